@@ -0,0 +1,46 @@
+"""add_users_created_at_id_index
+
+Revision ID: 3c9a51e0d2b4
+Revises: 7108734c05fc
+Create Date: 2026-10-18 13:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3c9a51e0d2b4"
+down_revision: Union[str, None] = "7108734c05fc"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keyset pagination orders by (created_at, id); NULLs would fall outside
+    # the cursor range, and schemas.User already requires created_at.
+    op.execute("UPDATE users SET created_at = now() WHERE created_at IS NULL")
+    op.alter_column(
+        "users",
+        "created_at",
+        existing_type=sa.DateTime(timezone=True),
+        existing_server_default=sa.text("now()"),
+        nullable=False,
+    )
+    op.create_index(
+        "ix_users_created_at_id", "users", ["created_at", "id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_users_created_at_id", table_name="users")
+    op.alter_column(
+        "users",
+        "created_at",
+        existing_type=sa.DateTime(timezone=True),
+        existing_server_default=sa.text("now()"),
+        nullable=True,
+    )
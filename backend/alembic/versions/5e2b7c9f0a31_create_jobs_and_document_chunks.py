@@ -0,0 +1,90 @@
+"""create_jobs_and_document_chunks
+
+Revision ID: 5e2b7c9f0a31
+Revises: a4f1c2d8e913
+Create Date: 2026-10-18 16:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5e2b7c9f0a31"
+down_revision: Union[str, None] = "a4f1c2d8e913"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(length=50), nullable=False),
+        sa.Column("document_id", sa.Integer(), nullable=True),
+        sa.Column("sha256", sa.String(length=64), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column(
+            "run_after",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.Column("locked_by", sa.String(length=255), nullable=True),
+        sa.Column("locked_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("pages", sa.Integer(), nullable=True),
+        sa.Column("chunks", sa.Integer(), nullable=True),
+        sa.Column("duration_seconds", sa.Float(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["document_id"], ["documents.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_jobs_id"), "jobs", ["id"], unique=False)
+    op.create_index(op.f("ix_jobs_sha256"), "jobs", ["sha256"], unique=False)
+    op.create_index(
+        "ix_jobs_status_run_after_id",
+        "jobs",
+        ["status", "run_after", "id"],
+        unique=False,
+    )
+
+    op.create_table(
+        "document_chunks",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("sha256", sa.String(length=64), nullable=False),
+        sa.Column("ordinal", sa.Integer(), nullable=False),
+        sa.Column("page_start", sa.Integer(), nullable=False),
+        sa.Column("page_end", sa.Integer(), nullable=False),
+        sa.Column("text", sa.Text(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "sha256", "ordinal", name="uq_document_chunks_sha256_ordinal"
+        ),
+    )
+    op.create_index(
+        op.f("ix_document_chunks_id"), "document_chunks", ["id"], unique=False
+    )
+    op.create_index(
+        op.f("ix_document_chunks_sha256"), "document_chunks", ["sha256"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_document_chunks_sha256"), table_name="document_chunks")
+    op.drop_index(op.f("ix_document_chunks_id"), table_name="document_chunks")
+    op.drop_table("document_chunks")
+    op.drop_index("ix_jobs_status_run_after_id", table_name="jobs")
+    op.drop_index(op.f("ix_jobs_sha256"), table_name="jobs")
+    op.drop_index(op.f("ix_jobs_id"), table_name="jobs")
+    op.drop_table("jobs")
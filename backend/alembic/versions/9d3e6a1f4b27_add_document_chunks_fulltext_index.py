@@ -0,0 +1,70 @@
+"""add_document_chunks_fulltext_index
+
+Revision ID: 9d3e6a1f4b27
+Revises: 5e2b7c9f0a31
+Create Date: 2026-10-18 17:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9d3e6a1f4b27"
+down_revision: Union[str, None] = "5e2b7c9f0a31"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == "sqlite":
+        # Local development: FTS5 external-content table kept in sync with
+        # document_chunks by triggers, then backfilled.
+        op.execute(
+            "CREATE VIRTUAL TABLE document_chunks_fts USING fts5("
+            "text, content='document_chunks', content_rowid='id', "
+            "tokenize='porter unicode61')"
+        )
+        op.execute(
+            "CREATE TRIGGER document_chunks_fts_ai AFTER INSERT ON document_chunks "
+            "BEGIN INSERT INTO document_chunks_fts(rowid, text) "
+            "VALUES (new.id, new.text); END"
+        )
+        op.execute(
+            "CREATE TRIGGER document_chunks_fts_ad AFTER DELETE ON document_chunks "
+            "BEGIN INSERT INTO document_chunks_fts(document_chunks_fts, rowid, text) "
+            "VALUES ('delete', old.id, old.text); END"
+        )
+        op.execute(
+            "CREATE TRIGGER document_chunks_fts_au AFTER UPDATE ON document_chunks "
+            "BEGIN INSERT INTO document_chunks_fts(document_chunks_fts, rowid, text) "
+            "VALUES ('delete', old.id, old.text); "
+            "INSERT INTO document_chunks_fts(rowid, text) "
+            "VALUES (new.id, new.text); END"
+        )
+        op.execute(
+            "INSERT INTO document_chunks_fts(document_chunks_fts) VALUES ('rebuild')"
+        )
+        return
+
+    # Generated column: always in sync, no trigger or application code needed.
+    op.execute(
+        "ALTER TABLE document_chunks ADD COLUMN text_tsv tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('english', text)) STORED"
+    )
+    op.execute(
+        "CREATE INDEX ix_document_chunks_text_tsv "
+        "ON document_chunks USING GIN (text_tsv)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "sqlite":
+        for trigger in ("ai", "ad", "au"):
+            op.execute(f"DROP TRIGGER IF EXISTS document_chunks_fts_{trigger}")
+        op.execute("DROP TABLE IF EXISTS document_chunks_fts")
+        return
+    op.execute("DROP INDEX IF EXISTS ix_document_chunks_text_tsv")
+    op.execute("ALTER TABLE document_chunks DROP COLUMN IF EXISTS text_tsv")
@@ -0,0 +1,52 @@
+"""create_documents_table
+
+Revision ID: a4f1c2d8e913
+Revises: 3c9a51e0d2b4
+Create Date: 2026-10-18 15:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a4f1c2d8e913"
+down_revision: Union[str, None] = "3c9a51e0d2b4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "documents",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("owner_id", sa.Integer(), nullable=False),
+        sa.Column("filename", sa.String(length=255), nullable=False),
+        sa.Column("content_type", sa.String(length=255), nullable=True),
+        sa.Column("sha256", sa.String(length=64), nullable=False),
+        sa.Column("size_bytes", sa.BigInteger(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["owner_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("owner_id", "sha256", name="uq_documents_owner_sha256"),
+    )
+    op.create_index(op.f("ix_documents_id"), "documents", ["id"], unique=False)
+    op.create_index(
+        op.f("ix_documents_owner_id"), "documents", ["owner_id"], unique=False
+    )
+    op.create_index(op.f("ix_documents_sha256"), "documents", ["sha256"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_documents_sha256"), table_name="documents")
+    op.drop_index(op.f("ix_documents_owner_id"), table_name="documents")
+    op.drop_index(op.f("ix_documents_id"), table_name="documents")
+    op.drop_table("documents")
@@ -0,0 +1,51 @@
+"""create_ai_responses_table
+
+Revision ID: b7c41e8d2f60
+Revises: 9d3e6a1f4b27
+Create Date: 2026-10-18 18:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b7c41e8d2f60"
+down_revision: Union[str, None] = "9d3e6a1f4b27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "ai_responses",
+        sa.Column("cache_key", sa.String(length=64), nullable=False),
+        sa.Column("model", sa.String(length=100), nullable=False),
+        sa.Column("template", sa.String(length=100), nullable=False),
+        sa.Column("template_version", sa.Integer(), nullable=False),
+        sa.Column("content_sha256", sa.String(length=64), nullable=False),
+        sa.Column("response", sa.Text(), nullable=False),
+        sa.Column("input_tokens", sa.Integer(), nullable=False),
+        sa.Column("output_tokens", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("cache_key"),
+    )
+    op.create_index(
+        op.f("ix_ai_responses_content_sha256"),
+        "ai_responses",
+        ["content_sha256"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_ai_responses_content_sha256"), table_name="ai_responses")
+    op.drop_table("ai_responses")
@@ -0,0 +1,64 @@
+"""create_papers_and_citations
+
+Revision ID: c2e8f4a7d190
+Revises: b7c41e8d2f60
+Create Date: 2026-10-18 19:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c2e8f4a7d190"
+down_revision: Union[str, None] = "b7c41e8d2f60"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "papers",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("key", sa.String(length=512), nullable=False),
+        sa.Column("doi", sa.String(length=255), nullable=True),
+        sa.Column("title", sa.String(length=500), nullable=True),
+        sa.Column("year", sa.Integer(), nullable=True),
+        sa.Column("document_sha256", sa.String(length=64), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("key"),
+    )
+    op.create_index(op.f("ix_papers_id"), "papers", ["id"], unique=False)
+    op.create_index(
+        op.f("ix_papers_document_sha256"), "papers", ["document_sha256"], unique=False
+    )
+    op.create_table(
+        "citations",
+        sa.Column("id", sa.BigInteger(), nullable=False),
+        sa.Column("citing_id", sa.Integer(), nullable=False),
+        sa.Column("cited_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["citing_id"], ["papers.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["cited_id"], ["papers.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("citing_id", "cited_id", name="uq_citations_citing_cited"),
+    )
+    op.create_index(
+        op.f("ix_citations_cited_id"), "citations", ["cited_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_citations_cited_id"), table_name="citations")
+    op.drop_table("citations")
+    op.drop_index(op.f("ix_papers_document_sha256"), table_name="papers")
+    op.drop_index(op.f("ix_papers_id"), table_name="papers")
+    op.drop_table("papers")
@@ -0,0 +1,62 @@
+"""create_minhash_tables
+
+Revision ID: d5a9b3c1e7f2
+Revises: c2e8f4a7d190
+Create Date: 2026-10-18 20:15:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d5a9b3c1e7f2"
+down_revision: Union[str, None] = "c2e8f4a7d190"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "document_signatures",
+        sa.Column("sha256", sa.String(length=64), nullable=False),
+        sa.Column("minhash", sa.LargeBinary(), nullable=False),
+        sa.Column("canonical_sha256", sa.String(length=64), nullable=True),
+        sa.Column("similarity", sa.Float(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("sha256"),
+    )
+    op.create_index(
+        op.f("ix_document_signatures_canonical_sha256"),
+        "document_signatures",
+        ["canonical_sha256"],
+        unique=False,
+    )
+    op.create_table(
+        "minhash_buckets",
+        sa.Column("band", sa.SmallInteger(), nullable=False),
+        sa.Column("bucket", sa.BigInteger(), nullable=False),
+        sa.Column("sha256", sa.String(length=64), nullable=False),
+        sa.PrimaryKeyConstraint("band", "bucket", "sha256"),
+    )
+    op.create_index(
+        op.f("ix_minhash_buckets_sha256"), "minhash_buckets", ["sha256"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_minhash_buckets_sha256"), table_name="minhash_buckets")
+    op.drop_table("minhash_buckets")
+    op.drop_index(
+        op.f("ix_document_signatures_canonical_sha256"),
+        table_name="document_signatures",
+    )
+    op.drop_table("document_signatures")
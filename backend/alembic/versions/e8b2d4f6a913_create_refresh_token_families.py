@@ -0,0 +1,54 @@
+"""create_refresh_token_families
+
+Revision ID: e8b2d4f6a913
+Revises: d5a9b3c1e7f2
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e8b2d4f6a913"
+down_revision: Union[str, None] = "d5a9b3c1e7f2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "refresh_token_families",
+        sa.Column("family_id", sa.String(length=32), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("generation", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("revoked_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("family_id"),
+    )
+    for column in ("user_id", "expires_at", "revoked_at"):
+        op.create_index(
+            op.f(f"ix_refresh_token_families_{column}"),
+            "refresh_token_families",
+            [column],
+            unique=False,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in ("revoked_at", "expires_at", "user_id"):
+        op.drop_index(
+            op.f(f"ix_refresh_token_families_{column}"),
+            table_name="refresh_token_families",
+        )
+    op.drop_table("refresh_token_families")
@@ -0,0 +1,48 @@
+"""add_last_login_and_audit_events
+
+Revision ID: f3a7c9e1b520
+Revises: e8b2d4f6a913
+Create Date: 2026-10-18 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f3a7c9e1b520"
+down_revision: Union[str, None] = "e8b2d4f6a913"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "users",
+        sa.Column("last_login_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_table(
+        "audit_events",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("actor_id", sa.Integer(), nullable=True),
+        sa.Column("action", sa.String(length=32), nullable=False),
+        sa.Column("detail", sa.String(length=255), nullable=True),
+        sa.Column("ip", sa.String(length=45), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    for column in ("id", "user_id", "action", "created_at"):
+        op.create_index(
+            op.f(f"ix_audit_events_{column}"), "audit_events", [column], unique=False
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in ("created_at", "action", "user_id", "id"):
+        op.drop_index(op.f(f"ix_audit_events_{column}"), table_name="audit_events")
+    op.drop_table("audit_events")
+    op.drop_column("users", "last_login_at")
@@ -1,15 +1,21 @@
-from typing import Generator
+from typing import AsyncGenerator, Awaitable, Callable, Generator, Literal, Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
 from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.crud import crud_user
-from app.db.models.user import User as UserModel  # User model from app.db.models.user
-from app.db.session import SessionLocal
+from app.core.rate_limit import get_rate_limiter, parse_rate
+from app.core.revocation import get_revoked_families
+from app.core.security import REFRESH_TOKEN_TYPE
+from app.core.token_cache import UserSnapshot, get_token_cache
+from app.crud import crud_user, crud_user_async
+from app.db import session
+from app.db.replicas import get_replica_router, pinned_by_cookie
+from app.db.session import get_async_db
 from app.schemas.token import TokenPayload
 
 reusable_oauth2 = OAuth2PasswordBearer(
@@ -20,28 +26,239 @@ reusable_oauth2 = OAuth2PasswordBearer(
 def get_db() -> Generator:
     """Dependency to get a database session."""
     try:
-        db = SessionLocal()
+        db = session.SessionLocal()
         yield db
     finally:
         db.close()
 
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
-) -> UserModel:
+def read_your_writes_key(request: Request) -> Optional[str]:
+    """The client a write is pinned to in this process: the bearer token's
+    user, or None for anonymous requests (they rely on the cookie)."""
+    token = request.headers.get("authorization", "")
+    if token.lower().startswith("bearer "):
+        return f"user:{_token_subject(token[7:])}"
+    return None
+
+
+def _reads_pinned(request: Request) -> bool:
+    if pinned_by_cookie(request):
+        return True
+    key = read_your_writes_key(request)
+    return key is not None and get_replica_router().is_pinned(key)
+
+
+def get_read_db(request: Request, primary: Session = Depends(get_db)) -> Generator:
+    """Dependency for read-only endpoints: a session on a read replica when
+    one is configured and usable, otherwise on the primary (see
+    app.db.replicas). Never write through it.
+
+    The primary session comes from `get_db`, so overriding that dependency
+    (tests, benchmarks) covers reads too. Sessions connect on first use: the
+    unused one costs no connection."""
+    router = get_replica_router()
+    replica = router.choose(pinned=bool(router.replicas) and _reads_pinned(request))
+    if replica is None:
+        yield primary
+        return
+    db = replica.session_factory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_read_db_async(
+    request: Request, primary: AsyncSession = Depends(get_async_db)
+) -> AsyncGenerator[AsyncSession, None]:
+    """Async variant of `get_read_db` used in DB_ASYNC_MODE."""
+    router = get_replica_router()
+    replica = router.choose(pinned=bool(router.replicas) and _reads_pinned(request))
+    if replica is None or replica.async_session_factory is None:
+        yield primary
+        return
+    async with replica.async_session_factory() as db:
+        yield db
+
+
+def decode_token(token: str) -> TokenPayload:
+    """Decode and validate a bearer token, raising 403 if it is not valid."""
+    # Imported on first use: python-jose pulls in the cryptography backends.
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
-        token_data = TokenPayload(**payload)
+        return TokenPayload(**payload)
     except (JWTError, ValidationError) as e:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=f"Could not validate credentials: {e}",
         )
+
+
+# The current-user dependencies return a UserSnapshot, not an ORM instance:
+# on a token-cache hit no DB query runs at all. Endpoints that need columns
+# outside the snapshot (e.g. hashed_password) must load the user themselves.
+
+
+def decode_access_token(token: str) -> TokenPayload:
+    token_data = decode_token(token)
+    if token_data.typ == REFRESH_TOKEN_TYPE:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Could not validate credentials: not an access token",
+        )
+    return token_data
+
+
+def decode_refresh_token(token: str) -> TokenPayload:
+    """Decode a refresh token, raising 401 if it is invalid or expired."""
+    try:
+        token_data = decode_token(token)
+    except HTTPException:
+        token_data = None
+    if (
+        token_data is None
+        or token_data.typ != REFRESH_TOKEN_TYPE
+        or not token_data.fam
+        or token_data.gen is None
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token"
+        )
+    return token_data
+
+
+def _session_revoked() -> HTTPException:
+    # Logged out, password changed, or refresh token replay detected.
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Session has been revoked",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def get_current_user(
+    db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
+) -> UserSnapshot:
+    cache = get_token_cache()
+    cached = cache.get(token)
+    token_data = cached[0] if cached is not None else decode_access_token(token)
+    if token_data.fam and get_revoked_families().is_revoked(token_data.fam):
+        raise _session_revoked()
+    if cached is not None:
+        return cached[1]
     user = crud_user.get_user_by_email(db, email=token_data.sub)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
-    return user
+    snapshot = UserSnapshot.from_model(user)
+    cache.put(token, token_data, snapshot)
+    return snapshot
+
+
+async def get_current_user_async(
+    db: AsyncSession = Depends(get_async_db), token: str = Depends(reusable_oauth2)
+) -> UserSnapshot:
+    """Async variant of `get_current_user` used in DB_ASYNC_MODE."""
+    cache = get_token_cache()
+    cached = cache.get(token)
+    token_data = cached[0] if cached is not None else decode_access_token(token)
+    if token_data.fam and await _is_revoked_async(token_data.fam):
+        raise _session_revoked()
+    if cached is not None:
+        return cached[1]
+    user = await crud_user_async.get_user_by_email(db, email=token_data.sub)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+        )
+    snapshot = UserSnapshot.from_model(user)
+    cache.put(token, token_data, snapshot)
+    return snapshot
+
+
+async def _is_revoked_async(family_id: str) -> bool:
+    # The filter answers from memory; only its periodic refresh and the rare
+    # positive go to the database, off the event loop.
+    revoked = get_revoked_families()
+    if revoked.stale:
+        await run_in_threadpool(revoked.refresh)
+    if not revoked.might_be_revoked(family_id):
+        return False
+    return await run_in_threadpool(revoked.confirm, family_id)
+
+
+def get_current_active_superuser(
+    current_user: UserSnapshot = Depends(get_current_user),
+) -> UserSnapshot:
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="The user doesn't have enough privileges",
+        )
+    return current_user
+
+
+def client_ip(request: Request) -> str:
+    if settings.RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            # Each trusted proxy appends the address it received the request
+            # from; anything to the left of those came from the client.
+            entries = [entry.strip() for entry in forwarded.split(",")]
+            hops = max(settings.RATE_LIMIT_TRUSTED_PROXIES, 1)
+            return entries[max(len(entries) - hops, 0)]
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit(
+    name: str, rate: str, *, per: Literal["ip", "user"] = "ip"
+) -> Callable[..., Awaitable[None]]:
+    """Dependency enforcing `rate` (e.g. "10/minute") per client IP or user.
+
+    Put it in the route's `dependencies=[...]`: those run before the
+    endpoint's own parameters, so a rejected request costs no session or
+    password hash (FastAPI has already read and parsed a form or JSON body by
+    then). Per-user limits read the user from the token (the token cache, or a
+    signature check) without touching the database; requests without a token
+    are limited by IP. An empty `rate` disables the limit.
+    """
+    parsed = parse_rate(rate)
+
+    async def dependency(request: Request) -> None:
+        if parsed is None:
+            return
+        key = f"ip:{client_ip(request)}"
+        if per == "user":
+            token = request.headers.get("authorization", "")
+            if token.lower().startswith("bearer "):
+                key = f"user:{_token_subject(token[7:])}"
+        result = get_rate_limiter().hit(name, key, parsed)
+        if not result.allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please retry later",
+                headers={
+                    "Retry-After": str(max(1, round(result.retry_after))),
+                    "X-RateLimit-Limit": str(parsed.limit),
+                    "X-RateLimit-Remaining": "0",
+                },
+            )
+
+    return dependency
+
+
+def _token_subject(token: str) -> str:
+    cached = get_token_cache().get(token)
+    if cached is not None:
+        return cached[0].sub or "invalid"
+    # An invalid token fails authentication right after; limiting it by its
+    # claimed subject is harmless.
+    try:
+        return decode_token(token).sub or "invalid"
+    except HTTPException:
+        return "invalid"
@@ -0,0 +1,20 @@
+"""Server-sent events helpers for streaming endpoints."""
+import json
+from typing import Any, AsyncIterator
+
+from fastapi.responses import StreamingResponse
+
+SSE_MEDIA_TYPE = "text/event-stream"
+# Disable proxy buffering (nginx) so each event reaches the client at once.
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+# A comment frame: keeps idle connections from being timed out by proxies.
+KEEPALIVE = ": keepalive\n\n"
+
+
+def format_event(event: str, data: Any) -> str:
+    """One SSE frame with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+def event_stream(body: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(body, media_type=SSE_MEDIA_TYPE, headers=SSE_HEADERS)
@@ -1,12 +1,40 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
-from app.api.v1.endpoints import health, login, users
+from app.api import deps
+from app.api.v1.endpoints import citations, documents, health, search, users_bulk
+from app.core.config import settings
 
 api_router = APIRouter()
 
 api_router.include_router(health.router, prefix="/meta", tags=["meta"])
+api_router.include_router(
+    health.stats_router,
+    prefix="/meta",
+    tags=["meta"],
+    dependencies=(
+        []
+        if settings.META_STATS_PUBLIC
+        else [Depends(deps.get_current_active_superuser)]
+    ),
+)
 # Add other endpoint routers here as they are created, e.g.:
 # from app.api.v1.endpoints import health, users, login, items
-api_router.include_router(users.router, prefix="/users", tags=["users"])
-api_router.include_router(login.router, tags=["login"])
+# Bulk routes first: /users/export must not be matched as /users/{user_id}.
+api_router.include_router(users_bulk.router, prefix="/users", tags=["users"])
+# Only the selected mode's modules are imported: building routes is a large
+# part of start-up time.
+if settings.DB_ASYNC_MODE:
+    from app.api.v1.endpoints import login_async, users_async
+
+    # Same routes, served by async handlers on the AsyncEngine.
+    api_router.include_router(users_async.router, prefix="/users", tags=["users"])
+    api_router.include_router(login_async.router, tags=["login"])
+else:
+    from app.api.v1.endpoints import login, users
+
+    api_router.include_router(users.router, prefix="/users", tags=["users"])
+    api_router.include_router(login.router, tags=["login"])
+api_router.include_router(documents.router, prefix="/documents", tags=["documents"])
+api_router.include_router(search.router, prefix="/search", tags=["search"])
+api_router.include_router(citations.router, prefix="/citations", tags=["citations"])
 # api_router.include_router(items.router, prefix="/items", tags=["items"])
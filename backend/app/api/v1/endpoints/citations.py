@@ -0,0 +1,133 @@
+from typing import List, Literal
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.api import deps
+from app.core.token_cache import UserSnapshot
+from app.crud import crud_citation
+from app.db.models.paper import Paper
+from app.services.citation_graph import get_citation_graph_store
+
+router = APIRouter()
+
+
+def _get_paper(db: Session, paper_id: int) -> Paper:
+    paper = crud_citation.get_paper(db, paper_id)
+    if paper is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Paper not found"
+        )
+    return paper
+
+
+def _scored(
+    db: Session, ids: np.ndarray, scores: np.ndarray
+) -> List[schemas.PaperScore]:
+    # Papers deleted since the graph snapshot was taken are skipped.
+    papers = crud_citation.get_papers(db, ids.tolist())
+    return [
+        schemas.PaperScore(paper=papers[paper_id], score=float(score))
+        for paper_id, score in zip(ids.tolist(), scores.tolist())
+        if paper_id in papers
+    ]
+
+
+@router.get("/papers/{paper_id}", response_model=schemas.PaperDetail)
+def read_paper(
+    paper_id: int,
+    db: Session = Depends(deps.get_read_db),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
+) -> schemas.PaperDetail:
+    """
+    Get a paper with its reference and citation counts.
+    """
+    paper = _get_paper(db, paper_id)
+    references, cited_by = get_citation_graph_store().get(db).degree(paper_id)
+    return schemas.PaperDetail(
+        **schemas.Paper.model_validate(paper).model_dump(),
+        references_count=references,
+        cited_by_count=cited_by,
+    )
+
+
+@router.get(
+    "/papers/{paper_id}/neighborhood", response_model=schemas.CitationNeighborhood
+)
+def read_neighborhood(
+    paper_id: int,
+    k: int = Query(2, ge=1, le=4),
+    direction: Literal["out", "in", "both"] = "both",
+    limit: int = Query(100, ge=1, le=5000),
+    db: Session = Depends(deps.get_read_db),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
+) -> schemas.CitationNeighborhood:
+    """
+    Papers within `k` citation hops, nearest first. `out` follows references,
+    `in` follows citing papers, `both` ignores edge direction.
+    """
+    _get_paper(db, paper_id)
+    graph = get_citation_graph_store().get(db)
+    ids, distances = graph.k_hop(paper_id, k, direction=direction, limit=limit)
+    papers = crud_citation.get_papers(db, ids.tolist())
+    return schemas.CitationNeighborhood(
+        paper_id=paper_id,
+        k=k,
+        direction=direction,
+        papers=[
+            schemas.PaperNeighbor(paper=papers[i], distance=d)
+            for i, d in zip(ids.tolist(), distances.tolist())
+            if i in papers
+        ],
+    )
+
+
+@router.get("/papers/{paper_id}/co-citations", response_model=schemas.PaperScores)
+def read_co_citations(
+    paper_id: int,
+    limit: int = Query(20, ge=1, le=500),
+    db: Session = Depends(deps.get_read_db),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
+) -> schemas.PaperScores:
+    """
+    Papers most often cited together with this one; the score is the number
+    of papers citing both.
+    """
+    _get_paper(db, paper_id)
+    ids, counts = get_citation_graph_store().get(db).co_citation(paper_id, limit)
+    return schemas.PaperScores(
+        paper_id=paper_id, measure="co_citation", papers=_scored(db, ids, counts)
+    )
+
+
+@router.get("/papers/{paper_id}/coupling", response_model=schemas.PaperScores)
+def read_coupling(
+    paper_id: int,
+    limit: int = Query(20, ge=1, le=500),
+    db: Session = Depends(deps.get_read_db),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
+) -> schemas.PaperScores:
+    """
+    Papers with the strongest bibliographic coupling to this one; the score is
+    the number of references they share.
+    """
+    _get_paper(db, paper_id)
+    ids, counts = get_citation_graph_store().get(db).coupling(paper_id, limit)
+    return schemas.PaperScores(
+        paper_id=paper_id, measure="coupling", papers=_scored(db, ids, counts)
+    )
+
+
+@router.get("/pagerank", response_model=schemas.PaperScores)
+def read_pagerank(
+    limit: int = Query(50, ge=1, le=1000),
+    db: Session = Depends(deps.get_read_db),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
+) -> schemas.PaperScores:
+    """
+    The most influential papers in the citation graph by PageRank.
+    """
+    ids, ranks = get_citation_graph_store().get(db).top_pagerank(limit)
+    return schemas.PaperScores(measure="pagerank", papers=_scored(db, ids, ranks))
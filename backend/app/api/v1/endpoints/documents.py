@@ -0,0 +1,500 @@
+import asyncio
+import logging
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.api import deps
+from app.api.sse import KEEPALIVE, event_stream, format_event
+from app.core.config import settings
+from app.core.token_cache import UserSnapshot
+from app.crud import crud_citation, crud_document, crud_job, crud_signature
+from app.db import models, session
+from app.db.models.job import JOB_FAILED, JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED
+from app.db.session import get_db
+from app.services import job_events, minhash
+from app.services.ai_cache import get_ai_cache
+from app.services.ai_client import get_ai_client
+from app.services.ai_provider import ProviderError
+from app.services.results import ResultsNotFound, UnknownField, get_result_store
+from app.services.storage import UploadTooLarge, get_content_store
+from app.services.summarize import ChunkText, summarize_chunks
+from app.services.uploads import receive_file
+from app.services.vector_index import get_vector_index, group_key
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+PDF_MAGIC = b"%PDF-"
+# Multipart framing (boundaries, part headers) on top of the file itself.
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+def _clean_filename(filename: str) -> str:
+    name = os.path.basename(filename.replace("\\", "/")).strip()
+    return name[:255] or "document.pdf"
+
+
+def _get_owned_document(
+    db: Session, document_id: int, current_user: UserSnapshot
+) -> models.Document:
+    document = crud_document.get_document(db, document_id)
+    # 404 rather than 403 so document ids of other users are not disclosed.
+    if document is None or (
+        document.owner_id != current_user.id and not current_user.is_superuser
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Document not found"
+        )
+    return document
+
+
+def _create_document(**fields) -> models.Document:
+    with session.SessionLocal() as db:
+        try:
+            document = crud_document.create_document(
+                db, file_exists=get_content_store().exists, **fields
+            )
+        except crud_document.FileRemoved:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="The file was removed while uploading; upload it again",
+            )
+        crud_job.enqueue_extraction(db, document)
+        db.refresh(document)
+        return document
+
+
+def _delete_file(sha256: str) -> None:
+    """Remove what is kept per file outside the database."""
+    get_content_store().delete(sha256)
+    get_vector_index().delete_groups([group_key(sha256)])
+    get_result_store().delete(sha256)
+
+
+@router.post(
+    "/",
+    response_model=schemas.Document,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[
+        Depends(deps.rate_limit("upload", settings.RATE_LIMIT_UPLOAD, per="user"))
+    ],
+)
+async def upload_document(
+    request: Request,
+    current_user: UserSnapshot = Depends(deps.get_current_user),
+) -> models.Document:
+    """
+    Upload a PDF as the `file` field of a multipart/form-data body.
+
+    The body is streamed to disk and hashed on the way in, so memory use does
+    not depend on the file size. Files are stored once per SHA-256; uploading
+    a file you already have returns the existing document. Text extraction is
+    queued for the background worker; poll `GET /documents/{id}/job`.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit():
+        if int(content_length) > settings.UPLOAD_MAX_BYTES + MULTIPART_OVERHEAD_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Upload exceeds the {settings.UPLOAD_MAX_BYTES} byte limit",
+            )
+
+    writer = get_content_store().open_writer()
+    try:
+        receiver = await receive_file(request, writer)
+        if not writer.head.startswith(PDF_MAGIC):
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Only PDF documents are supported",
+            )
+    except UploadTooLarge as e:
+        writer.abort()
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e)
+        )
+    except BaseException:
+        writer.abort()
+        raise
+    sha256, size_bytes = await run_in_threadpool(writer.commit)
+
+    return await run_in_threadpool(
+        _create_document,
+        owner_id=current_user.id,
+        filename=_clean_filename(receiver.filename or ""),
+        content_type=receiver.content_type or "application/pdf",
+        sha256=sha256,
+        size_bytes=size_bytes,
+    )
+
+
+@router.get("/", response_model=List[schemas.Document])
+def read_documents(
+    db: Session = Depends(deps.get_read_db),
+    skip: int = 0,
+    limit: int = 100,
+    current_user: UserSnapshot = Depends(deps.get_current_user),
+) -> List[models.Document]:
+    """
+    List the current user's documents.
+    """
+    return crud_document.get_documents_by_owner(
+        db, owner_id=current_user.id, skip=skip, limit=limit
+    )
+
+
+@router.get("/{document_id}", response_model=schemas.Document)
+def read_document(
+    document_id: int,
+    db: Session = Depends(deps.get_read_db),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
+) -> models.Document:
+    """
+    Get a document's metadata.
+    """
+    return _get_owned_document(db, document_id, current_user)
+
+
+@router.get("/{document_id}/job", response_model=schemas.Job)
+def read_document_job(
+    document_id: int,
+    db: Session = Depends(get_db),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
+) -> models.Job:
+    """
+    Get the status of the document's text extraction job.
+    """
+    document = _get_owned_document(db, document_id, current_user)
+    job = crud_job.get_latest_job_for_sha(db, document.sha256)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="No job for this document"
+        )
+    return job
+
+
+# The stage a job is in as seen from the database, for the first event of
+# a stream; "indexing" is only ever reported by the worker.
+_JOB_STAGES = {
+    JOB_QUEUED: job_events.STAGE_QUEUED,
+    JOB_RUNNING: job_events.STAGE_EXTRACTING,
+    JOB_SUCCEEDED: job_events.STAGE_DONE,
+    JOB_FAILED: job_events.STAGE_DONE,
+}
+
+
+def _get_job_snapshot(document_id: int, current_user: UserSnapshot) -> Dict[str, Any]:
+    with session.SessionLocal() as db:
+        document = _get_owned_document(db, document_id, current_user)
+        job = crud_job.get_latest_job_for_sha(db, document.sha256)
+        if job is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="No job for this document"
+            )
+        return job_events.job_event(
+            job_id=job.id,
+            sha256=job.sha256,
+            status=job.status,
+            stage=_JOB_STAGES[job.status],
+            attempts=job.attempts,
+            pages=job.pages,
+            chunks=job.chunks,
+            error=job.error,
+        )
+
+
+@router.get("/{document_id}/job/events")
+async def stream_document_job(
+    document_id: int,
+    current_user: UserSnapshot = Depends(deps.get_current_user),
+):
+    """
+    Push the progress of the document's extraction job as server-sent events,
+    instead of polling /job.
+
+    Sends a `job` event with the current state, then one per change; `stage`
+    is `queued`, `extracting`, `indexing` or `done`. The stream ends after
+    the `done` event; a client that reconnects gets the current state again.
+    """
+    snapshot = await run_in_threadpool(_get_job_snapshot, document_id, current_user)
+    # Subscribe before re-reading the state, so no event falls in between.
+    subscription = job_events.get_job_event_hub().subscribe(snapshot["sha256"])
+    try:
+        snapshot = await run_in_threadpool(_get_job_snapshot, document_id, current_user)
+    except BaseException:
+        subscription.close()
+        raise
+
+    async def body() -> AsyncIterator[str]:
+        with subscription:
+            event = snapshot
+            yield format_event("job", event)
+            while event["stage"] != job_events.STAGE_DONE:
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.get(), settings.JOB_EVENTS_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield KEEPALIVE
+                    continue
+                if event is job_events.RESYNC:
+                    event = await run_in_threadpool(
+                        _get_job_snapshot, document_id, current_user
+                    )
+                yield format_event("job", event)
+
+    return event_stream(body())
+
+
+@router.get("/{document_id}/references", response_model=schemas.DocumentReferences)
+def read_document_references(
+    document_id: int,
+    db: Session = Depends(get_db),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
+) -> schemas.DocumentReferences:
+    """
+    The document's paper in the citation graph and the works it cites, in
+    bibliography order. 404 until text extraction has finished.
+    """
+    document = _get_owned_document(db, document_id, current_user)
+    paper = crud_citation.get_paper_for_sha(db, document.sha256)
+    if paper is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No references extracted for this document yet",
+        )
+    return schemas.DocumentReferences(
+        paper=paper, references=crud_citation.get_references(db, paper.id)
+    )
+
+
+@router.get("/{document_id}/near-duplicates", response_model=schemas.NearDuplicates)
+def read_near_duplicates(
+    document_id: int,
+    db: Session = Depends(get_db),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
+) -> schemas.NearDuplicates:
+    """
+    The current user's other documents whose text is nearly the same as this
+    one's (e.g. a preprint and its published version), most similar first.
+    404 until text extraction has finished, or if the file has no text layer.
+    """
+    document = _get_owned_document(db, document_id, current_user)
+    signature = crud_signature.get_signature(db, document.sha256)
+    if signature is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No signature computed for this document yet",
+        )
+    matches = crud_signature.find_similar(
+        db,
+        minhash.from_bytes(signature.minhash),
+        threshold=settings.NEAR_DUPLICATE_THRESHOLD,
+        exclude_sha256=document.sha256,
+        shas=crud_document.get_owner_shas(db, owner_id=current_user.id),
+    )
+    duplicates = []
+    for sha256, similarity in matches:
+        duplicate = crud_document.get_document_by_owner_sha(
+            db, owner_id=current_user.id, sha256=sha256
+        )
+        if duplicate is not None:
+            duplicates.append(
+                schemas.NearDuplicate(document=duplicate, similarity=similarity)
+            )
+    return schemas.NearDuplicates(
+        analysis_shared=signature.canonical_sha256 is not None,
+        duplicates=duplicates,
+    )
+
+
+def _get_summary_chunks(
+    document_id: int, current_user: UserSnapshot
+) -> Tuple[str, List[ChunkText]]:
+    with session.SessionLocal() as db:
+        document = _get_owned_document(db, document_id, current_user)
+        job = crud_job.get_latest_job_for_sha(db, document.sha256)
+        if job is None or job.status != JOB_SUCCEEDED:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Text extraction has not finished for this document",
+            )
+        # Always the document's own chunks: passages it shares with a
+        # near-duplicate still hit the passage summary cache, which is keyed
+        # by passage text, while the passages that differ are summarized anew.
+        chunks = [
+            ChunkText(*row) for row in crud_document.get_chunks(db, document.sha256)
+        ]
+        return document.sha256, chunks
+
+
+def _store_summary(
+    sha256: str, partials: Dict[int, str], chunks: List[ChunkText], summary: str
+) -> None:
+    """Keep a finished summary in the results store, with the passage
+    summaries as a chunk column when they line up with the stored chunks."""
+    store = get_result_store()
+    try:
+        store.write(
+            sha256,
+            columns={"chunk_summary": [partials[chunk.ordinal] for chunk in chunks]},
+            document={"summary": summary},
+        )
+    except ValueError:
+        # The stored bundle was chunked differently (or is missing).
+        store.write(sha256, document={"summary": summary})
+
+
+@router.get(
+    "/{document_id}/summary",
+    dependencies=[
+        Depends(deps.rate_limit("summary", settings.RATE_LIMIT_SUMMARY, per="user"))
+    ],
+)
+async def summarize_document(
+    document_id: int,
+    current_user: UserSnapshot = Depends(deps.get_current_user),
+):
+    """
+    Summarize a document, streamed as server-sent events.
+
+    Emits a `chunk` event per passage summary as it completes, a `reduce`
+    event per combining level, then `summary` with the final text (or `error`).
+    Passage summaries are cached by passage text, so a new version of a paper
+    only recomputes the passages that changed.
+    """
+    sha256, chunks = await run_in_threadpool(
+        _get_summary_chunks, document_id, current_user
+    )
+
+    async def body() -> AsyncIterator[str]:
+        partials: Dict[int, str] = {}
+        events = summarize_chunks(
+            chunks,
+            model=settings.AI_MODEL,
+            cache=get_ai_cache(),
+            provider=get_ai_client(),
+        )
+        try:
+            async for event in events:
+                if event.event == "chunk":
+                    partials[event.data["ordinal"]] = event.data["summary"]
+                elif event.event == "summary":
+                    try:
+                        await run_in_threadpool(
+                            _store_summary,
+                            sha256,
+                            partials,
+                            chunks,
+                            event.data["summary"],
+                        )
+                    except Exception:
+                        logger.exception(
+                            "Storing the summary of document %s failed", document_id
+                        )
+                yield format_event(event.event, event.data)
+        except ProviderError as e:
+            logger.warning("Summary of document %s failed: %s", document_id, e)
+            yield format_event("error", {"detail": str(e)})
+        finally:
+            # Cancels outstanding model calls if the client went away.
+            await events.aclose()
+
+    return event_stream(body())
+
+
+@router.get("/{document_id}/results", response_model=schemas.DocumentResults)
+def read_document_results(
+    document_id: int,
+    fields: Optional[str] = Query(
+        None, description="Comma-separated fields; default all but embedding"
+    ),
+    chunk_start: int = Query(0, ge=0),
+    chunk_end: Optional[int] = Query(None, ge=0),
+    db: Session = Depends(deps.get_read_db),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
+) -> schemas.DocumentResults:
+    """
+    Stored analysis results of a document, in parts.
+
+    `fields` picks document-level fields (e.g. `summary`) and chunk-level ones
+    (`text`, `page_start`, `page_end`, `chunk_summary`, `embedding`, ...).
+    Chunk fields are returned column-wise for chunks [`chunk_start`,
+    `chunk_end`), at most RESULTS_MAX_CHUNKS_PER_REQUEST per call. Only those
+    rows of those fields are read from disk.
+    """
+    if chunk_end is not None and chunk_end < chunk_start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="chunk_end must not be less than chunk_start",
+        )
+    document = _get_owned_document(db, document_id, current_user)
+    selected = (
+        [field.strip() for field in fields.split(",") if field.strip()]
+        if fields
+        else None
+    )
+    stop = chunk_start + settings.RESULTS_MAX_CHUNKS_PER_REQUEST
+    if chunk_end is not None:
+        stop = min(stop, chunk_end)
+    try:
+        bundle, document_fields, chunk_fields = get_result_store().read(
+            document.sha256, selected, chunk_start, stop
+        )
+    except ResultsNotFound:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No analysis results stored for this document yet",
+        )
+    except UnknownField as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    start = min(chunk_start, bundle.chunk_count)
+    return schemas.DocumentResults(
+        document_id=document.id,
+        analysis_sha256=document.sha256,
+        chunk_count=bundle.chunk_count,
+        available_fields=bundle.fields,
+        document=document_fields,
+        chunk_start=start,
+        chunk_end=max(start, min(stop, bundle.chunk_count)),
+        chunks=chunk_fields,
+    )
+
+
+@router.get("/{document_id}/content")
+def download_document(
+    document_id: int,
+    db: Session = Depends(get_db),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
+) -> FileResponse:
+    """
+    Download the stored file.
+    """
+    document = _get_owned_document(db, document_id, current_user)
+    return FileResponse(
+        get_content_store().path_for(document.sha256),
+        media_type=document.content_type or "application/pdf",
+        filename=document.filename,
+    )
+
+
+@router.delete("/{document_id}", response_model=schemas.Document)
+def delete_document(
+    document_id: int,
+    db: Session = Depends(get_db),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
+) -> schemas.Document:
+    """
+    Delete a document. The file, its chunks and its search index entries are
+    removed once no document refers to it.
+    """
+    document = _get_owned_document(db, document_id, current_user)
+    deleted = schemas.Document.model_validate(document)
+    crud_document.delete_document(db, document, on_last=_delete_file)
+    return deleted
@@ -1,7 +1,31 @@
-from fastapi import APIRouter
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.hashing import get_hashing_executor
+from app.core.rate_limit import get_rate_limiter
+from app.core.revocation import get_revoked_families
+from app.core.token_cache import get_token_cache
+from app.crud import crud_job
+from app.db import session
+from app.db.replicas import get_replica_router
+from app.services.activity import get_activity_buffer
+from app.services.ai_cache import get_ai_cache
+from app.services.ai_client import get_ai_client
+from app.services.citation_graph import get_citation_graph_store
+from app.services.job_events import get_job_event_hub
+from app.services.results import get_result_store
+from app.services.vector_index import get_vector_index
 
 router = APIRouter()
+# Service internals (load, cache contents, user counts). api.py mounts these
+# behind a superuser check unless META_STATS_PUBLIC is set.
+stats_router = APIRouter()
 
 
 class HealthCheck(BaseModel):
@@ -14,3 +38,147 @@ def read_health():
     Health check endpoint.
     """
     return HealthCheck(status="OK")
+
+
+@stats_router.get("/hashing", response_model=Dict[str, Any])
+def read_hashing_stats():
+    """
+    Password hashing executor stats: queue depth, rejections and latency.
+    """
+    return get_hashing_executor().stats()
+
+
+@stats_router.get("/token-cache", response_model=Dict[str, Any])
+def read_token_cache_stats():
+    """
+    Verified-token cache stats: size, hit/miss and eviction counters.
+    """
+    return get_token_cache().stats()
+
+
+@stats_router.get("/rate-limit", response_model=Dict[str, Any])
+def read_rate_limit_stats():
+    """
+    Rate limiter stats: allowed and rejected requests per limit, tracked keys.
+    """
+    return get_rate_limiter().stats()
+
+
+@stats_router.get("/revocation", response_model=Dict[str, Any])
+def read_revocation_stats():
+    """
+    Revoked-session filter stats: size, checks answered from memory, false
+    positives.
+    """
+    return get_revoked_families().stats()
+
+
+@stats_router.get("/db-pool", response_model=Dict[str, Any])
+def read_db_pool_stats():
+    """
+    Connection pool stats per engine: checkout wait time, in-use and overflow.
+    """
+    pools = {"primary": session.pool_metrics.snapshot()}
+    if session.async_engine is not None:
+        pools["primary_async"] = session.async_pool_metrics.snapshot()
+    return pools
+
+
+@stats_router.get("/jobs", response_model=Dict[str, Any])
+def read_job_stats(db: Session = Depends(session.get_db)):
+    """
+    Background job queue depth and extraction throughput (pages/sec) across
+    all workers.
+    """
+    return crud_job.queue_stats(db)
+
+
+@stats_router.get("/vector-index", response_model=Dict[str, Any])
+def read_vector_index_stats():
+    """
+    Vector index stats: rows, tombstones, IVF training state and searches.
+    """
+    return get_vector_index().stats()
+
+
+@stats_router.get("/ai-cache", response_model=Dict[str, Any])
+def read_ai_cache_stats():
+    """
+    AI response cache stats: memory/database hits, coalesced calls, hit rate.
+    """
+    return get_ai_cache().stats()
+
+
+@stats_router.get("/ai-client", response_model=Dict[str, Any])
+def read_ai_client_stats():
+    """
+    AI client stats: upstream calls, batching, current rate, throttling, retries.
+    """
+    return get_ai_client().stats()
+
+
+@stats_router.get("/citation-graph", response_model=Dict[str, Any])
+def read_citation_graph_stats():
+    """
+    Citation graph snapshot: nodes, edges, memory, full vs incremental builds.
+    """
+    return get_citation_graph_store().stats()
+
+
+@stats_router.get("/job-events", response_model=Dict[str, Any])
+def read_job_event_stats():
+    """
+    Job progress push channel: subscribers, events delivered and dropped.
+    """
+    return get_job_event_hub().stats()
+
+
+@stats_router.get("/results", response_model=Dict[str, Any])
+def read_result_store_stats():
+    """
+    Analysis results store: open (memory-mapped) bundles, reads and writes.
+    """
+    return get_result_store().stats()
+
+
+@stats_router.get("/activity", response_model=Dict[str, Any])
+def read_activity_stats():
+    """
+    Activity/audit write-behind buffer: pending, flushed, batch sizes, drops.
+    """
+    return get_activity_buffer().stats()
+
+
+@stats_router.get("/replicas", response_model=Dict[str, Any])
+def read_replica_stats():
+    """
+    Read replicas: health, lag, reads per replica vs the primary, pins.
+    """
+    return get_replica_router().stats()
+
+
+@stats_router.get("/metrics", response_class=PlainTextResponse)
+def read_metrics():
+    """
+    Request, SQL and subsystem metrics in Prometheus text format.
+    """
+    body = metrics.registry.render()
+    body += metrics.render_stats("hashing", get_hashing_executor().stats())
+    body += metrics.render_stats("token_cache", get_token_cache().stats())
+    body += metrics.render_stats("rate_limit", get_rate_limiter().stats())
+    body += metrics.render_stats("revocation", get_revoked_families().stats())
+    body += metrics.render_stats("vector_index", get_vector_index().stats())
+    body += metrics.render_stats("ai_cache", get_ai_cache().stats())
+    body += metrics.render_stats("ai_client", get_ai_client().stats())
+    body += metrics.render_stats("citation_graph", get_citation_graph_store().stats())
+    body += metrics.render_stats("job_events", get_job_event_hub().stats())
+    body += metrics.render_stats("activity", get_activity_buffer().stats())
+    body += metrics.render_stats("results", get_result_store().stats())
+    body += metrics.render_stats("db_pool", session.pool_metrics.snapshot())
+    if session.async_engine is not None:
+        body += metrics.render_stats(
+            "db_pool_async", session.async_pool_metrics.snapshot()
+        )
+    if settings.DATABASE_REPLICA_URLS:
+        body += metrics.render_stats("db_replicas", get_replica_router().stats())
+    return PlainTextResponse(body, media_type=metrics.PROMETHEUS_CONTENT_TYPE)
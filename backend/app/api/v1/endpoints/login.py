@@ -1,4 +1,3 @@
-from datetime import timedelta
 from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException, status
@@ -9,12 +8,19 @@ from app import crud
 from app.api import deps
 from app.core import security
 from app.core.config import settings
-from app.schemas.token import Token
+from app.core.revocation import get_revoked_families
+from app.crud import crud_refresh_token
+from app.schemas.token import RefreshTokenRequest, Token
+from app.services.activity import get_activity_buffer
 
 router = APIRouter()
 
 
-@router.post("/login/access-token", response_model=Token)
+@router.post(
+    "/login/access-token",
+    response_model=Token,
+    dependencies=[Depends(deps.rate_limit("login", settings.RATE_LIMIT_LOGIN))],
+)
 def login_access_token(
     db: Session = Depends(deps.get_db),
     form_data: OAuth2PasswordRequestForm = Depends(),
@@ -37,12 +43,68 @@ def login_access_token(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user"
         )
 
-    access_token_expires = timedelta(
-        minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
-    )  # This needs settings import
-    return {
-        "access_token": security.create_access_token(
-            data={"sub": user.email}, expires_delta=access_token_expires
-        ),
-        "token_type": "bearer",
-    }
+    family_id = crud_refresh_token.create_family(
+        db,
+        user_id=user.id,
+        expires_at=crud_refresh_token.family_expiry(settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+    # Written behind the request, batched with other logins.
+    get_activity_buffer().record_login(user.id)
+    return security.create_session_tokens(
+        subject=user.email, family_id=family_id, generation=0
+    )
+
+
+@router.post(
+    "/login/refresh-token",
+    response_model=Token,
+    dependencies=[Depends(deps.rate_limit("refresh", settings.RATE_LIMIT_REFRESH))],
+)
+def refresh_access_token(
+    body: RefreshTokenRequest, db: Session = Depends(deps.get_db)
+) -> Any:
+    """
+    Exchange a refresh token for a new access token and a new refresh token.
+
+    Each refresh token can be used once. Presenting one that was already
+    exchanged means it was copied, so the whole session is revoked and both
+    holders have to log in again.
+    """
+    token_data = deps.decode_refresh_token(body.refresh_token)
+    revoked = get_revoked_families()
+    if revoked.is_revoked(token_data.fam):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Session has been revoked"
+        )
+    user = crud.crud_user.get_user_by_email(db, email=token_data.sub)
+    if not user or not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token"
+        )
+    generation = crud_refresh_token.rotate(
+        db,
+        family_id=token_data.fam,
+        generation=token_data.gen,
+        expires_at=crud_refresh_token.family_expiry(settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+    if generation is None:
+        crud_refresh_token.revoke_family(db, token_data.fam)
+        revoked.add([token_data.fam])
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token already used; session revoked",
+        )
+    return security.create_session_tokens(
+        subject=user.email, family_id=token_data.fam, generation=generation
+    )
+
+
+@router.post("/login/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(body: RefreshTokenRequest, db: Session = Depends(deps.get_db)) -> None:
+    """
+    End the session of a refresh token: it and every access token issued
+    from it stop working.
+    """
+    token_data = deps.decode_refresh_token(body.refresh_token)
+    crud_refresh_token.revoke_family(db, token_data.fam)
+    get_revoked_families().add([token_data.fam])
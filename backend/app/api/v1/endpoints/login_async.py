@@ -0,0 +1,115 @@
+# Async twin of login.py, mounted instead of it when settings.DB_ASYNC_MODE is on.
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api import deps
+from app.core import security
+from app.core.config import settings
+from app.core.revocation import get_revoked_families
+from app.crud import crud_refresh_token_async, crud_user_async
+from app.crud.crud_refresh_token import family_expiry
+from app.db.session import get_async_db
+from app.schemas.token import RefreshTokenRequest, Token
+from app.services.activity import get_activity_buffer
+
+router = APIRouter()
+
+
+@router.post(
+    "/login/access-token",
+    response_model=Token,
+    dependencies=[Depends(deps.rate_limit("login", settings.RATE_LIMIT_LOGIN))],
+)
+async def login_access_token(
+    db: AsyncSession = Depends(get_async_db),
+    form_data: OAuth2PasswordRequestForm = Depends(),
+) -> Any:
+    """
+    OAuth2 compatible token login, get an access token for future requests.
+    """
+    user = await crud_user_async.authenticate(
+        db,
+        email=form_data.username,  # OAuth2 uses 'username' for the first field
+        password=form_data.password,
+    )
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Incorrect email or password",
+        )
+    elif not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user"
+        )
+
+    family_id = await crud_refresh_token_async.create_family(
+        db,
+        user_id=user.id,
+        expires_at=family_expiry(settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+    # Written behind the request, batched with other logins.
+    await get_activity_buffer().record_login_async(user.id)
+    return security.create_session_tokens(
+        subject=user.email, family_id=family_id, generation=0
+    )
+
+
+@router.post(
+    "/login/refresh-token",
+    response_model=Token,
+    dependencies=[Depends(deps.rate_limit("refresh", settings.RATE_LIMIT_REFRESH))],
+)
+async def refresh_access_token(
+    body: RefreshTokenRequest, db: AsyncSession = Depends(get_async_db)
+) -> Any:
+    """
+    Exchange a refresh token for a new access token and a new refresh token.
+
+    Each refresh token can be used once. Presenting one that was already
+    exchanged means it was copied, so the whole session is revoked and both
+    holders have to log in again.
+    """
+    token_data = deps.decode_refresh_token(body.refresh_token)
+    revoked = get_revoked_families()
+    if await run_in_threadpool(revoked.is_revoked, token_data.fam):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Session has been revoked"
+        )
+    user = await crud_user_async.get_user_by_email(db, email=token_data.sub)
+    if not user or not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token"
+        )
+    generation = await crud_refresh_token_async.rotate(
+        db,
+        family_id=token_data.fam,
+        generation=token_data.gen,
+        expires_at=family_expiry(settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+    if generation is None:
+        await crud_refresh_token_async.revoke_family(db, token_data.fam)
+        revoked.add([token_data.fam])
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token already used; session revoked",
+        )
+    return security.create_session_tokens(
+        subject=user.email, family_id=token_data.fam, generation=generation
+    )
+
+
+@router.post("/login/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    body: RefreshTokenRequest, db: AsyncSession = Depends(get_async_db)
+) -> None:
+    """
+    End the session of a refresh token: it and every access token issued
+    from it stop working.
+    """
+    token_data = deps.decode_refresh_token(body.refresh_token)
+    await crud_refresh_token_async.revoke_family(db, token_data.fam)
+    get_revoked_families().add([token_data.fam])
@@ -0,0 +1,89 @@
+from typing import Dict, List, Literal, Tuple
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.api import deps
+from app.core.config import settings
+from app.core.token_cache import UserSnapshot
+from app.crud import crud_document
+from app.services.embeddings import get_embedder
+from app.services.ranking import reciprocal_rank_fusion
+from app.services.vector_index import get_vector_index, group_key
+
+router = APIRouter()
+
+# In hybrid mode each retriever contributes this many times k candidates, so
+# passages ranked moderately by both can still make the fused top k.
+HYBRID_CANDIDATES_FACTOR = 4
+
+
+def _semantic_hits(q: str, shas: List[str], limit: int) -> List[Tuple[int, float]]:
+    (hits,) = get_vector_index().search(
+        get_embedder().embed([q]), limit, groups=[group_key(sha) for sha in shas]
+    )
+    return hits
+
+
+@router.get(
+    "/",
+    response_model=schemas.SearchResults,
+    dependencies=[
+        Depends(deps.rate_limit("search", settings.RATE_LIMIT_SEARCH, per="user"))
+    ],
+)
+def search(
+    q: str = Query(..., min_length=1, max_length=1000),
+    k: int = Query(10, ge=1, le=100),
+    mode: Literal["hybrid", "semantic", "keyword"] = "hybrid",
+    db: Session = Depends(deps.get_read_db),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
+) -> schemas.SearchResults:
+    """
+    Search the passages of the current user's documents.
+
+    `semantic` matches by embedding similarity, `keyword` by full-text search
+    (exact terms such as author names or gene symbols), and `hybrid` runs both
+    and merges them with reciprocal rank fusion.
+    """
+    shas = crud_document.get_owner_shas(db, owner_id=current_user.id)
+    if not shas:
+        return schemas.SearchResults(query=q, mode=mode, hits=[])
+
+    limit = k * HYBRID_CANDIDATES_FACTOR if mode == "hybrid" else k
+    semantic: Dict[int, float] = {}
+    keyword: Dict[int, float] = {}
+    if mode != "keyword":
+        semantic = dict(_semantic_hits(q, shas, limit))
+    if mode != "semantic":
+        keyword = dict(
+            crud_document.keyword_search(db, query=q, shas=shas, limit=limit)
+        )
+
+    if mode == "hybrid":
+        ranked = reciprocal_rank_fusion(list(keyword), list(semantic))[:k]
+    else:
+        ranked = list((semantic or keyword).items())
+    scores = dict(ranked)
+
+    rows = crud_document.get_chunks_for_owner(
+        db, owner_id=current_user.id, chunk_ids=list(scores)
+    )
+    hits = [
+        schemas.SearchHit(
+            document_id=row.document_id,
+            filename=row.filename,
+            chunk_id=row.id,
+            ordinal=row.ordinal,
+            page_start=row.page_start,
+            page_end=row.page_end,
+            score=scores[row.id],
+            semantic_score=semantic.get(row.id),
+            keyword_score=keyword.get(row.id),
+            text=row.text,
+        )
+        for row in rows
+    ]
+    hits.sort(key=lambda hit: hit.score, reverse=True)
+    return schemas.SearchResults(query=q, mode=mode, hits=hits)
@@ -1,18 +1,33 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
 
 from app import crud, schemas  # Updated to import top-level crud and schemas
 from app.api import deps  # Added import for deps
+from app.api.responses import rows_response
 from app.core import security  # For password verification
+from app.core.config import settings
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.core.token_cache import UserSnapshot
 from app.db import models  # Updated to import top-level models
 from app.db.session import get_db
+from app.services.activity import (
+    AUDIT_ACCOUNT_DELETE,
+    AUDIT_PASSWORD_CHANGE,
+    get_activity_buffer,
+    update_audit_actions,
+)
 
 router = APIRouter()
 
 
-@router.post("/", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/",
+    response_model=schemas.User,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(deps.rate_limit("signup", settings.RATE_LIMIT_SIGNUP))],
+)
 def create_user(
     *, db: Session = Depends(get_db), user_in: schemas.UserCreate
 ) -> models.User:  # Returns SA model; Pydantic via response_model
@@ -31,41 +46,72 @@ def create_user(
 
 @router.get("/", response_model=List[schemas.User])
 def read_users(
-    db: Session = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100,
-    current_user: models.User = Depends(deps.get_current_user),  # Added
-) -> List[models.User]:
+    db: Session = Depends(deps.get_read_db),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    skip: int = Query(0, ge=0, deprecated=True),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
+) -> Response:
     """
-    Retrieve users. Requires authentication. (Future: Admin only)
+    Retrieve users ordered by creation time. Requires authentication.
+    (Future: Admin only)
+
+    Keyset-paginated: when more users exist, the `X-Next-Cursor` response
+    header holds an opaque cursor to pass back as `cursor` for the next page.
     """
-    users = crud.crud_user.get_users(db, skip=skip, limit=limit)
-    return users
+    after = decode_cursor(cursor) if cursor else None
+    # Fetch one extra row to learn whether there is a next page.
+    rows = crud.crud_user.get_users_page(db, limit=limit + 1, after=after, skip=skip)
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+    # Rows are the schema's columns: serialize them directly instead of
+    # validating each one through response_model (see app.api.responses).
+    return rows_response(rows, schemas.User, headers=headers)
 
 
 # /me endpoint must be before /users/{user_id} due to path matching.
 @router.get("/me", response_model=schemas.User)
 def read_users_me(
-    current_user: models.User = Depends(deps.get_current_user),
-) -> models.User:
+    current_user: UserSnapshot = Depends(deps.get_current_user),
+) -> UserSnapshot:
     """
     Get current user.
     """
     return current_user
 
 
-@router.post("/me/password", status_code=status.HTTP_200_OK)
+@router.post(
+    "/me/password",
+    status_code=status.HTTP_200_OK,
+    dependencies=[
+        Depends(
+            deps.rate_limit(
+                "password_change", settings.RATE_LIMIT_PASSWORD_CHANGE, per="user"
+            )
+        )
+    ],
+)
 def change_password_me(
     *,
+    request: Request,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
     password_in: schemas.UserPasswordChange,
 ) -> dict:
     """
     Update current user's password.
     """
+    # current_user is a cached snapshot without the hash; load the row.
+    db_user = crud.crud_user.get_user(db, user_id=current_user.id)
+    if not db_user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+        )
     if not security.verify_password(
-        password_in.current_password, current_user.hashed_password
+        password_in.current_password, db_user.hashed_password
     ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -74,7 +120,13 @@ def change_password_me(
 
     # The crud_user.update_user function handles hashing the new password
     crud.crud_user.update_user(
-        db=db, db_obj=current_user, obj_in={"password": password_in.new_password}
+        db=db, db_obj=db_user, obj_in={"password": password_in.new_password}
+    )
+    get_activity_buffer().audit(
+        AUDIT_PASSWORD_CHANGE,
+        user_id=db_user.id,
+        actor_id=current_user.id,
+        ip=deps.client_ip(request),
     )
     return {"msg": "Password updated successfully"}
 
@@ -82,8 +134,8 @@ def change_password_me(
 @router.get("/{user_id}", response_model=schemas.User)
 def read_user_by_id(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(deps.get_current_user),  # Added
+    db: Session = Depends(deps.get_read_db),
+    current_user: UserSnapshot = Depends(deps.get_current_user),  # Added
 ) -> models.User:
     """
     Get a specific user by id. A user can only retrieve their own details.
@@ -106,10 +158,11 @@ def read_user_by_id(
 @router.put("/{user_id}", response_model=schemas.User)
 def update_user(
     *,
+    request: Request,
     db: Session = Depends(get_db),
     user_id: int,
     user_in: schemas.UserUpdate,
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
 ) -> models.User:
     """
     Update a user.
@@ -126,15 +179,22 @@ def update_user(
             detail="Not authorized to update this user",
         )
     user = crud.crud_user.update_user(db=db, db_obj=db_user, obj_in=user_in)
+    buffer, ip = get_activity_buffer(), deps.client_ip(request)
+    changed = user_in.model_dump(exclude_unset=True)
+    for action, detail in update_audit_actions(changed):
+        buffer.audit(
+            action, user_id=user.id, actor_id=current_user.id, detail=detail, ip=ip
+        )
     return user
 
 
 @router.delete("/{user_id}", response_model=schemas.User)
 def delete_user(
     *,
+    request: Request,
     db: Session = Depends(get_db),
     user_id: int,
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: UserSnapshot = Depends(deps.get_current_user),
 ) -> models.User:  # Or perhaps a status message
     """
     Delete a user. A user can only delete their own account.
@@ -152,11 +212,16 @@ def delete_user(
         )
 
     # Consider what to do if deletion fails or if there are dependencies
-    # Assuming remove_user is the correct CRUD function for deletion
-    deleted_user_obj = crud.crud_user.remove_user(db=db, id=user_id)
+    deleted_user_obj = crud.crud_user.delete_user(db=db, user_id=user_id)
     if not deleted_user_obj:  # Should not happen if get_user found it and auth passed
         raise HTTPException(
             status_code=(status.HTTP_500_INTERNAL_SERVER_ERROR),
             detail="Could not delete user after authorization",
         )
+    get_activity_buffer().audit(
+        AUDIT_ACCOUNT_DELETE,
+        user_id=user_id,
+        actor_id=current_user.id,
+        ip=deps.client_ip(request),
+    )
     return deleted_user_obj  # Return deleted user obj (or confirmation)
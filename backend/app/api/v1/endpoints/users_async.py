@@ -0,0 +1,228 @@
+# Async twin of users.py, mounted instead of it when settings.DB_ASYNC_MODE is on.
+# Keep the routes, status codes and response models in sync with users.py.
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import schemas
+from app.api import deps
+from app.api.responses import rows_response
+from app.core import security
+from app.core.config import settings
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.core.token_cache import UserSnapshot
+from app.crud import crud_user_async
+from app.db import models
+from app.db.session import get_async_db
+from app.services.activity import (
+    AUDIT_ACCOUNT_DELETE,
+    AUDIT_PASSWORD_CHANGE,
+    get_activity_buffer,
+    update_audit_actions,
+)
+
+router = APIRouter()
+
+
+@router.post(
+    "/",
+    response_model=schemas.User,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(deps.rate_limit("signup", settings.RATE_LIMIT_SIGNUP))],
+)
+async def create_user(
+    *, db: AsyncSession = Depends(get_async_db), user_in: schemas.UserCreate
+) -> models.User:
+    """
+    Create new user.
+    """
+    db_user = await crud_user_async.get_user_by_email(db, email=user_in.email)
+    if db_user:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=("The user with this email already exists in the system."),
+        )
+    user = await crud_user_async.create_user(db=db, obj_in=user_in)
+    return user
+
+
+@router.get("/", response_model=List[schemas.User])
+async def read_users(
+    db: AsyncSession = Depends(deps.get_read_db_async),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    skip: int = Query(0, ge=0, deprecated=True),
+    current_user: UserSnapshot = Depends(deps.get_current_user_async),
+) -> Response:
+    """
+    Retrieve users ordered by creation time. Requires authentication.
+    (Future: Admin only)
+
+    Keyset-paginated: when more users exist, the `X-Next-Cursor` response
+    header holds an opaque cursor to pass back as `cursor` for the next page.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    # Fetch one extra row to learn whether there is a next page.
+    rows = await crud_user_async.get_users_page(
+        db, limit=limit + 1, after=after, skip=skip
+    )
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+    # Rows are the schema's columns: serialize them directly instead of
+    # validating each one through response_model (see app.api.responses).
+    return rows_response(rows, schemas.User, headers=headers)
+
+
+# /me endpoint must be before /users/{user_id} due to path matching.
+@router.get("/me", response_model=schemas.User)
+async def read_users_me(
+    current_user: UserSnapshot = Depends(deps.get_current_user_async),
+) -> UserSnapshot:
+    """
+    Get current user.
+    """
+    return current_user
+
+
+@router.post(
+    "/me/password",
+    status_code=status.HTTP_200_OK,
+    dependencies=[
+        Depends(
+            deps.rate_limit(
+                "password_change", settings.RATE_LIMIT_PASSWORD_CHANGE, per="user"
+            )
+        )
+    ],
+)
+async def change_password_me(
+    *,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(deps.get_current_user_async),
+    password_in: schemas.UserPasswordChange,
+) -> dict:
+    """
+    Update current user's password.
+    """
+    # current_user is a cached snapshot without the hash; load the row.
+    db_user = await crud_user_async.get_user(db, user_id=current_user.id)
+    if not db_user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+        )
+    if not await security.verify_password_async(
+        password_in.current_password, db_user.hashed_password
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Incorrect current password",
+        )
+
+    await crud_user_async.update_user(
+        db=db, db_obj=db_user, obj_in={"password": password_in.new_password}
+    )
+    await get_activity_buffer().audit_async(
+        AUDIT_PASSWORD_CHANGE,
+        user_id=db_user.id,
+        actor_id=current_user.id,
+        ip=deps.client_ip(request),
+    )
+    return {"msg": "Password updated successfully"}
+
+
+@router.get("/{user_id}", response_model=schemas.User)
+async def read_user_by_id(
+    user_id: int,
+    db: AsyncSession = Depends(deps.get_read_db_async),
+    current_user: UserSnapshot = Depends(deps.get_current_user_async),
+) -> models.User:
+    """
+    Get a specific user by id. A user can only retrieve their own details.
+    """
+    if current_user.id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this user's details",
+        )
+    db_user = await crud_user_async.get_user(db, user_id=user_id)
+    if db_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+        )
+    return db_user
+
+
+@router.put("/{user_id}", response_model=schemas.User)
+async def update_user(
+    *,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: int,
+    user_in: schemas.UserUpdate,
+    current_user: UserSnapshot = Depends(deps.get_current_user_async),
+) -> models.User:
+    """
+    Update a user.
+    """
+    db_user = await crud_user_async.get_user(db, user_id=user_id)
+    if not db_user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="The user with this id does not exist in the system",
+        )
+    if current_user.id != db_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to update this user",
+        )
+    user = await crud_user_async.update_user(db=db, db_obj=db_user, obj_in=user_in)
+    buffer, ip = get_activity_buffer(), deps.client_ip(request)
+    changed = user_in.model_dump(exclude_unset=True)
+    for action, detail in update_audit_actions(changed):
+        await buffer.audit_async(
+            action, user_id=user.id, actor_id=current_user.id, detail=detail, ip=ip
+        )
+    return user
+
+
+@router.delete("/{user_id}", response_model=schemas.User)
+async def delete_user(
+    *,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    user_id: int,
+    current_user: UserSnapshot = Depends(deps.get_current_user_async),
+) -> models.User:
+    """
+    Delete a user. A user can only delete their own account.
+    """
+    user_to_delete = await crud_user_async.get_user(db, user_id=user_id)
+    if not user_to_delete:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+        )
+
+    if current_user.id != user_to_delete.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to delete this user",
+        )
+
+    deleted_user_obj = await crud_user_async.delete_user(db=db, user_id=user_id)
+    if not deleted_user_obj:
+        raise HTTPException(
+            status_code=(status.HTTP_500_INTERNAL_SERVER_ERROR),
+            detail="Could not delete user after authorization",
+        )
+    await get_activity_buffer().audit_async(
+        AUDIT_ACCOUNT_DELETE,
+        user_id=user_id,
+        actor_id=current_user.id,
+        ip=deps.client_ip(request),
+    )
+    return deleted_user_obj
@@ -0,0 +1,243 @@
+# Bulk user operations. Mounted under /users in both DB modes, ahead of the
+# users router so /users/export is not captured by /users/{user_id}.
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Literal, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+
+from app import schemas
+from app.api import deps
+from app.core import security
+from app.core.config import settings
+from app.core.token_cache import UserSnapshot
+from app.crud import crud_user
+from app.db import session
+from app.schemas.user import User as UserSchema
+
+router = APIRouter()
+
+EXPORT_BATCH_SIZE = 1000
+IMPORT_BATCH_SIZE = 1000
+
+# (1-based record number, parsed record, parse error)
+_Record = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+# Same field set and order as the schemas.User read model.
+EXPORT_FIELDS = list(UserSchema.model_fields)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _iter_ndjson() -> Iterator[str]:
+    # The request's DB dependency is closed before a streaming body is sent,
+    # so the export holds its own session for the lifetime of the stream.
+    with session.SessionLocal() as db:
+        for batch in crud_user.iter_user_batches(db, batch_size=EXPORT_BATCH_SIZE):
+            yield "".join(
+                json.dumps(row._asdict(), default=_json_default) + "\n" for row in batch
+            )
+
+
+def _iter_csv() -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    with session.SessionLocal() as db:
+        for batch in crud_user.iter_user_batches(db, batch_size=EXPORT_BATCH_SIZE):
+            writer.writerows(
+                [
+                    value.isoformat() if isinstance(value, datetime) else value
+                    for value in row
+                ]
+                for row in batch
+            )
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+@router.get("/export")
+def export_users(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    current_user: UserSnapshot = Depends(deps.get_current_active_superuser),
+) -> StreamingResponse:
+    """
+    Stream every user as NDJSON or CSV. Superusers only.
+
+    Rows are read through a server-side cursor and written out batch by batch,
+    so memory stays flat regardless of table size.
+    """
+    if format == "csv":
+        body, media_type = _iter_csv(), "text/csv"
+    else:
+        body, media_type = _iter_ndjson(), "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'},
+    )
+
+
+async def _read_body(request: Request) -> bytes:
+    """The request body, refused with a 413 once it exceeds the import limit."""
+    limit = settings.USER_IMPORT_MAX_BYTES
+    too_large = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Import exceeds the {limit} byte limit",
+    )
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > limit:
+        raise too_large
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > limit:
+            raise too_large
+    return bytes(body)
+
+
+def _parse_records(body: bytes, format: str) -> List[_Record]:
+    """Split an upload into (line, record, parse_error) tuples."""
+    try:
+        text = body.decode("utf-8-sig")
+    except UnicodeDecodeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Import must be UTF-8 encoded: {e}",
+        )
+    records: List[_Record] = []
+    if format == "csv":
+        reader = csv.DictReader(io.StringIO(text))
+        for line, record in enumerate(reader, start=1):
+            # Empty CSV cells mean "not provided", not an empty string.
+            records.append((line, {k: v for k, v in record.items() if v != ""}, None))
+        return records
+    line = 0
+    for raw in text.splitlines():
+        if not raw.strip():
+            continue
+        line += 1
+        try:
+            record = json.loads(raw)
+            if not isinstance(record, dict):
+                raise ValueError("expected a JSON object")
+            records.append((line, record, None))
+        except ValueError as e:
+            records.append((line, None, f"Invalid JSON: {e}"))
+    return records
+
+
+def _import_users(records: List[_Record]) -> schemas.UserImportReport:
+    report = schemas.UserImportReport()
+    results: Dict[int, schemas.UserImportRow] = {}
+    valid: List[Tuple[int, schemas.UserCreate]] = []
+    seen_emails = set()
+
+    for line, record, parse_error in records:
+        if parse_error is not None:
+            results[line] = schemas.UserImportRow(
+                line=line, status="invalid", error=parse_error
+            )
+            continue
+        try:
+            user_in = schemas.UserCreate.model_validate(record)
+        except ValidationError as e:
+            results[line] = schemas.UserImportRow(
+                line=line,
+                email=record.get("email"),
+                status="invalid",
+                error="; ".join(
+                    f"{'.'.join(map(str, err['loc']))}: {err['msg']}"
+                    for err in e.errors()
+                ),
+            )
+            continue
+        if user_in.email in seen_emails:
+            results[line] = schemas.UserImportRow(
+                line=line,
+                email=user_in.email,
+                status="duplicate",
+                error="Email appears earlier in the file",
+            )
+            continue
+        seen_emails.add(user_in.email)
+        valid.append((line, user_in))
+
+    with session.SessionLocal() as db:
+        for start in range(0, len(valid), IMPORT_BATCH_SIZE):
+            batch = valid[start : start + IMPORT_BATCH_SIZE]
+            existing = crud_user.get_existing_emails(
+                db, (user_in.email for _, user_in in batch)
+            )
+            new = [(line, u) for line, u in batch if u.email not in existing]
+            hashed = security.get_password_hashes([u.password for _, u in new])
+            inserted = crud_user.bulk_insert_users(
+                db,
+                [
+                    {
+                        "email": u.email,
+                        "hashed_password": hashed_password,
+                        "full_name": u.full_name,
+                        "is_active": u.is_active,
+                        "is_superuser": u.is_superuser,
+                    }
+                    for (_, u), hashed_password in zip(new, hashed)
+                ],
+            )
+            db.commit()
+            for line, u in batch:
+                if u.email in inserted:
+                    results[line] = schemas.UserImportRow(
+                        line=line, email=u.email, status="created", id=inserted[u.email]
+                    )
+                else:
+                    results[line] = schemas.UserImportRow(
+                        line=line,
+                        email=u.email,
+                        status="duplicate",
+                        error="The user with this email already exists in the system.",
+                    )
+
+    report.rows = [results[line] for line in sorted(results)]
+    for row in report.rows:
+        if row.status == "created":
+            report.created += 1
+        elif row.status == "duplicate":
+            report.duplicates += 1
+        else:
+            report.invalid += 1
+    return report
+
+
+@router.post(
+    "/import",
+    response_model=schemas.UserImportReport,
+    status_code=status.HTTP_200_OK,
+)
+async def import_users(
+    request: Request,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    current_user: UserSnapshot = Depends(deps.get_current_active_superuser),
+) -> schemas.UserImportReport:
+    """
+    Bulk-create users from an NDJSON or CSV body of UserCreate records.
+    Superusers only.
+
+    Passwords are hashed in parallel on the hashing pool, duplicate emails are
+    found with one set-based query per batch, and rows are written with batched
+    INSERT ... ON CONFLICT DO NOTHING. The response reports the outcome of
+    every row. Bodies over USER_IMPORT_MAX_BYTES are refused with a 413.
+    """
+    records = _parse_records(await _read_body(request), format)
+    return await run_in_threadpool(_import_users, records)
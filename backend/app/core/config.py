@@ -1,5 +1,6 @@
 import logging
-from typing import Any, List, Optional
+from functools import lru_cache
+from typing import Any, List, Literal, Optional
 
 from pydantic import PostgresDsn, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -80,22 +81,229 @@ class Settings(BaseSettings):
         #     return self
         return v  # Return v; DB_URL assumed set in .env or by validator
 
+    # Connection pool (see app.db.session / app.db.pool_metrics). Sizes are per
+    # engine, i.e. per worker process. DB_POOL_RECYCLE=-1 disables recycling.
+    # DB_POOL_PRE_PING: "always" pings on every checkout (an extra round-trip),
+    # "idle" only pings connections idle for DB_POOL_PRE_PING_IDLE_SECONDS,
+    # "never" relies on DB_POOL_RECYCLE and error-time invalidation.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_PRE_PING: Literal["always", "idle", "never"] = "idle"
+    DB_POOL_PRE_PING_IDLE_SECONDS: float = 30.0
+
+    # Read replicas (see app.db.replicas): comma-separated URLs that read-only
+    # endpoints may use; empty sends everything to DATABASE_URL. Replicas are
+    # balanced "round_robin" or by "least_connections", checked every
+    # DB_REPLICA_CHECK_SECONDS and skipped while unreachable or lagging more
+    # than DB_REPLICA_MAX_LAG_SECONDS. After a write, the client reads from
+    # the primary for DB_READ_YOUR_WRITES_SECONDS.
+    DATABASE_REPLICA_URLS: str = ""
+    DB_REPLICA_BALANCING: Literal["round_robin", "least_connections"] = "round_robin"
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    DB_REPLICA_CHECK_SECONDS: float = 2.0
+    DB_READ_YOUR_WRITES_SECONDS: float = 5.0
+
+    @field_validator("DATABASE_REPLICA_URLS", mode="after")
+    @classmethod
+    def parse_replica_urls(cls, v: str) -> List[str]:
+        return [url.strip() for url in v.split(",") if url.strip()]
+
+    # Async database mode. When enabled the user and login endpoints are served
+    # by `async def` handlers on an AsyncEngine instead of the threadpool.
+    DB_ASYNC_MODE: bool = False
+    # Optional explicit async URL (e.g. postgresql+asyncpg://...). If unset it is
+    # derived from DATABASE_URL by swapping in the asyncpg driver.
+    DATABASE_URL_ASYNC: Optional[str] = None
+
     # JWT Authentication
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
 
+    # Revoked login sessions (see app.core.revocation): a Bloom filter sized for
+    # REVOCATION_FILTER_CAPACITY families at REVOCATION_FILTER_ERROR_RATE false
+    # positives. Each process re-reads new revocations every
+    # REVOCATION_REFRESH_SECONDS, the most another process may lag behind a
+    # logout, and rebuilds the filter every REVOCATION_REBUILD_SECONDS.
+    REVOCATION_FILTER_CAPACITY: int = 100000
+    REVOCATION_FILTER_ERROR_RATE: float = 0.001
+    REVOCATION_REFRESH_SECONDS: float = 5.0
+    REVOCATION_REBUILD_SECONDS: float = 3600.0
+
+    # Password hashing executor (see app.core.hashing). bcrypt runs in a process
+    # pool; at most HASHING_POOL_WORKERS + HASHING_MAX_QUEUE calls may be running
+    # or waiting, beyond that requests get a 503 with Retry-After.
+    HASHING_POOL_ENABLED: bool = True
+    HASHING_POOL_WORKERS: int = 2
+    HASHING_MAX_QUEUE: int = 32
+    HASHING_RETRY_AFTER_SECONDS: int = 1
+
+    # Verified-token cache (see app.core.token_cache). Skips jwt.decode and the
+    # user lookup for repeat requests with the same bearer token. The cache is
+    # per process, so keep the TTL short: it bounds how long another worker can
+    # serve a stale user after an update or delete.
+    TOKEN_CACHE_ENABLED: bool = True
+    TOKEN_CACHE_MAX_ENTRIES: int = 10000
+    TOKEN_CACHE_TTL_SECONDS: int = 60
+
+    # Bulk user import (POST /users/import): the body is parsed in memory, so
+    # larger bodies are refused with a 413.
+    USER_IMPORT_MAX_BYTES: int = 10 * 1024 * 1024
+
+    # User activity and audit trail (see app.services.activity): last-login
+    # times and account changes are buffered in memory and written in batches
+    # of up to ACTIVITY_FLUSH_SIZE events, at least every
+    # ACTIVITY_FLUSH_SECONDS. At most ACTIVITY_MAX_PENDING events are held; when
+    # full, callers wait up to ACTIVITY_BLOCK_SECONDS, then the event is
+    # dropped. ACTIVITY_WRITE_BEHIND=false writes each event in its request.
+    ACTIVITY_LOG_ENABLED: bool = True
+    ACTIVITY_WRITE_BEHIND: bool = True
+    ACTIVITY_FLUSH_SIZE: int = 500
+    ACTIVITY_FLUSH_SECONDS: float = 1.0
+    ACTIVITY_MAX_PENDING: int = 10000
+    ACTIVITY_BLOCK_SECONDS: float = 0.05
+
+    # Request/SQL metrics middleware, served in Prometheus format at /meta/metrics
+    METRICS_ENABLED: bool = True
+    # The /meta stats and metrics routes (all but /meta/health) need a
+    # superuser token. Set META_STATS_PUBLIC only when /meta is reachable from
+    # a trusted network alone, e.g. for a Prometheus scraper.
+    META_STATS_PUBLIC: bool = False
+
+    # Document storage (see app.services.storage). Uploads are streamed to disk
+    # and stored once per SHA-256 under STORAGE_DIR, however many users upload
+    # the same file.
+    STORAGE_DIR: str = "storage"
+    UPLOAD_MAX_BYTES: int = 100 * 1024 * 1024
+
+    # Background extraction worker (python -m app.worker). Jobs are claimed from
+    # the jobs table with FOR UPDATE SKIP LOCKED, so any number of worker
+    # processes can share one queue. A running job whose lock is older than
+    # JOB_LOCK_TIMEOUT_SECONDS is assumed lost and requeued.
+    WORKER_PROCESSES: int = 2
+    WORKER_POLL_INTERVAL_SECONDS: float = 1.0
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_LOCK_TIMEOUT_SECONDS: int = 600
+    CHUNK_MAX_CHARS: int = 2000
+    CHUNK_OVERLAP_CHARS: int = 200
+
+    # Semantic search (see app.services.vector_index). EMBEDDING_PROVIDER is
+    # "hashing" (offline, deterministic) or "package.module:ClassName". With
+    # VECTOR_INDEX_IVF_LISTS > 0 the index trains a coarse quantizer once large
+    # enough and scans only the NPROBE nearest lists per query.
+    EMBEDDING_PROVIDER: str = "hashing"
+    EMBEDDING_DIM: int = 384
+    VECTOR_INDEX_DIR: Optional[str] = None  # default: STORAGE_DIR/vector_index
+    VECTOR_INDEX_IVF_LISTS: int = 0
+    VECTOR_INDEX_IVF_NPROBE: int = 8
+    VECTOR_INDEX_COMPACT_RATIO: float = 0.2
+
+    # Analysis results store (see app.services.results): columnar per-document
+    # bundles, memory-mapped on read. GET /documents/{id}/results returns at
+    # most RESULTS_MAX_CHUNKS_PER_REQUEST chunks per call.
+    RESULTS_DIR: Optional[str] = None  # default: STORAGE_DIR/results
+    RESULTS_MAX_OPEN_BUNDLES: int = 256
+    RESULTS_MAX_CHUNKS_PER_REQUEST: int = 200
+
+    # Document analysis model (see app.services.ai_provider). AI_PROVIDER is
+    # "fake" (offline, deterministic) or "package.module:ClassName". Responses
+    # are cached by content hash + prompt version + model + parameters, in
+    # memory (AI_CACHE_MAX_ENTRIES) and, if AI_CACHE_PERSISTENT, in the database.
+    AI_PROVIDER: str = "fake"
+    AI_MODEL: str = "gemini-1.5-flash"
+    AI_CACHE_MAX_ENTRIES: int = 1024
+    AI_CACHE_PERSISTENT: bool = True
+
+    # Upstream model calls (see app.services.ai_client): at most
+    # AI_MAX_CONCURRENCY in flight, paced by a token bucket that starts at
+    # AI_RATE_LIMIT_PER_SECOND and backs off on 429s. Requests arriving within
+    # AI_BATCH_WINDOW_MS are sent as one batch of up to AI_BATCH_SIZE when the
+    # provider supports it.
+    AI_MAX_CONCURRENCY: int = 8
+    AI_RATE_LIMIT_PER_SECOND: float = 10.0
+    AI_RATE_LIMIT_BURST: int = 10
+    AI_BATCH_SIZE: int = 8
+    AI_BATCH_WINDOW_MS: int = 20
+    AI_MAX_ATTEMPTS: int = 5
+
+    # Citation graph (see app.services.citation_graph): the in-memory CSR
+    # snapshot picks up newly ingested citations at most this often.
+    CITATION_GRAPH_REFRESH_SECONDS: float = 5.0
+
+    # Near-duplicate uploads (see app.services.minhash): a new file whose
+    # estimated Jaccard similarity to an earlier one is at least this reuses
+    # the earlier file's analysis results.
+    NEAR_DUPLICATE_THRESHOLD: float = 0.8
+
+    # Job progress push channel (see app.services.job_events): events buffered
+    # per client before the oldest are dropped, and the SSE keep-alive interval.
+    JOB_EVENTS_BUFFER_SIZE: int = 64
+    JOB_EVENTS_KEEPALIVE_SECONDS: float = 15.0
+
+    # Rate limits (see app.core.rate_limit), as "<count>/<period>"; empty
+    # disables a limit. Login and signup are limited per client IP, the rest
+    # per user. Counters are kept per process, split over RATE_LIMIT_SHARDS
+    # locks. Set RATE_LIMIT_TRUST_FORWARDED only behind a proxy that appends
+    # the client address to X-Forwarded-For. Entries further left are sent by
+    # the client and can be anything, so the client IP is taken
+    # RATE_LIMIT_TRUSTED_PROXIES entries from the right (1: the entry added by
+    # the proxy in front of the app).
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_LOGIN: str = "10/minute"
+    RATE_LIMIT_SIGNUP: str = "5/minute"
+    RATE_LIMIT_PASSWORD_CHANGE: str = "5/minute"
+    RATE_LIMIT_UPLOAD: str = "30/minute"
+    RATE_LIMIT_REFRESH: str = "30/minute"
+    RATE_LIMIT_SEARCH: str = "60/minute"
+    RATE_LIMIT_SUMMARY: str = "20/hour"
+    RATE_LIMIT_SHARDS: int = 16
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    RATE_LIMIT_TRUST_FORWARDED: bool = False
+    RATE_LIMIT_TRUSTED_PROXIES: int = 1
+
+    # Start-up warm-up (see app.core.warmup): before serving, pre-fill the
+    # connection pool to DB_POOL_SIZE, start the bcrypt workers and load the
+    # token and revoked-session code, all concurrently. Steps still running
+    # after STARTUP_WARMUP_TIMEOUT_SECONDS are left to the first request.
+    STARTUP_WARMUP: bool = False
+    STARTUP_WARMUP_TIMEOUT_SECONDS: float = 30.0
+
     # First Superuser (optional)
     FIRST_SUPERUSER_EMAIL: Optional[str] = None
     FIRST_SUPERUSER_PASSWORD: Optional[str] = None
 
 
-settings = Settings()
+@lru_cache()
+def get_settings() -> Settings:
+    """The process-wide Settings, read from the environment on first call."""
+    return Settings()
+
+
+class _LazySettings:
+    """Stands in for the Settings instance so that importing a module which
+    does `from app.core.config import settings` neither reads the environment
+    nor fails validation; that happens on the first attribute access."""
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_settings(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(get_settings(), name, value)
+
+    def __repr__(self) -> str:
+        return repr(get_settings())
+
+
+settings: Settings = _LazySettings()  # type: ignore[assignment]
 
-# Configure logging based on settings
-logging.basicConfig(level=settings.LOG_LEVEL.upper())
-logger = logging.getLogger(settings.PROJECT_NAME)
 
-# Log the parsed CORS settings
-logger.info(f"Configured BACKEND_CORS_ORIGINS: " f"{settings.BACKEND_CORS_ORIGINS}")
+def configure_logging() -> None:
+    """Set up root logging from settings. Called by the app factory and the
+    worker entry point rather than at import."""
+    logging.basicConfig(level=settings.LOG_LEVEL.upper())
+    logger = logging.getLogger(settings.PROJECT_NAME)
+    # Log the parsed CORS settings
+    logger.info(f"Configured BACKEND_CORS_ORIGINS: {settings.BACKEND_CORS_ORIGINS}")
@@ -0,0 +1,271 @@
+"""Bounded executor for bcrypt hashing and verification.
+
+bcrypt costs ~250 ms of CPU per call. Running it inline in a request handler
+stalls every other request in the worker, so hashes are sent to a small
+process pool instead. The number of calls that may be running or waiting is
+capped; once the cap is hit new calls fail fast with `HashingQueueFull`, which
+the app turns into a 503 with `Retry-After` rather than letting latency grow
+without bound.
+
+This module deliberately avoids importing `app.core.config` and passlib at
+import time, so neither API start-up nor pool worker processes pay for them
+until the first hash.
+"""
+import asyncio
+import functools
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache()
+def get_pwd_context():
+    from passlib.context import CryptContext
+
+    # bcrypt as the default scheme; deprecated="auto" upgrades hashes on login
+    # if a new default scheme is set.
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+# Upper bounds (seconds) of the latency histogram buckets.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class HashingQueueFull(Exception):
+    """Raised when the hashing executor is at capacity."""
+
+
+# Task functions run inside pool workers; they must stay module-level so they
+# can be pickled.
+def bcrypt_verify(plain_password: str, hashed_password: str) -> bool:
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+
+def bcrypt_hash(password: str) -> str:
+    return get_pwd_context().hash(password)
+
+
+def bcrypt_hash_many(passwords: List[str]) -> List[str]:
+    pwd_context = get_pwd_context()
+    return [pwd_context.hash(password) for password in passwords]
+
+
+# "self-test" hashed at cost 4: verifying it takes about a millisecond.
+_SELF_TEST_HASH = "$2b$04$6l2Kfo67quY/LwaIMJiWT.n4NifM1exSfJF0iisdHWhwrC5XuHaQK"
+
+
+def bcrypt_self_test() -> bool:
+    """Load the bcrypt backend (passlib runs its own checks on first use) and
+    verify a known hash."""
+    return get_pwd_context().verify("self-test", _SELF_TEST_HASH)
+
+
+class HashingExecutor:
+    """Runs hashing calls in a process pool with a bounded number of waiters.
+
+    With `max_workers=0` calls run inline in the calling thread, which keeps
+    the same admission control and metrics without spawning processes.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int) -> None:
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._capacity = max(max_workers, 1) + max_queue
+        self._slots = threading.BoundedSemaphore(self._capacity)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._errors = 0
+        self._latency_sum = 0.0
+        self._latency_max = 0.0
+        self._bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    # spawn: forking a threaded server process is unsafe.
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+        return self._pool
+
+    def _admit(self) -> None:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise HashingQueueFull(
+                f"Hashing executor at capacity ({self._capacity} calls)"
+            )
+        with self._lock:
+            self._in_flight += 1
+
+    def _finish(self, started: float, failed: bool) -> None:
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._in_flight -= 1
+            self._completed += 1
+            if failed:
+                self._errors += 1
+            self._latency_sum += elapsed
+            self._latency_max = max(self._latency_max, elapsed)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if elapsed <= bound:
+                    self._bucket_counts[i] += 1
+                    break
+            else:
+                self._bucket_counts[-1] += 1
+        self._slots.release()
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        """Submit `fn(*args)`; raises `HashingQueueFull` when at capacity."""
+        self._admit()
+        started = time.perf_counter()
+        if self.max_workers <= 0:
+            future: Future = Future()
+            try:
+                future.set_result(fn(*args))
+            except BaseException as exc:  # propagate through the future
+                future.set_exception(exc)
+            self._finish(started, future.exception() is not None)
+            return future
+        try:
+            future = self._get_pool().submit(fn, *args)
+        except BaseException:
+            self._finish(started, True)
+            raise
+        future.add_done_callback(
+            lambda f: self._finish(started, f.cancelled() or f.exception() is not None)
+        )
+        return future
+
+    def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run `fn(*args)` and block for the result (for sync callers)."""
+        return self.submit(fn, *args).result()
+
+    def map_batches(
+        self, fn: Callable[[Any], Any], batches: Sequence[Any]
+    ) -> List[Any]:
+        """Run `fn(batch)` for every batch in parallel and return results in order.
+
+        Meant for bulk work such as imports: at most one batch per worker is in
+        flight, so interactive calls keep their queue slots. When the executor
+        is full this waits for capacity instead of raising.
+        """
+        window = max(self.max_workers, 1)
+        results: List[Any] = [None] * len(batches)
+        pending: Dict[Future, int] = {}
+        next_index = 0
+        while next_index < len(batches) or pending:
+            while next_index < len(batches) and len(pending) < window:
+                try:
+                    future = self.submit(fn, batches[next_index])
+                except HashingQueueFull:
+                    if not pending:
+                        time.sleep(0.05)
+                    break
+                pending[future] = next_index
+                next_index += 1
+            if pending:
+                done, _ = wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[pending.pop(future)] = future.result()
+        return results
+
+    async def run_async(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run `fn(*args)` without blocking the event loop."""
+        if self.max_workers <= 0:
+            # Inline mode would block the loop; hop to the default threadpool.
+            loop = asyncio.get_running_loop()
+            future = await loop.run_in_executor(None, self.submit, fn, *args)
+            return future.result()
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def warm_up(self) -> None:
+        """Start the pool workers and load bcrypt in each, so the first logins
+        pay for neither. Bypasses admission control; blocks until done."""
+        if self.max_workers <= 0:
+            ok = bcrypt_self_test()
+        else:
+            # Workers are spawned as tasks arrive, one task per worker.
+            pool = self._get_pool()
+            futures = [pool.submit(bcrypt_self_test) for _ in range(self.max_workers)]
+            ok = all(future.result() for future in futures)
+        if not ok:
+            raise RuntimeError("bcrypt self-test failed")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            in_flight = self._in_flight
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": in_flight,
+                "queue_depth": max(0, in_flight - max(self.max_workers, 1)),
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "errors": self._errors,
+                "latency_avg_ms": (
+                    self._latency_sum / self._completed * 1000
+                    if self._completed
+                    else 0.0
+                ),
+                "latency_max_ms": self._latency_max * 1000,
+                "latency_buckets": self._cumulative_buckets(),
+            }
+
+    def _cumulative_buckets(self) -> Dict[str, int]:
+        buckets: Dict[str, int] = {}
+        running = 0
+        for bound, count in zip(LATENCY_BUCKETS, self._bucket_counts):
+            running += count
+            buckets[f"le_{bound}"] = running
+        buckets["le_inf"] = running + self._bucket_counts[-1]
+        return buckets
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
+_executor: Optional[HashingExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_hashing_executor() -> HashingExecutor:
+    """Return the process-wide executor, creating it from settings on first use."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                from app.core.config import settings
+
+                workers = (
+                    settings.HASHING_POOL_WORKERS
+                    if settings.HASHING_POOL_ENABLED
+                    else 0
+                )
+                _executor = HashingExecutor(
+                    max_workers=workers, max_queue=settings.HASHING_MAX_QUEUE
+                )
+                logger.info(
+                    f"Hashing executor: workers={workers}, "
+                    f"max_queue={settings.HASHING_MAX_QUEUE}"
+                )
+    return _executor
+
+
+def shutdown_hashing_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
@@ -0,0 +1,283 @@
+"""Request-level performance metrics in Prometheus text format.
+
+`MetricsMiddleware` (a plain ASGI middleware, cheaper than BaseHTTPMiddleware)
+records per-route latency, in-flight requests and response sizes.
+`instrument_engine` hooks SQLAlchemy cursor events so every request also gets
+the number of SQL statements it ran and the time spent in them. The request's
+`SqlStats` object is published through a context variable; threadpool workers
+running sync endpoints inherit a copy of the context and so update the same
+object.
+
+Everything is kept in process memory and served by `/meta/metrics`.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+SQL_COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100)
+
+
+class SqlStats:
+    __slots__ = ("count", "seconds")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.seconds = 0.0
+
+
+_request_sql: ContextVar[Optional[SqlStats]] = ContextVar("request_sql", default=None)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _labels(names: Sequence[str], values: Sequence[Any]) -> str:
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return ",".join(pairs)
+
+
+class MetricsRegistry:
+    """Label-keyed histograms and counters, rendered in Prometheus text format."""
+
+    REQUEST_LABELS = ("method", "route", "status")
+    ROUTE_LABELS = ("method", "route")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self._latency: Dict[Tuple[str, ...], Histogram] = {}
+        self._size: Dict[Tuple[str, ...], Histogram] = {}
+        self._sql_count: Dict[Tuple[str, ...], Histogram] = {}
+        self._sql_seconds: Dict[Tuple[str, ...], Histogram] = {}
+        self.sql_statements_total = 0
+        self.sql_seconds_total = 0.0
+
+    @staticmethod
+    def _get(
+        family: Dict[Tuple[str, ...], Histogram],
+        key: Tuple[str, ...],
+        buckets: Sequence[float],
+    ) -> Histogram:
+        histogram = family.get(key)
+        if histogram is None:
+            histogram = family[key] = Histogram(buckets)
+        return histogram
+
+    def observe_request(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        seconds: float,
+        response_bytes: int,
+        sql: SqlStats,
+    ) -> None:
+        route_key = (method, route)
+        with self._lock:
+            self._get(
+                self._latency, (method, route, str(status)), LATENCY_BUCKETS
+            ).observe(seconds)
+            self._get(self._size, route_key, SIZE_BUCKETS).observe(response_bytes)
+            self._get(self._sql_count, route_key, SQL_COUNT_BUCKETS).observe(sql.count)
+            self._get(self._sql_seconds, route_key, LATENCY_BUCKETS).observe(
+                sql.seconds
+            )
+
+    def observe_sql(self, seconds: float) -> None:
+        with self._lock:
+            self.sql_statements_total += 1
+            self.sql_seconds_total += seconds
+
+    @staticmethod
+    def _render_histograms(
+        lines: List[str],
+        name: str,
+        help_text: str,
+        label_names: Sequence[str],
+        family: Dict[Tuple[str, ...], Histogram],
+    ) -> None:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for key, histogram in sorted(family.items()):
+            labels = _labels(label_names, key)
+            running = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                running += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {running}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            lines.append("# HELP http_requests_in_flight Requests being served.")
+            lines.append("# TYPE http_requests_in_flight gauge")
+            lines.append(f"http_requests_in_flight {self.in_flight}")
+            self._render_histograms(
+                lines,
+                "http_request_duration_seconds",
+                "Request latency by route.",
+                self.REQUEST_LABELS,
+                self._latency,
+            )
+            self._render_histograms(
+                lines,
+                "http_response_size_bytes",
+                "Response body size by route.",
+                self.ROUTE_LABELS,
+                self._size,
+            )
+            self._render_histograms(
+                lines,
+                "http_request_sql_statements",
+                "SQL statements executed per request.",
+                self.ROUTE_LABELS,
+                self._sql_count,
+            )
+            self._render_histograms(
+                lines,
+                "http_request_sql_duration_seconds",
+                "Time spent in SQL per request.",
+                self.ROUTE_LABELS,
+                self._sql_seconds,
+            )
+            lines.append("# HELP db_sql_statements_total SQL statements executed.")
+            lines.append("# TYPE db_sql_statements_total counter")
+            lines.append(f"db_sql_statements_total {self.sql_statements_total}")
+            lines.append("# HELP db_sql_duration_seconds_total Time spent in SQL.")
+            lines.append("# TYPE db_sql_duration_seconds_total counter")
+            lines.append(f"db_sql_duration_seconds_total {self.sql_seconds_total}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def render_stats(prefix: str, stats: Dict[str, Any]) -> str:
+    """Render a subsystem `stats()` dict as untyped gauges, e.g. for /meta/*.
+
+    Nested dicts become a `bucket` label; non-numeric values are skipped.
+    """
+    lines: List[str] = []
+    for key, value in stats.items():
+        name = f"{prefix}_{key}"
+        if isinstance(value, bool):
+            value = int(value)
+        if isinstance(value, (int, float)):
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        elif isinstance(value, dict):
+            lines.append(f"# TYPE {name} gauge")
+            for label, inner in value.items():
+                if isinstance(inner, (int, float)):
+                    lines.append(f'{name}{{{_labels(("bucket",), (label,))}}} {inner}')
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Count SQL statements and their time, globally and per request."""
+
+    # The start time lives on the statement's execution context, which is
+    # discarded with it, so a statement that fails (and never reaches
+    # after_cursor_execute) leaves nothing behind on the pooled connection.
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(
+        conn: Any,
+        cursor: Any,
+        statement: Any,
+        parameters: Any,
+        context: Any,
+        *args: Any,
+    ) -> None:
+        if context is not None:
+            context.metrics_query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(
+        conn: Any,
+        cursor: Any,
+        statement: Any,
+        parameters: Any,
+        context: Any,
+        *args: Any,
+    ) -> None:
+        started = getattr(context, "metrics_query_start", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        registry.observe_sql(elapsed)
+        stats = _request_sql.get()
+        if stats is not None:
+            stats.count += 1
+            stats.seconds += elapsed
+
+
+class MetricsMiddleware:
+    """ASGI middleware feeding `registry` for every HTTP request."""
+
+    def __init__(self, app: Any, exclude_paths: Iterable[str] = ()) -> None:
+        self.app = app
+        self.exclude_paths = frozenset(exclude_paths)
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+        response_bytes = 0
+        sql = SqlStats()
+        token = _request_sql.set(sql)
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal status_code, response_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        registry.in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            registry.in_flight -= 1
+            _request_sql.reset(token)
+            # The router stores the matched route in the scope; label by its
+            # template so /users/1 and /users/2 share one series.
+            route = scope.get("route")
+            route_label = getattr(route, "path_format", None) or "unmatched"
+            registry.observe_request(
+                scope["method"],
+                route_label,
+                status_code,
+                time.perf_counter() - started,
+                response_bytes,
+                sql,
+            )
@@ -0,0 +1,189 @@
+"""Request rate limiting with sliding-window counters.
+
+Limits are written as "<count>/<period>", e.g. "10/minute" or "100/5 minutes",
+and applied per client key (an IP address or a user) by `deps.rate_limit`,
+which runs before the endpoint opens a session or hashes a password.
+
+The counter is the usual sliding-window approximation: a key keeps its count
+for the current fixed window and the previous one, and the previous count is
+weighted by how much of it the sliding window still overlaps. That needs two
+integers per key instead of a timestamp per request, and is exact whenever
+traffic is spread evenly over the previous window.
+
+`MemoryRateLimitStore` keeps counters in this process, split over shards with
+a lock each so concurrent requests rarely contend. With several API processes
+each enforces the limit on its own; a shared store (e.g. Redis) only needs to
+implement `RateLimitStore.hit`.
+"""
+import re
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+_RATE_RE = re.compile(r"^\s*(\d+)\s*/\s*(\d+)?\s*(second|minute|hour|day)s?\s*$")
+
+
+class Rate(NamedTuple):
+    limit: int
+    window: float  # seconds
+
+
+def parse_rate(rate: str) -> Optional[Rate]:
+    """Parse e.g. "10/minute" into Rate(10, 60.0); empty means no limit."""
+    if not rate.strip():
+        return None
+    match = _RATE_RE.match(rate.lower())
+    if match is None:
+        raise ValueError(f"Invalid rate limit {rate!r}; expected e.g. '10/minute'")
+    count, multiple, period = match.groups()
+    return Rate(int(count), float(int(multiple or 1) * PERIODS[period]))
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    remaining: int
+    retry_after: float  # seconds until a request would be allowed; 0 if allowed
+
+
+class RateLimitStore:
+    """Backend interface: count a request for `key` against `rate`."""
+
+    def hit(self, key: str, rate: Rate) -> RateLimitResult:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+# (window start, count in that window, count in the window before it)
+_Counter = Tuple[float, int, int]
+
+
+class _Shard:
+    __slots__ = ("lock", "counters", "hits_since_prune")
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.counters: Dict[str, _Counter] = {}
+        self.hits_since_prune = 0
+
+
+class MemoryRateLimitStore(RateLimitStore):
+    def __init__(self, shards: int = 16, max_keys: int = 100_000) -> None:
+        self._shards: List[_Shard] = [_Shard() for _ in range(max(1, shards))]
+        # Per shard: beyond this many keys, expired counters are pruned.
+        self.max_keys_per_shard = max(1, max_keys // len(self._shards))
+        self.pruned = 0
+
+    def _shard(self, key: str) -> _Shard:
+        return self._shards[zlib.crc32(key.encode()) % len(self._shards)]
+
+    def hit(self, key: str, rate: Rate) -> RateLimitResult:
+        now = time.monotonic()
+        # Keys include the rate, so each key has one fixed window length.
+        key = f"{key}|{rate.limit}/{rate.window:g}"
+        shard = self._shard(key)
+        with shard.lock:
+            start, current, previous = shard.counters.get(key, (now, 0, 0))
+            elapsed = now - start
+            if elapsed >= rate.window:
+                # Roll forward; after two or more windows nothing carries over.
+                windows = int(elapsed // rate.window)
+                previous = current if windows == 1 else 0
+                current = 0
+                start += windows * rate.window
+                elapsed = now - start
+            weight = 1.0 - elapsed / rate.window
+            estimated = previous * weight + current
+            if estimated + 1 > rate.limit:
+                shard.counters[key] = (start, current, previous)
+                # Allowed again once enough of the previous window has slid
+                # out, or at the next window if the current one is full.
+                if current + 1 <= rate.limit and previous:
+                    needed = (estimated + 1 - rate.limit) / previous
+                    retry_after = needed * rate.window
+                else:
+                    retry_after = rate.window - elapsed
+                return RateLimitResult(False, 0, max(retry_after, 0.001))
+            current += 1
+            shard.counters[key] = (start, current, previous)
+            shard.hits_since_prune += 1
+            if (
+                len(shard.counters) > self.max_keys_per_shard
+                and shard.hits_since_prune >= self.max_keys_per_shard // 10
+            ):
+                self._prune(shard, now)
+        return RateLimitResult(True, int(rate.limit - estimated - 1), 0.0)
+
+    def _prune(self, shard: _Shard, now: float) -> None:
+        # A counter whose window started two of its own windows ago counts
+        # for nothing; the window length is part of the key.
+        shard.hits_since_prune = 0
+        for key, (start, _, _) in list(shard.counters.items()):
+            window = float(key.rsplit("/", 1)[1])
+            if now - start >= 2 * window:
+                del shard.counters[key]
+                self.pruned += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "store": "memory",
+            "shards": len(self._shards),
+            "keys": sum(len(shard.counters) for shard in self._shards),
+            "pruned": self.pruned,
+        }
+
+
+class RateLimiter:
+    def __init__(self, store: RateLimitStore, enabled: bool = True) -> None:
+        self.store = store
+        self.enabled = enabled
+        self.allowed = 0
+        self.rejected: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def hit(self, name: str, key: str, rate: Rate) -> RateLimitResult:
+        """Count a request to the `name` limit by `key` (e.g. "ip:1.2.3.4")."""
+        if not self.enabled:
+            return RateLimitResult(True, rate.limit, 0.0)
+        result = self.store.hit(f"{name}|{key}", rate)
+        with self._lock:
+            if result.allowed:
+                self.allowed += 1
+            else:
+                self.rejected[name] = self.rejected.get(name, 0) + 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rejected = dict(self.rejected)
+        return {
+            "enabled": self.enabled,
+            "allowed": self.allowed,
+            "rejected": sum(rejected.values()),
+            "rejected_by_limit": rejected,
+            **self.store.stats(),
+        }
+
+
+_rate_limiter: Optional[RateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                from app.core.config import settings
+
+                _rate_limiter = RateLimiter(
+                    MemoryRateLimitStore(
+                        shards=settings.RATE_LIMIT_SHARDS,
+                        max_keys=settings.RATE_LIMIT_MAX_KEYS,
+                    ),
+                    enabled=settings.RATE_LIMIT_ENABLED,
+                )
+    return _rate_limiter
@@ -0,0 +1,230 @@
+"""In-process view of revoked refresh-token families.
+
+Access tokens carry the id of the login session (refresh-token family) they
+were issued from, so logging out, changing the password or a detected refresh
+token replay ends them too. That check runs on every authenticated request, so
+it must not cost a query: revoked family ids are loaded into a Bloom filter,
+which answers "definitely not revoked" from memory. Only a positive answer
+(a revoked family, or a false positive at about `error_rate`) is confirmed
+against the `refresh_token_families` table, and confirmations are cached.
+
+Each process picks up revocations made elsewhere by re-reading recently
+revoked families every `refresh_interval` seconds, so another API process may
+accept a revoked session's access token for up to that long. Revocations made
+by this process apply immediately. The filter is rebuilt from scratch (dropping
+expired families) every `rebuild_interval` seconds or when it fills up.
+"""
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+# Re-read revocations this far before the newest one seen, so a transaction
+# that committed late with an earlier timestamp is still picked up.
+REFRESH_OVERLAP = timedelta(seconds=60)
+CONFIRMED_CACHE_SIZE = 10_000
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.bits = max(
+            64, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hashes = max(1, round(self.bits / self.capacity * math.log(2)))
+        self._array = bytearray((self.bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> List[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        # Kirsch-Mitzenmacher: k positions from two hashes.
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._array[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        array = self._array
+        return all(
+            array[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.capacity
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._array)
+
+
+class RevokedFamilies:
+    def __init__(
+        self,
+        *,
+        capacity: int,
+        error_rate: float,
+        refresh_interval: float,
+        rebuild_interval: float,
+    ) -> None:
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self._filter = BloomFilter(capacity, error_rate)
+        self._confirmed: "OrderedDict[str, bool]" = OrderedDict()
+        self._watermark: Optional[datetime] = None
+        self._refreshed = float("-inf")
+        self._rebuilt = float("-inf")
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.checks = 0
+        self.filter_negatives = 0
+        self.confirmations = 0
+        self.false_positives = 0
+        self.rejections = 0
+        self.refreshes = 0
+        self.rebuilds = 0
+
+    @property
+    def stale(self) -> bool:
+        return time.monotonic() - self._refreshed >= self.refresh_interval
+
+    def refresh(self) -> None:
+        """Load revocations made since the last refresh, or rebuild the filter
+        when it is due. Blocks on the database."""
+        from app.crud import crud_refresh_token
+        from app.db import session
+
+        if not self._refresh_lock.acquire(blocking=False):
+            return  # another thread is already refreshing
+        try:
+            now = time.monotonic()
+            rebuild = now - self._rebuilt >= self.rebuild_interval or self._filter.full
+            with session.SessionLocal() as db:
+                if rebuild:
+                    crud_refresh_token.delete_expired(db)
+                    rows = crud_refresh_token.get_revoked_since(db)
+                else:
+                    since = None
+                    if self._watermark is not None:
+                        since = self._watermark - REFRESH_OVERLAP
+                    rows = crud_refresh_token.get_revoked_since(db, since)
+            with self._lock:
+                if rebuild:
+                    capacity = max(self.capacity, 2 * len(rows))
+                    self._filter = BloomFilter(capacity, self.error_rate)
+                    self._confirmed.clear()
+                    self._rebuilt = now
+                    self.rebuilds += 1
+                for family_id, revoked_at in rows:
+                    if family_id not in self._filter:
+                        self._filter.add(family_id)
+                    self._confirmed.pop(family_id, None)
+                    if self._watermark is None or revoked_at > self._watermark:
+                        self._watermark = revoked_at
+                self._refreshed = now
+                self.refreshes += 1
+        finally:
+            self._refresh_lock.release()
+
+    def add(self, family_ids: Iterable[str]) -> None:
+        """Record revocations made by this process."""
+        with self._lock:
+            for family_id in family_ids:
+                self._filter.add(family_id)
+                self._remember(family_id, True)
+
+    def might_be_revoked(self, family_id: str) -> bool:
+        """Memory-only check: False means definitely not revoked."""
+        with self._lock:
+            self.checks += 1
+            if family_id not in self._filter:
+                self.filter_negatives += 1
+                return False
+            return True
+
+    def confirm(self, family_id: str) -> bool:
+        """Database check behind a filter hit. Blocks on the database."""
+        from app.crud import crud_refresh_token
+        from app.db import session
+
+        with self._lock:
+            if family_id in self._confirmed:
+                self._confirmed.move_to_end(family_id)
+                revoked = self._confirmed[family_id]
+                if revoked:
+                    self.rejections += 1
+                return revoked
+        with session.SessionLocal() as db:
+            revoked = crud_refresh_token.is_revoked(db, family_id)
+        with self._lock:
+            self.confirmations += 1
+            if revoked:
+                self.rejections += 1
+            else:
+                self.false_positives += 1
+            self._remember(family_id, revoked)
+        return revoked
+
+    def _remember(self, family_id: str, revoked: bool) -> None:
+        self._confirmed[family_id] = revoked
+        self._confirmed.move_to_end(family_id)
+        while len(self._confirmed) > CONFIRMED_CACHE_SIZE:
+            self._confirmed.popitem(last=False)
+
+    def is_revoked(self, family_id: str) -> bool:
+        """Full check for sync callers."""
+        if self.stale:
+            self.refresh()
+        return self.might_be_revoked(family_id) and self.confirm(family_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "revoked_families": self._filter.count,
+                "capacity": self._filter.capacity,
+                "filter_bytes": self._filter.nbytes,
+                "hashes": self._filter.hashes,
+                "checks": self.checks,
+                "filter_negatives": self.filter_negatives,
+                "confirmations": self.confirmations,
+                "false_positives": self.false_positives,
+                "rejections": self.rejections,
+                "refreshes": self.refreshes,
+                "rebuilds": self.rebuilds,
+            }
+
+
+_revoked_families: Optional[RevokedFamilies] = None
+_revoked_families_lock = threading.Lock()
+
+
+def get_revoked_families() -> RevokedFamilies:
+    global _revoked_families
+    if _revoked_families is None:
+        with _revoked_families_lock:
+            if _revoked_families is None:
+                from app.core.config import settings
+
+                _revoked_families = RevokedFamilies(
+                    capacity=settings.REVOCATION_FILTER_CAPACITY,
+                    error_rate=settings.REVOCATION_FILTER_ERROR_RATE,
+                    refresh_interval=settings.REVOCATION_REFRESH_SECONDS,
+                    rebuild_interval=settings.REVOCATION_REBUILD_SECONDS,
+                )
+    return _revoked_families
+
+
+def revoke(family_ids: Iterable[str]) -> None:
+    """Revocation hook for the CRUD layer and login endpoints."""
+    get_revoked_families().add(family_ids)
@@ -1,24 +1,47 @@
 from datetime import datetime, timedelta, timezone
-from typing import Optional
-
-from jose import jwt
-from passlib.context import CryptContext
+from typing import Dict, List, Optional
 
+from app.core import hashing
 from app.core.config import settings
 
-# Initialize CryptContext with bcrypt as the default scheme
-# deprecated="auto" upgrades hashes on login if new default scheme set
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt runs on the hashing executor (see app.core.hashing). All of these may
+# raise hashing.HashingQueueFull, which main.py maps to a 503. python-jose is
+# imported where tokens are made so that importing this module stays cheap.
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifies a plain password against a hashed password."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return hashing.get_hashing_executor().run(
+        hashing.bcrypt_verify, plain_password, hashed_password
+    )
 
 
 def get_password_hash(password: str) -> str:
     """Hashes a plain password."""
-    return pwd_context.hash(password)
+    return hashing.get_hashing_executor().run(hashing.bcrypt_hash, password)
+
+
+def get_password_hashes(passwords: List[str], *, chunk_size: int = 16) -> List[str]:
+    """Hash many passwords in parallel across the pool workers (bulk imports)."""
+    chunks = [
+        passwords[i : i + chunk_size] for i in range(0, len(passwords), chunk_size)
+    ]
+    hashed_chunks = hashing.get_hashing_executor().map_batches(
+        hashing.bcrypt_hash_many, chunks
+    )
+    return [hashed for chunk in hashed_chunks for hashed in chunk]
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Async variant of `verify_password` that does not block the event loop."""
+    return await hashing.get_hashing_executor().run_async(
+        hashing.bcrypt_verify, plain_password, hashed_password
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Async variant of `get_password_hash`."""
+    return await hashing.get_hashing_executor().run_async(hashing.bcrypt_hash, password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -30,7 +53,47 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
             minutes=(settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         )
     to_encode.update({"exp": expire})
+    from jose import jwt
+
     encoded_jwt = jwt.encode(
         to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
     )
     return encoded_jwt
+
+
+REFRESH_TOKEN_TYPE = "refresh"
+
+
+def create_refresh_token(
+    *, subject: str, family_id: str, generation: int, expires_delta: timedelta
+) -> str:
+    """A refresh token: generation `generation` of login session `family_id`."""
+    to_encode = {
+        "sub": subject,
+        "typ": REFRESH_TOKEN_TYPE,
+        "fam": family_id,
+        "gen": generation,
+        "exp": datetime.now(timezone.utc) + expires_delta,
+    }
+    from jose import jwt
+
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+def create_session_tokens(
+    *, subject: str, family_id: str, generation: int
+) -> Dict[str, str]:
+    """Access and refresh token for a login session, as the Token schema."""
+    return {
+        "access_token": create_access_token(
+            data={"sub": subject, "fam": family_id},
+            expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+        ),
+        "refresh_token": create_refresh_token(
+            subject=subject,
+            family_id=family_id,
+            generation=generation,
+            expires_delta=timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        ),
+        "token_type": "bearer",
+    }
@@ -0,0 +1,168 @@
+"""In-process cache of verified access tokens.
+
+`deps.get_current_user` would otherwise run `jwt.decode` and a user SELECT on
+every authenticated request. Entries are keyed by a SHA-256 digest of the raw
+token (the token itself is never stored) and hold the decoded payload plus a
+`UserSnapshot` of the columns endpoints read from `current_user`.
+
+Entries live for at most TOKEN_CACHE_TTL_SECONDS and never past the token's own
+`exp`. The CRUD layer calls `invalidate_user` whenever a user is updated or
+deleted (password changes go through `update_user`). The cache is per process,
+so other workers only see such a change once their entry's TTL runs out; keep
+the TTL short.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional, Set, Tuple
+
+from app.schemas.token import TokenPayload
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """Read-only copy of a user row, safe to share between requests."""
+
+    id: int
+    email: str
+    full_name: Optional[str]
+    is_active: Optional[bool]
+    is_superuser: Optional[bool]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+    @classmethod
+    def from_model(cls, user: Any) -> "UserSnapshot":
+        return cls(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            is_active=user.is_active,
+            is_superuser=user.is_superuser,
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+        )
+
+
+# (expires_at epoch seconds, payload, user)
+_Entry = Tuple[float, TokenPayload, UserSnapshot]
+
+
+def _token_key(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+class TokenCache:
+    """Thread-safe TTL + LRU map of token digest -> (payload, user snapshot)."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[bytes, _Entry] = OrderedDict()
+        self._keys_by_user: Dict[int, Set[bytes]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _drop(self, key: bytes) -> None:
+        _, _, user = self._entries.pop(key)
+        keys = self._keys_by_user.get(user.id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[user.id]
+
+    def get(self, token: str) -> Optional[Tuple[TokenPayload, UserSnapshot]]:
+        key = _token_key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, payload, user = entry
+            if expires_at <= time.time():
+                self._drop(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload, user
+
+    def put(self, token: str, payload: TokenPayload, user: UserSnapshot) -> None:
+        if self.max_entries <= 0:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        if payload.exp is not None:
+            expires_at = min(expires_at, payload.exp)
+        key = _token_key(token)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (expires_at, payload, user)
+            self._keys_by_user.setdefault(user.id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drop every cached token that resolves to `user_id`."""
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._drop(key)
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+_token_cache: Optional[TokenCache] = None
+_token_cache_lock = threading.Lock()
+
+
+def get_token_cache() -> TokenCache:
+    """Return the process-wide cache, sized from settings on first use."""
+    global _token_cache
+    if _token_cache is None:
+        with _token_cache_lock:
+            if _token_cache is None:
+                from app.core.config import settings
+
+                _token_cache = TokenCache(
+                    max_entries=(
+                        settings.TOKEN_CACHE_MAX_ENTRIES
+                        if settings.TOKEN_CACHE_ENABLED
+                        else 0
+                    ),
+                    ttl_seconds=settings.TOKEN_CACHE_TTL_SECONDS,
+                )
+    return _token_cache
+
+
+def invalidate_user(user_id: int) -> None:
+    """Invalidation hook for the CRUD layer."""
+    get_token_cache().invalidate_user(user_id)
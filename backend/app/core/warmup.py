@@ -0,0 +1,82 @@
+"""Optional start-up warm-up (STARTUP_WARMUP).
+
+Several first-use costs otherwise land on whichever request happens to be
+first: opening pooled database connections, spawning the bcrypt pool workers
+and loading the bcrypt backend in them, importing python-jose for the first
+token, and loading the revoked-session filter. With warm-up enabled the app's
+lifespan runs all of them concurrently before the first request is accepted.
+
+Warm-up never stops the app from starting: a step that fails or does not
+finish within STARTUP_WARMUP_TIMEOUT_SECONDS is logged and the cost falls back
+to the first request that needs it.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _database() -> int:
+    from app.core.revocation import get_revoked_families
+    from app.db import session
+
+    opened = session.prefill_pool(settings.DB_POOL_SIZE)
+    get_revoked_families().refresh()
+    return opened
+
+
+async def _async_database() -> int:
+    from app.db import session
+
+    return await session.prefill_async_pool(settings.DB_POOL_SIZE)
+
+
+def _hashing() -> None:
+    from app.core.hashing import get_hashing_executor
+
+    get_hashing_executor().warm_up()
+
+
+def _tokens() -> None:
+    from app.api.deps import decode_token
+    from app.core.security import create_access_token
+
+    decode_token(create_access_token({"sub": "warm-up"}))
+
+
+async def _timed(name: str, step: Callable[[], Awaitable[Any]]) -> float:
+    started = time.perf_counter()
+    try:
+        await step()
+    except Exception as e:
+        logger.warning(f"Warm-up step {name!r} failed: {e!r}")
+    return time.perf_counter() - started
+
+
+async def warm_up() -> Dict[str, float]:
+    """Run every warm-up step concurrently; returns seconds per step."""
+    steps: Dict[str, Callable[[], Awaitable[Any]]] = {
+        "database": lambda: asyncio.to_thread(_database),
+        "hashing": lambda: asyncio.to_thread(_hashing),
+        "tokens": lambda: asyncio.to_thread(_tokens),
+    }
+    if settings.DB_ASYNC_MODE:
+        steps["async_database"] = _async_database
+    tasks = {
+        name: asyncio.ensure_future(_timed(name, step)) for name, step in steps.items()
+    }
+    done, pending = await asyncio.wait(
+        tasks.values(), timeout=settings.STARTUP_WARMUP_TIMEOUT_SECONDS
+    )
+    for name, task in tasks.items():
+        if task in pending:
+            # Threads cannot be interrupted; the step finishes in the background.
+            task.cancel()
+            logger.warning(f"Warm-up step {name!r} timed out")
+    timings = {name: task.result() for name, task in tasks.items() if task in done}
+    logger.info(f"Warm-up finished: {timings}")
+    return timings
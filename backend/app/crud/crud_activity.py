@@ -0,0 +1,36 @@
+from datetime import datetime
+from typing import Any, Dict, List
+
+from sqlalchemy import bindparam, insert, or_, update
+from sqlalchemy.orm import Session
+
+from app.db.models.audit_event import AuditEvent
+from app.db.models.user import User
+
+# One statement, executed for many rows: the driver batches the parameter
+# sets (psycopg2's execute_batch) instead of a round-trip per user.
+_LAST_LOGIN_UPDATE = (
+    update(User)
+    .where(
+        User.id == bindparam("user_id"),
+        # Never move backwards, e.g. when another process flushes late.
+        or_(User.last_login_at.is_(None), User.last_login_at < bindparam("at")),
+    )
+    .values(last_login_at=bindparam("at"))
+)
+
+
+def write_batch(
+    db: Session, *, logins: Dict[int, datetime], events: List[Dict[str, Any]]
+) -> None:
+    """Write buffered activity in one transaction: `logins` maps user id to
+    the latest login time, `events` are AuditEvent rows as dicts."""
+    if events:
+        # Rendered as multi-row INSERT ... VALUES.
+        db.execute(insert(AuditEvent), events)
+    if logins:
+        db.connection().execute(
+            _LAST_LOGIN_UPDATE,
+            [{"user_id": user_id, "at": at} for user_id, at in logins.items()],
+        )
+    db.commit()
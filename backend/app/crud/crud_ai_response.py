@@ -0,0 +1,48 @@
+from typing import Optional
+
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.db.models.ai_response import AIResponse
+from app.services.ai_provider import GenerationRequest, GenerationResult
+
+
+def get_response(db: Session, cache_key: str) -> Optional[GenerationResult]:
+    row = db.get(AIResponse, cache_key)
+    if row is None:
+        return None
+    return GenerationResult(
+        text=row.response,
+        model=row.model,
+        input_tokens=row.input_tokens,
+        output_tokens=row.output_tokens,
+        source="db",
+    )
+
+
+def save_response(
+    db: Session, request: GenerationRequest, result: GenerationResult
+) -> None:
+    """Insert the response; a concurrent insert of the same key wins silently."""
+    values = {
+        "cache_key": request.cache_key(),
+        "model": request.model,
+        "template": request.template,
+        "template_version": request.template_version,
+        "content_sha256": request.content_sha256,
+        "response": result.text,
+        "input_tokens": result.input_tokens,
+        "output_tokens": result.output_tokens,
+    }
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        db.execute(
+            dialect_insert(AIResponse)
+            .values(**values)
+            .on_conflict_do_nothing(index_elements=[AIResponse.cache_key])
+        )
+    elif db.get(AIResponse, values["cache_key"]) is None:
+        db.execute(insert(AIResponse).values(**values))
+    db.commit()
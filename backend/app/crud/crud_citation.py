@@ -0,0 +1,169 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.db.models.citation import Citation
+from app.db.models.paper import Paper
+from app.services.references import ParsedReferences, Reference
+
+KEY_BATCH_SIZE = 500
+EDGE_FETCH_SIZE = 100_000
+
+
+def _insert_ignoring_conflicts(
+    db: Session, model: type, rows: List[dict], index_elements: Sequence
+) -> None:
+    """Batched INSERT ... ON CONFLICT DO NOTHING (plain INSERT elsewhere)."""
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        db.execute(
+            dialect_insert(model).on_conflict_do_nothing(index_elements=index_elements),
+            rows,
+        )
+    else:
+        db.execute(insert(model), rows)
+
+
+def get_paper(db: Session, paper_id: int) -> Optional[Paper]:
+    return db.get(Paper, paper_id)
+
+
+def get_paper_for_sha(db: Session, sha256: str) -> Optional[Paper]:
+    return db.scalars(select(Paper).where(Paper.document_sha256 == sha256)).first()
+
+
+def get_papers(db: Session, paper_ids: Iterable[int]) -> Dict[int, Paper]:
+    ids = list(paper_ids)
+    papers: Dict[int, Paper] = {}
+    for start in range(0, len(ids), KEY_BATCH_SIZE):
+        batch = ids[start : start + KEY_BATCH_SIZE]
+        papers.update(
+            (paper.id, paper)
+            for paper in db.scalars(select(Paper).where(Paper.id.in_(batch)))
+        )
+    return papers
+
+
+def get_references(db: Session, paper_id: int) -> List[Paper]:
+    return list(
+        db.scalars(
+            select(Paper)
+            .join(Citation, Citation.cited_id == Paper.id)
+            .where(Citation.citing_id == paper_id)
+            .order_by(Citation.id)
+        )
+    )
+
+
+def _paper_ids_by_key(db: Session, references: List[Reference]) -> Dict[str, int]:
+    """Insert missing papers for `references` and return {key: id}."""
+    _insert_ignoring_conflicts(
+        db,
+        Paper,
+        [
+            {"key": r.key, "doi": r.doi, "title": r.title, "year": r.year}
+            for r in references
+        ],
+        [Paper.key],
+    )
+    keys = [r.key for r in references]
+    ids: Dict[str, int] = {}
+    for start in range(0, len(keys), KEY_BATCH_SIZE):
+        rows = db.execute(
+            select(Paper.key, Paper.id).where(
+                Paper.key.in_(keys[start : start + KEY_BATCH_SIZE])
+            )
+        )
+        ids.update((key, paper_id) for key, paper_id in rows)
+    return ids
+
+
+def ingest_references(
+    db: Session, *, sha256: str, parsed: ParsedReferences
+) -> Tuple[int, int]:
+    """Record the file's paper and its references; returns (paper id, edges
+    added).
+
+    A file with a DOI joins the paper row other documents already cite by that
+    DOI. Re-ingesting (e.g. a new version with the same DOI) replaces the
+    paper's reference list.
+    """
+    paper = get_paper_for_sha(db, sha256)
+    if paper is None:
+        key = f"doi:{parsed.doi}" if parsed.doi else f"sha256:{sha256}"
+        _insert_ignoring_conflicts(
+            db, Paper, [{"key": key, "doi": parsed.doi}], [Paper.key]
+        )
+        paper = db.scalars(select(Paper).where(Paper.key == key)).one()
+        paper.document_sha256 = sha256
+
+    ids = _paper_ids_by_key(db, parsed.references)
+    wanted = {ids[r.key] for r in parsed.references if r.key in ids} - {paper.id}
+    existing = set(
+        db.scalars(select(Citation.cited_id).where(Citation.citing_id == paper.id))
+    )
+    stale = existing - wanted
+    if stale:
+        db.execute(
+            delete(Citation).where(
+                Citation.citing_id == paper.id, Citation.cited_id.in_(stale)
+            )
+        )
+    new = sorted(wanted - existing)
+    _insert_ignoring_conflicts(
+        db,
+        Citation,
+        [{"citing_id": paper.id, "cited_id": cited_id} for cited_id in new],
+        [Citation.citing_id, Citation.cited_id],
+    )
+    db.commit()
+    return paper.id, len(new)
+
+
+def detach_document(db: Session, sha256: str) -> None:
+    """The file is gone: drop the references taken from it. The paper row
+    stays, since other papers may cite it. Does not commit."""
+    paper = get_paper_for_sha(db, sha256)
+    if paper is None:
+        return
+    db.execute(delete(Citation).where(Citation.citing_id == paper.id))
+    paper.document_sha256 = None
+
+
+def edge_watermark(db: Session) -> Tuple[int, int]:
+    """(edge count, highest edge id) of the citations table."""
+    count, max_id = db.execute(
+        select(func.count(), func.coalesce(func.max(Citation.id), 0))
+    ).one()
+    return int(count), int(max_id)
+
+
+def get_edges(
+    db: Session, *, after_id: int = 0
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(ids, citing ids, cited ids) of every edge with id > after_id."""
+    result = db.connection().execute(
+        select(Citation.id, Citation.citing_id, Citation.cited_id)
+        .where(Citation.id > after_id)
+        .order_by(Citation.id)
+    )
+    # Read the DBAPI cursor directly: building a Row per edge dominates the
+    # cost of loading a million plain integer triples.
+    cursor = result.cursor
+    batches = [np.empty((0, 3), dtype=np.int64)]
+    try:
+        while True:
+            rows = cursor.fetchmany(EDGE_FETCH_SIZE)
+            if not rows:
+                break
+            batches.append(np.array(rows, dtype=np.int64))
+    finally:
+        result.close()
+    edges = np.concatenate(batches)
+    return edges[:, 0], edges[:, 1], edges[:, 2]
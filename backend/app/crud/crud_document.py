@@ -0,0 +1,232 @@
+import re
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Row, bindparam, delete, func, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.crud import crud_citation, crud_signature
+from app.db.models.document import Document
+from app.db.models.document_chunk import TSVECTOR_CONFIG, DocumentChunk
+from app.db.models.job import Job
+
+
+class FileRemoved(Exception):
+    """The stored file was deleted by a concurrent delete; upload it again."""
+
+
+def _lock_file(db: Session, sha256: str) -> None:
+    """Serialise adding and removing documents for one file until commit.
+
+    PostgreSQL takes a transaction-level advisory lock keyed by the sha256.
+    SQLite has one writer at a time, and both callers write before they read,
+    so they are serialised already.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(
+            text("SELECT pg_advisory_xact_lock(hashtext(:sha256))"),
+            {"sha256": sha256},
+        )
+
+
+def get_document(db: Session, document_id: int) -> Optional[Document]:
+    return db.get(Document, document_id)
+
+
+def get_document_by_owner_sha(
+    db: Session, *, owner_id: int, sha256: str
+) -> Optional[Document]:
+    return db.scalars(
+        select(Document).where(Document.owner_id == owner_id, Document.sha256 == sha256)
+    ).first()
+
+
+def get_documents_by_owner(
+    db: Session, *, owner_id: int, skip: int = 0, limit: int = 100
+) -> List[Document]:
+    return list(
+        db.scalars(
+            select(Document)
+            .where(Document.owner_id == owner_id)
+            .order_by(Document.id)
+            .offset(skip)
+            .limit(limit)
+        )
+    )
+
+
+def count_documents_with_sha(db: Session, sha256: str) -> int:
+    return db.scalar(
+        select(func.count()).select_from(Document).where(Document.sha256 == sha256)
+    )
+
+
+def create_document(
+    db: Session,
+    *,
+    owner_id: int,
+    filename: str,
+    content_type: Optional[str],
+    sha256: str,
+    size_bytes: int,
+    file_exists: Optional[Callable[[str], bool]] = None,
+) -> Document:
+    """Insert a document row, or return the owner's existing row for sha256.
+
+    `file_exists` is checked once the row is written: if the last document
+    using the file was deleted meanwhile, the file may be gone, and
+    FileRemoved is raised without inserting anything.
+    """
+    existing = get_document_by_owner_sha(db, owner_id=owner_id, sha256=sha256)
+    if existing is not None:
+        return existing
+    _lock_file(db, sha256)
+    document = Document(
+        owner_id=owner_id,
+        filename=filename,
+        content_type=content_type,
+        sha256=sha256,
+        size_bytes=size_bytes,
+    )
+    db.add(document)
+    try:
+        db.flush()
+        if file_exists is not None and not file_exists(sha256):
+            db.rollback()
+            raise FileRemoved(sha256)
+        db.commit()
+    except IntegrityError:
+        # Same owner uploaded the same file concurrently; keep the winner.
+        db.rollback()
+        return get_document_by_owner_sha(db, owner_id=owner_id, sha256=sha256)
+    db.refresh(document)
+    return document
+
+
+def delete_document(
+    db: Session,
+    document: Document,
+    on_last: Optional[Callable[[str], None]] = None,
+) -> int:
+    """Delete the row and return how many documents still use its file.
+
+    Extracted chunks, extraction jobs, the references taken from the file and
+    its MinHash signature are shared per file and go with the last document,
+    in the same transaction; `on_last(sha256)` runs before it commits, to
+    remove whatever else is kept per file. Concurrent uploads of the file
+    wait, so a document is never added to a file that is being removed.
+    """
+    sha256 = document.sha256
+    _lock_file(db, sha256)
+    db.delete(document)
+    db.flush()
+    remaining = count_documents_with_sha(db, sha256)
+    if remaining == 0:
+        db.execute(delete(DocumentChunk).where(DocumentChunk.sha256 == sha256))
+        # A re-upload of the file must be extracted again.
+        db.execute(delete(Job).where(Job.sha256 == sha256))
+        crud_citation.detach_document(db, sha256)
+        crud_signature.delete_signature(db, sha256)
+        if on_last is not None:
+            on_last(sha256)
+    db.commit()
+    return remaining
+
+
+def get_owner_shas(db: Session, *, owner_id: int) -> List[str]:
+    return list(
+        db.scalars(select(Document.sha256).where(Document.owner_id == owner_id))
+    )
+
+
+def get_chunks(db: Session, sha256: str) -> List[Row]:
+    """All chunks of a stored file, in order."""
+    return db.execute(
+        select(
+            DocumentChunk.ordinal,
+            DocumentChunk.page_start,
+            DocumentChunk.page_end,
+            DocumentChunk.text,
+        )
+        .where(DocumentChunk.sha256 == sha256)
+        .order_by(DocumentChunk.ordinal)
+    ).all()
+
+
+def get_chunks_for_owner(
+    db: Session, *, owner_id: int, chunk_ids: List[int]
+) -> List[Row]:
+    """Chunks by id joined to the owner's document for the same file.
+
+    Ids of chunks that no longer exist, or whose file the owner does not have,
+    are silently dropped.
+    """
+    return db.execute(
+        select(
+            DocumentChunk.id,
+            DocumentChunk.ordinal,
+            DocumentChunk.page_start,
+            DocumentChunk.page_end,
+            DocumentChunk.text,
+            Document.id.label("document_id"),
+            Document.filename,
+        )
+        .join(Document, Document.sha256 == DocumentChunk.sha256)
+        .where(DocumentChunk.id.in_(chunk_ids), Document.owner_id == owner_id)
+    ).all()
+
+
+_FTS_TOKEN_RE = re.compile(r"\w+")
+
+# Keyword search SQL per backend; both return (chunk id, score) with higher
+# scores better. Filtering by sha256 keeps results to the caller's files.
+_POSTGRES_KEYWORD_SQL = text(
+    f"""
+    SELECT c.id, ts_rank_cd(c.text_tsv, q.query) AS score
+    FROM document_chunks AS c,
+         websearch_to_tsquery('{TSVECTOR_CONFIG}', :query) AS q(query)
+    WHERE c.text_tsv @@ q.query AND c.sha256 IN :shas
+    ORDER BY score DESC
+    LIMIT :limit
+    """
+).bindparams(bindparam("shas", expanding=True))
+_SQLITE_KEYWORD_SQL = text(
+    """
+    SELECT c.id, -document_chunks_fts.rank AS score
+    FROM document_chunks_fts
+    JOIN document_chunks AS c ON c.id = document_chunks_fts.rowid
+    WHERE document_chunks_fts MATCH :query AND c.sha256 IN :shas
+    ORDER BY document_chunks_fts.rank
+    LIMIT :limit
+    """
+).bindparams(bindparam("shas", expanding=True))
+
+
+def keyword_search(
+    db: Session, *, query: str, shas: Sequence[str], limit: int
+) -> List[Tuple[int, float]]:
+    """Full-text search over chunks of the given files, best first.
+
+    PostgreSQL ranks with ts_rank_cd over the GIN-indexed tsvector column;
+    SQLite with FTS5's BM25 (its built-in `rank`). All query words must match.
+    Cost grows with the number of matching chunks, so terms found in almost
+    every chunk are the slow case; PostgreSQL drops English stop words.
+    """
+    if not shas:
+        return []
+    if db.get_bind().dialect.name == "sqlite":
+        # Quote every token so user input cannot use FTS5 query syntax.
+        tokens = _FTS_TOKEN_RE.findall(query)
+        if not tokens:
+            return []
+        fts_query = " ".join(f'"{token}"' for token in tokens)
+        rows = db.execute(
+            _SQLITE_KEYWORD_SQL,
+            {"query": fts_query, "shas": list(shas), "limit": limit},
+        )
+    else:
+        rows = db.execute(
+            _POSTGRES_KEYWORD_SQL,
+            {"query": query, "shas": list(shas), "limit": limit},
+        )
+    return [(row.id, float(row.score)) for row in rows]
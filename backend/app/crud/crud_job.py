@@ -0,0 +1,223 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import Row, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.db.models.document import Document
+from app.db.models.document_chunk import DocumentChunk
+from app.db.models.job import (
+    JOB_FAILED,
+    JOB_KIND_EXTRACT,
+    JOB_QUEUED,
+    JOB_RUNNING,
+    JOB_SUCCEEDED,
+    Job,
+)
+from app.services.extraction import Chunk
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def get_latest_job_for_sha(db: Session, sha256: str) -> Optional[Job]:
+    return db.scalars(
+        select(Job).where(Job.sha256 == sha256).order_by(Job.id.desc()).limit(1)
+    ).first()
+
+
+def enqueue_extraction(db: Session, document: Document) -> Job:
+    """Queue text extraction for a document's file unless it is already done
+    or pending; identical files are only ever extracted once."""
+    job = get_latest_job_for_sha(db, document.sha256)
+    if job is not None and job.status != JOB_FAILED:
+        return job
+    job = Job(
+        kind=JOB_KIND_EXTRACT,
+        document_id=document.id,
+        sha256=document.sha256,
+        status=JOB_QUEUED,
+        run_after=_now(),
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def claim_jobs(db: Session, *, worker_id: str, limit: int) -> List[Row]:
+    """Atomically move up to `limit` runnable jobs to running for `worker_id`.
+
+    Returns (id, kind, sha256, attempts) rows rather than ORM objects, so they
+    stay usable after the session is closed.
+
+    On PostgreSQL the candidate rows are locked with FOR UPDATE SKIP LOCKED,
+    so concurrent workers each get a disjoint set without waiting on one
+    another. SQLite ignores the locking clause but serialises writers, which
+    gives the same guarantee for the single UPDATE.
+    """
+    now = _now()
+    candidates = (
+        select(Job.id)
+        .where(Job.status == JOB_QUEUED, Job.run_after <= now)
+        .order_by(Job.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    claimed = db.execute(
+        update(Job)
+        .where(Job.id.in_(candidates.scalar_subquery()))
+        .values(
+            status=JOB_RUNNING,
+            locked_by=worker_id,
+            locked_at=now,
+            attempts=Job.attempts + 1,
+        )
+        .returning(Job.id, Job.kind, Job.sha256, Job.attempts)
+    ).all()
+    db.commit()
+    return sorted(claimed, key=lambda job: job.id)
+
+
+def heartbeat(db: Session, *, worker_id: str, job_ids: Sequence[int]) -> None:
+    """Refresh the lock on jobs this worker is still running."""
+    if not job_ids:
+        return
+    db.execute(
+        update(Job)
+        .where(Job.id.in_(job_ids), Job.locked_by == worker_id)
+        .values(locked_at=_now())
+    )
+    db.commit()
+
+
+def complete_extraction(
+    db: Session,
+    *,
+    job_id: int,
+    worker_id: str,
+    attempts: int,
+    pages: int,
+    chunks: List[Chunk],
+    duration_seconds: float,
+) -> Optional[List[int]]:
+    """Store a job's chunks and mark it succeeded, in one transaction.
+
+    Returns the new chunk ids, in chunk order. Returns None (and writes
+    nothing) if the job is no longer locked by `worker_id`, i.e. it was
+    requeued as stale and belongs to someone else.
+    """
+    result = db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.locked_by == worker_id)
+        .values(
+            status=JOB_SUCCEEDED,
+            attempts=attempts,
+            locked_by=None,
+            pages=pages,
+            chunks=len(chunks),
+            duration_seconds=duration_seconds,
+            error=None,
+            finished_at=_now(),
+        )
+        .returning(Job.sha256)
+    )
+    sha256 = result.scalar()
+    if sha256 is None:
+        db.rollback()
+        return None
+    # Replace rather than append, so a retried or repeated job is idempotent.
+    db.execute(delete(DocumentChunk).where(DocumentChunk.sha256 == sha256))
+    chunk_ids: List[int] = []
+    if chunks:
+        chunk_ids = list(
+            db.scalars(
+                insert(DocumentChunk).returning(
+                    DocumentChunk.id, sort_by_parameter_order=True
+                ),
+                [{"sha256": sha256, **chunk._asdict()} for chunk in chunks],
+            )
+        )
+    db.commit()
+    return chunk_ids
+
+
+def fail_job(
+    db: Session,
+    *,
+    job_id: int,
+    worker_id: str,
+    attempts: int,
+    error: str,
+    retry_after: Optional[float] = None,
+) -> None:
+    """Record a failure: requeue after `retry_after` seconds, or fail for good."""
+    values: Dict[str, Any] = {"attempts": attempts, "locked_by": None, "error": error}
+    if retry_after is None:
+        values.update(status=JOB_FAILED, finished_at=_now())
+    else:
+        values.update(
+            status=JOB_QUEUED, run_after=_now() + timedelta(seconds=retry_after)
+        )
+    db.execute(
+        update(Job).where(Job.id == job_id, Job.locked_by == worker_id).values(**values)
+    )
+    db.commit()
+
+
+def requeue_stale_jobs(db: Session, *, lock_timeout: float, max_attempts: int) -> int:
+    """Release running jobs whose worker stopped heart-beating.
+
+    Jobs that have used up their attempts are failed instead of requeued.
+    Returns the number of jobs released.
+    """
+    cutoff = _now() - timedelta(seconds=lock_timeout)
+    stale = (Job.status == JOB_RUNNING, Job.locked_at < cutoff)
+    failed = db.execute(
+        update(Job)
+        .where(*stale, Job.attempts >= max_attempts)
+        .values(
+            status=JOB_FAILED,
+            locked_by=None,
+            error="Worker lost while running the job",
+            finished_at=_now(),
+        )
+    ).rowcount
+    requeued = db.execute(
+        update(Job)
+        .where(*stale)
+        .values(status=JOB_QUEUED, locked_by=None, run_after=_now())
+    ).rowcount
+    db.commit()
+    return failed + requeued
+
+
+def queue_stats(db: Session, *, window_seconds: int = 300) -> Dict[str, Any]:
+    """Queue depth by status and extraction throughput over a recent window."""
+    counts = dict(
+        db.execute(select(Job.status, func.count()).group_by(Job.status)).all()
+    )
+    since = _now() - timedelta(seconds=window_seconds)
+    jobs, pages, busy_seconds = db.execute(
+        select(
+            func.count(),
+            func.coalesce(func.sum(Job.pages), 0),
+            func.coalesce(func.sum(Job.duration_seconds), 0.0),
+        ).where(Job.status == JOB_SUCCEEDED, Job.finished_at >= since)
+    ).one()
+    return {
+        "queued": counts.get(JOB_QUEUED, 0),
+        "running": counts.get(JOB_RUNNING, 0),
+        "succeeded": counts.get(JOB_SUCCEEDED, 0),
+        "failed": counts.get(JOB_FAILED, 0),
+        "window_seconds": window_seconds,
+        "window_jobs": jobs,
+        "window_pages": pages,
+        # Cluster-wide rate over the window, and the rate of a single worker
+        # process while it is busy.
+        "pages_per_second": round(pages / window_seconds, 3),
+        "pages_per_busy_second": round(pages / busy_seconds, 3)
+        if busy_seconds
+        else 0.0,
+    }
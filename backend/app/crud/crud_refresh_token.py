@@ -0,0 +1,110 @@
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Update, delete, select, update
+from sqlalchemy.orm import Session
+
+from app.db.models.refresh_token_family import RefreshTokenFamily
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def family_expiry(days: int) -> datetime:
+    return _now() + timedelta(days=days)
+
+
+def new_family(*, user_id: int, expires_at: datetime) -> RefreshTokenFamily:
+    return RefreshTokenFamily(
+        family_id=secrets.token_hex(16),
+        user_id=user_id,
+        generation=0,
+        expires_at=expires_at,
+    )
+
+
+def create_family(db: Session, *, user_id: int, expires_at: datetime) -> str:
+    """Start a login session; returns its family id."""
+    family = new_family(user_id=user_id, expires_at=expires_at)
+    db.add(family)
+    db.commit()
+    return family.family_id
+
+
+def rotate_statement(family_id: str, generation: int, expires_at: datetime) -> Update:
+    """Advance a live family from `generation` to the next one. Matches no row
+    if the family is revoked, expired, or already past `generation`."""
+    return (
+        update(RefreshTokenFamily)
+        .where(
+            RefreshTokenFamily.family_id == family_id,
+            RefreshTokenFamily.generation == generation,
+            RefreshTokenFamily.revoked_at.is_(None),
+            RefreshTokenFamily.expires_at > _now(),
+        )
+        .values(generation=generation + 1, expires_at=expires_at)
+    )
+
+
+def rotate(
+    db: Session, *, family_id: str, generation: int, expires_at: datetime
+) -> Optional[int]:
+    """Returns the new generation, or None if the token presented was not the
+    family's current one (reused, revoked or expired)."""
+    rowcount = db.execute(rotate_statement(family_id, generation, expires_at)).rowcount
+    db.commit()
+    return generation + 1 if rowcount == 1 else None
+
+
+def revoke_statement(*where) -> Update:
+    return (
+        update(RefreshTokenFamily)
+        .where(*where, RefreshTokenFamily.revoked_at.is_(None))
+        .values(revoked_at=_now())
+        .returning(RefreshTokenFamily.family_id)
+    )
+
+
+def revoke_family(db: Session, family_id: str) -> None:
+    db.execute(revoke_statement(RefreshTokenFamily.family_id == family_id))
+    db.commit()
+
+
+def revoke_user_families(db: Session, user_id: int) -> List[str]:
+    """Revoke every live session of a user; returns their family ids. Does
+    not commit."""
+    return list(db.scalars(revoke_statement(RefreshTokenFamily.user_id == user_id)))
+
+
+def is_revoked(db: Session, family_id: str) -> bool:
+    revoked_at = db.scalar(
+        select(RefreshTokenFamily.revoked_at).where(
+            RefreshTokenFamily.family_id == family_id
+        )
+    )
+    return revoked_at is not None
+
+
+def get_revoked_since(
+    db: Session, since: Optional[datetime] = None
+) -> List[Tuple[str, datetime]]:
+    """(family id, revoked at) of families revoked at or after `since` (all
+    revoked families if None) that have not expired."""
+    query = select(RefreshTokenFamily.family_id, RefreshTokenFamily.revoked_at).where(
+        RefreshTokenFamily.revoked_at.is_not(None),
+        RefreshTokenFamily.expires_at > _now(),
+    )
+    if since is not None:
+        query = query.where(RefreshTokenFamily.revoked_at >= since)
+    return [tuple(row) for row in db.execute(query)]
+
+
+def delete_expired(db: Session) -> int:
+    """Drop families whose tokens can no longer be presented."""
+    deleted = db.execute(
+        delete(RefreshTokenFamily).where(RefreshTokenFamily.expires_at <= _now())
+    ).rowcount
+    db.commit()
+    return deleted
@@ -0,0 +1,33 @@
+"""Async counterparts of `app.crud.crud_refresh_token` for DB_ASYNC_MODE."""
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.crud_refresh_token import new_family, revoke_statement, rotate_statement
+from app.db.models.refresh_token_family import RefreshTokenFamily
+
+
+async def create_family(db: AsyncSession, *, user_id: int, expires_at: datetime) -> str:
+    family = new_family(user_id=user_id, expires_at=expires_at)
+    db.add(family)
+    await db.commit()
+    return family.family_id
+
+
+async def rotate(
+    db: AsyncSession, *, family_id: str, generation: int, expires_at: datetime
+) -> Optional[int]:
+    result = await db.execute(rotate_statement(family_id, generation, expires_at))
+    await db.commit()
+    return generation + 1 if result.rowcount == 1 else None
+
+
+async def revoke_family(db: AsyncSession, family_id: str) -> None:
+    await db.execute(revoke_statement(RefreshTokenFamily.family_id == family_id))
+    await db.commit()
+
+
+async def revoke_user_families(db: AsyncSession, user_id: int) -> List[str]:
+    result = await db.scalars(revoke_statement(RefreshTokenFamily.user_id == user_id))
+    return list(result)
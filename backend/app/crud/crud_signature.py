@@ -0,0 +1,121 @@
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import and_, delete, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.db.models.document_signature import DocumentSignature
+from app.db.models.minhash_bucket import MinHashBucket
+from app.services import minhash
+
+
+def get_signature(db: Session, sha256: str) -> Optional[DocumentSignature]:
+    return db.get(DocumentSignature, sha256)
+
+
+def get_analysis_sha(db: Session, sha256: str) -> str:
+    """The first-seen file of `sha256`'s near-duplicate group: its canonical
+    near-duplicate if it has one, else itself."""
+    canonical = db.scalar(
+        select(DocumentSignature.canonical_sha256).where(
+            DocumentSignature.sha256 == sha256
+        )
+    )
+    return canonical or sha256
+
+
+def find_similar(
+    db: Session,
+    signature: np.ndarray,
+    *,
+    threshold: float,
+    exclude_sha256: Optional[str] = None,
+    shas: Optional[Sequence[str]] = None,
+) -> List[Tuple[str, float]]:
+    """Files whose estimated Jaccard similarity to `signature` is at least
+    `threshold`, most similar first.
+
+    Only files sharing an LSH bucket are compared, so the cost depends on the
+    number of candidates rather than the number of files. `shas` restricts the
+    search (e.g. to one owner's files).
+    """
+    # OR of (band, bucket) equalities rather than a row-value IN: SQLite only
+    # turns the former into one primary-key lookup per band.
+    candidates = select(MinHashBucket.sha256).where(
+        or_(
+            *(
+                and_(MinHashBucket.band == band, MinHashBucket.bucket == bucket)
+                for band, bucket in minhash.band_buckets(signature)
+            )
+        )
+    )
+    if exclude_sha256 is not None:
+        candidates = candidates.where(MinHashBucket.sha256 != exclude_sha256)
+    if shas is not None:
+        candidates = candidates.where(MinHashBucket.sha256.in_(shas))
+    rows = db.execute(
+        select(DocumentSignature.sha256, DocumentSignature.minhash).where(
+            DocumentSignature.sha256.in_(candidates.distinct())
+        )
+    )
+    matches = []
+    for sha256, data in rows:
+        score = minhash.similarity(signature, minhash.from_bytes(data))
+        if score >= threshold:
+            matches.append((sha256, score))
+    matches.sort(key=lambda match: (-match[1], match[0]))
+    return matches
+
+
+def save_signature(
+    db: Session, *, sha256: str, signature: np.ndarray, threshold: float
+) -> Optional[Tuple[str, float]]:
+    """Store the file's signature and LSH buckets, linking it to its most
+    similar earlier file. Returns (canonical sha256, similarity) if linked.
+
+    Links always point at the first copy seen, so a preprint, its journal
+    version and a third upload all reuse the same file's passage embeddings.
+    """
+    existing = get_signature(db, sha256)
+    if existing is not None:
+        # Re-extraction of the same file; the content, and so the link,
+        # has not changed.
+        if existing.canonical_sha256 is None:
+            return None
+        return existing.canonical_sha256, existing.similarity
+
+    canonical, score = None, None
+    matches = find_similar(db, signature, threshold=threshold, exclude_sha256=sha256)
+    if matches:
+        best_sha256, score = matches[0]
+        canonical = get_analysis_sha(db, best_sha256)
+
+    db.add(
+        DocumentSignature(
+            sha256=sha256,
+            minhash=minhash.to_bytes(signature),
+            canonical_sha256=canonical,
+            similarity=score,
+        )
+    )
+    db.execute(
+        insert(MinHashBucket),
+        [
+            {"band": band, "bucket": bucket, "sha256": sha256}
+            for band, bucket in minhash.band_buckets(signature)
+        ],
+    )
+    db.commit()
+    return (canonical, score) if canonical else None
+
+
+def delete_signature(db: Session, sha256: str) -> None:
+    """Forget a removed file. Files linked to it go back to their own
+    analysis. Does not commit."""
+    db.execute(delete(MinHashBucket).where(MinHashBucket.sha256 == sha256))
+    db.execute(delete(DocumentSignature).where(DocumentSignature.sha256 == sha256))
+    db.execute(
+        update(DocumentSignature)
+        .where(DocumentSignature.canonical_sha256 == sha256)
+        .values(canonical_sha256=None, similarity=None)
+    )
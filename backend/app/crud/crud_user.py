@@ -1,13 +1,35 @@
-from typing import Any, Dict, List, Optional, Union
+from datetime import datetime
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
 
+from sqlalchemy import Row, insert, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
 
+from app.core.revocation import revoke
 from app.core.security import get_password_hash, verify_password
+from app.core.token_cache import invalidate_user
+from app.crud import crud_refresh_token
 from app.db.models.user import (
     User as UserModel,  # Alias to avoid confusion with Pydantic model
 )
+from app.schemas.user import User as UserSchema
 from app.schemas.user import UserCreate, UserUpdate
 
+# Columns backing schemas.User. List endpoints select only these, so they skip
+# hashed_password and ORM instance construction.
+USER_READ_COLUMNS = tuple(getattr(UserModel, name) for name in UserSchema.model_fields)
+
 
 def get_user(db: Session, user_id: int) -> Optional[UserModel]:
     return db.query(UserModel).filter(UserModel.id == user_id).first()
@@ -21,6 +43,95 @@ def get_users(db: Session, skip: int = 0, limit: int = 100) -> List[UserModel]:
     return db.query(UserModel).offset(skip).limit(limit).all()
 
 
+def users_page_query(
+    *,
+    limit: int = 100,
+    after: Optional[Tuple[datetime, int]] = None,
+    skip: int = 0,
+):
+    """SELECT for one page of users ordered by (created_at, id).
+
+    `after` is the (created_at, id) of the last row already seen; it turns the
+    query into an index range scan on ix_users_created_at_id, so deep pages
+    cost the same as the first one. `skip` (OFFSET) is kept only for old
+    clients and is ignored when `after` is given.
+    """
+    stmt = (
+        select(*USER_READ_COLUMNS)
+        .order_by(UserModel.created_at, UserModel.id)
+        .limit(limit)
+    )
+    if after is not None:
+        stmt = stmt.where(tuple_(UserModel.created_at, UserModel.id) > tuple_(*after))
+    elif skip:
+        stmt = stmt.offset(skip)
+    return stmt
+
+
+def get_users_page(
+    db: Session,
+    *,
+    limit: int = 100,
+    after: Optional[Tuple[datetime, int]] = None,
+    skip: int = 0,
+) -> List[Row]:
+    """One page of users as projected rows (see `users_page_query`)."""
+    return list(db.execute(users_page_query(limit=limit, after=after, skip=skip)))
+
+
+def iter_user_batches(
+    db: Session, *, batch_size: int = 1000
+) -> Iterator[Sequence[Row]]:
+    """Yield all users (projected columns, ordered by id) in batches.
+
+    Uses a server-side cursor (yield_per implies stream_results), so memory
+    stays at one batch no matter how many rows the table has.
+    """
+    stmt = (
+        select(*USER_READ_COLUMNS)
+        .order_by(UserModel.id)
+        .execution_options(yield_per=batch_size)
+    )
+    yield from db.execute(stmt).partitions()
+
+
+def get_existing_emails(db: Session, emails: Iterable[str]) -> Set[str]:
+    """Return the subset of `emails` that already belong to a user (one query)."""
+    emails = list(emails)
+    if not emails:
+        return set()
+    return set(db.scalars(select(UserModel.email).where(UserModel.email.in_(emails))))
+
+
+def bulk_insert_users(db: Session, rows: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Insert pre-hashed user rows in one batched statement; does not commit.
+
+    Uses INSERT ... ON CONFLICT (email) DO NOTHING RETURNING on PostgreSQL and
+    SQLite, so rows that raced in concurrently are skipped rather than failing
+    the batch. Returns {email: id} for the rows actually inserted.
+    """
+    if not rows:
+        return {}
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = (
+            dialect_insert(UserModel)
+            .on_conflict_do_nothing(index_elements=[UserModel.email])
+            .returning(UserModel.id, UserModel.email)
+        )
+        return {row.email: row.id for row in db.execute(stmt, rows)}
+    # Other backends: plain executemany, then read the ids back.
+    db.execute(insert(UserModel), rows)
+    emails = [row["email"] for row in rows]
+    return {
+        row.email: row.id
+        for row in db.execute(
+            select(UserModel.id, UserModel.email).where(UserModel.email.in_(emails))
+        )
+    }
+
+
 def authenticate(db: Session, *, email: str, password: str) -> Optional[UserModel]:
     """Authenticate a user by email and password."""
     user = get_user_by_email(db, email=email)
@@ -76,12 +187,21 @@ def update_user(
     for field, value in update_data.items():
         setattr(user_to_update, field, value)
 
+    # A new password or deactivation ends every existing login session.
+    revoked_families: List[str] = []
+    if "hashed_password" in update_data or update_data.get("is_active") is False:
+        revoked_families = crud_refresh_token.revoke_user_families(
+            db, user_to_update.id
+        )
+
     # user_to_update is already persistent and managed by 'db' (because it was queried from it).
     # Changes made via setattr are tracked by SQLAlchemy's unit of work.
     db.commit()  # Commits changes made to user_to_update
     db.refresh(
         user_to_update
     )  # Refreshes user_to_update with its state from the DB after commit
+    invalidate_user(user_to_update.id)  # Drop cached tokens for this user
+    revoke(revoked_families)
     return user_to_update
 
 
@@ -90,4 +210,5 @@ def delete_user(db: Session, *, user_id: int) -> Optional[UserModel]:
     if db_obj:
         db.delete(db_obj)
         db.commit()
+        invalidate_user(user_id)
     return db_obj
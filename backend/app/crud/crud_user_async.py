@@ -0,0 +1,120 @@
+"""Async counterparts of `app.crud.crud_user` for DB_ASYNC_MODE.
+
+Function names and signatures mirror the sync module; the only difference is
+that they take an `AsyncSession` and must be awaited.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from sqlalchemy import Row, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.revocation import revoke
+from app.core.security import get_password_hash_async, verify_password_async
+from app.core.token_cache import invalidate_user
+from app.crud import crud_refresh_token_async
+from app.crud.crud_user import users_page_query
+from app.db.models.user import User as UserModel
+from app.schemas.user import UserCreate, UserUpdate
+
+
+async def get_user(db: AsyncSession, user_id: int) -> Optional[UserModel]:
+    return await db.get(UserModel, user_id)
+
+
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[UserModel]:
+    result = await db.execute(select(UserModel).where(UserModel.email == email))
+    return result.scalars().first()
+
+
+async def get_users(
+    db: AsyncSession, skip: int = 0, limit: int = 100
+) -> List[UserModel]:
+    result = await db.execute(select(UserModel).offset(skip).limit(limit))
+    return list(result.scalars().all())
+
+
+async def get_users_page(
+    db: AsyncSession,
+    *,
+    limit: int = 100,
+    after: Optional[Tuple[datetime, int]] = None,
+    skip: int = 0,
+) -> List[Row]:
+    result = await db.execute(users_page_query(limit=limit, after=after, skip=skip))
+    return list(result)
+
+
+async def authenticate(
+    db: AsyncSession, *, email: str, password: str
+) -> Optional[UserModel]:
+    """Authenticate a user by email and password."""
+    user = await get_user_by_email(db, email=email)
+    if not user:
+        return None
+    if not await verify_password_async(password, user.hashed_password):
+        return None
+    return user
+
+
+async def create_user(db: AsyncSession, *, obj_in: UserCreate) -> UserModel:
+    db_obj = UserModel(
+        email=obj_in.email,
+        hashed_password=await get_password_hash_async(obj_in.password),
+        full_name=obj_in.full_name,
+        is_superuser=obj_in.is_superuser,
+        is_active=obj_in.is_active,
+    )
+    db.add(db_obj)
+    await db.commit()
+    await db.refresh(db_obj)
+    return db_obj
+
+
+async def update_user(
+    db: AsyncSession,
+    *,
+    db_obj: UserModel,
+    obj_in: Union[UserUpdate, Dict[str, Any]],
+) -> UserModel:
+    if isinstance(obj_in, dict):
+        update_data = obj_in
+    else:
+        update_data = obj_in.model_dump(exclude_unset=True)
+
+    if "password" in update_data and update_data["password"]:
+        hashed_password = await get_password_hash_async(update_data["password"])
+        del update_data["password"]
+        update_data["hashed_password"] = hashed_password
+
+    # Re-load within this session, same as the sync version does.
+    user_to_update = await db.get(UserModel, db_obj.id)
+    if not user_to_update:
+        raise Exception(
+            f"Critical error: User with ID {db_obj.id} (from authenticated user) "
+            "not found in current DB session during update."
+        )
+
+    for field, value in update_data.items():
+        setattr(user_to_update, field, value)
+
+    revoked_families: List[str] = []
+    if "hashed_password" in update_data or update_data.get("is_active") is False:
+        revoked_families = await crud_refresh_token_async.revoke_user_families(
+            db, user_to_update.id
+        )
+
+    await db.commit()
+    await db.refresh(user_to_update)
+    invalidate_user(user_to_update.id)
+    revoke(revoked_families)
+    return user_to_update
+
+
+async def delete_user(db: AsyncSession, *, user_id: int) -> Optional[UserModel]:
+    db_obj = await db.get(UserModel, user_id)
+    if db_obj:
+        await db.delete(db_obj)
+        await db.commit()
+        invalidate_user(user_id)
+    return db_obj
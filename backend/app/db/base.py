@@ -1,7 +1,19 @@
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.sql.functions import now
 
 Base = declarative_base()
 
+
+@compiles(now, "sqlite")
+def _sqlite_now(element, compiler, **kw):
+    # SQLite's CURRENT_TIMESTAMP has whole seconds, while SQLAlchemy writes and
+    # binds DATETIME text with microseconds. Compared as text, a server default
+    # sorts before a bound value of the same second, which breaks keyset
+    # cursors such as (created_at, id). Use the same format for both.
+    return "STRFTIME('%Y-%m-%d %H:%M:%f000', 'now')"
+
+
 # You can also define a common base class for all your models here if needed,
 # for example, to add common columns like id, created_at, updated_at.
 # Example:
@@ -1,6 +1,16 @@
 # This file makes the 'models' directory a Python package.
 # Use this to import all models for Alembic or other app parts.
 
+from .ai_response import AIResponse  # noqa: F401
+from .audit_event import AuditEvent  # noqa: F401
+from .citation import Citation  # noqa: F401
+from .document import Document  # noqa: F401
+from .document_chunk import DocumentChunk  # noqa: F401
+from .document_signature import DocumentSignature  # noqa: F401
+from .job import Job  # noqa: F401
+from .minhash_bucket import MinHashBucket  # noqa: F401
+from .paper import Paper  # noqa: F401
+from .refresh_token_family import RefreshTokenFamily  # noqa: F401
 from .user import User  # noqa: F401
 
 # Add other model imports here as they are created
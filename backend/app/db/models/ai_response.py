@@ -0,0 +1,27 @@
+from sqlalchemy import Column, DateTime, Integer, String, Text
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class AIResponse(Base):
+    """Persistent tier of the AI response cache (see app.services.ai_cache)."""
+
+    __tablename__ = "ai_responses"
+
+    # sha256 of (content hash, template, template version, model, params)
+    cache_key = Column(String(64), primary_key=True)
+    model = Column(String(100), nullable=False)
+    template = Column(String(100), nullable=False)
+    template_version = Column(Integer, nullable=False)
+    content_sha256 = Column(String(64), index=True, nullable=False)
+    response = Column(Text, nullable=False)
+    input_tokens = Column(Integer, nullable=False, default=0)
+    output_tokens = Column(Integer, nullable=False, default=0)
+
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    def __repr__(self):
+        return f"<AIResponse(key='{self.cache_key[:12]}', template='{self.template}')>"
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, DateTime, Integer, String
+
+from app.db.base import Base
+
+
+class AuditEvent(Base):
+    """A change to a user account: profile update, password change, deletion.
+
+    Rows are written in batches by the activity buffer (app.services.activity),
+    after the request that caused them, so `created_at` is the time of the
+    change rather than a server default. `user_id` has no foreign key: the
+    trail outlives the account.
+    """
+
+    __tablename__ = "audit_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, index=True, nullable=False)
+    # The authenticated user who made the change.
+    actor_id = Column(Integer, nullable=True)
+    action = Column(String(32), index=True, nullable=False)
+    # e.g. the names (never the values) of the fields that were updated.
+    detail = Column(String(255), nullable=True)
+    ip = Column(String(45), nullable=True)
+    created_at = Column(DateTime(timezone=True), index=True, nullable=False)
+
+    def __repr__(self):
+        return f"<AuditEvent(id={self.id}, action='{self.action}')>"
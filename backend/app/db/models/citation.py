@@ -0,0 +1,24 @@
+from sqlalchemy import BigInteger, Column, ForeignKey, Integer, UniqueConstraint
+
+from app.db.base import Base
+
+
+class Citation(Base):
+    """A citing -> cited edge. The monotonically increasing id lets the
+    in-memory graph (app.services.citation_graph) load only new edges."""
+
+    __tablename__ = "citations"
+    __table_args__ = (
+        UniqueConstraint("citing_id", "cited_id", name="uq_citations_citing_cited"),
+    )
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    citing_id = Column(
+        Integer, ForeignKey("papers.id", ondelete="CASCADE"), nullable=False
+    )
+    cited_id = Column(
+        Integer, ForeignKey("papers.id", ondelete="CASCADE"), index=True, nullable=False
+    )
+
+    def __repr__(self):
+        return f"<Citation({self.citing_id} -> {self.cited_id})>"
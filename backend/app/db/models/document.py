@@ -0,0 +1,39 @@
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    ForeignKey,
+    Integer,
+    String,
+    UniqueConstraint,
+)
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class Document(Base):
+    """An uploaded paper. The file itself is stored once per sha256 (see
+    app.services.storage); each owner gets their own row pointing at it."""
+
+    __tablename__ = "documents"
+    __table_args__ = (
+        # Re-uploading the same file returns the existing document.
+        UniqueConstraint("owner_id", "sha256", name="uq_documents_owner_sha256"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False
+    )
+    filename = Column(String(255), nullable=False)
+    content_type = Column(String(255), nullable=True)
+    sha256 = Column(String(64), index=True, nullable=False)
+    size_bytes = Column(BigInteger, nullable=False)
+
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    def __repr__(self):
+        return f"<Document(id={self.id}, sha256='{self.sha256[:12]}')>"
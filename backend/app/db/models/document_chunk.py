@@ -0,0 +1,70 @@
+from sqlalchemy import DDL, Column, Integer, String, Text, UniqueConstraint, event
+
+from app.db.base import Base
+
+# Keyword search index. Not mapped as ORM columns because the two backends
+# differ: PostgreSQL gets a generated tsvector column with a GIN index, SQLite
+# (local development) an external-content FTS5 table kept in sync by triggers.
+# The same DDL is applied by migration 9d3e6a1f4b27 and, for create_all(), by
+# the events below.
+TSVECTOR_CONFIG = "english"
+POSTGRES_FTS_DDL = (
+    "ALTER TABLE document_chunks ADD COLUMN IF NOT EXISTS text_tsv tsvector "
+    f"GENERATED ALWAYS AS (to_tsvector('{TSVECTOR_CONFIG}', text)) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_document_chunks_text_tsv "
+    "ON document_chunks USING GIN (text_tsv)",
+)
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS document_chunks_fts USING fts5("
+    "text, content='document_chunks', content_rowid='id', "
+    "tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS document_chunks_fts_ai AFTER INSERT ON "
+    "document_chunks BEGIN INSERT INTO document_chunks_fts(rowid, text) "
+    "VALUES (new.id, new.text); END",
+    "CREATE TRIGGER IF NOT EXISTS document_chunks_fts_ad AFTER DELETE ON "
+    "document_chunks BEGIN INSERT INTO document_chunks_fts"
+    "(document_chunks_fts, rowid, text) VALUES ('delete', old.id, old.text); END",
+    "CREATE TRIGGER IF NOT EXISTS document_chunks_fts_au AFTER UPDATE ON "
+    "document_chunks BEGIN INSERT INTO document_chunks_fts"
+    "(document_chunks_fts, rowid, text) VALUES ('delete', old.id, old.text); "
+    "INSERT INTO document_chunks_fts(rowid, text) VALUES (new.id, new.text); END",
+)
+
+
+class DocumentChunk(Base):
+    """A passage of extracted text. Chunks belong to the stored file (sha256),
+    so every document with the same content shares them."""
+
+    __tablename__ = "document_chunks"
+    __table_args__ = (
+        UniqueConstraint("sha256", "ordinal", name="uq_document_chunks_sha256_ordinal"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), index=True, nullable=False)
+    ordinal = Column(Integer, nullable=False)  # 0-based position in the file
+    page_start = Column(Integer, nullable=False)  # 1-based, inclusive
+    page_end = Column(Integer, nullable=False)
+    text = Column(Text, nullable=False)
+
+    def __repr__(self):
+        return f"<DocumentChunk(sha256='{self.sha256[:12]}', ordinal={self.ordinal})>"
+
+
+for _statement in POSTGRES_FTS_DDL:
+    event.listen(
+        DocumentChunk.__table__,
+        "after_create",
+        DDL(_statement).execute_if(dialect="postgresql"),
+    )
+for _statement in SQLITE_FTS_DDL:
+    event.listen(
+        DocumentChunk.__table__,
+        "after_create",
+        DDL(_statement).execute_if(dialect="sqlite"),
+    )
+event.listen(
+    DocumentChunk.__table__,
+    "after_drop",
+    DDL("DROP TABLE IF EXISTS document_chunks_fts").execute_if(dialect="sqlite"),
+)
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, DateTime, Float, LargeBinary, String
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class DocumentSignature(Base):
+    """MinHash signature of a stored file (see app.services.minhash), and the
+    earlier file it was found to be a near-duplicate of, if any."""
+
+    __tablename__ = "document_signatures"
+
+    sha256 = Column(String(64), primary_key=True)
+    # NUM_PERM little-endian uint32 values
+    minhash = Column(LargeBinary, nullable=False)
+    # The earlier file this one was linked to; passages with identical text
+    # reuse its stored embeddings.
+    canonical_sha256 = Column(String(64), index=True, nullable=True)
+    similarity = Column(Float, nullable=True)
+
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    def __repr__(self):
+        return f"<DocumentSignature(sha256='{self.sha256[:12]}')>"
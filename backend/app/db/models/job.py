@@ -0,0 +1,51 @@
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+JOB_KIND_EXTRACT = "extract"
+
+
+class Job(Base):
+    """A unit of background work, claimed by workers (see crud_job.claim_jobs).
+
+    Extraction jobs are keyed by the file's sha256 rather than the document,
+    since identical uploads share one stored file and one set of chunks.
+    """
+
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Claim order: oldest runnable job first.
+        Index("ix_jobs_status_run_after_id", "status", "run_after", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(50), nullable=False)
+    document_id = Column(
+        Integer, ForeignKey("documents.id", ondelete="SET NULL"), nullable=True
+    )
+    sha256 = Column(String(64), index=True, nullable=False)
+    status = Column(String(20), nullable=False, default=JOB_QUEUED)
+    attempts = Column(Integer, nullable=False, default=0)
+    run_after = Column(DateTime(timezone=True), server_default=func.now())
+    locked_by = Column(String(255), nullable=True)
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    error = Column(Text, nullable=True)
+
+    # Filled in on success; pages / duration_seconds is the extraction rate.
+    pages = Column(Integer, nullable=True)
+    chunks = Column(Integer, nullable=True)
+    duration_seconds = Column(Float, nullable=True)
+
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<Job(id={self.id}, kind='{self.kind}', status='{self.status}')>"
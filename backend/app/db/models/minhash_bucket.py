@@ -0,0 +1,17 @@
+from sqlalchemy import BigInteger, Column, SmallInteger, String
+
+from app.db.base import Base
+
+
+class MinHashBucket(Base):
+    """LSH index: one row per (band, bucket) of each file's signature. Files
+    sharing any row are near-duplicate candidates."""
+
+    __tablename__ = "minhash_buckets"
+
+    band = Column(SmallInteger, primary_key=True)
+    bucket = Column(BigInteger, primary_key=True)
+    sha256 = Column(String(64), primary_key=True, index=True)
+
+    def __repr__(self):
+        return f"<MinHashBucket(band={self.band}, sha256='{self.sha256[:12]}')>"
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, DateTime, Integer, String
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class Paper(Base):
+    """A work in the citation graph: an ingested document or something one
+    cites. `key` identifies the work across documents ("doi:..." or
+    "title:<normalised title>", see app.services.references; "sha256:..." for
+    an ingested file without a DOI)."""
+
+    __tablename__ = "papers"
+
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String(512), unique=True, nullable=False)
+    doi = Column(String(255), nullable=True)
+    title = Column(String(500), nullable=True)
+    year = Column(Integer, nullable=True)
+    # Set when the paper's own PDF has been ingested.
+    document_sha256 = Column(String(64), index=True, nullable=True)
+
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    def __repr__(self):
+        return f"<Paper(id={self.id}, key='{self.key[:40]}')>"
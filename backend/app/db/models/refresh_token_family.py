@@ -0,0 +1,34 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class RefreshTokenFamily(Base):
+    """One login session: the chain of refresh tokens rotated from a single
+    password login (see crud_refresh_token).
+
+    Only the current generation is stored, not the tokens. A refresh token
+    from an older generation means the chain was copied, and the family is
+    revoked; `revoked_at` also ends the access tokens issued from it.
+    """
+
+    __tablename__ = "refresh_token_families"
+
+    family_id = Column(String(32), primary_key=True)
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False
+    )
+    generation = Column(Integer, nullable=False, default=0)
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    # Pushed forward on every rotation; expired rows are purged.
+    expires_at = Column(DateTime(timezone=True), index=True, nullable=False)
+    revoked_at = Column(DateTime(timezone=True), index=True, nullable=True)
+
+    def __repr__(self):
+        return (
+            f"<RefreshTokenFamily(family_id='{self.family_id}', "
+            f"generation={self.generation})>"
+        )
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, DateTime, Integer, String
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, String
 from sqlalchemy.sql import func  # For server-side default timestamps
 
 from app.db.base import Base  # Import the Base from base.py
@@ -6,6 +6,10 @@ from app.db.base import Base  # Import the Base from base.py
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Keyset pagination order for GET /users/ (see crud_user.users_page_query)
+        Index("ix_users_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True, nullable=False)
@@ -15,8 +19,13 @@ class User(Base):
     is_active = Column(Boolean(), default=True)
     is_superuser = Column(Boolean(), default=False)
 
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Written behind the login request by app.services.activity, so it can
+    # trail the latest login by up to ACTIVITY_FLUSH_SECONDS.
+    last_login_at = Column(DateTime(timezone=True), nullable=True)
 
     # If you add relationships later, they would go here, e.g.:
     # items = relationship("Item", back_populates="owner")
@@ -0,0 +1,158 @@
+"""Connection pool instrumentation and the idle pre-ping strategy.
+
+`PoolMetrics.instrument(engine)` hooks SQLAlchemy pool events to track
+checkouts, in-use connections, overflow usage and how long callers waited for
+a connection. Wait time is measured around `Pool._do_get`, which is where a
+caller blocks when the pool is saturated, so engines must be created with the
+pool class returned by `PoolMetrics.pool_class`.
+"""
+import threading
+import time
+from typing import Any, Dict, Type
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+# Upper bounds (milliseconds) of the checkout wait histogram buckets.
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class PoolMetrics:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self._engine: Any = None
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.peak_overflow = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self._wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def pool_class(self, base: Type[Pool]) -> Type[Pool]:
+        """Subclass `base` so checkout wait time is recorded on this object.
+
+        The metrics live on the class, so they survive `Pool.recreate()`
+        (e.g. after `engine.dispose()`).
+        """
+        metrics = self
+
+        def _do_get(pool: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return base._do_get(pool)
+            except exc.TimeoutError:
+                metrics._record_timeout()
+                raise
+            finally:
+                metrics._record_wait((time.perf_counter() - started) * 1000)
+
+        return type(f"Instrumented{base.__name__}", (base,), {"_do_get": _do_get})
+
+    def instrument(self, engine: Engine) -> None:
+        """Attach pool event listeners to a sync engine (or AsyncEngine.sync_engine)."""
+        self._engine = engine
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "invalidate", self._on_invalidate)
+
+    def _record_wait(self, wait_ms: float) -> None:
+        with self._lock:
+            self.wait_total_ms += wait_ms
+            self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+            for i, bound in enumerate(WAIT_BUCKETS_MS):
+                if wait_ms <= bound:
+                    self._wait_buckets[i] += 1
+                    break
+            else:
+                self._wait_buckets[-1] += 1
+
+    def _record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def _on_connect(self, dbapi_conn: Any, record: Any) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_conn: Any, record: Any, proxy: Any) -> None:
+        pool = self._engine.pool
+        overflow = pool.overflow() if hasattr(pool, "overflow") else 0
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+            self.peak_overflow = max(self.peak_overflow, overflow)
+
+    def _on_checkin(self, dbapi_conn: Any, record: Any) -> None:
+        with self._lock:
+            self.checkins += 1
+            self.in_use = max(0, self.in_use - 1)
+
+    def _on_invalidate(self, dbapi_conn: Any, record: Any, exception: Any) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        # Read through the engine: dispose() swaps in a new pool instance.
+        pool = self._engine.pool if self._engine is not None else None
+        with self._lock:
+            waits = sum(self._wait_buckets)
+            buckets: Dict[str, int] = {}
+            running = 0
+            for bound, count in zip(WAIT_BUCKETS_MS, self._wait_buckets):
+                running += count
+                buckets[f"le_{bound}ms"] = running
+            buckets["le_inf"] = waits
+            return {
+                "name": self.name,
+                "pool_class": type(pool).__name__ if pool is not None else None,
+                "size": pool.size() if hasattr(pool, "size") else None,
+                "checked_in": pool.checkedin() if hasattr(pool, "checkedin") else None,
+                "checked_out": self.in_use,
+                "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+                "peak_checked_out": self.peak_in_use,
+                "peak_overflow": self.peak_overflow,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": self.wait_total_ms / waits if waits else 0.0,
+                "wait_max_ms": self.wait_max_ms,
+                "wait_buckets": buckets,
+            }
+
+
+def install_idle_pre_ping(engine: Engine, idle_seconds: float) -> None:
+    """Ping a connection on checkout only if it sat idle for `idle_seconds`.
+
+    `pool_pre_ping=True` costs a round-trip on every checkout; connections that
+    were just returned to a busy pool are almost never stale, so only the idle
+    ones are checked. A failed ping raises DisconnectionError, which makes the
+    pool discard the connection and retry with a fresh one.
+    """
+
+    @event.listens_for(engine, "checkin")
+    def _stamp_checkin(dbapi_conn: Any, record: Any) -> None:
+        record.info["last_checkin"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _ping_if_idle(dbapi_conn: Any, record: Any, proxy: Any) -> None:
+        last_checkin = record.info.get("last_checkin")
+        if last_checkin is None or time.monotonic() - last_checkin < idle_seconds:
+            return
+        cursor = dbapi_conn.cursor()
+        try:
+            cursor.execute("SELECT 1")
+        except Exception as e:
+            raise exc.DisconnectionError(f"Idle connection failed pre-ping: {e}")
+        finally:
+            cursor.close()
@@ -0,0 +1,349 @@
+"""Read replica routing.
+
+Read-only endpoints take their session from `deps.get_read_db` instead of
+`get_db`. With DATABASE_REPLICA_URLS set, that session is opened on a replica
+picked by DB_REPLICA_BALANCING: "round_robin", or "least_connections" (the
+replica with the fewest connections checked out of its pool). Writes, and the
+authentication lookup, always use the primary.
+
+A background thread checks every replica each DB_REPLICA_CHECK_SECONDS. A
+replica that cannot be reached, or (PostgreSQL) is more than
+DB_REPLICA_MAX_LAG_SECONDS behind the primary, is skipped until a later check
+passes. When no replica qualifies, reads go to the primary.
+
+Read-your-writes: `ReadYourWritesMiddleware` pins a client's reads to the
+primary for DB_READ_YOUR_WRITES_SECONDS after each successful write request
+(any method but GET, HEAD and OPTIONS). The pin is kept in a cookie, which
+every API process honours, and in this process keyed by the requesting user,
+for clients that do not keep cookies.
+"""
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.requests import Request
+
+from app.db.pool_metrics import PoolMetrics
+
+logger = logging.getLogger(__name__)
+
+BALANCING = ("round_robin", "least_connections")
+PIN_COOKIE = "read_primary_until"
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# Replay lag in seconds, or 0 when the replica has replayed everything it has
+# received (pg_last_xact_replay_timestamp alone keeps growing while the
+# primary is idle).
+_PG_LAG_SQL = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery()"
+    " OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+def measure_lag(engine: Engine) -> float:
+    """Seconds the replica behind `engine` trails its primary. Other databases
+    only get a connectivity check and report 0."""
+    with engine.connect() as connection:
+        if engine.dialect.name == "postgresql":
+            return float(connection.execute(_PG_LAG_SQL).scalar() or 0.0)
+        connection.execute(text("SELECT 1"))
+        return 0.0
+
+
+class Replica:
+    def __init__(
+        self,
+        name: str,
+        engine: Engine,
+        async_engine: Any = None,
+        metrics: Optional[PoolMetrics] = None,
+        async_metrics: Optional[PoolMetrics] = None,
+    ) -> None:
+        self.name = name
+        self.engine = engine
+        self.session_factory = sessionmaker(
+            autocommit=False, autoflush=False, bind=engine
+        )
+        self.async_engine = async_engine
+        self.async_session_factory = (
+            async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+            if async_engine is not None
+            else None
+        )
+        self.metrics = metrics or PoolMetrics(name)
+        self.async_metrics = async_metrics
+        self.healthy = True  # until the first check says otherwise
+        self.lag: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.reads = 0
+
+    @property
+    def in_use(self) -> int:
+        in_use = self.metrics.in_use
+        if self.async_metrics is not None:
+            in_use += self.async_metrics.in_use
+        return in_use
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "url": make_url(str(self.engine.url)).render_as_string(),
+            "healthy": self.healthy,
+            "lag_seconds": self.lag,
+            "last_error": self.last_error,
+            "reads": self.reads,
+            "in_use": self.in_use,
+        }
+
+
+class ReplicaRouter:
+    def __init__(
+        self,
+        replicas: List[Replica],
+        *,
+        balancing: str = "round_robin",
+        max_lag: float = 5.0,
+        check_interval: float = 2.0,
+        pin_seconds: float = 5.0,
+        max_pins: int = 100_000,
+        lag_probe: Callable[[Engine], float] = measure_lag,
+    ) -> None:
+        if balancing not in BALANCING:
+            raise ValueError(f"Unknown replica balancing {balancing!r}")
+        self.replicas = replicas
+        self.balancing = balancing
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.pin_seconds = pin_seconds
+        self.max_pins = max_pins
+        self.lag_probe = lag_probe
+        self._round_robin = itertools.count()
+        self._pins: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.primary_reads = 0
+        self.pinned_reads = 0
+        self.failover_reads = 0
+        self.checks = 0
+
+    def choose(self, *, pinned: bool = False) -> Optional[Replica]:
+        """The replica to read from, or None for the primary."""
+        if not self.replicas:
+            return None
+        if pinned:
+            with self._lock:
+                self.pinned_reads += 1
+                self.primary_reads += 1
+            return None
+        candidates = [replica for replica in self.replicas if replica.healthy]
+        if not candidates:
+            with self._lock:
+                self.failover_reads += 1
+                self.primary_reads += 1
+            return None
+        if self.balancing == "least_connections":
+            replica = min(candidates, key=lambda replica: replica.in_use)
+        else:
+            replica = candidates[next(self._round_robin) % len(candidates)]
+        with self._lock:
+            replica.reads += 1
+        return replica
+
+    # Health and lag
+
+    def check(self) -> None:
+        """Probe every replica once. Blocks on the network."""
+        for replica in self.replicas:
+            try:
+                lag = self.lag_probe(replica.engine)
+            except Exception as e:
+                replica.lag, replica.last_error = None, repr(e)
+                healthy = False
+            else:
+                replica.lag, replica.last_error = lag, None
+                healthy = lag <= self.max_lag
+            if healthy != replica.healthy:
+                logger.log(
+                    logging.INFO if healthy else logging.WARNING,
+                    f"Read replica {replica.name} is "
+                    f"{'back in rotation' if healthy else 'out of rotation'} "
+                    f"(lag={replica.lag}, error={replica.last_error})",
+                )
+            replica.healthy = healthy
+        self.checks += 1
+
+    def start(self) -> None:
+        """Check the replicas now, then keep checking in a daemon thread."""
+        if not self.replicas or self._thread is not None:
+            return
+        self.check()
+        self._thread = threading.Thread(
+            target=self._run, name="replica-checks", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.check_interval):
+            try:
+                self.check()
+            except Exception:  # never let the checker die
+                logger.exception("Read replica check failed")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.check_interval + 1)
+            self._thread = None
+        for replica in self.replicas:
+            replica.engine.dispose()
+            if replica.async_engine is not None:
+                # Pooled async connections are dropped without awaiting.
+                replica.async_engine.sync_engine.dispose(close=False)
+
+    # Read-your-writes pins kept in this process
+
+    def pin(self, key: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._pins[key] = now + self.pin_seconds
+            if len(self._pins) > self.max_pins:
+                self._pins = {k: t for k, t in self._pins.items() if t > now}
+
+    def is_pinned(self, key: str) -> bool:
+        until = self._pins.get(key)
+        return until is not None and until > time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pins = len(self._pins)
+        return {
+            "balancing": self.balancing,
+            "replicas": {replica.name: replica.stats() for replica in self.replicas},
+            "healthy": sum(replica.healthy for replica in self.replicas),
+            "replica_reads": sum(replica.reads for replica in self.replicas),
+            "primary_reads": self.primary_reads,
+            "pinned_reads": self.pinned_reads,
+            "failover_reads": self.failover_reads,
+            "pins": pins,
+            "checks": self.checks,
+        }
+
+
+def pinned_by_cookie(request: Request) -> bool:
+    value = request.cookies.get(PIN_COOKIE)
+    try:
+        return value is not None and float(value) > time.time()
+    except ValueError:
+        return False
+
+
+class ReadYourWritesMiddleware:
+    """ASGI middleware pinning a client's reads to the primary after a
+    successful write. `key_func(request)` names the client for the
+    in-process pin (None: cookie only). Without `router`, the shared one is
+    looked up on first use, so adding the middleware opens no connections."""
+
+    def __init__(
+        self,
+        app: Any,
+        key_func: Callable[[Request], Optional[str]],
+        router: Optional[ReplicaRouter] = None,
+    ) -> None:
+        self.app = app
+        self.key_func = key_func
+        self._router = router
+
+    @property
+    def router(self) -> ReplicaRouter:
+        return self._router or get_replica_router()
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                seconds = self.router.pin_seconds
+                key = self.key_func(Request(scope))
+                if key is not None:
+                    self.router.pin(key)
+                cookie = (
+                    f"{PIN_COOKIE}={time.time() + seconds:.3f}; "
+                    f"Max-Age={max(1, round(seconds))}; Path=/; HttpOnly; "
+                    "SameSite=Lax"
+                )
+                headers = list(message.get("headers", []))
+                headers.append((b"set-cookie", cookie.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def build_replica(index: int, url: str, *, async_mode: bool) -> Replica:
+    """A replica with engines configured like the primary's (see
+    app.db.session)."""
+    from app.core.config import settings
+    from app.core.metrics import instrument_engine
+    from app.db.session import pool_kwargs, to_async_url
+
+    name = f"replica_{index}"
+    metrics = PoolMetrics(name)
+    engine = create_engine(
+        url, poolclass=metrics.pool_class(QueuePool), **pool_kwargs()
+    )
+    metrics.instrument(engine)
+    if settings.METRICS_ENABLED:
+        instrument_engine(engine)
+    async_engine = async_metrics = None
+    if async_mode:
+        async_metrics = PoolMetrics(f"{name}_async")
+        async_engine = create_async_engine(
+            to_async_url(url),
+            poolclass=async_metrics.pool_class(AsyncAdaptedQueuePool),
+            **pool_kwargs(),
+        )
+        async_metrics.instrument(async_engine.sync_engine)
+    return Replica(name, engine, async_engine, metrics, async_metrics)
+
+
+_router: Optional[ReplicaRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_replica_router() -> ReplicaRouter:
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                from app.core.config import settings
+
+                router = ReplicaRouter(
+                    [
+                        build_replica(i, url, async_mode=settings.DB_ASYNC_MODE)
+                        for i, url in enumerate(settings.DATABASE_REPLICA_URLS)
+                    ],
+                    balancing=settings.DB_REPLICA_BALANCING,
+                    max_lag=settings.DB_REPLICA_MAX_LAG_SECONDS,
+                    check_interval=settings.DB_REPLICA_CHECK_SECONDS,
+                    pin_seconds=settings.DB_READ_YOUR_WRITES_SECONDS,
+                )
+                router.start()
+                _router = router
+    return _router
+
+
+def stop_replica_router() -> None:
+    global _router
+    if _router is not None:
+        _router.stop()
+        _router = None
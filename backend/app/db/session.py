@@ -1,26 +1,174 @@
-from typing import Generator
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncGenerator, Dict, Generator
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 from app.core.config import settings
+from app.core.metrics import instrument_engine
+from app.db.pool_metrics import PoolMetrics, install_idle_pre_ping
 
-# Construct the database URL from settings
-# Ensure DATABASE_URL is correctly formed in your .env or config.py
-if settings.DATABASE_URL:
-    SQLALCHEMY_DATABASE_URL = str(settings.DATABASE_URL)  # Ensure string
-    engine = create_engine(SQLALCHEMY_DATABASE_URL, pool_pre_ping=True)
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-else:
-    # Fallback or error if DATABASE_URL is not set
-    # This case should ideally be handled by Pydantic validation in config.py
-    # For now, raise error or use default SQLite for testing if appropriate
-    # However, for PostgreSQL, a valid URL is essential.
-    raise ValueError("DATABASE_URL not configured in settings.")
+# Pool instrumentation, served at /meta/db-pool
+pool_metrics = PoolMetrics("primary")
+async_pool_metrics = PoolMetrics("primary_async")
+
+
+def pool_kwargs() -> Dict[str, Any]:
+    """create_engine() pool arguments from settings (shared by sync and async)."""
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING == "always",
+    }
+
+
+# The engines and session factories are built on first use (or by the app's
+# lifespan via `init_engine`), not at import: importing a module that uses
+# `session.SessionLocal` then costs no driver import, no pool and no settings.
+_LAZY_ATTRIBUTES = (
+    "engine",
+    "SessionLocal",
+    "async_engine",
+    "AsyncSessionLocal",
+    "SQLALCHEMY_DATABASE_URL",
+)
+_init_lock = threading.Lock()
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_ATTRIBUTES:
+        init_engine()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def init_engine() -> None:
+    """Create the engines and session factories from settings. Idempotent."""
+    global engine, SessionLocal, async_engine, AsyncSessionLocal
+    global SQLALCHEMY_DATABASE_URL
+    if "engine" in globals():
+        return
+    with _init_lock:
+        if "engine" in globals():
+            return
+        # Construct the database URL from settings
+        # Ensure DATABASE_URL is correctly formed in your .env or config.py
+        if not settings.DATABASE_URL:
+            # This case should ideally be handled by Pydantic validation in
+            # config.py; for PostgreSQL a valid URL is essential.
+            raise ValueError("DATABASE_URL not configured in settings.")
+        SQLALCHEMY_DATABASE_URL = str(settings.DATABASE_URL)  # Ensure string
+        sync_engine = create_engine(
+            SQLALCHEMY_DATABASE_URL,
+            poolclass=pool_metrics.pool_class(QueuePool),
+            **pool_kwargs(),
+        )
+        pool_metrics.instrument(sync_engine)
+        if settings.METRICS_ENABLED:
+            instrument_engine(sync_engine)
+        if settings.DB_POOL_PRE_PING == "idle":
+            install_idle_pre_ping(sync_engine, settings.DB_POOL_PRE_PING_IDLE_SECONDS)
+
+        # The async engine is only built in async mode so the sync deployment
+        # does not need an async driver (asyncpg/aiosqlite) installed.
+        if settings.DB_ASYNC_MODE:
+            async_engine = create_async_engine(
+                get_async_database_url(),
+                poolclass=async_pool_metrics.pool_class(AsyncAdaptedQueuePool),
+                **pool_kwargs(),
+            )
+            async_pool_metrics.instrument(async_engine.sync_engine)
+            if settings.METRICS_ENABLED:
+                instrument_engine(async_engine.sync_engine)
+            if settings.DB_POOL_PRE_PING == "idle":
+                install_idle_pre_ping(
+                    async_engine.sync_engine, settings.DB_POOL_PRE_PING_IDLE_SECONDS
+                )
+            # expire_on_commit=False: attribute access after commit would
+            # otherwise trigger implicit IO, which is not allowed on an
+            # AsyncSession.
+            AsyncSessionLocal = async_sessionmaker(
+                async_engine, autoflush=False, expire_on_commit=False
+            )
+        else:
+            async_engine = None
+            AsyncSessionLocal = None
+        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=sync_engine)
+        # Published last: its presence is what marks initialisation complete.
+        engine = sync_engine
+
+
+def prefill_pool(count: int) -> int:
+    """Open `count` pooled connections at once and return them to the pool,
+    so the first requests find them ready. Returns the number opened."""
+    init_engine()
+    with ThreadPoolExecutor(max_workers=max(1, count)) as executor:
+        futures = [executor.submit(engine.raw_connection) for _ in range(count)]
+    connections = [f.result() for f in futures if f.exception() is None]
+    for connection in connections:
+        connection.close()
+    for future in futures:
+        if future.exception() is not None:
+            raise future.exception()
+    return len(connections)
+
+
+async def prefill_async_pool(count: int) -> int:
+    """`prefill_pool` for the async engine (DB_ASYNC_MODE only)."""
+    init_engine()
+    if async_engine is None:
+        return 0
+    results = await asyncio.gather(
+        *(async_engine.connect().start() for _ in range(count)),
+        return_exceptions=True,
+    )
+    connections = [r for r in results if not isinstance(r, BaseException)]
+    for connection in connections:
+        await connection.close()
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return len(connections)
+
+
+async def dispose_engine() -> None:
+    """Close pooled connections at shutdown. The engines stay usable and
+    reconnect on demand."""
+    if "engine" not in globals():
+        return
+    engine.dispose()
+    if async_engine is not None:
+        await async_engine.dispose()
+
+
+def to_async_url(sync_url: str) -> str:
+    """The async-driver form of a URL: asyncpg for PostgreSQL, aiosqlite for
+    SQLite; other URLs are returned unchanged."""
+    url = make_url(sync_url)
+    if url.get_backend_name() == "postgresql":
+        url = url.set(drivername="postgresql+asyncpg")
+    elif url.get_backend_name() == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    return url.render_as_string(hide_password=False)
+
+
+def get_async_database_url() -> str:
+    """Return the async URL, deriving an asyncpg URL from DATABASE_URL if needed."""
+    if settings.DATABASE_URL_ASYNC:
+        return settings.DATABASE_URL_ASYNC
+    return to_async_url(str(settings.DATABASE_URL))
 
 
 # Dependency to get DB session
 def get_db() -> Generator:
+    init_engine()
     db = None
     try:
         db = SessionLocal()
@@ -28,3 +176,12 @@ def get_db() -> Generator:
     finally:
         if db:
             db.close()
+
+
+# Dependency to get an async DB session (DB_ASYNC_MODE only)
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    init_engine()
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async database session requested but DB_ASYNC_MODE is off.")
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,72 +1,139 @@
 import logging
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+
+from app.core.config import configure_logging, settings
+from app.core.hashing import HashingQueueFull, shutdown_hashing_executor
+
+# Importing this module is cheap: settings, logging, the endpoint modules and
+# the database engine are all set up by `create_app` and the lifespan. `app`
+# itself is built on first access, which is what `uvicorn app.main:app` does;
+# `uvicorn --factory app.main:create_app` works as well.
+
+logger = logging.getLogger(__name__)
 
-from app.api.v1.api import api_router as api_v1_router
-from app.core.config import settings
-
-# Initialize FastAPI app
-app = FastAPI(
-    title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json",
-    # You can add other app metadata here like version, description, etc.
-    # version="0.1.0",
-    # description="AcademiaLens API",
-)
-
-# Set up logging
-logger = logging.getLogger(settings.PROJECT_NAME)
-logger.info(f"Starting {settings.PROJECT_NAME} " f"with log level {settings.LOG_LEVEL}")
-
-# CORS Middleware - Add this before any other middleware
-if settings.BACKEND_CORS_ORIGINS:
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=settings.BACKEND_CORS_ORIGINS,
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
-        expose_headers=["*"],  # Expose all headers
-        max_age=600,  # Max CORS cache time (seconds)
-    )
-    logger.info(f"CORS enabled for origins: {settings.BACKEND_CORS_ORIGINS}")
-else:
-    # If no origins specified, allow all origins for development
-    logger.warning(
-        "No CORS origins specified - " "allowing all origins in development mode"
-    )
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=["*"],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
-    )
 
-# Include API routers
-app.include_router(api_v1_router, prefix=settings.API_V1_STR)
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    from app.db import replicas, session
+    from app.services import activity, job_events
 
+    session.init_engine()
+    if settings.DATABASE_REPLICA_URLS:
+        # Connects to and checks every replica before serving.
+        await run_in_threadpool(replicas.get_replica_router)
+    job_events.start_listener()
+    if settings.STARTUP_WARMUP:
+        from app.core.warmup import warm_up
 
-@app.on_event("startup")
-async def startup_event():
+        await warm_up()
     logger.info("Application startup complete.")
-    # You can add database connection checks or other startup logic here
-    # For example, trying to connect to the database:
-    # from app.db.session import engine
-    # try:
-    #     with engine.connect() as connection:
-    #         logger.info("Database connection successful.")
-    # except Exception as e:
-    #     logger.error(f"DB connection failed: {e}")
-
-
-@app.on_event("shutdown")
-async def shutdown_event():
+    yield
+    await job_events.stop_listener()
+    shutdown_hashing_executor()
+    # Last writes go to the primary before its engine is disposed.
+    await run_in_threadpool(activity.stop_activity_buffer)
+    replicas.stop_replica_router()
+    await session.dispose_engine()
     logger.info("Application shutdown complete.")
 
 
+async def hashing_queue_full_handler(request: Request, exc: HashingQueueFull):
+    # Shed load quickly instead of queueing behind bcrypt.
+    logger.warning(f"Rejected {request.method} {request.url.path}: {exc}")
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server busy, please retry shortly"},
+        headers={"Retry-After": str(settings.HASHING_RETRY_AFTER_SECONDS)},
+    )
+
+
 # A root endpoint for basic check (optional)
-@app.get("/", tags=["root"])
 async def read_root():
     return {"message": f"Welcome to {settings.PROJECT_NAME}"}
+
+
+def create_app() -> FastAPI:
+    configure_logging()
+    # The endpoint modules (and through them the CRUD, services and numpy)
+    # are the bulk of import time; load them only when an app is built.
+    from app.api import deps
+    from app.api.responses import FastJSONResponse
+    from app.api.v1.api import api_router as api_v1_router
+    from app.core.metrics import MetricsMiddleware
+    from app.db.replicas import ReadYourWritesMiddleware
+
+    logger.info(f"Starting {settings.PROJECT_NAME} with log level {settings.LOG_LEVEL}")
+    application = FastAPI(
+        title=settings.PROJECT_NAME,
+        openapi_url=f"{settings.API_V1_STR}/openapi.json",
+        lifespan=lifespan,
+        default_response_class=FastJSONResponse,
+        # You can add other app metadata here like version, description, etc.
+        # version="0.1.0",
+        # description="AcademiaLens API",
+    )
+
+    # CORS Middleware - Add this before any other middleware
+    if settings.BACKEND_CORS_ORIGINS:
+        application.add_middleware(
+            CORSMiddleware,
+            allow_origins=settings.BACKEND_CORS_ORIGINS,
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+            expose_headers=["*"],  # Expose all headers
+            max_age=600,  # Max CORS cache time (seconds)
+        )
+        logger.info(f"CORS enabled for origins: {settings.BACKEND_CORS_ORIGINS}")
+    else:
+        # If no origins specified, allow all origins for development
+        logger.warning(
+            "No CORS origins specified - " "allowing all origins in development mode"
+        )
+        application.add_middleware(
+            CORSMiddleware,
+            allow_origins=["*"],
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+        )
+
+    # Read-your-writes: after a write, this client reads from the primary for a
+    # few seconds (see app.db.replicas).
+    if settings.DATABASE_REPLICA_URLS:
+        application.add_middleware(
+            ReadYourWritesMiddleware, key_func=deps.read_your_writes_key
+        )
+
+    # Request metrics - added last so it is the outermost middleware and times
+    # everything, including CORS handling. /meta/metrics itself is not recorded.
+    if settings.METRICS_ENABLED:
+        application.add_middleware(
+            MetricsMiddleware, exclude_paths=[f"{settings.API_V1_STR}/meta/metrics"]
+        )
+
+    # Include API routers
+    application.include_router(api_v1_router, prefix=settings.API_V1_STR)
+    application.add_exception_handler(HashingQueueFull, hashing_queue_full_handler)
+    application.add_api_route("/", read_root, methods=["GET"], tags=["root"])
+    return application
+
+
+_app_lock = threading.Lock()
+
+
+def __getattr__(name: str) -> Any:
+    global app
+    if name == "app":
+        with _app_lock:
+            if "app" not in globals():
+                app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
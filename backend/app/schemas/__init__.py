@@ -1,10 +1,24 @@
 # This file makes the 'schemas' directory a Python package.
 # You can import schemas from here, e.g.:
-from .token import Token, TokenPayload
+from .citation import (
+    CitationNeighborhood,
+    DocumentReferences,
+    Paper,
+    PaperDetail,
+    PaperNeighbor,
+    PaperScore,
+    PaperScores,
+)
+from .document import Document, DocumentResults, NearDuplicate, NearDuplicates
+from .job import Job
+from .search import SearchHit, SearchResults
+from .token import RefreshTokenRequest, Token, TokenPayload
 from .user import (
     User,
     UserBase,
     UserCreate,
+    UserImportReport,
+    UserImportRow,
     UserInDB,
     UserInDBBase,
     UserPasswordChange,
@@ -12,11 +26,28 @@ from .user import (
 )
 
 __all__ = [
+    "CitationNeighborhood",
+    "Document",
+    "DocumentReferences",
+    "DocumentResults",
+    "Job",
+    "NearDuplicate",
+    "NearDuplicates",
+    "Paper",
+    "PaperDetail",
+    "PaperNeighbor",
+    "PaperScore",
+    "PaperScores",
+    "RefreshTokenRequest",
+    "SearchHit",
+    "SearchResults",
     "Token",
     "TokenPayload",
     "User",
     "UserBase",
     "UserCreate",
+    "UserImportReport",
+    "UserImportRow",
     "UserInDB",
     "UserInDBBase",
     "UserUpdate",
@@ -0,0 +1,48 @@
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel
+
+
+# A work in the citation graph
+class Paper(BaseModel):
+    id: int
+    key: str
+    doi: Optional[str] = None
+    title: Optional[str] = None
+    year: Optional[int] = None
+
+    model_config = {"from_attributes": True}
+
+
+class PaperDetail(Paper):
+    references_count: int
+    cited_by_count: int
+
+
+class PaperNeighbor(BaseModel):
+    paper: Paper
+    distance: int  # hops from the queried paper
+
+
+class CitationNeighborhood(BaseModel):
+    paper_id: int
+    k: int
+    direction: Literal["out", "in", "both"]
+    papers: List[PaperNeighbor]
+
+
+class PaperScore(BaseModel):
+    paper: Paper
+    score: float
+
+
+class PaperScores(BaseModel):
+    # None for graph-wide rankings (PageRank)
+    paper_id: Optional[int] = None
+    measure: Literal["co_citation", "coupling", "pagerank"]
+    papers: List[PaperScore]
+
+
+class DocumentReferences(BaseModel):
+    paper: Paper
+    references: List[Paper]
@@ -0,0 +1,46 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+# Properties to return to client
+class Document(BaseModel):
+    id: int
+    owner_id: int
+    filename: str
+    content_type: Optional[str] = None
+    sha256: str
+    size_bytes: int
+    created_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
+class NearDuplicate(BaseModel):
+    document: Document
+    similarity: float
+
+
+class NearDuplicates(BaseModel):
+    # True if this document is linked to an earlier, near-identical file:
+    # passages with the same text reuse that file's embeddings.
+    analysis_shared: bool
+    duplicates: List[NearDuplicate]
+
+
+class DocumentResults(BaseModel):
+    document_id: int
+    # The sha256 the results are stored under: the document's file, whose
+    # uploads by any user share one set of results.
+    analysis_sha256: str
+    chunk_count: int
+    # Every stored field, for discovering what can be selected.
+    available_fields: List[str]
+    # Selected document-level fields, e.g. summary.
+    document: Dict[str, Any]
+    # Selected chunk-level fields, column-wise, for chunks
+    # [chunk_start, chunk_end).
+    chunk_start: int
+    chunk_end: int
+    chunks: Dict[str, List[Any]]
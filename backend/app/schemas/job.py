@@ -0,0 +1,20 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+# Processing status of a document, polled by clients after upload
+class Job(BaseModel):
+    id: int
+    kind: str
+    status: str  # queued | running | succeeded | failed
+    attempts: int
+    error: Optional[str] = None
+    pages: Optional[int] = None
+    chunks: Optional[int] = None
+    duration_seconds: Optional[float] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    model_config = {"from_attributes": True}
@@ -0,0 +1,24 @@
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel
+
+
+# A matching passage from one of the user's documents
+class SearchHit(BaseModel):
+    document_id: int
+    filename: str
+    chunk_id: int
+    ordinal: int
+    page_start: int
+    page_end: int
+    # Fused (hybrid) or single-mode score; higher is better
+    score: float
+    semantic_score: Optional[float] = None  # cosine similarity
+    keyword_score: Optional[float] = None  # ts_rank_cd / BM25
+    text: str
+
+
+class SearchResults(BaseModel):
+    query: str
+    mode: Literal["hybrid", "semantic", "keyword"]
+    hits: List[SearchHit]
@@ -6,8 +6,16 @@ from pydantic import BaseModel
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
 
 
 class TokenPayload(BaseModel):
     sub: Optional[str] = None
-    # exp: Optional[int] = None  # Exp time, handled by JWT creation
+    exp: Optional[int] = None  # Expiry (epoch seconds), set by JWT creation
+    typ: Optional[str] = None  # "refresh" for refresh tokens, unset for access
+    fam: Optional[str] = None  # Login session (refresh token family) id
+    gen: Optional[int] = None  # Refresh token generation within the family
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Literal, Optional
 
 from pydantic import BaseModel, EmailStr, Field
 
@@ -46,3 +46,19 @@ class User(UserInDBBase):
 # Additional properties stored in DB
 class UserInDB(UserInDBBase):
     hashed_password: str
+
+
+# Per-row outcome of a bulk import (POST /users/import)
+class UserImportRow(BaseModel):
+    line: int  # 1-based record number in the uploaded file
+    email: Optional[str] = None
+    status: Literal["created", "duplicate", "invalid"]
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class UserImportReport(BaseModel):
+    created: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    rows: List[UserImportRow] = []
@@ -0,0 +1 @@
+# Business logic and services that are not tied to a single endpoint.
@@ -0,0 +1,420 @@
+"""Write-behind buffer for user activity and audit events.
+
+Recording a login time or an audit event as its own UPDATE or INSERT would
+add a write and a commit to the request that caused it. Instead
+`record_login` and `audit` add the event to an in-memory buffer and return. A
+background thread writes the buffer in one transaction once it holds
+ACTIVITY_FLUSH_SIZE events, or ACTIVITY_FLUSH_SECONDS after the last flush,
+whichever comes first: audit events as one multi-row INSERT, last-login times
+as one batched UPDATE. Logins by the same user between two flushes collapse
+into one row.
+
+Memory is bounded by ACTIVITY_MAX_PENDING events. When the database falls
+behind and the buffer is full, callers wait up to ACTIVITY_BLOCK_SECONDS for
+the flusher to make room (async callers in the threadpool, never on the event
+loop); after that the event is dropped and counted. A flush that fails
+because the database is unreachable is retried with the next one, as far as
+its events still fit. One rejected by the database itself (a data or
+integrity error) would fail again, so its rows are written one at a time and
+only the rows that fail are dropped.
+
+`close()`, called from the app's lifespan shutdown, stops accepting events and
+writes what is pending; events still in memory when a process is killed are
+lost. With ACTIVITY_WRITE_BEHIND off every event is written by its caller, in
+a transaction of its own.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+
+from app.crud import crud_activity
+
+logger = logging.getLogger(__name__)
+
+AUDIT_PROFILE_UPDATE = "profile_update"
+AUDIT_PASSWORD_CHANGE = "password_change"
+AUDIT_ACCOUNT_DELETE = "account_delete"
+
+Login = Tuple[int, datetime]
+Event = Dict[str, Any]
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class ActivityBuffer:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        *,
+        enabled: bool = True,
+        write_behind: bool = True,
+        flush_size: int = 500,
+        flush_interval: float = 1.0,
+        max_pending: int = 10_000,
+        block_seconds: float = 0.05,
+    ) -> None:
+        self.session_factory = session_factory
+        self.enabled = enabled
+        self.write_behind = write_behind
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.block_seconds = block_seconds
+        # A full buffer is flushed at once, even below flush_size.
+        self._flush_at = min(flush_size, max_pending)
+        self._logins: Dict[int, datetime] = {}
+        self._events: List[Event] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self.recorded = 0
+        self.coalesced = 0
+        self.blocked = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.flushed_events = 0
+        self.failed_flushes = 0
+        self.largest_batch = 0
+        self.last_flush_ms = 0.0
+
+    @property
+    def pending(self) -> int:
+        return len(self._logins) + len(self._events)
+
+    # Recording
+
+    def record_login(self, user_id: int, *, at: Optional[datetime] = None) -> bool:
+        """Set the user's last_login_at. Returns False if the event was
+        dropped (buffer full or closed, or recording disabled)."""
+        return self._add(self.block_seconds, login=(user_id, at or _now()))
+
+    def audit(
+        self,
+        action: str,
+        *,
+        user_id: int,
+        actor_id: Optional[int] = None,
+        detail: Optional[str] = None,
+        ip: Optional[str] = None,
+        at: Optional[datetime] = None,
+    ) -> bool:
+        """Append an AuditEvent. Returns False if the event was dropped."""
+        event = _audit_event(action, user_id, actor_id, detail, ip, at)
+        return self._add(self.block_seconds, event=event)
+
+    async def record_login_async(
+        self, user_id: int, *, at: Optional[datetime] = None
+    ) -> bool:
+        return await self._add_async(login=(user_id, at or _now()))
+
+    async def audit_async(
+        self,
+        action: str,
+        *,
+        user_id: int,
+        actor_id: Optional[int] = None,
+        detail: Optional[str] = None,
+        ip: Optional[str] = None,
+        at: Optional[datetime] = None,
+    ) -> bool:
+        event = _audit_event(action, user_id, actor_id, detail, ip, at)
+        return await self._add_async(event=event)
+
+    async def _add_async(
+        self, *, login: Optional[Login] = None, event: Optional[Event] = None
+    ) -> bool:
+        # The common case appends under a short lock. Writing (write-behind
+        # off) or waiting for room (buffer full) happens off the event loop.
+        if self.write_behind and self._has_room(login):
+            return self._add(0.0, login=login, event=event)
+        return await run_in_threadpool(
+            self._add, self.block_seconds, login=login, event=event
+        )
+
+    def _has_room(self, login: Optional[Login]) -> bool:
+        if login is not None and login[0] in self._logins:
+            return True
+        return self._closed or self.pending < self.max_pending
+
+    def _add(
+        self,
+        timeout: float,
+        *,
+        login: Optional[Login] = None,
+        event: Optional[Event] = None,
+    ) -> bool:
+        if not self.enabled:
+            return False
+        if not self.write_behind:
+            logins = dict([login]) if login is not None else {}
+            with self._cond:
+                self.recorded += 1
+            return self._flush(logins, [event] if event else [], requeue=False)
+        with self._cond:
+            if self._closed:
+                self._drop(1)
+                return False
+            if login is not None and login[0] in self._logins:
+                user_id, at = login
+                self._logins[user_id] = max(self._logins[user_id], at)
+                self.recorded += 1
+                self.coalesced += 1
+                return True
+            if self.pending >= self.max_pending:
+                self.blocked += 1
+                self._cond.notify_all()  # flush now rather than on the timer
+                if (
+                    not self._cond.wait_for(
+                        lambda: self._closed or self.pending < self.max_pending, timeout
+                    )
+                    or self._closed
+                ):
+                    self._drop(1)
+                    return False
+            if login is not None:
+                self._logins[login[0]] = login[1]
+            if event is not None:
+                self._events.append(event)
+            self.recorded += 1
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="activity-flush", daemon=True
+                )
+                self._thread.start()
+            if self.pending >= self._flush_at:
+                self._cond.notify_all()
+        return True
+
+    def _drop(self, count: int) -> None:
+        # Called with the lock held.
+        self.dropped += count
+        if (
+            self.dropped == count
+            or self.dropped // 1000 > (self.dropped - count) // 1000
+        ):
+            logger.warning(
+                f"Activity buffer full or closed: {self.dropped} events dropped"
+            )
+
+    # Flushing
+
+    def _take(self) -> Tuple[Dict[int, datetime], List[Event]]:
+        # Called with the lock held.
+        logins, events = self._logins, self._events
+        self._logins, self._events = {}, []
+        return logins, events
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._closed or self.pending >= self._flush_at,
+                    self.flush_interval,
+                )
+                closing = self._closed
+                logins, events = self._take()
+                self._cond.notify_all()  # wake callers waiting for room
+            ok = self._flush(logins, events) if logins or events else True
+            if closing:
+                return
+            if not ok:
+                # Back off instead of retrying in a tight loop.
+                with self._cond:
+                    self._cond.wait_for(lambda: self._closed, self.flush_interval)
+
+    def _flush(
+        self,
+        logins: Dict[int, datetime],
+        events: List[Event],
+        *,
+        requeue: bool = True,
+    ) -> bool:
+        count = len(logins) + len(events)
+        started = time.perf_counter()
+        try:
+            self._write(logins, events)
+        except (DataError, IntegrityError) as e:
+            logger.warning(
+                f"Writing {count} activity events failed: {e!r}; "
+                "writing them one at a time"
+            )
+            written = self._write_each(logins, events)
+            with self._cond:
+                self.failed_flushes += 1
+                self.flushed_events += written
+                if written < count:
+                    self._drop(count - written)
+            return written == count
+        except Exception as e:
+            # No traceback: while the database is down this repeats each
+            # flush interval.
+            logger.warning(f"Writing {count} activity events failed: {e!r}")
+            with self._cond:
+                self.failed_flushes += 1
+                if requeue:
+                    self._requeue(logins, events)
+                else:
+                    self._drop(count)
+            return False
+        with self._cond:
+            self.flushes += 1
+            self.flushed_events += count
+            self.largest_batch = max(self.largest_batch, count)
+            self.last_flush_ms = round((time.perf_counter() - started) * 1000, 3)
+        return True
+
+    def _write(self, logins: Dict[int, datetime], events: List[Event]) -> None:
+        with self.session_factory() as db:
+            crud_activity.write_batch(db, logins=logins, events=events)
+
+    def _write_each(self, logins: Dict[int, datetime], events: List[Event]) -> int:
+        """Write every row in a transaction of its own; returns how many were
+        written. Failures are dropped, not requeued, whatever their cause."""
+        batches = [({user_id: at}, []) for user_id, at in logins.items()]
+        batches += [({}, [event]) for event in events]
+        written = 0
+        for batch_logins, batch_events in batches:
+            try:
+                self._write(batch_logins, batch_events)
+            except Exception:
+                continue
+            written += 1
+        return written
+
+    def _requeue(self, logins: Dict[int, datetime], events: List[Event]) -> None:
+        # Called with the lock held. Failed events go back in front of newer
+        # ones; whatever no longer fits is dropped.
+        for user_id, at in logins.items():
+            if user_id in self._logins:
+                self._logins[user_id] = max(self._logins[user_id], at)
+            elif self.pending < self.max_pending:
+                self._logins[user_id] = at
+            else:
+                self._drop(1)
+        room = max(0, self.max_pending - self.pending)
+        if len(events) > room:
+            self._drop(len(events) - room)
+            events = events[:room]
+        self._events = events + self._events
+
+    def flush(self) -> bool:
+        """Write everything pending now, in the caller's thread."""
+        with self._cond:
+            logins, events = self._take()
+            self._cond.notify_all()
+        return self._flush(logins, events) if logins or events else True
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Stop accepting events and write the pending ones. Idempotent."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        # Left over if the flusher never started or its last write failed.
+        with self._cond:
+            logins, events = self._take()
+        if (logins or events) and not self._flush(logins, events, requeue=False):
+            logger.error("Final activity flush failed; pending events were lost")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "enabled": self.enabled,
+                "write_behind": self.write_behind,
+                "pending": self.pending,
+                "max_pending": self.max_pending,
+                "recorded": self.recorded,
+                "coalesced": self.coalesced,
+                "blocked": self.blocked,
+                "dropped": self.dropped,
+                "flushes": self.flushes,
+                "flushed_events": self.flushed_events,
+                "failed_flushes": self.failed_flushes,
+                "largest_batch": self.largest_batch,
+                "last_flush_ms": self.last_flush_ms,
+            }
+
+
+def update_audit_actions(
+    update_data: Dict[str, Any]
+) -> List[Tuple[str, Optional[str]]]:
+    """(action, detail) pairs for a user update: a password change, and a
+    profile update naming (not quoting) the other fields that were set."""
+    actions: List[Tuple[str, Optional[str]]] = []
+    if update_data.get("password"):
+        actions.append((AUDIT_PASSWORD_CHANGE, None))
+    profile = sorted(field for field in update_data if field != "password")
+    if profile:
+        actions.append((AUDIT_PROFILE_UPDATE, ",".join(profile)))
+    return actions
+
+
+def _audit_event(
+    action: str,
+    user_id: int,
+    actor_id: Optional[int],
+    detail: Optional[str],
+    ip: Optional[str],
+    at: Optional[datetime],
+) -> Event:
+    return {
+        "user_id": user_id,
+        "actor_id": actor_id,
+        "action": action,
+        # Cut to the column sizes; `ip` may come from X-Forwarded-For.
+        "detail": detail[:255] if detail else detail,
+        "ip": ip[:45] if ip else ip,
+        "created_at": at or _now(),
+    }
+
+
+_buffer: Optional[ActivityBuffer] = None
+_buffer_lock = threading.Lock()
+
+
+def _new_session() -> Session:
+    from app.db import session
+
+    session.init_engine()
+    return session.SessionLocal()
+
+
+def get_activity_buffer() -> ActivityBuffer:
+    """Return the process-wide buffer, creating it from settings on first use."""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                from app.core.config import settings
+
+                _buffer = ActivityBuffer(
+                    _new_session,
+                    enabled=settings.ACTIVITY_LOG_ENABLED,
+                    write_behind=settings.ACTIVITY_WRITE_BEHIND,
+                    flush_size=settings.ACTIVITY_FLUSH_SIZE,
+                    flush_interval=settings.ACTIVITY_FLUSH_SECONDS,
+                    max_pending=settings.ACTIVITY_MAX_PENDING,
+                    block_seconds=settings.ACTIVITY_BLOCK_SECONDS,
+                )
+    return _buffer
+
+
+def stop_activity_buffer() -> None:
+    """Flush and close the buffer (app shutdown)."""
+    global _buffer
+    with _buffer_lock:
+        buffer, _buffer = _buffer, None
+    if buffer is not None:
+        buffer.close()
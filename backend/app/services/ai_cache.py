@@ -0,0 +1,179 @@
+"""Content-addressed cache in front of the AI provider.
+
+Responses are keyed by `GenerationRequest.cache_key()`, a hash of (content
+sha256, prompt template and version, model, parameters), so the same paper
+analysed with the same prompt by any number of users costs one upstream call.
+
+Lookups go memory LRU -> `ai_responses` table -> provider. Concurrent
+requests for the same key within a process share one in-flight load
+(single-flight); the load is cancelled only when every caller waiting on it
+has gone away.
+"""
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Any, Dict, Optional
+
+from app.crud import crud_ai_response
+from app.services.ai_provider import AIProvider, GenerationRequest, GenerationResult
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task[GenerationResult]") -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class AIResponseCache:
+    def __init__(self, max_entries: int, persistent: bool = True) -> None:
+        self.max_entries = max_entries
+        self.persistent = persistent
+        self._entries: "OrderedDict[str, GenerationResult]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, _Flight] = {}
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.coalesced = 0
+        self.misses = 0
+        self.errors = 0
+        self.evictions = 0
+
+    # -- memory tier -------------------------------------------------------
+
+    def _memory_get(self, key: str) -> Optional[GenerationResult]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+            return result
+
+    def _memory_put(self, key: str, result: GenerationResult) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    # -- persistent tier ---------------------------------------------------
+
+    @staticmethod
+    def _db_get(key: str) -> Optional[GenerationResult]:
+        from app.db import session
+
+        with session.SessionLocal() as db:
+            return crud_ai_response.get_response(db, key)
+
+    @staticmethod
+    def _db_put(request: GenerationRequest, result: GenerationResult) -> None:
+        from app.db import session
+
+        with session.SessionLocal() as db:
+            crud_ai_response.save_response(db, request, result)
+
+    # -- lookups -----------------------------------------------------------
+
+    async def generate(
+        self, request: GenerationRequest, provider: AIProvider
+    ) -> GenerationResult:
+        """Return the cached response for `request`, calling `provider` only
+        if neither tier has it and no identical call is already running."""
+        key = request.cache_key()
+        result = self._memory_get(key)
+        if result is not None:
+            self.memory_hits += 1
+            return replace(result, source="memory")
+
+        flight = self._inflight.get(key)
+        if flight is not None and flight.task.get_loop() is asyncio.get_running_loop():
+            self.coalesced += 1
+        else:
+            flight = _Flight(asyncio.ensure_future(self._load(key, request, provider)))
+            self._inflight[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+
+        flight.waiters += 1
+        try:
+            # shield: one caller giving up must not cancel the shared load.
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+        if not flight.task.cancelled() and flight.task.exception() is not None:
+            self.errors += 1
+
+    async def _load(
+        self, key: str, request: GenerationRequest, provider: AIProvider
+    ) -> GenerationResult:
+        if self.persistent:
+            result = await asyncio.to_thread(self._db_get, key)
+            if result is not None:
+                self.db_hits += 1
+                self._memory_put(key, result)
+                return result
+        self.misses += 1
+        result = await provider.generate(request)
+        self._memory_put(key, result)
+        if self.persistent:
+            try:
+                await asyncio.to_thread(self._db_put, request, result)
+            except Exception:
+                # The caller still gets its answer; only reuse is lost.
+                logger.exception("Failed to persist AI response %s", key[:12])
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.memory_hits + self.db_hits + self.coalesced
+        total = hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "persistent": self.persistent,
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "upstream_calls": self.misses,
+            "errors": self.errors,
+            "evictions": self.evictions,
+            "in_flight": len(self._inflight),
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+        }
+
+
+_ai_cache: Optional[AIResponseCache] = None
+_ai_cache_lock = threading.Lock()
+
+
+def get_ai_cache() -> AIResponseCache:
+    """Return the process-wide cache, sized from settings on first use."""
+    global _ai_cache
+    if _ai_cache is None:
+        with _ai_cache_lock:
+            if _ai_cache is None:
+                from app.core.config import settings
+
+                _ai_cache = AIResponseCache(
+                    max_entries=settings.AI_CACHE_MAX_ENTRIES,
+                    persistent=settings.AI_CACHE_PERSISTENT,
+                )
+    return _ai_cache
@@ -0,0 +1,319 @@
+"""Rate-limited, batching client in front of the AI provider.
+
+Analysing one long paper fans out to hundreds of per-chunk model calls.
+`AIClient` sits between callers (usually `AIResponseCache`) and the provider:
+
+* requests arriving within `batch_window` seconds are grouped into one
+  `generate_batch` call when the provider supports it (micro-batching);
+* a semaphore caps the upstream calls in flight;
+* an AIMD token bucket paces calls: it halves its rate on every 429 (and
+  honours Retry-After), then creeps back up on success;
+* retryable failures are retried with full jitter via tenacity;
+* a caller that is cancelled simply drops out of its batch, and a batch whose
+  callers have all gone away is cancelled upstream.
+
+`AIClient` has the same `generate` signature as a provider, so it can be passed
+anywhere an `AIProvider` is expected.
+"""
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+from app.services.ai_provider import (
+    AIProvider,
+    GenerationRequest,
+    GenerationResult,
+    ProviderError,
+    RateLimited,
+)
+
+# A queued request and the future its caller is awaiting.
+_Pending = Tuple[GenerationRequest, "asyncio.Future[GenerationResult]"]
+
+
+class AdaptiveTokenBucket:
+    """Token bucket whose refill rate adapts to throttling (AIMD).
+
+    `on_throttle` halves the rate (down to `min_rate`), empties the bucket and
+    pauses it for `retry_after`; each `on_success` adds back `recovery` of
+    `max_rate`, so the client converges just under the provider's real limit.
+    """
+
+    def __init__(
+        self,
+        max_rate: float,
+        burst: int,
+        min_rate: float = 0.1,
+        recovery: float = 0.05,
+    ) -> None:
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, max_rate)
+        self.rate = max_rate
+        self.burst = max(1, burst)
+        self.recovery = recovery
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+        self.throttles = 0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        # The lock makes waiters queue in order instead of all waking at once.
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+                await asyncio.sleep(wait)
+
+    def on_success(self) -> None:
+        self.rate = min(self.max_rate, self.rate + self.max_rate * self.recovery)
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        self.throttles += 1
+        now = time.monotonic()
+        self._refill(now)
+        self.rate = max(self.min_rate, self.rate / 2)
+        self._tokens = 0.0
+        if retry_after:
+            self._paused_until = max(self._paused_until, now + retry_after)
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    return isinstance(exc, ProviderError) and exc.retryable
+
+
+class AIClient:
+    def __init__(
+        self,
+        provider: AIProvider,
+        *,
+        max_concurrency: int,
+        rate_per_second: float,
+        burst: int,
+        batch_size: int,
+        batch_window: float,
+        max_attempts: int,
+        retry_max_wait: float = 30.0,
+    ) -> None:
+        self.provider = provider
+        self.name = getattr(provider, "name", type(provider).__name__)
+        self.max_concurrency = max_concurrency
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.max_attempts = max_attempts
+        self.retry_max_wait = retry_max_wait
+        self.batching = batch_size > 1 and hasattr(provider, "generate_batch")
+        self.bucket = AdaptiveTokenBucket(rate_per_second, burst)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._pending: List[_Pending] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._batches: Set["asyncio.Task[None]"] = set()
+        self.in_flight = 0
+        self.requests = 0
+        self.upstream_calls = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.cancelled = 0
+
+    # -- public API --------------------------------------------------------
+
+    async def generate(self, request: GenerationRequest) -> GenerationResult:
+        self.requests += 1
+        if not self.batching:
+            return await self._call(self.provider.generate, request)
+
+        future: "asyncio.Future[GenerationResult]" = (
+            asyncio.get_running_loop().create_future()
+        )
+        self._pending.append((request, future))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                self.batch_window, self._flush
+            )
+        try:
+            return await future
+        except asyncio.CancelledError:
+            # The flush and dispatch steps skip futures that are already done.
+            self.cancelled += 1
+            raise
+
+    async def generate_many(
+        self, requests: Sequence[GenerationRequest]
+    ) -> List[GenerationResult]:
+        """Run `requests` concurrently; results are in input order.
+
+        Cancelling the caller cancels every outstanding request.
+        """
+        return list(await asyncio.gather(*(self.generate(r) for r in requests)))
+
+    async def aclose(self) -> None:
+        """Cancel queued and running batches (their callers get CancelledError)."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        for _, future in self._pending:
+            future.cancel()
+        self._pending = []
+        for task in list(self._batches):
+            task.cancel()
+        if self._batches:
+            await asyncio.gather(*self._batches, return_exceptions=True)
+
+    # -- batching ----------------------------------------------------------
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch = [(r, f) for r, f in self._pending if not f.done()]
+        self._pending = []
+        if not batch:
+            return
+        task = asyncio.ensure_future(self._dispatch(batch))
+        self._batches.add(task)
+        task.add_done_callback(self._batches.discard)
+
+        # Abandon the upstream call once every caller in the batch is gone.
+        def _on_caller_done(_: Any) -> None:
+            if not task.done() and all(f.cancelled() for _, f in batch):
+                task.cancel()
+
+        for _, future in batch:
+            future.add_done_callback(_on_caller_done)
+
+    async def _dispatch(self, batch: List[_Pending]) -> None:
+        try:
+            if len(batch) == 1:
+                results = [await self._call(self.provider.generate, batch[0][0])]
+            else:
+                self.batches += 1
+                self.batched_requests += len(batch)
+                results = await self._call(
+                    self.provider.generate_batch,  # type: ignore[attr-defined]
+                    [r for r, _ in batch],
+                )
+                if len(results) != len(batch):
+                    raise ProviderError(
+                        f"Batch returned {len(results)} results "
+                        f"for {len(batch)} requests"
+                    )
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    # -- upstream calls ----------------------------------------------------
+
+    async def _call(self, fn: Any, payload: Any) -> Any:
+        retrying = AsyncRetrying(
+            retry=retry_if_exception(_is_retryable),
+            wait=wait_random_exponential(multiplier=0.5, max=self.retry_max_wait),
+            stop=stop_after_attempt(self.max_attempts),
+            reraise=True,
+        )
+        try:
+            async for attempt in retrying:
+                with attempt:
+                    if attempt.retry_state.attempt_number > 1:
+                        self.retries += 1
+                    result = await self._call_once(fn, payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.failures += 1
+            raise
+        return result
+
+    async def _call_once(self, fn: Any, payload: Any) -> Any:
+        await self.bucket.acquire()
+        async with self._semaphore:
+            self.in_flight += 1
+            self.upstream_calls += 1
+            try:
+                result = await fn(payload)
+            except RateLimited as exc:
+                self.bucket.on_throttle(exc.retry_after)
+                raise
+            finally:
+                self.in_flight -= 1
+        self.bucket.on_success()
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "provider": self.name,
+            "batching": self.batching,
+            "requests": self.requests,
+            "upstream_calls": self.upstream_calls,
+            "batches": self.batches,
+            "batched_requests": self.batched_requests,
+            "mean_batch_size": (
+                round(self.batched_requests / self.batches, 2) if self.batches else 0.0
+            ),
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "queued": len(self._pending),
+            "rate_per_second": round(self.bucket.rate, 3),
+            "max_rate_per_second": self.bucket.max_rate,
+            "throttled": self.bucket.throttles,
+            "retries": self.retries,
+            "failures": self.failures,
+            "cancelled": self.cancelled,
+        }
+
+
+_ai_client: Optional[AIClient] = None
+_ai_client_lock = threading.Lock()
+
+
+def get_ai_client() -> AIClient:
+    """Return the process-wide client around `get_ai_provider()`.
+
+    Its semaphore and bucket bind to the event loop that first uses them, so
+    use it from the application's loop only.
+    """
+    global _ai_client
+    if _ai_client is None:
+        with _ai_client_lock:
+            if _ai_client is None:
+                from app.core.config import settings
+                from app.services.ai_provider import get_ai_provider
+
+                _ai_client = AIClient(
+                    get_ai_provider(),
+                    max_concurrency=settings.AI_MAX_CONCURRENCY,
+                    rate_per_second=settings.AI_RATE_LIMIT_PER_SECOND,
+                    burst=settings.AI_RATE_LIMIT_BURST,
+                    batch_size=settings.AI_BATCH_SIZE,
+                    batch_window=settings.AI_BATCH_WINDOW_MS / 1000.0,
+                    max_attempts=settings.AI_MAX_ATTEMPTS,
+                )
+    return _ai_client
@@ -0,0 +1,152 @@
+"""AI provider abstraction for document analysis (summaries, concepts).
+
+`AI_PROVIDER` names an entry in `PROVIDERS` or a dotted path
+(`package.module:ClassName`) to a class implementing `AIProvider`, built with
+no arguments. The `fake` provider is deterministic and offline, for tests,
+benchmarks and development without an API key.
+"""
+import asyncio
+import hashlib
+import importlib
+import json
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Protocol, Type
+
+
+class ProviderError(Exception):
+    """An upstream model call failed."""
+
+    retryable = False
+
+
+class RateLimited(ProviderError):
+    """The provider throttled us (HTTP 429)."""
+
+    retryable = True
+
+    def __init__(self, message: str = "", retry_after: Optional[float] = None) -> None:
+        super().__init__(message or "Rate limited by the AI provider")
+        self.retry_after = retry_after
+
+
+class ProviderUnavailable(ProviderError):
+    """A transient upstream failure (5xx, timeout); worth retrying."""
+
+    retryable = True
+
+
+@dataclass(frozen=True)
+class GenerationRequest:
+    prompt: str
+    model: str
+    template: str
+    template_version: int
+    # Hash of the content the prompt was rendered from (file or chunk sha256).
+    content_sha256: str
+    temperature: float = 0.0
+    max_output_tokens: int = 1024
+
+    def cache_key(self) -> str:
+        """Content address of the response.
+
+        The rendered prompt is deliberately left out: it is a function of the
+        content and the template version, and hashing it would only add cost.
+        Bump the template version whenever the template text changes.
+        """
+        material = json.dumps(
+            [
+                self.content_sha256,
+                self.template,
+                self.template_version,
+                self.model,
+                {
+                    "temperature": self.temperature,
+                    "max_output_tokens": self.max_output_tokens,
+                },
+            ],
+            sort_keys=True,
+        )
+        return hashlib.sha256(material.encode()).hexdigest()
+
+
+@dataclass(frozen=True)
+class GenerationResult:
+    text: str
+    model: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+    # Where this result came from: upstream, memory or db (see ai_cache).
+    source: str = "upstream"
+
+
+class AIProvider(Protocol):
+    """A model backend. Providers whose API accepts several prompts in one call
+    may also define `async generate_batch(requests) -> List[GenerationResult]`
+    (same order); `ai_client.AIClient` then micro-batches requests to it."""
+
+    name: str
+
+    async def generate(self, request: GenerationRequest) -> GenerationResult:
+        ...
+
+
+class FakeProvider:
+    """Echoes the start of the prompt back after an optional delay."""
+
+    name = "fake"
+
+    def __init__(self, latency: float = 0.0, words: int = 40) -> None:
+        self.latency = latency
+        self.words = words
+        self.calls = 0
+
+    async def generate(self, request: GenerationRequest) -> GenerationResult:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        words = request.prompt.split()
+        text = " ".join(words[-self.words :])
+        return GenerationResult(
+            text=f"[{request.template} v{request.template_version}] {text}",
+            model=request.model,
+            input_tokens=len(words),
+            output_tokens=min(len(words), self.words),
+        )
+
+    async def generate_batch(
+        self, requests: List[GenerationRequest]
+    ) -> List[GenerationResult]:
+        # One round trip for the whole batch, as with a real batch endpoint.
+        return list(await asyncio.gather(*(self.generate(r) for r in requests)))
+
+
+PROVIDERS: Dict[str, Type] = {"fake": FakeProvider}
+
+
+def load_provider(name: str) -> AIProvider:
+    if name in PROVIDERS:
+        return PROVIDERS[name]()
+    module_name, _, class_name = name.partition(":")
+    if not class_name:
+        raise ValueError(
+            f"Unknown AI provider {name!r}; use one of {sorted(PROVIDERS)} "
+            "or 'package.module:ClassName'"
+        )
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+_provider: Optional[AIProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_ai_provider() -> AIProvider:
+    """Return the process-wide provider configured in settings."""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                from app.core.config import settings
+
+                _provider = load_provider(settings.AI_PROVIDER)
+    return _provider
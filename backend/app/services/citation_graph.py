@@ -0,0 +1,325 @@
+"""In-memory citation graph in compressed sparse row (CSR) form.
+
+`CitationGraph` is an immutable snapshot holding two CSR adjacencies over
+paper ids: outgoing (references) and incoming (cited by), as NumPy int32
+arrays. Traversals gather whole frontiers with vectorised index arithmetic
+instead of per-node queries, so a 2-hop neighbourhood or a PageRank pass over
+a million edges takes milliseconds rather than thousands of round trips.
+
+`CitationGraphStore` keeps the current snapshot in sync with the `citations`
+table. Edge ids only grow, so a refresh normally loads just the edges above
+the last id seen and merges them in; if edges were deleted (the counts no
+longer add up) it rebuilds from scratch. Readers always see a complete
+snapshot and never block on a refresh.
+"""
+import threading
+import time
+from typing import Any, Dict, Literal, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.crud import crud_citation
+
+Direction = Literal["out", "in", "both"]
+
+PAGERANK_DAMPING = 0.85
+PAGERANK_TOLERANCE = 1e-8
+PAGERANK_MAX_ITERATIONS = 100
+
+
+def _csr(
+    rows: np.ndarray, cols: np.ndarray, n_nodes: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    # Stable sort: when `rows` is an existing CSR expansion followed by a few
+    # new edges, timsort finds the sorted run and merges in near-linear time.
+    order = np.argsort(rows, kind="stable")
+    counts = np.bincount(rows, minlength=n_nodes)
+    indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return indptr, cols[order].astype(np.int32, copy=False)
+
+
+def _expand(indptr: np.ndarray) -> np.ndarray:
+    """Row index of every entry of a CSR matrix."""
+    n_nodes = len(indptr) - 1
+    return np.repeat(np.arange(n_nodes, dtype=np.int32), np.diff(indptr))
+
+
+def _n_nodes(*arrays: np.ndarray) -> int:
+    return max((int(a.max()) + 1 for a in arrays if a.size), default=0)
+
+
+def _gather(indptr: np.ndarray, indices: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """Concatenated adjacency lists of `rows`, without a Python loop."""
+    starts = indptr[rows]
+    lengths = indptr[rows + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=indices.dtype)
+    offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    return indices[offsets + np.arange(total)]
+
+
+class CitationGraph:
+    def __init__(
+        self,
+        out_indptr: np.ndarray,
+        out_indices: np.ndarray,
+        in_indptr: np.ndarray,
+        in_indices: np.ndarray,
+        *,
+        last_edge_id: int = 0,
+    ) -> None:
+        self.out_indptr, self.out_indices = out_indptr, out_indices
+        self.in_indptr, self.in_indices = in_indptr, in_indices
+        self.n_nodes = len(out_indptr) - 1
+        self.last_edge_id = last_edge_id
+        self._pagerank: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_edges(
+        cls, citing: np.ndarray, cited: np.ndarray, *, last_edge_id: int = 0
+    ) -> "CitationGraph":
+        """Build from citing -> cited paper id arrays; node ids are paper ids."""
+        citing = np.asarray(citing, dtype=np.int32)
+        cited = np.asarray(cited, dtype=np.int32)
+        n_nodes = _n_nodes(citing, cited)
+        return cls(
+            *_csr(citing, cited, n_nodes),
+            *_csr(cited, citing, n_nodes),
+            last_edge_id=last_edge_id,
+        )
+
+    @property
+    def n_edges(self) -> int:
+        return len(self.out_indices)
+
+    def with_edges(
+        self, citing: np.ndarray, cited: np.ndarray, last_edge_id: int
+    ) -> "CitationGraph":
+        """A new snapshot with the given edges merged in."""
+        citing = np.asarray(citing, dtype=np.int32)
+        cited = np.asarray(cited, dtype=np.int32)
+        n_nodes = max(self.n_nodes, _n_nodes(citing, cited))
+        out_rows = np.concatenate([_expand(self.out_indptr), citing])
+        out_cols = np.concatenate([self.out_indices, cited])
+        in_rows = np.concatenate([_expand(self.in_indptr), cited])
+        in_cols = np.concatenate([self.in_indices, citing])
+        return CitationGraph(
+            *_csr(out_rows, out_cols, n_nodes),
+            *_csr(in_rows, in_cols, n_nodes),
+            last_edge_id=last_edge_id,
+        )
+
+    # -- queries -----------------------------------------------------------
+
+    def _valid(self, node: int) -> bool:
+        return 0 <= node < self.n_nodes
+
+    def degree(self, node: int) -> Tuple[int, int]:
+        """(references, cited by) counts of `node`."""
+        if not self._valid(node):
+            return 0, 0
+        return (
+            int(self.out_indptr[node + 1] - self.out_indptr[node]),
+            int(self.in_indptr[node + 1] - self.in_indptr[node]),
+        )
+
+    def _neighbours(self, frontier: np.ndarray, direction: Direction) -> np.ndarray:
+        if direction == "out":
+            return _gather(self.out_indptr, self.out_indices, frontier)
+        if direction == "in":
+            return _gather(self.in_indptr, self.in_indices, frontier)
+        return np.concatenate(
+            [
+                _gather(self.out_indptr, self.out_indices, frontier),
+                _gather(self.in_indptr, self.in_indices, frontier),
+            ]
+        )
+
+    def k_hop(
+        self, node: int, k: int, direction: Direction = "both", limit: int = 1000
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Papers within `k` hops of `node` (excluding it), as (ids, distances)
+        ordered by distance; at most `limit` results."""
+        if not self._valid(node):
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32)
+        distance = np.full(self.n_nodes, -1, dtype=np.int32)
+        distance[node] = 0
+        frontier = np.array([node], dtype=np.int32)
+        found = 0
+        for hop in range(1, k + 1):
+            reached = np.unique(self._neighbours(frontier, direction))
+            frontier = reached[distance[reached] < 0]
+            if frontier.size == 0:
+                break
+            distance[frontier] = hop
+            found += frontier.size
+            if found >= limit:
+                break
+        ids = np.flatnonzero(distance > 0)
+        order = np.argsort(distance[ids], kind="stable")[:limit]
+        ids = ids[order].astype(np.int32)
+        return ids, distance[ids]
+
+    @staticmethod
+    def _top(
+        counts: np.ndarray, exclude: int, limit: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        if exclude < len(counts):
+            counts[exclude] = 0
+        candidates = np.flatnonzero(counts)
+        if candidates.size > limit:
+            part = np.argpartition(-counts[candidates], limit - 1)[:limit]
+            candidates = candidates[part]
+        order = np.lexsort((candidates, -counts[candidates]))
+        ids = candidates[order].astype(np.int32)
+        return ids, counts[ids]
+
+    def co_citation(self, node: int, limit: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+        """Papers most often cited together with `node`: (ids, shared citers)."""
+        if not self._valid(node):
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int64)
+        citers = self.in_indices[self.in_indptr[node] : self.in_indptr[node + 1]]
+        co_cited = _gather(self.out_indptr, self.out_indices, citers)
+        return self._top(np.bincount(co_cited, minlength=self.n_nodes), node, limit)
+
+    def coupling(self, node: int, limit: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+        """Papers sharing the most references with `node` (bibliographic
+        coupling): (ids, shared references)."""
+        if not self._valid(node):
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int64)
+        references = self.out_indices[self.out_indptr[node] : self.out_indptr[node + 1]]
+        coupled = _gather(self.in_indptr, self.in_indices, references)
+        return self._top(np.bincount(coupled, minlength=self.n_nodes), node, limit)
+
+    def pagerank(self) -> np.ndarray:
+        """PageRank of every node (computed once per snapshot).
+
+        Power iteration over the edge list; the rank of papers without
+        references (dangling nodes) is spread uniformly.
+        """
+        if self._pagerank is not None:
+            return self._pagerank
+        n = self.n_nodes
+        if n == 0:
+            self._pagerank = np.empty(0)
+            return self._pagerank
+        out_degree = np.diff(self.out_indptr).astype(np.float64)
+        dangling = out_degree == 0
+        inverse_degree = np.divide(1.0, out_degree, out=np.zeros(n), where=~dangling)
+        citing, cited = _expand(self.out_indptr), self.out_indices
+        rank = np.full(n, 1.0 / n)
+        for _ in range(PAGERANK_MAX_ITERATIONS):
+            contribution = rank * inverse_degree
+            new = np.bincount(cited, weights=contribution[citing], minlength=n)
+            new = (
+                PAGERANK_DAMPING * (new + rank[dangling].sum() / n)
+                + (1.0 - PAGERANK_DAMPING) / n
+            )
+            delta = np.abs(new - rank).sum()
+            rank = new
+            if delta < PAGERANK_TOLERANCE:
+                break
+        self._pagerank = rank
+        return rank
+
+    def top_pagerank(self, limit: int = 50) -> Tuple[np.ndarray, np.ndarray]:
+        rank = self.pagerank()
+        if rank.size == 0:
+            return np.empty(0, dtype=np.int32), rank
+        limit = min(limit, rank.size)
+        top = np.argpartition(-rank, limit - 1)[:limit]
+        top = top[np.argsort(-rank[top], kind="stable")].astype(np.int32)
+        return top, rank[top]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "nodes": self.n_nodes,
+            "edges": self.n_edges,
+            "last_edge_id": self.last_edge_id,
+            "bytes": int(
+                self.out_indptr.nbytes
+                + self.out_indices.nbytes
+                + self.in_indptr.nbytes
+                + self.in_indices.nbytes
+            ),
+        }
+
+
+class CitationGraphStore:
+    """Holds the current `CitationGraph` and refreshes it from the database
+    at most every `refresh_interval` seconds."""
+
+    def __init__(self, refresh_interval: float) -> None:
+        self.refresh_interval = refresh_interval
+        self._graph = CitationGraph.from_edges(np.empty(0), np.empty(0))
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.full_builds = 0
+        self.incremental_updates = 0
+        self.last_refresh_seconds = 0.0
+
+    def get(self, db: Session, *, force: bool = False) -> CitationGraph:
+        if force or time.monotonic() - self._checked >= self.refresh_interval:
+            # One refresher at a time; everyone else keeps using the snapshot.
+            if self._lock.acquire(blocking=force):
+                try:
+                    self._refresh(db)
+                finally:
+                    self._lock.release()
+        return self._graph
+
+    def _refresh(self, db: Session) -> None:
+        started = time.perf_counter()
+        graph = self._graph
+        total, max_id = crud_citation.edge_watermark(db)
+        if total == graph.n_edges and max_id == graph.last_edge_id:
+            pass
+        elif max_id > graph.last_edge_id and total > graph.n_edges:
+            ids, citing, cited = crud_citation.get_edges(
+                db, after_id=graph.last_edge_id
+            )
+            if graph.n_edges + len(ids) == total:
+                self._graph = graph.with_edges(citing, cited, int(ids.max()))
+                self.incremental_updates += 1
+            else:
+                self._rebuild(db)
+        else:
+            self._rebuild(db)
+        self._checked = time.monotonic()
+        self.last_refresh_seconds = time.perf_counter() - started
+
+    def _rebuild(self, db: Session) -> None:
+        ids, citing, cited = crud_citation.get_edges(db)
+        self._graph = CitationGraph.from_edges(
+            citing, cited, last_edge_id=int(ids.max()) if len(ids) else 0
+        )
+        self.full_builds += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._graph.stats(),
+            "full_builds": self.full_builds,
+            "incremental_updates": self.incremental_updates,
+            "last_refresh_seconds": round(self.last_refresh_seconds, 4),
+            "refresh_interval": self.refresh_interval,
+        }
+
+
+_graph_store: Optional[CitationGraphStore] = None
+_graph_store_lock = threading.Lock()
+
+
+def get_citation_graph_store() -> CitationGraphStore:
+    global _graph_store
+    if _graph_store is None:
+        with _graph_store_lock:
+            if _graph_store is None:
+                from app.core.config import settings
+
+                _graph_store = CitationGraphStore(
+                    settings.CITATION_GRAPH_REFRESH_SECONDS
+                )
+    return _graph_store
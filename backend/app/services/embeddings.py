@@ -0,0 +1,87 @@
+"""Pluggable text embedders for the vector index.
+
+`EMBEDDING_PROVIDER` names an entry in `EMBEDDERS` or a dotted path
+(`package.module:ClassName`) to any class with a `dim` attribute and an
+`embed(texts) -> float32 array` method, constructed with `dim=`.
+"""
+import importlib
+import re
+import threading
+import zlib
+from typing import Dict, Optional, Protocol, Sequence, Type
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class Embedder(Protocol):
+    dim: int
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Return a (len(texts), dim) float32 array."""
+
+
+class HashingEmbedder:
+    """Deterministic, offline embedder: signed feature hashing of word
+    unigrams and bigrams, L2-normalised.
+
+    It captures lexical overlap only, but needs no model or network, is
+    stable across processes and releases, and is fast enough for tests and
+    development.
+    """
+
+    def __init__(self, dim: int = 384) -> None:
+        self.dim = dim
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = _TOKEN_RE.findall(text.lower())
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            if not features:
+                continue
+            # crc32 rather than hash(): must not vary with PYTHONHASHSEED.
+            hashes = np.fromiter(
+                (zlib.crc32(feature.encode()) for feature in features),
+                dtype=np.uint32,
+                count=len(features),
+            )
+            signs = np.where(hashes >> 31, -1.0, 1.0).astype(np.float32)
+            np.add.at(out[row], hashes % self.dim, signs)
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+        return out
+
+
+EMBEDDERS: Dict[str, Type] = {"hashing": HashingEmbedder}
+
+
+def load_embedder(provider: str, dim: int) -> Embedder:
+    if provider in EMBEDDERS:
+        return EMBEDDERS[provider](dim=dim)
+    module_name, _, class_name = provider.partition(":")
+    if not class_name:
+        raise ValueError(
+            f"Unknown embedding provider {provider!r}; use one of "
+            f"{sorted(EMBEDDERS)} or 'package.module:ClassName'"
+        )
+    return getattr(importlib.import_module(module_name), class_name)(dim=dim)
+
+
+_embedder: Optional[Embedder] = None
+_embedder_lock = threading.Lock()
+
+
+def get_embedder() -> Embedder:
+    """Return the process-wide embedder configured in settings."""
+    global _embedder
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                from app.core.config import settings
+
+                _embedder = load_embedder(
+                    settings.EMBEDDING_PROVIDER, settings.EMBEDDING_DIM
+                )
+    return _embedder
@@ -0,0 +1,102 @@
+"""PDF text extraction and chunking, run in the worker's process pool.
+
+Everything here is a plain module-level function on plain data so it can be
+pickled to a spawn-context worker process.
+"""
+from bisect import bisect_right
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+
+from app.services import minhash
+from app.services.references import ParsedReferences, extract_references
+
+
+class PermanentExtractionError(Exception):
+    """The file can never be processed (missing, not a PDF); do not retry."""
+
+
+class Chunk(NamedTuple):
+    ordinal: int
+    page_start: int
+    page_end: int
+    text: str
+
+
+def extract_pages(path: str) -> List[str]:
+    """Return the text of every page, whitespace-normalised."""
+    try:
+        # Imported lazily: only the worker needs pypdf.
+        from pypdf import PdfReader
+        from pypdf.errors import PdfReadError
+    except ImportError as e:  # pragma: no cover - depends on the install
+        raise PermanentExtractionError("pypdf is not installed") from e
+
+    try:
+        reader = PdfReader(path)
+        return [" ".join((page.extract_text() or "").split()) for page in reader.pages]
+    except FileNotFoundError as e:
+        raise PermanentExtractionError(f"Stored file is missing: {path}") from e
+    except PdfReadError as e:
+        raise PermanentExtractionError(f"Unreadable PDF: {e}") from e
+
+
+def chunk_pages(pages: List[str], *, max_chars: int, overlap: int) -> List[Chunk]:
+    """Split page texts into overlapping passages of at most `max_chars`.
+
+    Passages break on whitespace where possible and record the (1-based)
+    pages they span.
+    """
+    page_offsets = []
+    position = 0
+    for text in pages:
+        page_offsets.append(position)
+        position += len(text) + 1  # joined with "\n" below
+    text = "\n".join(pages)
+    length = len(text)
+    overlap = min(overlap, max_chars // 2)
+
+    def page_at(offset: int) -> int:
+        return bisect_right(page_offsets, offset)
+
+    chunks: List[Chunk] = []
+    start = 0
+    while start < length:
+        end = min(start + max_chars, length)
+        if end < length:
+            # Prefer to cut on whitespace in the second half of the window.
+            cut = max(
+                text.rfind(" ", start + max_chars // 2, end),
+                text.rfind("\n", start + max_chars // 2, end),
+            )
+            if cut > start:
+                end = cut
+        piece = text[start:end].strip()
+        if piece:
+            chunks.append(Chunk(len(chunks), page_at(start), page_at(end - 1), piece))
+        if end >= length:
+            break
+        next_start = max(end - overlap, start + 1)
+        # Do not start the next passage mid-word.
+        boundary = text.find(" ", next_start, end)
+        start = boundary + 1 if boundary != -1 else next_start
+    return chunks
+
+
+class Extraction(NamedTuple):
+    pages: int
+    chunks: List[Chunk]
+    references: ParsedReferences
+    minhash: Optional[np.ndarray]
+
+
+def extract_and_chunk(path: str, max_chars: int, overlap: int) -> Extraction:
+    """Worker entry point: page count, chunks, bibliography and MinHash
+    signature of the PDF at `path`."""
+    pages = extract_pages(path)
+    return Extraction(
+        len(pages),
+        chunk_pages(pages, max_chars=max_chars, overlap=overlap),
+        extract_references(pages),
+        minhash.signature(" ".join(pages)),
+    )
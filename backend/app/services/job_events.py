@@ -0,0 +1,312 @@
+"""Job progress events, pushed to API clients instead of polled.
+
+Workers `publish` an event as a job moves through its stages. On PostgreSQL
+the event goes out with NOTIFY on the `job_events` channel and every API
+process keeps a single LISTEN connection (`PgListener`) feeding its
+`JobEventHub`. With any other database (SQLite, tests) `publish` hands the
+event straight to the hub, so it only reaches subscribers in the same process.
+
+The hub fans events out from the event loop to any number of subscribers,
+keyed by file sha256 like the jobs themselves. Each subscriber has a bounded
+buffer: when a slow client falls behind, its oldest events are dropped (and
+counted) so memory stays bounded and the latest state still gets through.
+"""
+import asyncio
+import collections
+import json
+import logging
+import threading
+from typing import Any, Deque, Dict, List, Optional, Set
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "job_events"
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes or more.
+MAX_ERROR_CHARS = 500
+
+STAGE_QUEUED = "queued"
+STAGE_EXTRACTING = "extracting"
+STAGE_INDEXING = "indexing"
+STAGE_DONE = "done"
+
+# Sent to every subscriber after events may have been missed (the LISTEN
+# connection was re-established); they should re-read the job's state.
+RESYNC = {"resync": True}
+
+
+def job_event(
+    *, job_id: int, sha256: str, status: str, stage: str, **fields: Any
+) -> Dict[str, Any]:
+    """The payload clients receive. Extra fields: attempts, pages, chunks,
+    error."""
+    if fields.get("error"):
+        fields["error"] = fields["error"][:MAX_ERROR_CHARS]
+    return {
+        "job_id": job_id,
+        "sha256": sha256,
+        "status": status,
+        "stage": stage,
+        **fields,
+    }
+
+
+class Subscription:
+    """One client's view of the events for a file.
+
+    Created and consumed on the hub's event loop; `close` (or leaving the
+    `with` block) unsubscribes.
+    """
+
+    def __init__(
+        self,
+        hub: "JobEventHub",
+        sha256: str,
+        maxsize: int,
+        loop: asyncio.AbstractEventLoop,
+    ) -> None:
+        self.hub = hub
+        self.sha256 = sha256
+        self.loop = loop
+        self.dropped = 0
+        self._buffer: Deque[Dict[str, Any]] = collections.deque(maxlen=maxsize)
+        self._ready = asyncio.Event()
+
+    def _put(self, event: Dict[str, Any]) -> None:
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+            self.hub.dropped += 1
+        self._buffer.append(event)
+        self.hub.delivered += 1
+        self._ready.set()
+
+    async def get(self) -> Dict[str, Any]:
+        while not self._buffer:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._buffer.popleft()
+
+    def close(self) -> None:
+        self.hub._unsubscribe(self)
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _put_all(subscriptions: List[Subscription], event: Dict[str, Any]) -> None:
+    for subscription in subscriptions:
+        subscription._put(event)
+
+
+class JobEventHub:
+    def __init__(self, buffer_size: int) -> None:
+        self.buffer_size = max(1, buffer_size)
+        self._subscribers: Dict[str, Set[Subscription]] = collections.defaultdict(set)
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.peak_subscribers = 0
+
+    def subscribe(self, sha256: str) -> Subscription:
+        """Subscribe to a file's job events; call from the event loop."""
+        subscription = Subscription(
+            self, sha256, self.buffer_size, asyncio.get_running_loop()
+        )
+        with self._lock:
+            self._subscribers[sha256].add(subscription)
+            self.peak_subscribers = max(self.peak_subscribers, self.subscribers)
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.sha256)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.sha256]
+
+    @property
+    def subscribers(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def dispatch(self, event: Dict[str, Any]) -> None:
+        """Deliver an event to the file's subscribers. Safe from any thread."""
+        with self._lock:
+            self.published += 1
+            targets = list(self._subscribers.get(event.get("sha256"), ()))
+        self._deliver(targets, event)
+
+    def resync(self) -> None:
+        with self._lock:
+            targets = [s for subs in self._subscribers.values() for s in subs]
+        self._deliver(targets, RESYNC)
+
+    @staticmethod
+    def _deliver(targets: List[Subscription], event: Dict[str, Any]) -> None:
+        # One wake-up per event loop rather than per subscriber: waking a loop
+        # from another thread costs far more than appending to a buffer.
+        by_loop: Dict[asyncio.AbstractEventLoop, List[Subscription]] = {}
+        for subscription in targets:
+            by_loop.setdefault(subscription.loop, []).append(subscription)
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+        for loop, subscriptions in by_loop.items():
+            if loop is current:
+                _put_all(subscriptions, event)
+                continue
+            try:
+                loop.call_soon_threadsafe(_put_all, subscriptions, event)
+            except RuntimeError:
+                # The loop has shut down; its subscribers are gone.
+                for subscription in subscriptions:
+                    subscription.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            files = len(self._subscribers)
+            subscribers = self.subscribers
+        return {
+            "backend": "postgres" if _listener is not None else "in-process",
+            "subscribers": subscribers,
+            "peak_subscribers": self.peak_subscribers,
+            "files": files,
+            "buffer_size": self.buffer_size,
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "reconnects": _listener.reconnects if _listener is not None else 0,
+        }
+
+
+def publish(db: Session, event: Dict[str, Any]) -> None:
+    """Send a job event to subscribers in every API process (PostgreSQL) or
+    in this process (anything else). Commits."""
+    if db.get_bind().dialect.name == "postgresql":
+        payload = json.dumps(event, separators=(",", ":"))
+        db.execute(select(func.pg_notify(CHANNEL, payload)))
+        db.commit()
+    else:
+        get_job_event_hub().dispatch(event)
+
+
+class PgListener:
+    """A dedicated LISTEN connection that feeds NOTIFY payloads to the hub.
+
+    The connection's socket is watched with `loop.add_reader`, so listening
+    costs no thread and no polling. If the connection drops it is re-opened
+    with backoff and subscribers are told to resync.
+    """
+
+    def __init__(
+        self, engine: Engine, hub: JobEventHub, max_reconnect_delay: float = 30.0
+    ) -> None:
+        self.engine = engine
+        self.hub = hub
+        self.max_reconnect_delay = max_reconnect_delay
+        self.reconnects = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def _connect(self):
+        # Detached from the pool: it lives for the process and is never
+        # handed out for queries.
+        connection = self.engine.raw_connection()
+        connection.detach()
+        dbapi_connection = connection.driver_connection
+        dbapi_connection.autocommit = True
+        with dbapi_connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANNEL}")
+        return dbapi_connection
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        delay = 0.5
+        first = True
+        while True:
+            connection = None
+            lost = loop.create_future()
+            try:
+                connection = await asyncio.to_thread(self._connect)
+                if not first:
+                    self.reconnects += 1
+                    self.hub.resync()
+                first, delay = False, 0.5
+                loop.add_reader(connection.fileno(), self._drain, connection, lost)
+                await lost
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Job event listener lost its connection: %r", e)
+            finally:
+                if connection is not None:
+                    loop.remove_reader(connection.fileno())
+                    connection.close()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _drain(self, connection, lost: asyncio.Future) -> None:
+        try:
+            connection.poll()
+        except Exception as e:
+            if not lost.done():
+                lost.set_exception(e)
+            return
+        while connection.notifies:
+            notify = connection.notifies.pop(0)
+            try:
+                event = json.loads(notify.payload)
+            except ValueError:
+                logger.warning("Ignoring malformed job event %r", notify.payload)
+                continue
+            self.hub.dispatch(event)
+
+
+_hub: Optional[JobEventHub] = None
+_hub_lock = threading.Lock()
+_listener: Optional[PgListener] = None
+
+
+def get_job_event_hub() -> JobEventHub:
+    global _hub
+    if _hub is None:
+        with _hub_lock:
+            if _hub is None:
+                from app.core.config import settings
+
+                _hub = JobEventHub(settings.JOB_EVENTS_BUFFER_SIZE)
+    return _hub
+
+
+def start_listener() -> None:
+    """Start receiving workers' events; call from the app's event loop at
+    startup. A no-op unless the database is PostgreSQL."""
+    global _listener
+    from app.db.session import engine
+
+    if _listener is None and engine.dialect.name == "postgresql":
+        _listener = PgListener(engine, get_job_event_hub())
+        _listener.start()
+
+
+async def stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        await _listener.stop()
+        _listener = None
@@ -0,0 +1,57 @@
+"""Versioned prompt templates for document analysis.
+
+A template's version is part of the AI response cache key, so bump it
+whenever the text changes; old cached responses are then simply not reused.
+"""
+from dataclasses import dataclass
+
+from app.services.ai_provider import GenerationRequest
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    name: str
+    version: int
+    text: str
+
+    def request(
+        self,
+        *,
+        content_sha256: str,
+        model: str,
+        temperature: float = 0.0,
+        max_output_tokens: int = 1024,
+        **fields: str,
+    ) -> GenerationRequest:
+        return GenerationRequest(
+            prompt=self.text.format(**fields),
+            model=model,
+            template=self.name,
+            template_version=self.version,
+            content_sha256=content_sha256,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+        )
+
+
+SUMMARIZE_CHUNK = PromptTemplate(
+    "summarize_chunk",
+    1,
+    "Summarize the following passage of an academic paper in 3-5 sentences. "
+    "Keep key findings, methods, numbers and named entities.\n\n{text}",
+)
+
+SUMMARIZE_REDUCE = PromptTemplate(
+    "summarize_reduce",
+    1,
+    "The following are summaries of consecutive passages of one academic "
+    "paper. Write a single coherent summary of the whole paper covering its "
+    "question, method, findings and limitations.\n\n{summaries}",
+)
+
+EXTRACT_CONCEPTS = PromptTemplate(
+    "extract_concepts",
+    1,
+    "List the key concepts, methods and named entities in the following "
+    "passage, one per line.\n\n{text}",
+)
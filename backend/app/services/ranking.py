@@ -0,0 +1,21 @@
+"""Rank fusion for hybrid (keyword + semantic) search."""
+from typing import Dict, Hashable, List, Sequence, Tuple
+
+# Constant from Cormack et al. (2009); damps the weight of top ranks so one
+# list cannot dominate the fused order.
+RRF_K = 60
+
+
+def reciprocal_rank_fusion(
+    *rankings: Sequence[Hashable], k: int = RRF_K
+) -> List[Tuple[Hashable, float]]:
+    """Fuse best-first id lists: score(id) = sum over lists of 1 / (k + rank).
+
+    Only ranks are used, so lists scored on incompatible scales (BM25,
+    ts_rank, cosine) combine without normalisation.
+    """
+    scores: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda pair: pair[1], reverse=True)
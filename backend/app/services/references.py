@@ -0,0 +1,121 @@
+"""Bibliography extraction from page text, run in the worker's process pool.
+
+Heuristic by design: the reference list is the text after the last
+"References"/"Bibliography" heading, split on numbered markers ([1], 1.) or,
+failing that, on "Surname, X." author starts. Each entry is identified by its
+DOI when it has one, otherwise by its normalised title, so the same work cited
+by many papers maps to one `papers` row.
+"""
+import re
+from typing import List, NamedTuple, Optional
+
+DOI_RE = re.compile(r"\b10\.\d{4,9}/[^\s\"<>]+", re.IGNORECASE)
+YEAR_RE = re.compile(r"\b(1[89]\d{2}|20\d{2})[a-z]?\b")
+HEADING_RE = re.compile(r"\b(?:References|REFERENCES|Bibliography|BIBLIOGRAPHY)\b")
+BRACKET_MARKER_RE = re.compile(r"\[\d{1,3}\]\s+")
+NUMBER_MARKER_RE = re.compile(r"(?:^|(?<=[.\s]))\d{1,3}\.\s+(?=[A-Z])")
+AUTHOR_START_RE = re.compile(
+    r"(?<=\.)\s+(?=[A-Z][A-Za-z'\-]+,\s+(?:[A-Z]\.|[A-Z][a-z]+))"
+)
+QUOTED_TITLE_RE = re.compile(r"[\"“]([^\"”]{10,300}?)[,.]?[\"”]")
+
+MIN_TITLE_WORDS = 3
+MAX_REFERENCES = 500
+MAX_ENTRY_CHARS = 1000
+
+
+class Reference(NamedTuple):
+    key: str
+    doi: Optional[str]
+    title: Optional[str]
+    year: Optional[int]
+
+
+class ParsedReferences(NamedTuple):
+    doi: Optional[str]  # the paper's own DOI, if printed before its references
+    references: List[Reference]
+
+
+def clean_doi(doi: str) -> str:
+    return doi.rstrip(".,;)]}").lower()
+
+
+def normalize_title(title: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", title.lower()))
+
+
+def reference_key(doi: Optional[str], title: Optional[str]) -> Optional[str]:
+    if doi:
+        return f"doi:{doi}"
+    if title:
+        normalized = normalize_title(title)
+        if len(normalized.split()) >= MIN_TITLE_WORDS:
+            return f"title:{normalized[:400]}"
+    return None
+
+
+def _split_entries(section: str) -> List[str]:
+    for pattern in (BRACKET_MARKER_RE, NUMBER_MARKER_RE, AUTHOR_START_RE):
+        parts = [p.strip() for p in pattern.split(section) if p.strip()]
+        if len(parts) > 1:
+            return parts
+    return [section.strip()] if section.strip() else []
+
+
+def _guess_title(entry: str, year_match: Optional["re.Match[str]"]) -> Optional[str]:
+    quoted = QUOTED_TITLE_RE.search(entry)
+    if quoted:
+        return quoted.group(1).strip()
+    # APA-like: "Authors (2020). Title. Venue." -- the sentence after the year.
+    if year_match:
+        rest = entry[year_match.end() :].lstrip(").,:; ")
+        title = rest.split(". ", 1)[0].strip()
+        if len(title.split()) >= MIN_TITLE_WORDS:
+            return title
+    # Otherwise the longest sentence that is not a DOI or URL.
+    sentences = [
+        s.strip()
+        for s in entry.split(". ")
+        if "doi" not in s.lower() and "http" not in s.lower()
+    ]
+    return max(sentences, key=len, default=None)
+
+
+def parse_reference(entry: str) -> Optional[Reference]:
+    entry = entry[:MAX_ENTRY_CHARS]
+    doi_match = DOI_RE.search(entry)
+    doi = clean_doi(doi_match.group(0)) if doi_match else None
+    year_match = YEAR_RE.search(entry)
+    title = _guess_title(entry, year_match)
+    key = reference_key(doi, title)
+    if key is None:
+        return None
+    return Reference(
+        key=key,
+        doi=doi,
+        title=title[:500] if title else None,
+        year=int(year_match.group(1)) if year_match else None,
+    )
+
+
+def extract_references(pages: List[str]) -> ParsedReferences:
+    """The paper's own DOI and its parsed, de-duplicated reference list."""
+    text = " ".join(pages)
+    headings = list(HEADING_RE.finditer(text))
+    if not headings:
+        own = DOI_RE.search(text)
+        return ParsedReferences(clean_doi(own.group(0)) if own else None, [])
+    body, section = text[: headings[-1].start()], text[headings[-1].end() :]
+    own = DOI_RE.search(body)
+
+    references: List[Reference] = []
+    seen = set()
+    for entry in _split_entries(section):
+        reference = parse_reference(entry)
+        if reference is None or reference.key in seen:
+            continue
+        seen.add(reference.key)
+        references.append(reference)
+        if len(references) >= MAX_REFERENCES:
+            break
+    return ParsedReferences(clean_doi(own.group(0)) if own else None, references)
@@ -0,0 +1,362 @@
+"""Per-document analysis results in a columnar on-disk format.
+
+A document's analysis output is a bundle of named fields. Document-level
+fields (the summary, key concepts) are small values. Chunk-level fields (text,
+pages, per-chunk summaries and entities, embeddings) are columns with one row
+per chunk. Columns are stored as `.npy` files and memory-mapped on read. A
+request for chunks 40-60 of two fields touches only those rows of those two
+files, never the whole result.
+
+Layout of `RESULTS_DIR/<sha[:2]>/<sha>/`:
+
+    meta.json                 chunk count, columns (kind, file token), and
+                              the document-level fields
+    <name>-<token>.npy        numeric column: n or n x d
+    <name>-<token>.off.npy    string column: n + 1 int64 byte offsets into
+    <name>-<token>.str.npy    the concatenated UTF-8 values (uint8)
+
+Columns of string lists (e.g. entities) are string columns whose items are
+joined by U+001F. Bundles are keyed by the file's sha256, so every upload of
+the same file shares one. Near-duplicates (see crud_signature) get bundles of
+their own: only their identical passages' embeddings are copied over.
+
+As in the vector index, writers serialise on an flock'd lock file. A write
+puts new column files next to the old ones and then publishes by replacing
+meta.json atomically. Readers re-open a bundle when meta.json changes, so they
+never see a half-written column. Files from a replaced column are unlinked;
+readers that still have them mapped keep their view.
+"""
+import collections
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows; single process only
+    fcntl = None
+
+KIND_NUMERIC = "numeric"
+KIND_STR = "str"
+KIND_STR_LIST = "str_list"
+LIST_SEPARATOR = "\x1f"
+FORMAT_VERSION = 1
+
+
+class ResultsNotFound(Exception):
+    """No results are stored for this document."""
+
+
+class UnknownField(Exception):
+    def __init__(self, fields: Sequence[str], available: Sequence[str]) -> None:
+        super().__init__(
+            f"Unknown result field(s) {', '.join(fields)}; "
+            f"available: {', '.join(available)}"
+        )
+
+
+def _column_files(name: str, kind: str, token: str) -> List[str]:
+    if kind == KIND_NUMERIC:
+        return [f"{name}-{token}.npy"]
+    return [f"{name}-{token}.off.npy", f"{name}-{token}.str.npy"]
+
+
+def _encode_column(values: Any) -> Tuple[str, List[np.ndarray]]:
+    """(kind, arrays) for a column given as an array or a list of values."""
+    if isinstance(values, np.ndarray):
+        return KIND_NUMERIC, [values]
+    values = list(values)
+    if values and all(isinstance(value, (list, tuple)) for value in values):
+        kind = KIND_STR_LIST
+        values = [LIST_SEPARATOR.join(items) for items in values]
+    elif all(isinstance(value, str) for value in values):
+        kind = KIND_STR
+    else:
+        return KIND_NUMERIC, [np.asarray(values)]
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return kind, [offsets, data]
+
+
+class ResultBundle:
+    """A read-only view of one published version of a bundle."""
+
+    def __init__(self, directory: Path, meta: Dict[str, Any]) -> None:
+        self.directory = directory
+        self.meta = meta
+        self.chunk_count: int = meta["chunks"]
+        self.columns: Dict[str, Dict[str, str]] = meta["columns"]
+        self.document: Dict[str, Any] = meta["document"]
+        self._mapped: Dict[str, List[np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def fields(self) -> List[str]:
+        return sorted(self.document) + sorted(self.columns)
+
+    def _arrays(self, name: str) -> List[np.ndarray]:
+        arrays = self._mapped.get(name)
+        if arrays is None:
+            column = self.columns[name]
+            with self._lock:
+                arrays = self._mapped.get(name)
+                if arrays is None:
+                    arrays = [
+                        np.load(self.directory / file, mmap_mode="r")
+                        for file in _column_files(name, column["kind"], column["token"])
+                    ]
+                    self._mapped[name] = arrays
+        return arrays
+
+    def column(self, name: str, start: int = 0, stop: Optional[int] = None) -> Any:
+        """Rows [start, stop) of a chunk column: a NumPy array for numeric
+        columns, a list of str (or of lists of str) otherwise."""
+        stop = self.chunk_count if stop is None else min(stop, self.chunk_count)
+        start = min(start, stop)
+        kind = self.columns[name]["kind"]
+        arrays = self._arrays(name)
+        if kind == KIND_NUMERIC:
+            return np.asarray(arrays[0][start:stop])
+        offsets, data = arrays
+        bounds = np.asarray(offsets[start : stop + 1])
+        if not len(bounds):
+            return []
+        # Only the bytes of the requested rows are read from the mapping.
+        raw = bytes(data[bounds[0] : bounds[-1]])
+        bounds = bounds - bounds[0]
+        values = [
+            raw[bounds[i] : bounds[i + 1]].decode("utf-8") for i in range(stop - start)
+        ]
+        if kind == KIND_STR_LIST:
+            return [value.split(LIST_SEPARATOR) if value else [] for value in values]
+        return values
+
+    def select(
+        self,
+        fields: Optional[Sequence[str]] = None,
+        start: int = 0,
+        stop: Optional[int] = None,
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """(document fields, chunk columns) for `fields`, chunk columns cut to
+        rows [start, stop). Without `fields`: everything except 2-D numeric
+        columns such as embeddings, which have to be asked for by name."""
+        if fields is None:
+            fields = list(self.document) + [
+                name
+                for name, column in self.columns.items()
+                if column["kind"] != KIND_NUMERIC or len(column["shape"]) == 1
+            ]
+        unknown = [
+            f for f in fields if f not in self.document and f not in self.columns
+        ]
+        if unknown:
+            raise UnknownField(unknown, self.fields)
+        document = {f: self.document[f] for f in fields if f in self.document}
+        chunks = {}
+        for name in fields:
+            if name in self.columns:
+                values = self.column(name, start, stop)
+                chunks[name] = (
+                    values.tolist() if isinstance(values, np.ndarray) else values
+                )
+        return document, chunks
+
+
+class ResultStore:
+    def __init__(self, root: str, *, max_open: int = 256) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_open = max_open
+        # sha256 -> (meta.json stamp, bundle), least recently used first
+        self._open: "collections.OrderedDict[str, Tuple[Any, ResultBundle]]" = (
+            collections.OrderedDict()
+        )
+        self._thread_lock = threading.Lock()
+        self._open_lock = threading.Lock()
+        self.reads = 0
+        self.opens = 0
+        self.writes = 0
+
+    def _dir(self, sha256: str) -> Path:
+        return self.root / sha256[:2] / sha256
+
+    @contextmanager
+    def _write_lock(self, directory: Path) -> Iterator[None]:
+        """Exclusive across threads and, via flock, across processes."""
+        with self._thread_lock:
+            with open(directory / "lock", "a") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # -- reads -------------------------------------------------------------
+
+    def open(self, sha256: str) -> ResultBundle:
+        """The current bundle for `sha256`, re-opened if it was rewritten."""
+        directory = self._dir(sha256)
+        try:
+            stat = (directory / "meta.json").stat()
+        except FileNotFoundError:
+            raise ResultsNotFound(sha256)
+        stamp = (stat.st_mtime_ns, stat.st_ino)
+        with self._open_lock:
+            self.reads += 1
+            entry = self._open.get(sha256)
+            if entry is not None and entry[0] == stamp:
+                self._open.move_to_end(sha256)
+                return entry[1]
+        with open(directory / "meta.json") as f:
+            bundle = ResultBundle(directory, json.load(f))
+        with self._open_lock:
+            self.opens += 1
+            self._open[sha256] = (stamp, bundle)
+            self._open.move_to_end(sha256)
+            while len(self._open) > self.max_open:
+                self._open.popitem(last=False)
+        return bundle
+
+    def read(
+        self,
+        sha256: str,
+        fields: Optional[Sequence[str]] = None,
+        start: int = 0,
+        stop: Optional[int] = None,
+    ) -> Tuple[ResultBundle, Dict[str, Any], Dict[str, Any]]:
+        """`ResultBundle.select` on the current bundle."""
+        bundle = self.open(sha256)
+        try:
+            return (bundle, *bundle.select(fields, start, stop))
+        except FileNotFoundError:
+            # Rewritten between reading meta.json and mapping a column.
+            with self._open_lock:
+                self._open.pop(sha256, None)
+            bundle = self.open(sha256)
+            return (bundle, *bundle.select(fields, start, stop))
+
+    # -- writes ------------------------------------------------------------
+
+    def write(
+        self,
+        sha256: str,
+        *,
+        columns: Optional[Mapping[str, Any]] = None,
+        document: Optional[Mapping[str, Any]] = None,
+        replace: bool = False,
+    ) -> None:
+        """Add or overwrite fields of a bundle.
+
+        Chunk columns must have one row per chunk of the existing bundle. With
+        `replace` (a document was re-chunked) every existing field is dropped
+        first. Document fields must be JSON-serialisable.
+        """
+        columns = dict(columns or {})
+        directory = self._dir(sha256)
+        directory.mkdir(parents=True, exist_ok=True)
+        with self._write_lock(directory):
+            meta_path = directory / "meta.json"
+            old: Optional[Dict[str, Any]] = None
+            if meta_path.exists():
+                with open(meta_path) as f:
+                    old = json.load(f)
+            meta = (
+                {
+                    "version": FORMAT_VERSION,
+                    "chunks": None,
+                    "columns": {},
+                    "document": {},
+                }
+                if old is None or replace
+                else json.loads(json.dumps(old))
+            )
+            token = uuid.uuid4().hex[:12]
+            # Check every column before writing any, so a rejected write
+            # leaves no stray files behind.
+            encoded = {name: _encode_column(values) for name, values in columns.items()}
+            for name, (kind, arrays) in encoded.items():
+                rows = len(arrays[0]) - (kind != KIND_NUMERIC)
+                if meta["chunks"] is None:
+                    meta["chunks"] = rows
+                elif rows != meta["chunks"]:
+                    raise ValueError(
+                        f"Column {name!r} has {rows} rows, the bundle has "
+                        f"{meta['chunks']} chunks"
+                    )
+                meta["columns"][name] = {
+                    "kind": kind,
+                    "token": token,
+                    "shape": [rows, *arrays[0].shape[1:]],
+                    "dtype": str(arrays[0].dtype),
+                }
+            for name, (kind, arrays) in encoded.items():
+                for file, array in zip(_column_files(name, kind, token), arrays):
+                    np.save(directory / file, np.ascontiguousarray(array))
+            meta["document"].update(document or {})
+            if meta["chunks"] is None:
+                meta["chunks"] = 0
+            tmp = directory / "meta.tmp"
+            with open(tmp, "w") as f:
+                json.dump(meta, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, meta_path)
+            self.writes += 1
+            if old is not None:
+                for name, column in old["columns"].items():
+                    if meta["columns"].get(name) != column:
+                        for file in _column_files(
+                            name, column["kind"], column["token"]
+                        ):
+                            (directory / file).unlink(missing_ok=True)
+
+    def delete(self, sha256: str) -> None:
+        directory = self._dir(sha256)
+        if not directory.exists():
+            return
+        with self._write_lock(directory):
+            for path in directory.iterdir():
+                if path.name != "lock":
+                    path.unlink(missing_ok=True)
+        with self._open_lock:
+            self._open.pop(sha256, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._open_lock:
+            return {
+                "open_bundles": len(self._open),
+                "max_open": self.max_open,
+                "reads": self.reads,
+                "opens": self.opens,
+                "writes": self.writes,
+            }
+
+
+_result_store: Optional[ResultStore] = None
+_result_store_lock = threading.Lock()
+
+
+def get_result_store() -> ResultStore:
+    """Return the process-wide store configured in settings."""
+    global _result_store
+    if _result_store is None:
+        with _result_store_lock:
+            if _result_store is None:
+                from app.core.config import settings
+
+                _result_store = ResultStore(
+                    settings.RESULTS_DIR
+                    or os.path.join(settings.STORAGE_DIR, "results"),
+                    max_open=settings.RESULTS_MAX_OPEN_BUNDLES,
+                )
+    return _result_store
@@ -0,0 +1,107 @@
+"""Content-addressed file storage for uploaded documents.
+
+Files live at `STORAGE_DIR/ab/cd/<sha256>`. A `BlobWriter` streams data to a
+temporary file in the same directory tree while hashing it, then moves it into
+place with an atomic rename. Identical uploads therefore end up as a single
+file no matter who uploads them, and a half-written upload is never visible
+under its final name.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional, Tuple
+
+
+class UploadTooLarge(Exception):
+    """Raised by `BlobWriter.write` once the size limit is exceeded."""
+
+    def __init__(self, max_bytes: int) -> None:
+        super().__init__(f"Upload exceeds the {max_bytes} byte limit")
+        self.max_bytes = max_bytes
+
+
+class BlobWriter:
+    """Write one upload to a temp file, hashing as it goes."""
+
+    HEAD_BYTES = 8  # enough to sniff the file type (e.g. b"%PDF-")
+
+    def __init__(self, store: "ContentStore", max_bytes: Optional[int]) -> None:
+        self._store = store
+        self._max_bytes = max_bytes
+        self._hash = hashlib.sha256()
+        self._file = tempfile.NamedTemporaryFile(
+            dir=store.tmp_dir, prefix="upload-", delete=False
+        )
+        self.size = 0
+        self.head = b""
+
+    def write(self, data: bytes) -> None:
+        self.size += len(data)
+        if self._max_bytes is not None and self.size > self._max_bytes:
+            raise UploadTooLarge(self._max_bytes)
+        if len(self.head) < self.HEAD_BYTES:
+            self.head += data[: self.HEAD_BYTES - len(self.head)]
+        self._hash.update(data)
+        self._file.write(data)
+
+    def commit(self) -> Tuple[str, int]:
+        """Move the file into place and return (sha256, size)."""
+        digest = self._hash.hexdigest()
+        self._file.close()
+        path = self._store.path_for(digest)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Replace unconditionally: if the blob already exists the content is
+        # identical, and re-linking it narrows the window in which a concurrent
+        # delete of the last reference could leave this upload without a file.
+        os.replace(self._file.name, path)
+        return digest, self.size
+
+    def abort(self) -> None:
+        self._file.close()
+        try:
+            os.unlink(self._file.name)
+        except FileNotFoundError:
+            pass
+
+
+class ContentStore:
+    def __init__(self, root: str, max_upload_bytes: Optional[int] = None) -> None:
+        self.root = Path(root)
+        self.tmp_dir = self.root / "tmp"
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        self.max_upload_bytes = max_upload_bytes
+
+    def path_for(self, sha256: str) -> Path:
+        return self.root / sha256[:2] / sha256[2:4] / sha256
+
+    def exists(self, sha256: str) -> bool:
+        return self.path_for(sha256).is_file()
+
+    def open_writer(self) -> BlobWriter:
+        return BlobWriter(self, self.max_upload_bytes)
+
+    def delete(self, sha256: str) -> None:
+        try:
+            self.path_for(sha256).unlink()
+        except FileNotFoundError:
+            pass
+
+
+_content_store: Optional[ContentStore] = None
+_content_store_lock = threading.Lock()
+
+
+def get_content_store() -> ContentStore:
+    """Return the process-wide store rooted at settings.STORAGE_DIR."""
+    global _content_store
+    if _content_store is None:
+        with _content_store_lock:
+            if _content_store is None:
+                from app.core.config import settings
+
+                _content_store = ContentStore(
+                    settings.STORAGE_DIR, max_upload_bytes=settings.UPLOAD_MAX_BYTES
+                )
+    return _content_store
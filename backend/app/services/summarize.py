@@ -0,0 +1,130 @@
+"""Incremental map-reduce summarization of a document's chunks.
+
+Map: every chunk is summarized on its own, and the request is addressed by the
+SHA-256 of the chunk text rather than of the file. When a corrected version of
+a paper is uploaded, chunks whose text did not change are answered by the AI
+response cache, and only the changed chunks go upstream.
+
+Reduce: partial summaries are combined `fanin` at a time, level by level, until
+one remains. Each reduce request is addressed by the hash of its inputs, so
+only the groups above a changed chunk are recomputed.
+
+`summarize_chunks` yields events as results complete, which lets callers
+stream partial output. Closing the generator cancels the outstanding calls.
+"""
+import asyncio
+import hashlib
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Sequence
+
+from app.services.ai_cache import AIResponseCache
+from app.services.ai_provider import AIProvider, GenerationResult
+from app.services.prompts import SUMMARIZE_CHUNK, SUMMARIZE_REDUCE
+
+REDUCE_FANIN = 8
+
+
+class ChunkText(NamedTuple):
+    ordinal: int
+    page_start: int
+    page_end: int
+    text: str
+
+
+class SummaryEvent(NamedTuple):
+    event: str  # "chunk" | "reduce" | "summary"
+    data: Dict[str, Any]
+
+
+def text_sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _reused(result: GenerationResult) -> bool:
+    return result.source != "upstream"
+
+
+async def summarize_chunks(
+    chunks: Sequence[ChunkText],
+    *,
+    model: str,
+    cache: AIResponseCache,
+    provider: AIProvider,
+    fanin: int = REDUCE_FANIN,
+) -> AsyncIterator[SummaryEvent]:
+    """Summarize `chunks`, yielding a "chunk" event per partial summary in
+    completion order, a "reduce" event per reduce level and a final "summary".
+
+    Provider errors propagate to the consumer.
+    """
+    tasks: Dict["asyncio.Future[GenerationResult]", ChunkText] = {}
+    for chunk in chunks:
+        request = SUMMARIZE_CHUNK.request(
+            content_sha256=text_sha256(chunk.text), model=model, text=chunk.text
+        )
+        tasks[asyncio.ensure_future(cache.generate(request, provider))] = chunk
+
+    partials: Dict[int, str] = {}
+    reused = 0
+    try:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in sorted(done, key=lambda t: tasks[t].ordinal):
+                chunk, result = tasks[task], task.result()
+                partials[chunk.ordinal] = result.text
+                reused += _reused(result)
+                yield SummaryEvent(
+                    "chunk",
+                    {
+                        "ordinal": chunk.ordinal,
+                        "page_start": chunk.page_start,
+                        "page_end": chunk.page_end,
+                        "summary": result.text,
+                        "cached": _reused(result),
+                        "completed": len(partials),
+                        "total": len(tasks),
+                    },
+                )
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    level: List[str] = [partials[ordinal] for ordinal in sorted(partials)]
+    depth = 0
+    while len(level) > 1:
+        depth += 1
+        groups = [
+            "\n\n".join(level[i : i + fanin]) for i in range(0, len(level), fanin)
+        ]
+        results = await asyncio.gather(
+            *(
+                cache.generate(
+                    SUMMARIZE_REDUCE.request(
+                        content_sha256=text_sha256(group), model=model, summaries=group
+                    ),
+                    provider,
+                )
+                for group in groups
+            )
+        )
+        level = [result.text for result in results]
+        yield SummaryEvent(
+            "reduce",
+            {
+                "level": depth,
+                "groups": len(groups),
+                "cached": sum(_reused(result) for result in results),
+            },
+        )
+
+    yield SummaryEvent(
+        "summary",
+        {
+            "summary": level[0] if level else "",
+            "chunks": len(partials),
+            "cached_chunks": reused,
+            "reduce_levels": depth,
+        },
+    )
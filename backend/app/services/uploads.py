@@ -0,0 +1,112 @@
+"""Stream a multipart/form-data file field straight into a `BlobWriter`.
+
+Starlette's `Request.form()` spools every file part to a temporary file before
+the endpoint sees it, so an upload is written twice and the endpoint cannot
+hash it on the way in. Here the body is fed chunk by chunk from
+`request.stream()` into python-multipart's push parser and the file part's
+bytes go directly to the writer. At most one network chunk is held in memory
+at a time, whatever the file size.
+"""
+from email.message import Message
+from typing import List, Optional
+
+from fastapi import HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from multipart.multipart import MultipartParser, parse_options_header
+
+from app.services.storage import BlobWriter
+
+
+class MultipartFileReceiver:
+    """Push-parser callbacks that collect one named file field."""
+
+    def __init__(self, boundary: bytes, field_name: str) -> None:
+        self.field_name = field_name
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self.found = False
+        self.pending: List[bytes] = []
+        self._header_field = b""
+        self._header_value = b""
+        self._headers = Message()
+        self._in_target = False
+        self.parser = MultipartParser(
+            boundary,
+            {
+                "on_part_begin": self._on_part_begin,
+                "on_part_data": self._on_part_data,
+                "on_header_field": self._on_header_field,
+                "on_header_value": self._on_header_value,
+                "on_header_end": self._on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+            },
+        )
+
+    def feed(self, chunk: bytes) -> bytes:
+        """Parse `chunk` and return the file bytes it contained."""
+        self.parser.write(chunk)
+        data = b"".join(self.pending)
+        self.pending.clear()
+        return data
+
+    def _on_part_begin(self) -> None:
+        self._headers = Message()
+        self._in_target = False
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[self._header_field.decode("latin-1")] = self._header_value.decode(
+            "latin-1"
+        )
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        disposition, options = parse_options_header(
+            self._headers.get("content-disposition", "")
+        )
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        if disposition == b"form-data" and name == self.field_name and not self.found:
+            self.found = self._in_target = True
+            self.filename = options.get(b"filename", b"").decode("utf-8", "replace")
+            self.content_type = self._headers.get("content-type")
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_target:
+            self.pending.append(data[start:end])
+
+
+async def receive_file(
+    request: Request, writer: BlobWriter, field_name: str = "file"
+) -> MultipartFileReceiver:
+    """Stream the `field_name` part of a multipart request body into `writer`.
+
+    Returns the receiver, whose `filename` and `content_type` describe the
+    part. Disk writes run in the threadpool so the event loop is not blocked.
+    """
+    content_type, options = parse_options_header(
+        request.headers.get("content-type", "")
+    )
+    boundary = options.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Expected a multipart/form-data body",
+        )
+    receiver = MultipartFileReceiver(boundary, field_name)
+    async for chunk in request.stream():
+        data = receiver.feed(chunk)
+        if data:
+            await run_in_threadpool(writer.write, data)
+    receiver.parser.finalize()
+    if not receiver.found:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Missing file field '{field_name}'",
+        )
+    return receiver
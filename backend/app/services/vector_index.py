@@ -0,0 +1,537 @@
+"""Embedded vector index over document chunks.
+
+Embeddings are L2-normalised float32 rows in one contiguous file that every
+process memory-maps, so cosine similarity is a plain matrix multiply and the
+OS page cache is shared between API workers. Per row the index also stores
+the chunk id, a group key (the document's sha256, so a whole file can be
+filtered or dropped at once), a tombstone byte and, once trained, the row's
+IVF list.
+
+Layout of `VECTOR_INDEX_DIR`:
+
+    meta.json               dim, generation, row/deleted counts, IVF state
+    vectors-<gen>.f32       count x dim float32
+    ids-<gen>.i64           chunk ids
+    groups-<gen>.i64        group keys
+    deleted-<gen>.u8        tombstones (1 = deleted)
+    lists-<gen>.i32         IVF list per row (-1 = not assigned)
+    centroids-<gen>.npy     IVF centroids
+
+Writers (append, delete, compact) serialise on an flock'd lock file and
+publish by rewriting meta.json atomically, after the data it describes is on
+disk; readers notice the change with one stat() per search and re-map. A
+compaction writes a new generation and then switches meta.json to it, so
+readers never see a half-written file.
+"""
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows; single process only
+    fcntl = None
+
+BLOCK_ROWS = 65536  # rows scored per matmul; bounds scratch memory
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 256
+# Fewer training points per list than this gives poor centroids.
+MIN_POINTS_PER_LIST = 39
+
+# (chunk_id, score) pairs, best first
+Hits = List[Tuple[int, float]]
+
+
+def group_key(sha256: str) -> int:
+    """int64 group key for a document sha256."""
+    return int.from_bytes(bytes.fromhex(sha256[:16]), "big", signed=True)
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def train_centroids(vectors: np.ndarray, n_lists: int, *, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on a sample of `vectors` (coarse quantizer)."""
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), n_lists * KMEANS_SAMPLE_PER_LIST)
+    sample = np.asarray(
+        vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))]
+    )
+    centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        empty = ~sums.any(axis=1)
+        # Re-seed empty lists from random points so none stay unused.
+        sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+        centroids = normalize(sums)
+    return centroids
+
+
+def assign_lists(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    out = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), BLOCK_ROWS):
+        block = np.asarray(vectors[start : start + BLOCK_ROWS])
+        out[start : start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return out
+
+
+class _Snapshot:
+    """Read-only mappings of one published state of the index."""
+
+    def __init__(self, directory: Path, meta: Dict[str, Any]) -> None:
+        self.meta = meta
+        self.count = meta["count"]
+        gen, dim, count = meta["generation"], meta["dim"], meta["count"]
+        self.centroids: Optional[np.ndarray] = None
+        self._list_rows: Optional[List[np.ndarray]] = None
+        self._unassigned: Optional[np.ndarray] = None
+        if count == 0:
+            self.vectors = np.zeros((0, dim), dtype=np.float32)
+            self.ids = self.groups = np.zeros(0, dtype=np.int64)
+            self.deleted = np.zeros(0, dtype=np.uint8)
+            self.lists = np.zeros(0, dtype=np.int32)
+            return
+
+        def mapped(name: str, dtype: Any, shape: Tuple[int, ...]) -> np.ndarray:
+            return np.memmap(
+                directory / f"{name}-{gen}.{_SUFFIX[name]}",
+                dtype=dtype,
+                mode="r",
+                shape=shape,
+            )
+
+        self.vectors = mapped("vectors", np.float32, (count, dim))
+        self.ids = mapped("ids", np.int64, (count,))
+        self.groups = mapped("groups", np.int64, (count,))
+        self.deleted = mapped("deleted", np.uint8, (count,))
+        self.lists = mapped("lists", np.int32, (count,))
+        centroids_path = directory / f"centroids-{gen}.npy"
+        if meta.get("ivf_lists") and centroids_path.exists():
+            self.centroids = np.load(centroids_path)
+
+    def list_rows(self, list_ids: np.ndarray) -> np.ndarray:
+        """Row numbers in the given IVF lists, plus rows not yet assigned."""
+        if self._list_rows is None:
+            lists = np.asarray(self.lists)
+            order = np.argsort(lists, kind="stable")
+            bounds = np.searchsorted(lists[order], np.arange(len(self.centroids) + 1))
+            self._unassigned = order[: bounds[0]]
+            self._list_rows = [
+                order[bounds[i] : bounds[i + 1]] for i in range(len(self.centroids))
+            ]
+        return np.concatenate(
+            [self._unassigned, *(self._list_rows[i] for i in list_ids)]
+        )
+
+
+_SUFFIX = {
+    "vectors": "f32",
+    "ids": "i64",
+    "groups": "i64",
+    "deleted": "u8",
+    "lists": "i32",
+}
+
+
+class VectorIndex:
+    def __init__(
+        self,
+        directory: str,
+        dim: int,
+        *,
+        ivf_lists: int = 0,
+        nprobe: int = 8,
+        compact_ratio: float = 0.2,
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.dim = dim
+        self.ivf_lists = ivf_lists
+        self.nprobe = nprobe
+        self.compact_ratio = compact_ratio
+        self._meta_path = self.directory / "meta.json"
+        self._lock_path = self.directory / "lock"
+        self._thread_lock = threading.Lock()
+        self._snapshot: Optional[_Snapshot] = None
+        self._meta_stamp: Optional[Tuple[int, int]] = None
+        self.searches = 0
+        if not self._meta_path.exists():
+            with self._write_lock():
+                if not self._meta_path.exists():
+                    self._publish(
+                        {
+                            "dim": dim,
+                            "generation": 0,
+                            "count": 0,
+                            "deleted": 0,
+                            "ivf_lists": 0,
+                            "trained_count": 0,
+                        }
+                    )
+        meta = self._read_meta()
+        if meta["dim"] != dim:
+            raise ValueError(
+                f"Index at {directory} has dim {meta['dim']}, expected {dim}; "
+                "rebuild it after changing the embedder"
+            )
+
+    # -- files and locking -------------------------------------------------
+
+    def _path(self, name: str, generation: int) -> Path:
+        return self.directory / f"{name}-{generation}.{_SUFFIX[name]}"
+
+    def _read_meta(self) -> Dict[str, Any]:
+        with open(self._meta_path) as f:
+            return json.load(f)
+
+    def _publish(self, meta: Dict[str, Any]) -> None:
+        tmp = self._meta_path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._meta_path)
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        """Exclusive across threads and, via flock, across processes."""
+        with self._thread_lock:
+            with open(self._lock_path, "a") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def snapshot(self) -> _Snapshot:
+        """Current mappings, re-mapped if another process published changes."""
+        stat = self._meta_path.stat()
+        stamp = (stat.st_mtime_ns, stat.st_ino)
+        snapshot = self._snapshot
+        if snapshot is None or stamp != self._meta_stamp:
+            snapshot = _Snapshot(self.directory, self._read_meta())
+            self._snapshot, self._meta_stamp = snapshot, stamp
+        return snapshot
+
+    # -- writes ------------------------------------------------------------
+
+    def add(
+        self, ids: Sequence[int], groups: Sequence[int], vectors: np.ndarray
+    ) -> None:
+        """Append rows. `vectors` is normalised here."""
+        vectors = normalize(vectors)
+        if vectors.shape != (len(ids), self.dim) or len(groups) != len(ids):
+            raise ValueError("ids, groups and vectors must have matching lengths")
+        with self._write_lock():
+            self._append(self._read_meta(), ids, groups, vectors)
+
+    def replace_group(
+        self, group: int, ids: Sequence[int], vectors: np.ndarray
+    ) -> None:
+        """Tombstone every row of `group` and append the new rows, atomically
+        for readers (one meta.json update)."""
+        vectors = normalize(vectors)
+        with self._write_lock():
+            meta = self._read_meta()
+            meta["deleted"] += self._tombstone(meta, self._group_rows(meta, [group]))
+            self._append(meta, ids, [group] * len(ids), vectors)
+
+    def delete_groups(self, groups: Sequence[int]) -> int:
+        with self._write_lock():
+            meta = self._read_meta()
+            removed = self._tombstone(meta, self._group_rows(meta, groups))
+            if removed:
+                meta["deleted"] += removed
+                self._publish(meta)
+            return removed
+
+    def delete_ids(self, ids: Sequence[int]) -> int:
+        with self._write_lock():
+            meta = self._read_meta()
+            rows = np.zeros(0, dtype=np.int64)
+            if meta["count"]:
+                mapped = np.memmap(
+                    self._path("ids", meta["generation"]),
+                    dtype=np.int64,
+                    mode="r",
+                    shape=(meta["count"],),
+                )
+                rows = np.flatnonzero(np.isin(mapped, np.asarray(ids, np.int64)))
+            removed = self._tombstone(meta, rows)
+            if removed:
+                meta["deleted"] += removed
+                self._publish(meta)
+            return removed
+
+    def _group_rows(self, meta: Dict[str, Any], groups: Sequence[int]) -> np.ndarray:
+        if not meta["count"]:
+            return np.zeros(0, dtype=np.int64)
+        mapped = np.memmap(
+            self._path("groups", meta["generation"]),
+            dtype=np.int64,
+            mode="r",
+            shape=(meta["count"],),
+        )
+        return np.flatnonzero(np.isin(mapped, np.asarray(groups, np.int64)))
+
+    def _tombstone(self, meta: Dict[str, Any], rows: np.ndarray) -> int:
+        """Mark rows deleted in place; returns how many were newly deleted."""
+        if not len(rows):
+            return 0
+        deleted = np.memmap(
+            self._path("deleted", meta["generation"]),
+            dtype=np.uint8,
+            mode="r+",
+            shape=(meta["count"],),
+        )
+        newly = int(len(rows) - np.count_nonzero(deleted[rows]))
+        deleted[rows] = 1
+        deleted.flush()
+        return newly
+
+    def _append(
+        self,
+        meta: Dict[str, Any],
+        ids: Sequence[int],
+        groups: Sequence[int],
+        vectors: np.ndarray,
+    ) -> None:
+        gen = meta["generation"]
+        lists = np.full(len(ids), -1, dtype=np.int32)
+        centroids_path = self.directory / f"centroids-{gen}.npy"
+        if meta["ivf_lists"] and len(ids) and centroids_path.exists():
+            lists = assign_lists(vectors, np.load(centroids_path))
+        columns = {
+            "vectors": vectors.astype(np.float32, copy=False),
+            "ids": np.asarray(ids, dtype=np.int64),
+            "groups": np.asarray(groups, dtype=np.int64),
+            "deleted": np.zeros(len(ids), dtype=np.uint8),
+            "lists": lists,
+        }
+        for name, data in columns.items():
+            path = self._path(name, gen)
+            with open(path, "ab") as f:
+                # A writer that died mid-append may have left a partial tail
+                # beyond the published count; overwrite it.
+                row_bytes = data.itemsize * (data.shape[1] if data.ndim == 2 else 1)
+                f.truncate(meta["count"] * row_bytes)
+                f.write(np.ascontiguousarray(data).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+        meta["count"] += len(ids)
+        self._publish(meta)
+
+    def needs_compaction(self, meta: Optional[Dict[str, Any]] = None) -> bool:
+        meta = meta or self._read_meta()
+        if meta["count"] and meta["deleted"] / meta["count"] >= self.compact_ratio:
+            return True
+        if self.ivf_lists:
+            # (Re)train once the corpus is big enough, then whenever it doubles.
+            alive = meta["count"] - meta["deleted"]
+            return (
+                alive >= self.ivf_lists * MIN_POINTS_PER_LIST
+                and alive >= 2 * meta["trained_count"]
+            )
+        return False
+
+    def compact(self, *, force: bool = False) -> bool:
+        """Rewrite the index without tombstoned rows (and retrain IVF) as a
+        new generation, then switch readers to it.
+
+        Unless `force` is set this is a no-op when `needs_compaction()` is
+        false, checked under the write lock so concurrent callers (several
+        workers) compact only once. Returns whether a compaction ran.
+        """
+        with self._write_lock():
+            meta = self._read_meta()
+            if not force and not self.needs_compaction(meta):
+                return False
+            old_gen, new_gen = meta["generation"], meta["generation"] + 1
+            old = _Snapshot(self.directory, meta)
+            alive = np.flatnonzero(np.asarray(old.deleted) == 0)
+            for name in ("vectors", "ids", "groups", "deleted", "lists"):
+                with open(self._path(name, new_gen), "wb") as f:
+                    for start in range(0, len(alive), BLOCK_ROWS):
+                        rows = alive[start : start + BLOCK_ROWS]
+                        if name == "deleted":
+                            block = np.zeros(len(rows), dtype=np.uint8)
+                        elif name == "lists":
+                            block = np.full(len(rows), -1, dtype=np.int32)
+                        else:
+                            block = np.asarray(getattr(old, name)[rows])
+                        f.write(np.ascontiguousarray(block).tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+            new_meta = dict(
+                meta,
+                generation=new_gen,
+                count=len(alive),
+                deleted=0,
+                ivf_lists=0,
+                trained_count=0,
+            )
+            if self.ivf_lists and len(alive) >= self.ivf_lists * MIN_POINTS_PER_LIST:
+                vectors = np.memmap(
+                    self._path("vectors", new_gen),
+                    dtype=np.float32,
+                    mode="r",
+                    shape=(len(alive), self.dim),
+                )
+                centroids = train_centroids(vectors, self.ivf_lists)
+                np.save(self.directory / f"centroids-{new_gen}.npy", centroids)
+                lists = np.memmap(
+                    self._path("lists", new_gen),
+                    dtype=np.int32,
+                    mode="r+",
+                    shape=(len(alive),),
+                )
+                lists[:] = assign_lists(vectors, centroids)
+                lists.flush()
+                new_meta.update(ivf_lists=self.ivf_lists, trained_count=len(alive))
+            self._publish(new_meta)
+            for name in _SUFFIX:
+                self._path(name, old_gen).unlink(missing_ok=True)
+            (self.directory / f"centroids-{old_gen}.npy").unlink(missing_ok=True)
+        return True
+
+    # -- reads -------------------------------------------------------------
+
+    def search(
+        self,
+        queries: np.ndarray,
+        k: int = 10,
+        *,
+        groups: Optional[Sequence[int]] = None,
+        nprobe: Optional[int] = None,
+    ) -> List[Hits]:
+        """Top-k rows by cosine similarity for each query row.
+
+        `groups` restricts results to those group keys. With a trained IVF
+        quantizer only the `nprobe` closest lists are scanned; otherwise the
+        whole matrix is, in blocks of BLOCK_ROWS.
+        """
+        queries = normalize(queries)
+        snapshot = self.snapshot()
+        self.searches += len(queries)
+        if snapshot.count == 0 or k <= 0:
+            return [[] for _ in queries]
+        allowed = None
+        if groups is not None:
+            allowed = np.isin(snapshot.groups, np.asarray(list(groups), np.int64))
+        if snapshot.centroids is not None:
+            return [
+                self._search_ivf(snapshot, query, k, allowed, nprobe or self.nprobe)
+                for query in queries
+            ]
+        return self._search_flat(snapshot, queries, k, allowed)
+
+    def _search_flat(
+        self,
+        snapshot: _Snapshot,
+        queries: np.ndarray,
+        k: int,
+        allowed: Optional[np.ndarray],
+    ) -> List[Hits]:
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+        for start in range(0, snapshot.count, BLOCK_ROWS):
+            stop = min(start + BLOCK_ROWS, snapshot.count)
+            scores = queries @ np.asarray(snapshot.vectors[start:stop]).T  # q x B
+            dead = np.asarray(snapshot.deleted[start:stop]) != 0
+            if allowed is not None:
+                dead |= ~allowed[start:stop]
+            scores[:, dead] = -np.inf
+            rows = np.broadcast_to(np.arange(start, stop), scores.shape)
+            best_scores = np.concatenate([best_scores, scores], axis=1)
+            best_rows = np.concatenate([best_rows, rows], axis=1)
+            if best_scores.shape[1] > k:
+                top = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_scores = np.take_along_axis(best_scores, top, axis=1)
+                best_rows = np.take_along_axis(best_rows, top, axis=1)
+        return [
+            self._hits(snapshot, scores, rows)
+            for scores, rows in zip(best_scores, best_rows)
+        ]
+
+    def _search_ivf(
+        self,
+        snapshot: _Snapshot,
+        query: np.ndarray,
+        k: int,
+        allowed: Optional[np.ndarray],
+        nprobe: int,
+    ) -> Hits:
+        centroid_scores = snapshot.centroids @ query
+        probe = np.argsort(-centroid_scores)[: max(nprobe, 1)]
+        rows = snapshot.list_rows(probe)
+        keep = np.asarray(snapshot.deleted[rows]) == 0
+        if allowed is not None:
+            keep &= allowed[rows]
+        rows = np.sort(rows[keep])
+        if not len(rows):
+            return []
+        scores = np.asarray(snapshot.vectors[rows]) @ query
+        if len(rows) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            scores, rows = scores[top], rows[top]
+        return self._hits(snapshot, scores, rows)
+
+    @staticmethod
+    def _hits(snapshot: _Snapshot, scores: np.ndarray, rows: np.ndarray) -> Hits:
+        order = np.argsort(-scores, kind="stable")
+        return [
+            (int(snapshot.ids[rows[i]]), float(scores[i]))
+            for i in order
+            if np.isfinite(scores[i])
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        meta = self._read_meta()
+        return {
+            "dim": meta["dim"],
+            "generation": meta["generation"],
+            "rows": meta["count"],
+            "deleted": meta["deleted"],
+            "live": meta["count"] - meta["deleted"],
+            "ivf_lists": meta["ivf_lists"],
+            "trained_rows": meta["trained_count"],
+            "bytes": meta["count"] * meta["dim"] * 4,
+            "searches": self.searches,
+        }
+
+
+_vector_index: Optional[VectorIndex] = None
+_vector_index_lock = threading.Lock()
+
+
+def get_vector_index() -> VectorIndex:
+    """Return the process-wide index configured in settings."""
+    global _vector_index
+    if _vector_index is None:
+        with _vector_index_lock:
+            if _vector_index is None:
+                from app.core.config import settings
+
+                _vector_index = VectorIndex(
+                    settings.VECTOR_INDEX_DIR
+                    or os.path.join(settings.STORAGE_DIR, "vector_index"),
+                    settings.EMBEDDING_DIM,
+                    ivf_lists=settings.VECTOR_INDEX_IVF_LISTS,
+                    nprobe=settings.VECTOR_INDEX_IVF_NPROBE,
+                    compact_ratio=settings.VECTOR_INDEX_COMPACT_RATIO,
+                )
+    return _vector_index
@@ -0,0 +1,414 @@
+"""Background worker for document text extraction.
+
+    python -m app.worker [--processes N]
+
+Each worker claims jobs from the `jobs` table (see crud_job.claim_jobs) and
+runs extraction, chunking and reference parsing in a process pool, so any
+number of worker processes, on any number of hosts, can share one queue
+without a job being processed twice. Transient failures are retried in place
+with exponential backoff (tenacity); a job whose worker dies is requeued once
+its lock times out. Throughput is logged in pages/sec and stored on each job
+for /meta/jobs. Progress is published to API clients through
+app.services.job_events.
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional, TypeVar
+
+import numpy as np
+from sqlalchemy import Row
+from sqlalchemy.exc import OperationalError
+from tenacity import (
+    AsyncRetrying,
+    retry,
+    retry_if_exception_type,
+    retry_if_not_exception_type,
+    stop_after_attempt,
+    wait_exponential,
+    wait_exponential_jitter,
+)
+
+from app.core.config import configure_logging, settings
+from app.crud import crud_citation, crud_job, crud_signature
+from app.db import session
+from app.db.models.job import JOB_FAILED, JOB_RUNNING, JOB_SUCCEEDED
+from app.services import job_events
+from app.services.embeddings import get_embedder
+from app.services.extraction import Chunk, PermanentExtractionError, extract_and_chunk
+from app.services.results import ResultsNotFound, get_result_store
+from app.services.storage import get_content_store
+from app.services.vector_index import get_vector_index, group_key
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+STATS_LOG_INTERVAL_SECONDS = 30.0
+
+
+# Queue operations survive short database outages (failover, restarts).
+@retry(
+    retry=retry_if_exception_type(OperationalError),
+    stop=stop_after_attempt(5),
+    wait=wait_exponential(multiplier=0.5, max=10),
+    reraise=True,
+)
+def _with_db(fn: Callable[..., T], **kwargs) -> T:
+    with session.SessionLocal() as db:
+        return fn(db, **kwargs)
+
+
+def index_chunks(
+    sha256: str,
+    chunk_ids: List[int],
+    chunks: List[Chunk],
+    *,
+    reuse_from: Optional[str] = None,
+) -> int:
+    """Embed a file's chunks, replace its rows in the vector index and start
+    its analysis results bundle (text, pages and embedding per chunk).
+
+    Passages whose text is identical to one of `reuse_from`'s (the file's
+    near-duplicate, see crud_signature) take that passage's stored embedding
+    instead of being embedded again. Returns the number of passages embedded.
+    """
+    texts = [chunk.text for chunk in chunks]
+    embedder = get_embedder()
+    vectors = np.zeros((len(texts), embedder.dim), dtype=np.float32)
+    known = _stored_embeddings(reuse_from, embedder.dim) if reuse_from else {}
+    missing = []
+    for row, text in enumerate(texts):
+        if text in known:
+            vectors[row] = known[text]
+        else:
+            missing.append(row)
+    if missing:
+        vectors[missing] = embedder.embed([texts[row] for row in missing])
+    get_vector_index().replace_group(group_key(sha256), chunk_ids, vectors)
+    get_result_store().write(
+        sha256,
+        columns={
+            "ordinal": np.array([chunk.ordinal for chunk in chunks], np.int32),
+            "page_start": np.array([chunk.page_start for chunk in chunks], np.int32),
+            "page_end": np.array([chunk.page_end for chunk in chunks], np.int32),
+            "text": texts,
+            "embedding": vectors,
+        },
+        replace=True,
+    )
+    return len(missing)
+
+
+def _stored_embeddings(sha256: str, dim: int) -> Dict[str, np.ndarray]:
+    """Passage text -> embedding from a file's results bundle; empty if it
+    has none, or was embedded at another dimension."""
+    try:
+        bundle = get_result_store().open(sha256)
+        texts = bundle.column("text")
+        embeddings = bundle.column("embedding")
+    except (ResultsNotFound, KeyError, FileNotFoundError):
+        return {}
+    if embeddings.ndim != 2 or embeddings.shape[1] != dim:
+        return {}
+    return dict(zip(texts, embeddings))
+
+
+class Worker:
+    def __init__(
+        self,
+        *,
+        processes: int,
+        poll_interval: float,
+        max_attempts: int,
+        lock_timeout: float,
+        worker_id: Optional[str] = None,
+    ) -> None:
+        self.processes = max(processes, 1)
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.lock_timeout = lock_timeout
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._running: Dict[int, asyncio.Task] = {}
+        self._stopping = asyncio.Event()
+        self.jobs_succeeded = 0
+        self.jobs_failed = 0
+        self.pages = 0
+        self._busy_seconds = 0.0
+        self._started = time.monotonic()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=configure_logging,
+            )
+        return self._pool
+
+    def _reset_pool(self) -> None:
+        # A crashed child (e.g. OOM on a hostile PDF) breaks the whole pool.
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stop(self) -> None:
+        logger.info("Worker %s stopping after running jobs finish", self.worker_id)
+        self._stopping.set()
+
+    async def run(self) -> None:
+        logger.info(
+            "Worker %s started with %d processes", self.worker_id, self.processes
+        )
+        self._started = last_stats = time.monotonic()
+        last_housekeeping = 0.0
+        try:
+            while not self._stopping.is_set():
+                now = time.monotonic()
+                if now - last_housekeeping >= self.lock_timeout / 3:
+                    await self._housekeeping()
+                    last_housekeeping = now
+                if now - last_stats >= STATS_LOG_INTERVAL_SECONDS:
+                    self._log_stats()
+                    last_stats = now
+
+                claimed: List[Row] = []
+                free = self.processes - len(self._running)
+                if free > 0:
+                    claimed = await asyncio.to_thread(
+                        _with_db,
+                        crud_job.claim_jobs,
+                        worker_id=self.worker_id,
+                        limit=free,
+                    )
+                    for job in claimed:
+                        self._running[job.id] = asyncio.create_task(self._process(job))
+                if claimed and len(self._running) < self.processes:
+                    continue  # the queue may hold more work; claim again
+                await self._wait_for_capacity()
+            if self._running:
+                await asyncio.wait(self._running.values())
+        finally:
+            self._log_stats()
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+
+    async def _wait_for_capacity(self) -> None:
+        stop = asyncio.ensure_future(self._stopping.wait())
+        try:
+            await asyncio.wait(
+                [stop, *self._running.values()],
+                timeout=self.poll_interval,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+        finally:
+            stop.cancel()
+
+    async def _housekeeping(self) -> None:
+        await asyncio.to_thread(
+            _with_db,
+            crud_job.heartbeat,
+            worker_id=self.worker_id,
+            job_ids=list(self._running),
+        )
+        released = await asyncio.to_thread(
+            _with_db,
+            crud_job.requeue_stale_jobs,
+            lock_timeout=self.lock_timeout,
+            max_attempts=self.max_attempts,
+        )
+        if released:
+            logger.warning("Released %d stale jobs", released)
+        index = get_vector_index()
+        if await asyncio.to_thread(index.compact):
+            logger.info("Compacted vector index: %s", index.stats())
+
+    async def _extract(self, path: str):
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                self._get_pool(),
+                extract_and_chunk,
+                path,
+                settings.CHUNK_MAX_CHARS,
+                settings.CHUNK_OVERLAP_CHARS,
+            )
+        except BrokenProcessPool:
+            self._reset_pool()
+            raise
+
+    async def _publish(self, job: Row, status: str, stage: str, **fields) -> None:
+        event = job_events.job_event(
+            job_id=job.id, sha256=job.sha256, status=status, stage=stage, **fields
+        )
+        try:
+            await asyncio.to_thread(_with_db, job_events.publish, event=event)
+        except Exception:
+            # Progress events are best effort; clients can still poll.
+            logger.exception("Publishing progress of job %d failed", job.id)
+
+    async def _process(self, job: Row) -> None:
+        path = str(get_content_store().path_for(job.sha256))
+        attempts = job.attempts
+        started = time.perf_counter()
+        await self._publish(
+            job, JOB_RUNNING, job_events.STAGE_EXTRACTING, attempts=attempts
+        )
+        try:
+            async for attempt in AsyncRetrying(
+                retry=retry_if_not_exception_type(PermanentExtractionError),
+                stop=stop_after_attempt(max(self.max_attempts - job.attempts + 1, 1)),
+                wait=wait_exponential_jitter(initial=1, max=30),
+                reraise=True,
+            ):
+                with attempt:
+                    attempts = job.attempts + attempt.retry_state.attempt_number - 1
+                    started = time.perf_counter()
+                    pages, chunks, references, signature = await self._extract(path)
+        except Exception as e:
+            logger.warning("Job %d failed after %d attempts: %r", job.id, attempts, e)
+            self.jobs_failed += 1
+            error = f"{type(e).__name__}: {e}"[:2000]
+            await asyncio.to_thread(
+                _with_db,
+                crud_job.fail_job,
+                job_id=job.id,
+                worker_id=self.worker_id,
+                attempts=attempts,
+                error=error,
+            )
+            await self._publish(
+                job, JOB_FAILED, job_events.STAGE_DONE, attempts=attempts, error=error
+            )
+        else:
+            elapsed = time.perf_counter() - started
+            chunk_ids = await asyncio.to_thread(
+                _with_db,
+                crud_job.complete_extraction,
+                job_id=job.id,
+                worker_id=self.worker_id,
+                attempts=attempts,
+                pages=pages,
+                chunks=chunks,
+                duration_seconds=elapsed,
+            )
+            if chunk_ids is None:
+                logger.warning("Job %d lock lost; result discarded", job.id)
+            else:
+                self.jobs_succeeded += 1
+                self.pages += pages
+                self._busy_seconds += elapsed
+                progress = {"attempts": attempts, "pages": pages, "chunks": len(chunks)}
+                await self._publish(
+                    job, JOB_SUCCEEDED, job_events.STAGE_INDEXING, **progress
+                )
+                canonical = None
+                if signature is not None:
+                    canonical = await self._link_near_duplicate(job, signature)
+                try:
+                    embedded = await asyncio.to_thread(
+                        index_chunks,
+                        job.sha256,
+                        chunk_ids,
+                        chunks,
+                        reuse_from=canonical,
+                    )
+                except Exception:
+                    logger.exception("Indexing chunks of job %d failed", job.id)
+                else:
+                    if canonical is not None:
+                        logger.info(
+                            "Job %d: reused %d of %d passage embeddings from %s",
+                            job.id,
+                            len(chunks) - embedded,
+                            len(chunks),
+                            canonical[:12],
+                        )
+                try:
+                    await asyncio.to_thread(
+                        _with_db,
+                        crud_citation.ingest_references,
+                        sha256=job.sha256,
+                        parsed=references,
+                    )
+                except Exception:
+                    logger.exception("Storing references of job %d failed", job.id)
+                await self._publish(
+                    job, JOB_SUCCEEDED, job_events.STAGE_DONE, **progress
+                )
+        finally:
+            self._running.pop(job.id, None)
+
+    async def _link_near_duplicate(
+        self, job: Row, signature: np.ndarray
+    ) -> Optional[str]:
+        """Store the file's signature; returns the sha256 of the earlier file
+        it is a near-duplicate of, if any."""
+        try:
+            link = await asyncio.to_thread(
+                _with_db,
+                crud_signature.save_signature,
+                sha256=job.sha256,
+                signature=signature,
+                threshold=settings.NEAR_DUPLICATE_THRESHOLD,
+            )
+        except Exception:
+            logger.exception("Storing the signature of job %d failed", job.id)
+            return None
+        if link is None:
+            return None
+        logger.info(
+            "Job %d: file %s is a near-duplicate of %s (similarity %.2f)",
+            job.id,
+            job.sha256[:12],
+            link[0][:12],
+            link[1],
+        )
+        return link[0]
+
+    def _log_stats(self) -> None:
+        uptime = time.monotonic() - self._started
+        logger.info(
+            "Worker %s: %d jobs succeeded, %d failed, %d pages, "
+            "%.1f pages/sec overall, %.1f pages/sec per busy process",
+            self.worker_id,
+            self.jobs_succeeded,
+            self.jobs_failed,
+            self.pages,
+            self.pages / uptime if uptime else 0.0,
+            self.pages / self._busy_seconds if self._busy_seconds else 0.0,
+        )
+
+
+def main() -> None:
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Document extraction worker")
+    parser.add_argument("--processes", type=int, default=settings.WORKER_PROCESSES)
+    args = parser.parse_args()
+
+    worker = Worker(
+        processes=args.processes,
+        poll_interval=settings.WORKER_POLL_INTERVAL_SECONDS,
+        max_attempts=settings.JOB_MAX_ATTEMPTS,
+        lock_timeout=settings.JOB_LOCK_TIMEOUT_SECONDS,
+    )
+
+    async def run() -> None:
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, worker.stop)
+        await worker.run()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""Local stand-in for a model API that simulates latency and throttling.
+
+The server enforces its own token-bucket quota per second and answers with
+429 + Retry-After once it is exhausted, like a hosted LLM API. Each call
+sleeps for `latency` (+ `per_item_latency` per prompt in a batch) and,
+optionally, fails with a 503 at `error_rate`.
+
+`StubServerProvider` is the matching `AIProvider`; it talks to the server over
+httpx, in-process through ASGITransport by default. To run the server on its
+own:
+
+    python benchmarks/ai_stub_server.py --port 8765 --rate 20 --latency 0.2
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+import common  # noqa: F401  (sets up sys.path)
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.services.ai_provider import (
+    GenerationRequest,
+    GenerationResult,
+    ProviderError,
+    ProviderUnavailable,
+    RateLimited,
+)
+
+
+class StubPrompt(BaseModel):
+    prompt: str
+    model: str
+
+
+class StubBatch(BaseModel):
+    requests: List[StubPrompt]
+
+
+class StubQuota:
+    """Server-side quota: `rate` calls/second with bursts of `burst`."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.accepted = 0
+        self.throttled = 0
+
+    def take(self) -> Optional[float]:
+        """Consume a token, or return the seconds until one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            self.accepted += 1
+            return None
+        self.throttled += 1
+        return (1 - self.tokens) / self.rate
+
+
+def create_app(
+    *,
+    rate: float = 20.0,
+    burst: int = 5,
+    latency: float = 0.2,
+    per_item_latency: float = 0.01,
+    error_rate: float = 0.0,
+) -> FastAPI:
+    app = FastAPI(title="AI stub server")
+    app.state.quota = StubQuota(rate, burst)
+
+    def _complete(prompt: StubPrompt) -> Dict[str, Any]:
+        words = prompt.prompt.split()
+        return {
+            "text": "stub: " + " ".join(words[:20]),
+            "model": prompt.model,
+            "input_tokens": len(words),
+            "output_tokens": min(len(words), 20),
+        }
+
+    async def _gate(items: int) -> Optional[JSONResponse]:
+        retry_after = app.state.quota.take()
+        if retry_after is not None:
+            return JSONResponse(
+                {"detail": "rate limited"},
+                status_code=429,
+                headers={"Retry-After": f"{retry_after:.3f}"},
+            )
+        await asyncio.sleep(latency + per_item_latency * items)
+        if error_rate and random.random() < error_rate:
+            return JSONResponse({"detail": "overloaded"}, status_code=503)
+        return None
+
+    @app.post("/v1/generate")
+    async def generate(prompt: StubPrompt) -> Any:
+        return await _gate(1) or _complete(prompt)
+
+    @app.post("/v1/generate_batch")
+    async def generate_batch(batch: StubBatch) -> Any:
+        return await _gate(len(batch.requests)) or {
+            "results": [_complete(p) for p in batch.requests]
+        }
+
+    @app.get("/v1/stats")
+    def stats() -> Dict[str, Any]:
+        quota = app.state.quota
+        return {"accepted": quota.accepted, "throttled": quota.throttled}
+
+    return app
+
+
+class StubServerProvider:
+    """`AIProvider` backed by the stub server (or any API with its shape)."""
+
+    name = "stub"
+
+    def __init__(
+        self, app: Optional[FastAPI] = None, base_url: str = "http://stub"
+    ) -> None:
+        transport = httpx.ASGITransport(app=app) if app is not None else None
+        self.client = httpx.AsyncClient(
+            transport=transport, base_url=base_url, timeout=30.0
+        )
+
+    async def _post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            response = await self.client.post(path, json=payload)
+        except httpx.TransportError as e:
+            raise ProviderUnavailable(str(e)) from e
+        if response.status_code == 429:
+            retry_after = response.headers.get("Retry-After")
+            raise RateLimited(retry_after=float(retry_after) if retry_after else None)
+        if response.status_code >= 500:
+            raise ProviderUnavailable(f"Stub server returned {response.status_code}")
+        if response.status_code != 200:
+            raise ProviderError(f"Stub server returned {response.status_code}")
+        return response.json()
+
+    @staticmethod
+    def _payload(request: GenerationRequest) -> Dict[str, Any]:
+        return {"prompt": request.prompt, "model": request.model}
+
+    async def generate(self, request: GenerationRequest) -> GenerationResult:
+        return GenerationResult(
+            **await self._post("/v1/generate", self._payload(request))
+        )
+
+    async def generate_batch(
+        self, requests: List[GenerationRequest]
+    ) -> List[GenerationResult]:
+        body = await self._post(
+            "/v1/generate_batch", {"requests": [self._payload(r) for r in requests]}
+        )
+        return [GenerationResult(**result) for result in body["results"]]
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rate", type=float, default=20.0)
+    parser.add_argument("--burst", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    uvicorn.run(
+        create_app(
+            rate=args.rate,
+            burst=args.burst,
+            latency=args.latency,
+            error_rate=args.error_rate,
+        ),
+        host=args.host,
+        port=args.port,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Login throughput with activity recording off, written inline, and written behind.
+
+Runs POST /login/access-token through the ASGI app with --concurrency logins
+in flight, for each way of recording last_login_at:
+
+  off           ACTIVITY_LOG_ENABLED=false
+  inline        ACTIVITY_WRITE_BEHIND=false: an UPDATE and commit per login
+  write-behind  buffered, flushed in batches by app.services.activity
+
+Users get cost-4 bcrypt hashes and hashing runs inline, so bcrypt does not
+drown out the database work. After each run the buffer is closed (its final
+flush is timed separately) and the users with a last_login_at are counted.
+
+    python benchmarks/bench_activity.py --users 200 --requests 2000
+    python benchmarks/bench_activity.py --url postgresql://u:p@host/db
+"""
+import argparse
+import asyncio
+import time
+
+import common
+import httpx
+from sqlalchemy import create_engine, func, insert, select, update
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.hashing import _SELF_TEST_HASH
+from app.db import session as db_session
+from app.db.base import Base
+from app.db.models import User
+from app.main import create_app
+from app.services import activity
+
+PASSWORD = "self-test"  # the password in _SELF_TEST_HASH
+MODES = {
+    "off": {"ACTIVITY_LOG_ENABLED": False},
+    "inline": {"ACTIVITY_LOG_ENABLED": True, "ACTIVITY_WRITE_BEHIND": False},
+    "write-behind": {"ACTIVITY_LOG_ENABLED": True, "ACTIVITY_WRITE_BEHIND": True},
+}
+
+
+def seed(engine, n_users: int) -> None:
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(User),
+            [
+                {
+                    "email": f"user{i}@example.com",
+                    "hashed_password": _SELF_TEST_HASH,
+                    "is_active": True,
+                    "is_superuser": False,
+                }
+                for i in range(n_users)
+            ],
+        )
+
+
+async def bench_mode(mode: str, engine, args: argparse.Namespace) -> None:
+    for name, value in MODES[mode].items():
+        setattr(settings, name, value)
+    with engine.begin() as conn:
+        conn.execute(update(User).values(last_login_at=None))
+
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+
+        async def login(i: int) -> bool:
+            response = await client.post(
+                f"{settings.API_V1_STR}/login/access-token",
+                data={
+                    "username": f"user{i % args.users}@example.com",
+                    "password": PASSWORD,
+                },
+            )
+            return response.status_code == 200
+
+        result = await common.run_load(
+            mode, login, requests=args.requests, concurrency=args.concurrency
+        )
+    started = time.perf_counter()
+    stats = activity.get_activity_buffer().stats()
+    activity.stop_activity_buffer()
+    close_ms = (time.perf_counter() - started) * 1000
+    with engine.connect() as conn:
+        recorded = conn.scalar(
+            select(func.count()).where(User.last_login_at.is_not(None))
+        )
+    print(result.row())
+    print(
+        f"{'':<28} flushes={stats['flushes']} largest_batch={stats['largest_batch']}"
+        f" final_flush={close_ms:.1f}ms users_with_last_login={recorded}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=common.sqlite_urls()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+    # Set before the endpoint modules are imported by create_app.
+    settings.RATE_LIMIT_LOGIN = ""
+    settings.HASHING_POOL_ENABLED = False
+    settings.METRICS_ENABLED = False
+
+    connect_args = (
+        {"check_same_thread": False, "timeout": 30}
+        if args.url.startswith("sqlite")
+        else {}
+    )
+    engine = create_engine(
+        args.url, connect_args=connect_args, pool_size=args.concurrency
+    )
+    seed(engine, args.users)
+    # The app's sessions, and the activity buffer's, use this engine.
+    db_session.engine = engine
+    db_session.SessionLocal = sessionmaker(
+        autocommit=False, autoflush=False, bind=engine
+    )
+    for mode in MODES:
+        asyncio.run(bench_mode(mode, engine, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""AI client throughput against a throttling stub server.
+
+Fans N per-chunk requests out against `ai_stub_server` (in-process) and
+compares an unbounded `asyncio.gather` straight at the provider with
+`AIClient` without and with micro-batching. Reports wall time, failed
+requests, upstream calls and how often the server throttled. A final run
+cancels a fan-out midway and checks that nothing is left in flight.
+
+    python benchmarks/bench_ai_client.py --chunks 200 --rate 20 --latency 0.2
+"""
+import argparse
+import asyncio
+import time
+
+import common  # noqa: F401  (sets up sys.path)
+from ai_stub_server import StubServerProvider, create_app
+
+from app.services.ai_client import AIClient
+from app.services.prompts import SUMMARIZE_CHUNK
+
+
+def chunk_requests(n: int):
+    return [
+        SUMMARIZE_CHUNK.request(
+            content_sha256=f"{i:064x}",
+            model="stub-model",
+            text=f"chunk {i} " + "lorem ipsum dolor sit amet " * 40,
+        )
+        for i in range(n)
+    ]
+
+
+def make_client(provider, args, batch_size: int) -> AIClient:
+    return AIClient(
+        provider,
+        max_concurrency=args.concurrency,
+        rate_per_second=args.client_rate,
+        burst=args.burst,
+        batch_size=batch_size,
+        batch_window=args.batch_window_ms / 1000.0,
+        max_attempts=args.attempts,
+        retry_max_wait=5.0,
+    )
+
+
+async def run(label: str, args, call_factory) -> None:
+    app = create_app(
+        rate=args.rate,
+        burst=args.burst,
+        latency=args.latency,
+        error_rate=args.error_rate,
+    )
+    provider = StubServerProvider(app)
+    requests = chunk_requests(args.chunks)
+    generate, client = call_factory(provider)
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(
+        *(generate(r) for r in requests), return_exceptions=True
+    )
+    elapsed = time.perf_counter() - started
+    failed = sum(isinstance(o, BaseException) for o in outcomes)
+    quota = app.state.quota
+    line = (
+        f"{label:<24} {elapsed:>7.2f}s  ok={len(outcomes) - failed:<5} "
+        f"failed={failed:<5} upstream={quota.accepted + quota.throttled:<5} "
+        f"throttled={quota.throttled:<5}"
+    )
+    if client is not None:
+        stats = client.stats()
+        line += f" retries={stats['retries']:<4} rate={stats['rate_per_second']}/s"
+    print(line)
+    await provider.aclose()
+
+
+async def run_cancellation(args) -> None:
+    app = create_app(rate=args.rate, burst=args.burst, latency=args.latency)
+    provider = StubServerProvider(app)
+    client = make_client(provider, args, args.batch_size)
+    task = asyncio.ensure_future(client.generate_many(chunk_requests(args.chunks)))
+    await asyncio.sleep(args.cancel_after)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    await asyncio.sleep(0)
+    accepted = app.state.quota.accepted
+    await asyncio.sleep(args.latency * 3)
+    stats = client.stats()
+    print(
+        f"{'cancel after ' + str(args.cancel_after) + 's':<24} "
+        f"cancelled={stats['cancelled']:<5} in_flight={stats['in_flight']} "
+        f"queued={stats['queued']} running_batches={len(client._batches)} "
+        f"upstream_after_cancel={app.state.quota.accepted - accepted}"
+    )
+    await provider.aclose()
+
+
+async def main_async(args) -> None:
+    print(
+        f"{args.chunks} requests; server {args.rate}/s burst {args.burst}, "
+        f"latency {args.latency * 1000:.0f}ms; client cap {args.concurrency} in flight"
+    )
+    await run("unbounded gather", args, lambda provider: (provider.generate, None))
+    for batch_size in (1, args.batch_size):
+
+        def with_client(provider, batch_size=batch_size):
+            client = make_client(provider, args, batch_size)
+            return client.generate, client
+
+        await run(f"client batch={batch_size}", args, with_client)
+    await run_cancellation(args)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=20.0, help="server quota/s")
+    parser.add_argument("--burst", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--client-rate", type=float, default=40.0, help="client starting rate/s"
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--batch-window-ms", type=int, default=20)
+    parser.add_argument("--attempts", type=int, default=8)
+    parser.add_argument("--cancel-after", type=float, default=0.5)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
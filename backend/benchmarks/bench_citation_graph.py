@@ -0,0 +1,132 @@
+"""Citation graph build and query times on a synthetic million-edge graph.
+
+Generates papers whose reference counts and citation targets follow a skewed
+(preferential) distribution, builds the CSR snapshot, then times an
+incremental merge, k-hop neighbourhoods, co-citation, bibliographic coupling
+and PageRank. With --with-db the edges are also written to a SQLite citations
+table and loaded back through crud_citation.get_edges, as a cold start does.
+
+    python benchmarks/bench_citation_graph.py --papers 100000 --edges 1000000
+"""
+import argparse
+import time
+
+import common  # noqa: F401  (sets up sys.path)
+import numpy as np
+
+from app.services.citation_graph import CitationGraph
+
+
+def synthetic_edges(papers: int, edges: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    pairs = np.empty((0, 2), dtype=np.int64)
+    while len(pairs) < edges:
+        # Citing papers roughly uniform; cited papers skewed towards a few
+        # classics (Zipf), and only ever older (lower id) than the citing one.
+        size = (edges - len(pairs)) * 2
+        citing = rng.integers(1, papers, size=size)
+        skew = rng.zipf(1.3, size=size).astype(np.int64) - 1
+        cited = citing - 1 - (skew % citing)
+        pairs = np.unique(
+            np.concatenate([pairs, np.stack([citing, cited], axis=1)]), axis=0
+        )
+    pairs = pairs[rng.permutation(len(pairs))[:edges]]
+    return pairs[:, 0].astype(np.int32), pairs[:, 1].astype(np.int32)
+
+
+def best_of(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def per_query(label: str, fn, nodes: np.ndarray) -> None:
+    started = time.perf_counter()
+    results = 0
+    for node in nodes.tolist():
+        results += len(fn(node)[0])
+    elapsed = time.perf_counter() - started
+    print(
+        f"{label:<28} {elapsed / len(nodes) * 1000:>8.3f} ms/query  "
+        f"{len(nodes) / elapsed:>9.0f} q/s  avg results={results / len(nodes):.1f}"
+    )
+
+
+def load_through_db(citing: np.ndarray, cited: np.ndarray) -> None:
+    from sqlalchemy import create_engine, insert
+    from sqlalchemy.orm import Session
+
+    from app.crud import crud_citation
+    from app.db.base import Base
+    from app.db.models.citation import Citation
+
+    url, _ = common.sqlite_urls()
+    engine = create_engine(url)
+    Base.metadata.create_all(engine, tables=[Citation.__table__])
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Citation.__table__),
+            [
+                {"citing_id": a, "cited_id": b}
+                for a, b in zip(citing.tolist(), cited.tolist())
+            ],
+        )
+    print(f"{'insert into SQLite':<28} {time.perf_counter() - started:>8.2f} s")
+    with Session(engine) as db:
+        started = time.perf_counter()
+        ids, db_citing, db_cited = crud_citation.get_edges(db)
+        loaded = time.perf_counter() - started
+        started = time.perf_counter()
+        CitationGraph.from_edges(db_citing, db_cited, last_edge_id=int(ids.max()))
+        built = time.perf_counter() - started
+    print(f"{'load edges from SQLite':<28} {loaded:>8.2f} s  ({len(ids)} edges)")
+    print(f"{'build from loaded edges':<28} {built:>8.2f} s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--papers", type=int, default=100_000)
+    parser.add_argument("--edges", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--with-db", action="store_true")
+    args = parser.parse_args()
+
+    citing, cited = synthetic_edges(args.papers, args.edges)
+    print(f"{args.papers} papers, {len(citing)} distinct edges")
+
+    holdout = 1_000
+    graph = None
+
+    def build():
+        nonlocal graph
+        graph = CitationGraph.from_edges(citing[:-holdout], cited[:-holdout])
+
+    print(f"{'full build':<28} {best_of(build):>8.3f} s")
+    new_citing, new_cited = citing[-holdout:], cited[-holdout:]
+    merge = best_of(lambda: graph.with_edges(new_citing, new_cited, 0))
+    print(f"{'merge 1000 new edges':<28} {merge:>8.3f} s")
+    graph = graph.with_edges(new_citing, new_cited, 0)
+    print(f"{'snapshot size':<28} {graph.stats()['bytes'] / 1e6:>8.1f} MB")
+
+    rng = np.random.default_rng(1)
+    nodes = rng.integers(0, graph.n_nodes, size=args.queries)
+    per_query("1-hop (both)", lambda n: graph.k_hop(n, 1, limit=10_000), nodes)
+    per_query("2-hop (out)", lambda n: graph.k_hop(n, 2, "out", limit=10_000), nodes)
+    per_query("2-hop (both, limit 1000)", lambda n: graph.k_hop(n, 2), nodes)
+    per_query("co-citation top 20", lambda n: graph.co_citation(n, 20), nodes)
+    per_query("coupling top 20", lambda n: graph.coupling(n, 20), nodes)
+
+    started = time.perf_counter()
+    graph.pagerank()
+    print(f"{'PageRank (all nodes)':<28} {time.perf_counter() - started:>8.3f} s")
+
+    if args.with_db:
+        load_through_db(citing, cited)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Compare the sync (threadpool) and async (AsyncEngine) user endpoints.
+
+Drives authenticated `GET /users/me` and `GET /users/{id}` through the real
+routers with an in-process ASGI client and reports requests/sec and p99 for
+both modes against the same database.
+
+    python benchmarks/bench_db_modes.py                      # SQLite stand-in
+    python benchmarks/bench_db_modes.py \\
+        --sync-url postgresql://u:p@localhost/bench \\
+        --async-url postgresql+asyncpg://u:p@localhost/bench
+"""
+import argparse
+import asyncio
+
+import common  # noqa: F401  (sets up sys.path and placeholder settings)
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api import deps
+from app.api.v1.endpoints import users, users_async
+from app.core import security
+from app.db import session as db_session
+from app.db.base import Base
+from app.db.models.user import User
+
+
+def seed(sync_url: str, n_users: int) -> None:
+    engine = create_engine(sync_url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    hashed = security.get_password_hash("benchmark-password")
+    with engine.begin() as conn:
+        conn.execute(
+            insert(User),
+            [
+                {
+                    "email": f"user{i}@example.com",
+                    "hashed_password": hashed,
+                    "full_name": f"Bench User {i}",
+                    "is_active": True,
+                    "is_superuser": False,
+                }
+                for i in range(1, n_users + 1)
+            ],
+        )
+    engine.dispose()
+
+
+def build_app(mode: str, sync_url: str, async_url: str, pool_size: int) -> FastAPI:
+    app = FastAPI()
+    # Size both pools so neither mode is measured against pool exhaustion; the
+    # sync handlers hold two sessions per request (endpoint + auth dependency).
+    pool_args = {"pool_size": pool_size, "max_overflow": pool_size}
+    if mode == "sync":
+        connect_args = (
+            {"check_same_thread": False} if sync_url.startswith("sqlite") else {}
+        )
+        engine = create_engine(sync_url, connect_args=connect_args, **pool_args)
+        factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        def override_get_db():
+            db = factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[db_session.get_db] = override_get_db
+        app.dependency_overrides[deps.get_db] = override_get_db
+        app.include_router(users.router, prefix="/users")
+    else:
+        engine = create_async_engine(async_url, **pool_args)
+        factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+        async def override_get_async_db():
+            async with factory() as db:
+                yield db
+
+        app.dependency_overrides[db_session.get_async_db] = override_get_async_db
+        app.include_router(users_async.router, prefix="/users")
+    return app
+
+
+async def bench_mode(mode: str, args: argparse.Namespace) -> None:
+    app = build_app(mode, args.sync_url, args.async_url, args.concurrency)
+    tokens = [
+        security.create_access_token({"sub": f"user{i}@example.com"})
+        for i in range(1, args.users + 1)
+    ]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+
+        async def me(i: int) -> bool:
+            token = tokens[i % len(tokens)]
+            resp = await client.get(
+                "/users/me", headers={"Authorization": f"Bearer {token}"}
+            )
+            return resp.status_code == 200
+
+        async def by_id(i: int) -> bool:
+            user_id = i % len(tokens) + 1
+            resp = await client.get(
+                f"/users/{user_id}",
+                headers={"Authorization": f"Bearer {tokens[user_id - 1]}"},
+            )
+            return resp.status_code == 200
+
+        await common.run_load("warmup", me, requests=50, concurrency=5)
+        for label, call in (("GET /users/me", me), ("GET /users/{id}", by_id)):
+            result = await common.run_load(
+                f"{mode:<5} {label}",
+                call,
+                requests=args.requests,
+                concurrency=args.concurrency,
+            )
+            print(result.row())
+
+
+def main() -> None:
+    default_sync, default_async = common.sqlite_urls()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sync-url", default=default_sync)
+    parser.add_argument("--async-url", default=default_async)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    seed(args.sync_url, args.users)
+    print(
+        f"{args.requests} requests, concurrency {args.concurrency}, "
+        f"db={args.sync_url.split(':')[0]}"
+    )
+    for mode in ("sync", "async"):
+        asyncio.run(bench_mode(mode, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Job event fan-out: many SSE-style subscribers on one event loop.
+
+Subscribes --clients consumers spread over --files files, a --slow fraction of
+which stall for a while as a client on a bad connection would, then publishes
+--events events from another thread, as the LISTEN connection or an
+in-process worker does. Reports delivery latency for the fast consumers and
+how many events the bounded buffers dropped for the slow ones.
+
+    python benchmarks/bench_job_events.py --clients 10000 --events 200
+"""
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+
+import common  # noqa: F401  (sets up sys.path)
+
+from app.services.job_events import JobEventHub
+
+
+async def consume(subscription, count: int, latencies, stall: float) -> None:
+    if stall:
+        await asyncio.sleep(stall)
+    for _ in range(count):
+        event = await subscription.get()
+        if not stall:
+            latencies.append(time.perf_counter() - event["sent"])
+        if event["last"]:
+            break
+
+
+async def run(args) -> None:
+    hub = JobEventHub(args.buffer)
+    latencies = []
+    consumers = []
+    for i in range(args.clients):
+        subscription = hub.subscribe(f"file-{i % args.files}")
+        stall = args.stall if i < args.clients * args.slow else 0.0
+        consumers.append(
+            asyncio.create_task(consume(subscription, args.events, latencies, stall))
+        )
+
+    def publish() -> None:
+        for n in range(args.events):
+            for f in range(args.files):
+                hub.dispatch(
+                    {
+                        "sha256": f"file-{f}",
+                        "sent": time.perf_counter(),
+                        "last": n == args.events - 1,
+                    }
+                )
+            time.sleep(args.interval)
+
+    started = time.perf_counter()
+    publisher = threading.Thread(target=publish)
+    publisher.start()
+    await asyncio.gather(*consumers)
+    elapsed = time.perf_counter() - started
+    publisher.join()
+
+    stats = hub.stats()
+    latencies.sort()
+    print(f"{args.clients} clients on {args.files} files, {args.events} events each")
+    print(f"delivered          {stats['delivered']:>10}  in {elapsed:.2f} s")
+    print(f"dropped (slow)     {stats['dropped']:>10}")
+    print(
+        f"latency p50/p99    {statistics.median(latencies) * 1000:>7.2f} / "
+        f"{latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=10_000)
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=0.02)
+    parser.add_argument("--buffer", type=int, default=64)
+    parser.add_argument("--slow", type=float, default=0.1)
+    parser.add_argument("--stall", type=float, default=5.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Keyword (full-text) search latency on a large chunk table.
+
+Seeds N synthetic chunks (Zipf-distributed vocabulary plus rare "gene
+symbol" and author terms) and times `crud_document.keyword_search` for rare,
+medium and common terms, restricted to a user's files as the API does. On
+SQLite this exercises the FTS5 fallback; pass a Postgres URL to measure the
+tsvector/GIN path (the script creates the tables and index itself).
+
+Ranking touches every match, so "common" (a term in every chunk) is the worst
+case; selective terms stay in the low milliseconds as the table grows.
+
+    python benchmarks/bench_keyword_search.py --chunks 1000000
+    python benchmarks/bench_keyword_search.py --url postgresql://u:p@localhost/bench
+"""
+import argparse
+import time
+
+import common
+import numpy as np
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import Session
+
+from app.crud import crud_document
+from app.db.base import Base
+from app.db.models.document_chunk import DocumentChunk
+
+VOCABULARY = 50_000
+WORDS_PER_CHUNK = 300
+FILES = 2_000
+
+
+def seed(engine, n_chunks: int) -> list:
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    rng = np.random.default_rng(0)
+    shas = [f"{i:064x}" for i in range(FILES)]
+    batch = 5_000
+    with engine.begin() as conn:
+        for start in range(0, n_chunks, batch):
+            size = min(batch, n_chunks - start)
+            words = np.minimum(rng.zipf(1.2, size=(size, WORDS_PER_CHUNK)), VOCABULARY)
+            rows = []
+            for offset, row in enumerate(words):
+                i = start + offset
+                extra = f" BRCA{i % 997} author{i % 10007}"
+                rows.append(
+                    {
+                        "sha256": shas[i % FILES],
+                        "ordinal": i // FILES,
+                        "page_start": 1,
+                        "page_end": 1,
+                        "text": " ".join(f"w{w}" for w in row) + extra,
+                    }
+                )
+            conn.execute(insert(DocumentChunk), rows)
+        if engine.dialect.name == "postgresql":
+            conn.execute(text("ANALYZE document_chunks"))
+    return shas
+
+
+def main() -> None:
+    default_url, _ = common.sqlite_urls()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=default_url)
+    parser.add_argument("--chunks", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    print(f"seeding {args.chunks} chunks ...")
+    started = time.perf_counter()
+    shas = seed(engine, args.chunks)
+    print(f"seeded in {time.perf_counter() - started:.1f}s")
+
+    # A user with 1% of the files, and one with all of them.
+    scopes = {"100% files": shas, "1% files": shas[: FILES // 100]}
+    queries = {
+        "rare (gene symbol)": "BRCA42",
+        "rare (author)": "author4242",
+        "medium": "w500",
+        "common": "w2",
+        "two terms": "w3 BRCA7",
+    }
+    print(f"{'query':<20} {'scope':<11} {'hits':>5} {'p50':>9} {'p99':>9}")
+    with Session(engine) as db:
+        for label, query in queries.items():
+            for scope, scope_shas in scopes.items():
+                timings = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    hits = crud_document.keyword_search(
+                        db, query=query, shas=scope_shas, limit=args.k
+                    )
+                    timings.append((time.perf_counter() - started) * 1000)
+                print(
+                    f"{label:<20} {scope:<11} {len(hits):>5} "
+                    f"{common.percentile(timings, 50):>7.2f}ms "
+                    f"{common.percentile(timings, 99):>7.2f}ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
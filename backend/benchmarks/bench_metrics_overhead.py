@@ -0,0 +1,122 @@
+"""Overhead of the request metrics middleware and SQL statement hooks.
+
+Serves authenticated `GET /users/{id}` from two otherwise identical apps, one
+bare and one with `MetricsMiddleware` plus `instrument_engine`. Each round runs
+both back to back, in alternating order, and gives one overhead figure
+(1 - instrumented / bare throughput). Single rounds swing by several percent
+either way on a busy machine, so the result is the median over the rounds with
+their min and max; an overhead inside that spread is noise.
+
+    python benchmarks/bench_metrics_overhead.py --requests 10000 --rounds 9
+"""
+import argparse
+import asyncio
+import statistics
+
+import common
+import httpx
+from bench_db_modes import seed
+from fastapi import FastAPI
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api import deps
+from app.api.v1.endpoints import users
+from app.core import metrics, security
+from app.db import session as db_session
+
+
+def build_app(url: str, instrumented: bool, pool_size: int) -> FastAPI:
+    app = FastAPI()
+    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+    engine = create_engine(
+        url, connect_args=connect_args, pool_size=pool_size, max_overflow=pool_size
+    )
+    if instrumented:
+        metrics.instrument_engine(engine)
+        app.add_middleware(metrics.MetricsMiddleware)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[db_session.get_db] = override_get_db
+    app.dependency_overrides[deps.get_db] = override_get_db
+    app.include_router(users.router, prefix="/users")
+    return app
+
+
+async def bench_app(
+    label: str, app: FastAPI, tokens: list, args: argparse.Namespace
+) -> common.LoadResult:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+
+        async def by_id(i: int) -> bool:
+            user_id = i % len(tokens) + 1
+            resp = await client.get(
+                f"/users/{user_id}",
+                headers={"Authorization": f"Bearer {tokens[user_id - 1]}"},
+            )
+            return resp.status_code == 200
+
+        await common.run_load("warmup", by_id, requests=100, concurrency=10)
+        return await common.run_load(
+            label, by_id, requests=args.requests, concurrency=args.concurrency
+        )
+
+
+async def run(args: argparse.Namespace) -> None:
+    tokens = [
+        security.create_access_token({"sub": f"user{i}@example.com"})
+        for i in range(1, args.users + 1)
+    ]
+    apps = {
+        "bare": build_app(args.url, False, args.concurrency),
+        "instrumented": build_app(args.url, True, args.concurrency),
+    }
+    rps = {label: [] for label in apps}
+    overheads = []
+    for round_no in range(1, args.rounds + 1):
+        # Alternate which app goes first, so drift within a round (thermal,
+        # other load) does not always favour the same one.
+        order = list(apps) if round_no % 2 else list(apps)[::-1]
+        for label in order:
+            result = await bench_app(f"{label} #{round_no}", apps[label], tokens, args)
+            rps[label].append(result.rps)
+            print(result.row())
+        overhead = (1 - rps["instrumented"][-1] / rps["bare"][-1]) * 100
+        overheads.append(overhead)
+        print(f"round {round_no} overhead {overhead:+.2f}%")
+
+    print(
+        f"median of {args.rounds} rounds: "
+        f"bare {statistics.median(rps['bare']):.1f} req/s, "
+        f"instrumented {statistics.median(rps['instrumented']):.1f} req/s, "
+        f"overhead {statistics.median(overheads):+.2f}% "
+        f"(min {min(overheads):+.2f}%, max {max(overheads):+.2f}%)"
+    )
+
+
+def main() -> None:
+    default_url, _ = common.sqlite_urls()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=default_url)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=7)
+    args = parser.parse_args()
+
+    seed(args.url, args.users)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
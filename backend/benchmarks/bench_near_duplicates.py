@@ -0,0 +1,102 @@
+"""Near-duplicate lookup: LSH buckets versus comparing against every signature.
+
+Stores synthetic MinHash signatures for --docs files in a SQLite database, then
+looks up perturbed copies of some of them (about --similarity of positions
+kept) through crud_signature.find_similar, and through a linear scan that loads
+and compares every stored signature, as a naive implementation would.
+
+    python benchmarks/bench_near_duplicates.py --docs 100000
+"""
+import argparse
+import time
+
+import common  # noqa: F401  (sets up sys.path)
+import numpy as np
+
+from app.services import minhash
+
+
+def populate(engine, signatures: np.ndarray) -> None:
+    from sqlalchemy import insert
+
+    from app.db.base import Base
+    from app.db.models.document_signature import DocumentSignature
+    from app.db.models.minhash_bucket import MinHashBucket
+
+    Base.metadata.create_all(
+        engine, tables=[DocumentSignature.__table__, MinHashBucket.__table__]
+    )
+    with engine.begin() as conn:
+        for start in range(0, len(signatures), 10_000):
+            batch = signatures[start : start + 10_000]
+            conn.execute(
+                insert(DocumentSignature.__table__),
+                [
+                    {"sha256": f"{start + i:064x}", "minhash": minhash.to_bytes(sig)}
+                    for i, sig in enumerate(batch)
+                ],
+            )
+            conn.execute(
+                insert(MinHashBucket.__table__),
+                [
+                    {"band": band, "bucket": bucket, "sha256": f"{start + i:064x}"}
+                    for i, sig in enumerate(batch)
+                    for band, bucket in minhash.band_buckets(sig)
+                ],
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--similarity", type=float, default=0.9)
+    args = parser.parse_args()
+
+    from sqlalchemy import create_engine, select
+    from sqlalchemy.orm import Session
+
+    from app.crud import crud_signature
+    from app.db.models.document_signature import DocumentSignature
+
+    rng = np.random.default_rng(0)
+    signatures = rng.integers(
+        0, 2**31 - 1, size=(args.docs, minhash.NUM_PERM), dtype=np.uint32
+    )
+    url, _ = common.sqlite_urls()
+    engine = create_engine(url)
+    started = time.perf_counter()
+    populate(engine, signatures)
+    print(f"{'store signatures':<24} {time.perf_counter() - started:>8.2f} s")
+
+    targets = rng.integers(0, args.docs, size=args.queries)
+    queries = signatures[targets].copy()
+    changed = rng.random(queries.shape) > args.similarity
+    queries[changed] = rng.integers(0, 2**31 - 1, size=int(changed.sum()))
+
+    with Session(engine) as db:
+        found = 0
+        started = time.perf_counter()
+        for target, query in zip(targets.tolist(), queries):
+            matches = crud_signature.find_similar(db, query, threshold=0.8)
+            found += any(sha == f"{target:064x}" for sha, _ in matches)
+        lsh = time.perf_counter() - started
+        print(
+            f"{'LSH lookup':<24} {lsh / args.queries * 1000:>8.2f} ms/query  "
+            f"recall={found / args.queries:.2f}"
+        )
+
+        scans = max(1, args.queries // 10)
+        started = time.perf_counter()
+        for query in queries[:scans]:
+            rows = db.execute(
+                select(DocumentSignature.sha256, DocumentSignature.minhash)
+            )
+            for _, data in rows:
+                minhash.similarity(query, minhash.from_bytes(data))
+        linear = (time.perf_counter() - started) / scans
+        print(f"{'linear scan':<24} {linear * 1000:>8.2f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
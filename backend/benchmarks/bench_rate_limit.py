@@ -0,0 +1,48 @@
+"""Rate limiter store throughput: hits per second by shard and thread count.
+
+Each thread counts requests for its own set of keys, as the threadpool serving
+sync endpoints does. Compares one lock (one shard) with the sharded store.
+
+    python benchmarks/bench_rate_limit.py --threads 8 --hits 200000
+"""
+import argparse
+import threading
+import time
+
+import common  # noqa: F401  (sets up sys.path)
+
+from app.core.rate_limit import MemoryRateLimitStore, Rate
+
+
+def run(shards: int, threads: int, hits: int, keys: int) -> float:
+    store = MemoryRateLimitStore(shards=shards, max_keys=keys * threads * 2)
+    rate = Rate(1_000_000, 60.0)
+    per_thread = hits // threads
+
+    def work(t: int) -> None:
+        for i in range(per_thread):
+            store.hit(f"user:{t}:{i % keys}", rate)
+
+    workers = [threading.Thread(target=work, args=(t,)) for t in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return per_thread * threads / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--hits", type=int, default=200_000)
+    parser.add_argument("--keys", type=int, default=1_000)
+    args = parser.parse_args()
+    for shards in (1, 16, 64):
+        for threads in (1, args.threads):
+            rate = run(shards, threads, args.hits, args.keys)
+            print(f"shards={shards:<3} threads={threads:<3} {rate:>10.0f} hits/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Analysis results: one JSON blob per document vs the columnar results store.
+
+Builds the results of one large paper (--chunks passages with text, a passage
+summary, entities and a --dim embedding each, plus a document summary and key
+concepts). It writes them both as a single JSON file and as a bundle in
+app.services.results. It then times the reads a frontend makes:
+
+  concepts       the document's key concepts only
+  chunks 40-60   text and summary of 20 passages
+  embeddings     the embeddings of the same 20 passages
+  everything     all fields of all chunks (embeddings excluded)
+
+The JSON path has to read and parse the whole file every time. The store
+reads meta.json (cached while unchanged) and only the requested rows.
+
+    python benchmarks/bench_results_store.py --chunks 5000
+"""
+import argparse
+import json
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+import common
+import numpy as np
+
+from app.services.results import ResultStore
+
+SHA = "ab" * 32
+
+
+def build(n_chunks: int, dim: int) -> Dict[str, Any]:
+    rng = np.random.default_rng(0)
+    words = [f"term{i}" for i in range(2000)]
+    # About 1.6 kB of text per passage.
+    text = [" ".join(rng.choice(words, 220)) for _ in range(n_chunks)]
+    return {
+        "summary": " ".join(rng.choice(words, 300)),
+        "concepts": [str(word) for word in rng.choice(words, 40)],
+        "ordinal": np.arange(n_chunks, dtype=np.int32),
+        "page_start": np.arange(n_chunks, dtype=np.int32) // 3 + 1,
+        "text": text,
+        "chunk_summary": [" ".join(rng.choice(words, 60)) for _ in range(n_chunks)],
+        "entities": [
+            [str(word) for word in rng.choice(words, 5)] for _ in range(n_chunks)
+        ],
+        "embedding": rng.standard_normal((n_chunks, dim)).astype(np.float32),
+    }
+
+
+def report(label: str, fn: Callable[[], Any], repeat: int) -> None:
+    seconds = common.timeit(fn, repeat=repeat)
+    size = len(json.dumps(fn()))
+    print(f"  {label:<16} {seconds * 1000:>10.2f}ms {size / 1024:>10.1f} KiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    result = build(args.chunks, args.dim)
+    document = {"summary": result["summary"], "concepts": result["concepts"]}
+    columns = {k: v for k, v in result.items() if k not in document}
+    root = Path(tempfile.mkdtemp(prefix="academialens-results-"))
+
+    blob_path = root / "result.json"
+    blob_path.write_text(
+        json.dumps(
+            {
+                **document,
+                **{
+                    k: v.tolist() if isinstance(v, np.ndarray) else v
+                    for k, v in columns.items()
+                },
+            }
+        )
+    )
+    store = ResultStore(str(root / "store"))
+    store.write(SHA, columns=columns, document=document, replace=True)
+    bundle_dir = root / "store" / SHA[:2] / SHA
+    bundle_bytes = sum(path.stat().st_size for path in bundle_dir.iterdir())
+    print(
+        f"{args.chunks} chunks: JSON blob {blob_path.stat().st_size / 2**20:.1f} MiB,"
+        f" columnar bundle {bundle_bytes / 2**20:.1f} MiB"
+    )
+
+    def blob() -> Dict[str, Any]:
+        with open(blob_path) as f:
+            return json.load(f)
+
+    def blob_chunks(*fields: str) -> Dict[str, Any]:
+        data = blob()
+        return {field: data[field][40:60] for field in fields}
+
+    def blob_everything() -> Dict[str, Any]:
+        data = blob()
+        del data["embedding"]
+        return data
+
+    print(f"{'':<18} {'time':>10} {'response':>13}")
+    print("JSON blob")
+    report("concepts", lambda: blob()["concepts"], args.repeat)
+    report("chunks 40-60", lambda: blob_chunks("text", "chunk_summary"), args.repeat)
+    report("embeddings", lambda: blob_chunks("embedding"), args.repeat)
+    report("everything", blob_everything, args.repeat)
+    print("results store")
+    report("concepts", lambda: store.read(SHA, ["concepts"])[1:], args.repeat)
+    report(
+        "chunks 40-60",
+        lambda: store.read(SHA, ["text", "chunk_summary"], 40, 60)[2],
+        args.repeat,
+    )
+    report("embeddings", lambda: store.read(SHA, ["embedding"], 40, 60)[2], args.repeat)
+    report("everything", lambda: store.read(SHA)[1:], args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Cold start: import time and time to first request, with and without warm-up.
+
+Every run is a fresh interpreter, timed in phases: importing `app.main`,
+building the app, the lifespan start-up (with STARTUP_WARMUP off, then on),
+the first request (`GET /meta/health`) and the first login-path work (a bcrypt
+hash plus issuing and decoding a token). "to first response" is the wall time
+from spawning the process, as a load balancer waiting on a new worker sees it.
+Reports the median of --runs runs.
+
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --database-url postgresql://u:p@host/db
+
+Without --database-url the pool pre-fill step of the warm-up fails fast on the
+placeholder URL and is skipped.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import common  # noqa: F401  (sets up sys.path and placeholder settings)
+
+PHASES = ("import", "create_app", "startup", "first_request", "first_login")
+
+
+def child() -> None:
+    """One cold start; prints phase timings (seconds) as JSON."""
+    import asyncio
+
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+    import app.main
+
+    timings["import"] = time.perf_counter() - started
+
+    async def run() -> None:
+        import httpx
+
+        mark = time.perf_counter()
+        application = app.main.app
+        timings["create_app"] = time.perf_counter() - mark
+
+        mark = time.perf_counter()
+        async with application.router.lifespan_context(application):
+            timings["startup"] = time.perf_counter() - mark
+            transport = httpx.ASGITransport(app=application)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://bench"
+            ) as client:
+                mark = time.perf_counter()
+                response = await client.get("/api/v1/meta/health")
+                response.raise_for_status()
+                timings["first_request"] = time.perf_counter() - mark
+                timings["to_first_response"] = time.time()
+
+            from app.api import deps
+            from app.core import security
+
+            mark = time.perf_counter()
+            await security.get_password_hash_async("benchmark-password")
+            deps.decode_token(security.create_access_token({"sub": "1"}))
+            timings["first_login"] = time.perf_counter() - mark
+
+    asyncio.run(run())
+    print(json.dumps(timings))
+
+
+def cold_start(warmup: bool, database_url: str) -> Dict[str, float]:
+    env = dict(os.environ, STARTUP_WARMUP=str(warmup).lower(), LOG_LEVEL="ERROR")
+    if database_url:
+        env["DATABASE_URL"] = database_url
+    spawned = time.time()
+    output = subprocess.run(
+        [sys.executable, __file__, "--child"],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    timings = json.loads(output.strip().splitlines()[-1])
+    timings["to_first_response"] -= spawned
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--database-url", default="")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child()
+        return
+
+    columns = PHASES + ("to_first_response",)
+    print(f"{'warm-up':<8}" + "".join(f"{name:>19}" for name in columns))
+    for warmup in (False, True):
+        runs: List[Dict[str, float]] = [
+            cold_start(warmup, args.database_url) for _ in range(args.runs)
+        ]
+        medians = [statistics.median(run[name] for run in runs) for name in columns]
+        print(
+            f"{'on' if warmup else 'off':<8}"
+            + "".join(f"{value * 1000:>17.1f}ms" for value in medians)
+        )
+
+
+if __name__ == "__main__":
+    main()
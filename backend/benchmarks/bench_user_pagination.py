@@ -0,0 +1,88 @@
+"""OFFSET vs keyset pagination for the users listing.
+
+Seeds N users, then times fetching one page at increasing depths with the old
+OFFSET query (full ORM rows) and the keyset query (projected columns, cursor on
+(created_at, id)). Keyset time should stay flat as depth grows.
+
+    python benchmarks/bench_user_pagination.py --users 200000
+    python benchmarks/bench_user_pagination.py --url postgresql://u:p@localhost/bench
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+
+import common
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.crud import crud_user
+from app.db.base import Base
+from app.db.models.user import User
+
+
+def seed(engine, n_users: int) -> None:
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    batch = 10_000
+    with engine.begin() as conn:
+        for offset in range(0, n_users, batch):
+            conn.execute(
+                insert(User),
+                [
+                    {
+                        "email": f"user{i}@example.com",
+                        "hashed_password": "x" * 60,
+                        "full_name": f"User {i}",
+                        "is_active": True,
+                        "is_superuser": False,
+                        # Pairs of equal timestamps exercise the id tie-breaker.
+                        "created_at": start + timedelta(seconds=i // 2),
+                    }
+                    for i in range(offset, min(offset + batch, n_users))
+                ],
+            )
+
+
+def main() -> None:
+    default_url, _ = common.sqlite_urls()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=default_url)
+    parser.add_argument("--users", type=int, default=200_000)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    print(f"seeding {args.users} users ...")
+    seed(engine, args.users)
+
+    depths = [0, args.users // 100, args.users // 10, args.users // 2]
+    depths.append(args.users - args.page_size)
+    print(f"{'depth':>10} {'offset (ORM)':>14} {'keyset':>10}")
+    with Session(engine) as db:
+        for depth in depths:
+            # Cursor for the row just before `depth`, as a client would hold it.
+            after = None
+            if depth:
+                after = db.execute(
+                    select(User.created_at, User.id)
+                    .order_by(User.created_at, User.id)
+                    .offset(depth - 1)
+                    .limit(1)
+                ).one()
+                after = (after.created_at, after.id)
+
+            offset_time = common.timeit(
+                lambda: crud_user.get_users(db, skip=depth, limit=args.page_size)
+            )
+            keyset_time = common.timeit(
+                lambda: crud_user.get_users_page(db, limit=args.page_size, after=after)
+            )
+            db.expunge_all()
+            print(
+                f"{depth:>10} {offset_time * 1000:>12.2f}ms "
+                f"{keyset_time * 1000:>8.2f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Users listing response cost: response_model validation vs direct serialization.
+
+Seeds N users and times producing the JSON body of one N-user list, the way
+each path does it:
+
+  orm + response_model   ORM instances, validated by FastAPI through
+                         List[schemas.User], encoded with stdlib json
+  rows + response_model  projected rows (USER_READ_COLUMNS), same validation
+  rows + rows_to_json    projected rows serialized straight to bytes by the
+                         cached TypeAdapter in app.api.responses
+
+"serialize" excludes the query; "total" includes it. Also compares encoding
+already JSON-ready content with JSONResponse and FastJSONResponse.
+
+    python benchmarks/bench_user_serialization.py --users 10000
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, List
+
+import common
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.api.responses import FastJSONResponse, rows_to_json
+from app.crud import crud_user
+from app.db.base import Base
+from app.db.models.user import User
+
+
+def seed(engine, n_users: int) -> None:
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(User),
+            [
+                {
+                    "email": f"user{i}@example.com",
+                    "hashed_password": "x" * 60,
+                    "full_name": f"User {i}",
+                    "is_active": True,
+                    "is_superuser": False,
+                    "created_at": start + timedelta(seconds=i),
+                }
+                for i in range(n_users)
+            ],
+        )
+
+
+def _list_users() -> List[schemas.User]:
+    raise NotImplementedError  # only its response_model is used
+
+
+# The response field FastAPI builds for `response_model=List[schemas.User]`.
+RESPONSE_FIELD = APIRoute(
+    "/users/", _list_users, response_model=List[schemas.User]
+).response_field
+
+
+def response_model_body(content: Any) -> bytes:
+    """What FastAPI does with a handler's return value: validate and dump it
+    through the response model, then render a JSONResponse."""
+    jsonable = asyncio.run(
+        serialize_response(
+            field=RESPONSE_FIELD, response_content=content, is_coroutine=False
+        )
+    )
+    return JSONResponse(jsonable).body
+
+
+def report(label: str, fn: Callable[[], Any], repeat: int) -> None:
+    print(f"{label:<26} {common.timeit(fn, repeat=repeat) * 1000:>10.1f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="sqlite://")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    print(f"seeding {args.users} users ...")
+    seed(engine, args.users)
+
+    with Session(engine) as db:
+
+        def orm_users() -> List[User]:
+            db.expunge_all()
+            return crud_user.get_users(db, limit=args.users)
+
+        def rows() -> list:
+            return crud_user.get_users_page(db, limit=args.users)
+
+        orm, projected = orm_users(), rows()
+        expected = response_model_body(orm)
+        assert response_model_body(projected) == expected
+        assert rows_to_json(projected, schemas.User) == expected
+
+        print("serialize")
+        report("  orm + response_model", lambda: response_model_body(orm), args.repeat)
+        report(
+            "  rows + response_model",
+            lambda: response_model_body(projected),
+            args.repeat,
+        )
+        report(
+            "  rows + rows_to_json",
+            lambda: rows_to_json(projected, schemas.User),
+            args.repeat,
+        )
+        print("total (query + serialize)")
+        report(
+            "  orm + response_model",
+            lambda: response_model_body(orm_users()),
+            args.repeat,
+        )
+        report(
+            "  rows + rows_to_json",
+            lambda: rows_to_json(rows(), schemas.User),
+            args.repeat,
+        )
+
+    jsonable = asyncio.run(
+        serialize_response(
+            field=RESPONSE_FIELD, response_content=projected, is_coroutine=False
+        )
+    )
+    print("encode only")
+    report("  JSONResponse", lambda: JSONResponse(jsonable), args.repeat)
+    report("  FastJSONResponse", lambda: FastJSONResponse(jsonable), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Vector index queries/sec against corpus size, flat vs IVF.
+
+Builds indexes of random unit vectors at increasing sizes and measures
+single-query and batched search throughput for brute-force (matrix multiply
+over the memory-mapped matrix) and IVF (nprobe lists) modes, with IVF
+recall@k measured against the exact result.
+
+    python benchmarks/bench_vector_search.py --sizes 10000 100000 1000000
+"""
+import argparse
+import math
+import tempfile
+import time
+
+import common  # noqa: F401  (sets up sys.path)
+import numpy as np
+
+from app.services.vector_index import VectorIndex
+
+
+def build(directory: str, vectors: np.ndarray, ivf_lists: int, nprobe: int):
+    index = VectorIndex(directory, vectors.shape[1], ivf_lists=ivf_lists, nprobe=nprobe)
+    batch = 50_000
+    for start in range(0, len(vectors), batch):
+        block = vectors[start : start + batch]
+        index.add(range(start, start + len(block)), [0] * len(block), block)
+    if ivf_lists:
+        index.compact(force=True)
+    return index
+
+
+def qps(index: VectorIndex, queries: np.ndarray, k: int, batch: int) -> float:
+    started = time.perf_counter()
+    for start in range(0, len(queries), batch):
+        index.search(queries[start : start + batch], k)
+    return len(queries) / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=256)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, default=8)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    # Clustered data, so IVF has structure to exploit as real embeddings do.
+    n_clusters = 256
+    centers = rng.standard_normal((n_clusters, args.dim)).astype(np.float32)
+    print(
+        f"{'rows':>9} {'mode':<12} {'q/s (1)':>10} {'q/s (32)':>10} "
+        f"{'recall@' + str(args.k):>10}"
+    )
+    for size in args.sizes:
+        labels = rng.integers(n_clusters, size=size)
+        vectors = centers[labels] + rng.standard_normal((size, args.dim)).astype(
+            np.float32
+        )
+        queries = centers[rng.integers(n_clusters, size=args.queries)]
+        queries = queries + rng.standard_normal(queries.shape).astype(np.float32)
+
+        flat = build(tempfile.mkdtemp(), vectors, 0, args.nprobe)
+        exact = flat.search(queries, args.k)
+        ivf_lists = max(1, int(4 * math.sqrt(size)))
+        ivf_lists = min(ivf_lists, size // 39) or 1
+        ivf = build(tempfile.mkdtemp(), vectors, ivf_lists, args.nprobe)
+        approx = ivf.search(queries, args.k)
+        recall = np.mean(
+            [
+                len({i for i, _ in a} & {i for i, _ in e}) / args.k
+                for a, e in zip(approx, exact)
+            ]
+        )
+        for label, index, rec in (
+            ("flat", flat, 1.0),
+            (f"ivf/{ivf_lists}", ivf, recall),
+        ):
+            print(
+                f"{size:>9} {label:<12} "
+                f"{qps(index, queries, args.k, 1):>10.1f} "
+                f"{qps(index, queries, args.k, 32):>10.1f} {rec:>10.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
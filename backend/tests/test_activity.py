@@ -0,0 +1,203 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db import session as db_session
+from app.db.models import AuditEvent, User
+from app.services import activity
+from app.services.activity import ActivityBuffer, update_audit_actions
+
+T0 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def wait_until(predicate, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture()
+def users(db):
+    """Two users; returns their ids."""
+    rows = [User(email=f"u{i}@example.com", hashed_password="x") for i in range(2)]
+    db.add_all(rows)
+    db.commit()
+    return [row.id for row in rows]
+
+
+def last_logins(db) -> dict:
+    db.expire_all()
+    return {
+        user.id: user.last_login_at and user.last_login_at.replace(tzinfo=timezone.utc)
+        for user in db.scalars(select(User))
+    }
+
+
+def actions(db) -> list:
+    return list(db.scalars(select(AuditEvent.action).order_by(AuditEvent.id)))
+
+
+def test_logins_coalesce_and_never_move_backwards(engine, db, users):
+    buffer = ActivityBuffer(db_session.SessionLocal, flush_interval=60)
+    for minutes in (1, 3, 2):
+        buffer.record_login(users[0], at=T0 + timedelta(minutes=minutes))
+    assert (buffer.pending, buffer.stats()["coalesced"]) == (1, 2)
+    buffer.flush()
+    assert last_logins(db)[users[0]] == T0 + timedelta(minutes=3)
+
+    buffer.record_login(users[0], at=T0)  # e.g. flushed late by another process
+    buffer.record_login(users[1], at=T0)
+    buffer.close()
+    assert last_logins(db) == {users[0]: T0 + timedelta(minutes=3), users[1]: T0}
+
+
+def test_a_full_batch_is_flushed_without_waiting(engine, db):
+    buffer = ActivityBuffer(db_session.SessionLocal, flush_size=5, flush_interval=60)
+    for i in range(5):
+        buffer.audit("x", user_id=i)
+    wait_until(lambda: buffer.stats()["flushes"] == 1)
+    assert buffer.stats()["largest_batch"] == 5
+    assert actions(db) == ["x"] * 5
+    buffer.close()
+
+
+def test_close_writes_pending_events_and_refuses_new_ones(engine, db):
+    buffer = ActivityBuffer(db_session.SessionLocal, flush_interval=60)
+    for _ in range(3):
+        buffer.audit("closing", user_id=1)
+    buffer.close()
+    assert actions(db) == ["closing"] * 3
+    assert buffer.audit("late", user_id=1) is False
+    assert buffer.stats()["dropped"] == 1
+    buffer.close()  # idempotent
+
+
+def test_a_full_buffer_blocks_briefly_then_drops(engine, db):
+    release = threading.Event()
+
+    def stuck_session():
+        release.wait(5)  # the database is slow
+        return db_session.SessionLocal()
+
+    buffer = ActivityBuffer(
+        stuck_session,
+        flush_size=2,
+        max_pending=2,
+        flush_interval=60,
+        block_seconds=0.01,
+    )
+    assert buffer.audit("a", user_id=1) and buffer.audit("b", user_id=1)
+    wait_until(lambda: buffer.pending == 0)  # taken by the stuck flusher
+    assert buffer.audit("c", user_id=1) and buffer.audit("d", user_id=1)
+    assert buffer.audit("e", user_id=1) is False
+    stats = buffer.stats()
+    assert (stats["blocked"], stats["dropped"]) == (1, 1)
+    release.set()
+    buffer.close()
+    assert actions(db) == ["a", "b", "c", "d"]
+
+
+def test_failed_flushes_are_retried(engine, db):
+    factory = {"session": None}
+
+    def session():
+        if factory["session"] is None:
+            raise RuntimeError("database down")
+        return factory["session"]()
+
+    buffer = ActivityBuffer(session, flush_size=3, flush_interval=0.02)
+    for _ in range(3):
+        buffer.audit("retried", user_id=1)
+    wait_until(lambda: buffer.stats()["failed_flushes"] > 0)
+    factory["session"] = db_session.SessionLocal
+    wait_until(lambda: buffer.stats()["flushed_events"] == 3)
+    assert buffer.stats()["dropped"] == 0
+    assert actions(db) == ["retried"] * 3
+    buffer.close()
+
+
+def test_without_write_behind_the_caller_writes(engine, db):
+    buffer = ActivityBuffer(db_session.SessionLocal, write_behind=False)
+    assert buffer.audit("inline", user_id=1)
+    assert actions(db) == ["inline"]
+    assert buffer._thread is None
+    assert (
+        ActivityBuffer(db_session.SessionLocal, enabled=False).audit("off", user_id=1)
+        is False
+    )
+
+
+def test_async_callers_wait_off_the_event_loop(engine, db):
+    buffer = ActivityBuffer(
+        db_session.SessionLocal, flush_interval=60, max_pending=3, block_seconds=0.01
+    )
+
+    async def run():
+        return [await buffer.audit_async("async", user_id=1) for _ in range(5)]
+
+    recorded = asyncio.run(run())
+    buffer.close()
+    # A full buffer is flushed at once, so no event had to be dropped.
+    assert recorded == [True] * 5
+    assert actions(db) == ["async"] * 5
+
+
+def test_update_audit_names_fields_but_not_values():
+    assert update_audit_actions(
+        {"password": "secret", "full_name": "A", "email": "e"}
+    ) == [("password_change", None), ("profile_update", "email,full_name")]
+    assert update_audit_actions({"password": None}) == []
+
+
+def test_account_changes_are_audited(client, signup, db):
+    headers = signup()
+    me = client.get(f"{settings.API_V1_STR}/users/me", headers=headers).json()
+    client.put(
+        f"{settings.API_V1_STR}/users/{me['id']}",
+        headers=headers,
+        json={"full_name": "Ada", "password": "password456"},
+    )
+    activity.get_activity_buffer().flush()
+    events = db.scalars(select(AuditEvent).order_by(AuditEvent.id)).all()
+    assert [(e.action, e.detail) for e in events] == [
+        ("password_change", None),
+        ("profile_update", "full_name"),
+    ]
+    assert {(e.user_id, e.actor_id) for e in events} == {(me["id"], me["id"])}
+    assert last_logins(db)[me["id"]] is not None
+
+
+def test_account_deletion_is_audited_without_the_email(client, signup, db):
+    headers = signup("gone@example.com")
+    me = client.get(f"{settings.API_V1_STR}/users/me", headers=headers).json()
+    client.delete(f"{settings.API_V1_STR}/users/{me['id']}", headers=headers)
+    activity.get_activity_buffer().flush()
+    event = db.scalars(select(AuditEvent)).one()
+    assert (event.action, event.user_id, event.detail) == (
+        "account_delete",
+        me["id"],
+        None,
+    )
+
+
+def test_a_rejected_batch_is_written_row_by_row(engine, db):
+    buffer = ActivityBuffer(db_session.SessionLocal, flush_interval=60)
+    buffer.audit("before", user_id=1)
+    buffer.audit(None, user_id=1)  # violates NOT NULL: can never be written
+    buffer.audit("after", user_id=1, ip="1" * 100)
+    assert buffer.flush() is False
+    stats = buffer.stats()
+    assert (stats["pending"], stats["dropped"], stats["flushed_events"]) == (0, 1, 2)
+    assert actions(db) == ["before", "after"]
+    assert db.scalars(select(AuditEvent.ip)).all()[-1] == "1" * 45
+
+    # Nothing was requeued, so the next flush is unaffected.
+    buffer.audit("next", user_id=1)
+    assert buffer.flush() is True
+    buffer.close()
@@ -0,0 +1,131 @@
+import asyncio
+from dataclasses import replace
+
+import pytest
+
+from app.services.ai_cache import AIResponseCache
+from app.services.ai_provider import FakeProvider, GenerationRequest, ProviderError
+from app.services.prompts import SUMMARIZE_CHUNK
+
+
+def request(i: int) -> GenerationRequest:
+    return SUMMARIZE_CHUNK.request(
+        content_sha256=f"{i:064x}", model="m", text=f"text {i} " * 5
+    )
+
+
+class FailingProvider(FakeProvider):
+    async def generate(self, request: GenerationRequest):
+        self.calls += 1
+        raise ProviderError("upstream failed")
+
+
+def test_cache_key_is_the_content_address():
+    base = request(1)
+    assert base.cache_key() == request(1).cache_key()
+    # The rendered prompt is not part of the key...
+    assert replace(base, prompt="other").cache_key() == base.cache_key()
+    # ...but content, template version, model and parameters are.
+    for changed in (
+        replace(base, content_sha256="f" * 64),
+        replace(base, template_version=base.template_version + 1),
+        replace(base, model="other"),
+        replace(base, temperature=0.5),
+    ):
+        assert changed.cache_key() != base.cache_key()
+
+
+def test_memory_tier_and_eviction(engine):
+    async def run():
+        provider = FakeProvider()
+        cache = AIResponseCache(max_entries=2, persistent=False)
+        first = await cache.generate(request(1), provider)
+        again = await cache.generate(request(1), provider)
+        await cache.generate(request(2), provider)
+        await cache.generate(request(3), provider)  # evicts request 1
+        evicted = await cache.generate(request(1), provider)
+        return provider, cache, first, again, evicted
+
+    provider, cache, first, again, evicted = asyncio.run(run())
+    assert (first.source, again.source, evicted.source) == (
+        "upstream",
+        "memory",
+        "upstream",
+    )
+    assert again.text == first.text
+    assert provider.calls == 4
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["misses"], stats["evictions"]) == (1, 4, 2)
+
+
+def test_database_tier_survives_the_memory_tier(engine):
+    async def run():
+        provider = FakeProvider()
+        cache = AIResponseCache(max_entries=10)
+        await cache.generate(request(1), provider)
+        # A new process: empty memory, same table.
+        fresh = AIResponseCache(max_entries=10)
+        from_db = await fresh.generate(request(1), provider)
+        from_memory = await fresh.generate(request(1), provider)
+        return provider, fresh, from_db, from_memory
+
+    provider, fresh, from_db, from_memory = asyncio.run(run())
+    assert provider.calls == 1
+    assert (from_db.source, from_memory.source) == ("db", "memory")
+    assert fresh.stats()["db_hits"] == 1
+
+
+def test_concurrent_identical_requests_share_one_call(engine):
+    async def run():
+        provider = FakeProvider(latency=0.05)
+        cache = AIResponseCache(max_entries=10, persistent=False)
+        results = await asyncio.gather(
+            *(cache.generate(request(1), provider) for _ in range(10))
+        )
+        return provider, cache, results
+
+    provider, cache, results = asyncio.run(run())
+    assert provider.calls == 1
+    assert len({result.text for result in results}) == 1
+    stats = cache.stats()
+    assert (stats["coalesced"], stats["in_flight"]) == (9, 0)
+    assert stats["hit_rate"] == 0.9
+
+
+def test_load_survives_until_the_last_waiter_cancels(engine):
+    async def run():
+        provider = FakeProvider(latency=0.1)
+        cache = AIResponseCache(max_entries=10, persistent=False)
+        first = asyncio.ensure_future(cache.generate(request(1), provider))
+        second = asyncio.ensure_future(cache.generate(request(1), provider))
+        await asyncio.sleep(0.02)
+        first.cancel()
+        kept = await second
+
+        alone = asyncio.ensure_future(cache.generate(request(2), provider))
+        await asyncio.sleep(0.02)
+        alone.cancel()
+        await asyncio.gather(alone, return_exceptions=True)
+        await asyncio.sleep(0)  # let the load observe its cancellation
+        return cache, first, kept, alone
+
+    cache, first, kept, alone = asyncio.run(run())
+    assert first.cancelled() and alone.cancelled()
+    assert kept.source == "upstream"
+    assert cache.stats()["in_flight"] == 0
+    assert cache.stats()["entries"] == 1  # the abandoned load stored nothing
+
+
+def test_errors_are_not_cached(engine):
+    async def run():
+        cache = AIResponseCache(max_entries=10)
+        failing = FailingProvider()
+        for _ in range(2):
+            with pytest.raises(ProviderError):
+                await cache.generate(request(1), failing)
+        return cache, failing
+
+    cache, failing = asyncio.run(run())
+    assert failing.calls == 2
+    assert cache.stats()["errors"] == 2
+    assert cache.stats()["entries"] == 0
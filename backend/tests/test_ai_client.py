@@ -0,0 +1,195 @@
+"""AIClient against the throttling stub server from benchmarks/ (in-process,
+over httpx's ASGI transport)."""
+import asyncio
+import time
+
+import pytest
+from ai_stub_server import StubServerProvider, create_app
+
+from app.services.ai_client import AdaptiveTokenBucket, AIClient
+from app.services.ai_provider import (
+    GenerationRequest,
+    ProviderError,
+    ProviderUnavailable,
+)
+
+
+def requests(n: int):
+    return [
+        GenerationRequest(
+            prompt=f"chunk {i} lorem ipsum dolor sit amet",
+            model="stub-model",
+            template="summarize_chunk",
+            template_version=1,
+            content_sha256=f"{i:064x}",
+        )
+        for i in range(n)
+    ]
+
+
+def make_client(provider, **kwargs) -> AIClient:
+    options = {
+        "max_concurrency": 8,
+        "rate_per_second": 100.0,
+        "burst": 10,
+        "batch_size": 1,
+        "batch_window": 0.01,
+        "max_attempts": 5,
+        "retry_max_wait": 0.01,
+    }
+    options.update(kwargs)
+    return AIClient(provider, **options)
+
+
+def stub(**kwargs):
+    kwargs.setdefault("latency", 0.0)
+    kwargs.setdefault("per_item_latency", 0.0)
+    app = create_app(**kwargs)
+    return app, StubServerProvider(app)
+
+
+def test_bucket_paces_calls_below_the_server_quota():
+    async def run():
+        app, provider = stub(rate=1000.0, burst=100)
+        client = make_client(provider, rate_per_second=10.0, burst=2)
+        started = time.monotonic()
+        results = await client.generate_many(requests(7))
+        elapsed = time.monotonic() - started
+        await provider.aclose()
+        return app, client, results, elapsed
+
+    app, client, results, elapsed = asyncio.run(run())
+    assert len(results) == 7
+    # Two calls from the burst, then one every 100 ms.
+    assert elapsed >= 0.45
+    assert app.state.quota.throttled == 0
+    assert client.stats()["throttled"] == 0
+
+
+def test_throttle_halves_the_rate_and_recovers():
+    bucket = AdaptiveTokenBucket(max_rate=8.0, burst=4, min_rate=1.0, recovery=0.25)
+    bucket.on_throttle()
+    assert bucket.rate == 4.0
+    for _ in range(3):
+        bucket.on_throttle()
+    assert bucket.rate == 1.0  # floored at min_rate
+    bucket.on_success()
+    assert bucket.rate == 3.0
+    for _ in range(10):
+        bucket.on_success()
+    assert bucket.rate == 8.0  # capped at max_rate
+    assert bucket.throttles == 4
+
+
+def test_429_backs_off_for_retry_after():
+    async def run():
+        # One call per half second: the second call gets a 429 with
+        # Retry-After of about 0.5 s.
+        app, provider = stub(rate=2.0, burst=1)
+        client = make_client(provider)
+        started = time.monotonic()
+        results = await client.generate_many(requests(2))
+        elapsed = time.monotonic() - started
+        await provider.aclose()
+        return app, client, results, elapsed
+
+    app, client, results, elapsed = asyncio.run(run())
+    assert [r.text.startswith("stub:") for r in results] == [True, True]
+    assert elapsed >= 0.4  # waited out Retry-After instead of hammering
+    assert app.state.quota.throttled == 1
+    stats = client.stats()
+    assert stats["throttled"] == 1
+    assert stats["retries"] == 1
+    assert stats["rate_per_second"] < 100.0
+
+
+def test_retries_stop_after_max_attempts():
+    async def run():
+        app, provider = stub(rate=1000.0, burst=100, error_rate=1.0)
+        client = make_client(provider, max_attempts=3)
+        with pytest.raises(ProviderUnavailable):
+            await client.generate(requests(1)[0])
+        await provider.aclose()
+        return client
+
+    stats = asyncio.run(run()).stats()
+    assert stats["upstream_calls"] == 3
+    assert stats["retries"] == 2
+    assert stats["failures"] == 1
+
+
+def test_non_retryable_errors_are_not_retried():
+    async def run():
+        app = create_app(latency=0.0)
+        # Unknown path: a 404, which is not worth retrying.
+        provider = StubServerProvider(app, base_url="http://stub/missing")
+        client = make_client(provider, max_attempts=3)
+        with pytest.raises(ProviderError) as excinfo:
+            await client.generate(requests(1)[0])
+        await provider.aclose()
+        return client, excinfo.value
+
+    client, error = asyncio.run(run())
+    assert not error.retryable
+    assert client.stats()["upstream_calls"] == 1
+
+
+def test_requests_are_batched_within_the_window():
+    async def run():
+        app, provider = stub(rate=1000.0, burst=100)
+        client = make_client(provider, batch_size=4, batch_window=0.05)
+        results = await client.generate_many(requests(8))
+        await provider.aclose()
+        return app, client, results
+
+    app, client, results = asyncio.run(run())
+    assert [r.text for r in results] == [
+        f"stub: chunk {i} lorem ipsum dolor sit amet" for i in range(8)
+    ]
+    assert client.stats()["batches"] == 2
+    assert app.state.quota.accepted == 2
+
+
+def test_cancelled_caller_drops_out_of_its_batch():
+    async def run():
+        app, provider = stub(rate=1000.0, burst=100)
+        client = make_client(provider, batch_size=8, batch_window=0.1)
+        tasks = [asyncio.ensure_future(client.generate(r)) for r in requests(3)]
+        await asyncio.sleep(0.01)
+        tasks[1].cancel()
+        outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+        await provider.aclose()
+        return client, outcomes
+
+    client, outcomes = asyncio.run(run())
+    assert isinstance(outcomes[1], asyncio.CancelledError)
+    assert outcomes[0].text.endswith("chunk 0 lorem ipsum dolor sit amet")
+    assert outcomes[2].text.endswith("chunk 2 lorem ipsum dolor sit amet")
+    stats = client.stats()
+    assert stats["batched_requests"] == 2
+    assert stats["cancelled"] == 1
+
+
+def test_cancelling_a_fan_out_cancels_the_upstream_call():
+    async def run():
+        app, provider = stub(rate=1000.0, burst=100, latency=5.0)
+        client = make_client(provider, batch_size=4, batch_window=0.01)
+        fan_out = asyncio.ensure_future(client.generate_many(requests(4)))
+        await asyncio.sleep(0.1)  # the batch is in flight upstream
+        assert client.stats()["in_flight"] == 1
+        started = time.monotonic()
+        fan_out.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await fan_out
+        await asyncio.sleep(0)  # let the batch task observe its cancellation
+        elapsed = time.monotonic() - started
+        await provider.aclose()
+        return client, elapsed
+
+    client, elapsed = asyncio.run(run())
+    assert elapsed < 1.0  # did not wait for the 5 s upstream call
+    stats = client.stats()
+    assert stats["in_flight"] == 0
+    assert stats["cancelled"] == 4
+    assert stats["failures"] == 0
+    assert not client._batches
@@ -0,0 +1,120 @@
+"""The user and login endpoints behave the same in both DB modes."""
+import importlib
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.v1 import api
+from app.core.config import settings
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.main import create_app
+
+API = settings.API_V1_STR
+
+
+@pytest.fixture(params=[False, True], ids=["sync", "async"])
+def mode_client(request, engine, monkeypatch):
+    # api.py picks the handler modules at import.
+    with monkeypatch.context() as patch:
+        patch.setattr(settings, "DB_ASYNC_MODE", request.param)
+        routes = importlib.reload(api)
+        handlers = {route.endpoint.__module__ for route in routes.api_router.routes}
+        try:
+            with TestClient(create_app()) as client:
+                yield client, handlers
+        finally:
+            patch.undo()
+            importlib.reload(api)
+
+
+def log_in(client, email: str, password: str = "password123") -> dict:
+    response = client.post(
+        f"{API}/login/access-token", data={"username": email, "password": password}
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def bearer(tokens: dict) -> dict:
+    return {"Authorization": f"Bearer {tokens['access_token']}"}
+
+
+def test_mode_selects_the_handlers(mode_client):
+    client, handlers = mode_client
+    suffix = "_async" if settings.DB_ASYNC_MODE else ""
+    assert f"app.api.v1.endpoints.users{suffix}" in handlers
+    assert f"app.api.v1.endpoints.login{suffix}" in handlers
+    other = "" if suffix else "_async"
+    assert f"app.api.v1.endpoints.users{other}" not in handlers
+
+
+def test_account_lifecycle(mode_client):
+    client, _ = mode_client
+    for i in range(3):
+        response = client.post(
+            f"{API}/users/",
+            json={"email": f"u{i}@example.com", "password": "password123"},
+        )
+        assert response.status_code == 201, response.text
+    response = client.post(
+        f"{API}/users/", json={"email": "u0@example.com", "password": "password123"}
+    )
+    assert response.status_code == 400
+
+    tokens = log_in(client, "u0@example.com")
+    me = client.get(f"{API}/users/me", headers=bearer(tokens)).json()
+    assert me["email"] == "u0@example.com"
+    assert "hashed_password" not in me
+
+    page = client.get(f"{API}/users/", headers=bearer(tokens), params={"limit": 2})
+    rest = client.get(
+        f"{API}/users/",
+        headers=bearer(tokens),
+        params={"limit": 2, "cursor": page.headers[NEXT_CURSOR_HEADER]},
+    )
+    assert [u["email"] for u in page.json() + rest.json()] == [
+        f"u{i}@example.com" for i in range(3)
+    ]
+    assert NEXT_CURSOR_HEADER not in rest.headers
+
+    other_id = page.json()[1]["id"]
+    assert (
+        client.get(f"{API}/users/{other_id}", headers=bearer(tokens)).status_code == 403
+    )
+    response = client.put(
+        f"{API}/users/{me['id']}", headers=bearer(tokens), json={"full_name": "U Zero"}
+    )
+    assert response.json()["full_name"] == "U Zero"
+
+    response = client.post(
+        f"{API}/users/me/password",
+        headers=bearer(tokens),
+        json={"current_password": "wrong-password", "new_password": "password456"},
+    )
+    assert response.status_code == 400
+    response = client.post(
+        f"{API}/users/me/password",
+        headers=bearer(tokens),
+        json={"current_password": "password123", "new_password": "password456"},
+    )
+    assert response.status_code == 200, response.text
+    tokens = log_in(client, "u0@example.com", "password456")
+
+    refreshed = client.post(
+        f"{API}/login/refresh-token", json={"refresh_token": tokens["refresh_token"]}
+    ).json()
+    assert client.get(f"{API}/users/me", headers=bearer(refreshed)).status_code == 200
+    response = client.post(
+        f"{API}/login/logout", json={"refresh_token": refreshed["refresh_token"]}
+    )
+    assert response.status_code == 204
+    assert client.get(f"{API}/users/me", headers=bearer(refreshed)).status_code == 401
+
+    tokens = log_in(client, "u0@example.com", "password456")
+    response = client.delete(f"{API}/users/{me['id']}", headers=bearer(tokens))
+    assert response.status_code == 200
+    response = client.post(
+        f"{API}/login/access-token",
+        data={"username": "u0@example.com", "password": "password456"},
+    )
+    assert response.status_code == 400
@@ -0,0 +1,165 @@
+from typing import Optional
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.crud import crud_citation
+from app.services.citation_graph import CitationGraph, CitationGraphStore
+from app.services.references import (
+    ParsedReferences,
+    Reference,
+    extract_references,
+    reference_key,
+)
+
+CITATIONS = f"{settings.API_V1_STR}/citations"
+
+# 0 and 1 both cite 2 and 3; 3 cites 4; 5 cites 0.
+EDGES = [(0, 2), (0, 3), (1, 2), (1, 3), (3, 4), (5, 0)]
+
+
+@pytest.fixture()
+def graph() -> CitationGraph:
+    citing, cited = zip(*EDGES)
+    return CitationGraph.from_edges(np.array(citing), np.array(cited))
+
+
+def dense_pagerank(n: int, edges, damping: float = 0.85) -> np.ndarray:
+    links = np.zeros((n, n))
+    for citing, cited in edges:
+        links[cited, citing] = 1.0
+    out_degree = links.sum(axis=0)
+    transition = np.where(out_degree > 0, links / np.maximum(out_degree, 1), 1.0 / n)
+    rank = np.full(n, 1.0 / n)
+    for _ in range(200):
+        rank = damping * transition @ rank + (1 - damping) / n
+    return rank
+
+
+def test_references_are_parsed_after_the_last_heading():
+    pages = [
+        "A study of graphs. doi:10.5555/Own.1 Related work cites earlier references.",
+        "References [1] Smith, J. (2019). Deep learning for citation graphs. "
+        "J X. doi:10.1000/AAA. [2] Lee, K. (2020). A survey of bibliometric "
+        "methods. Proc ABC. [3] Lee, K. (2020). A survey of bibliometric methods. "
+        "Proc ABC.",
+    ]
+    parsed = extract_references(pages)
+    assert parsed.doi == "10.5555/own.1"
+    assert [reference.key for reference in parsed.references] == [
+        "doi:10.1000/aaa",
+        "title:a survey of bibliometric methods",
+    ]
+    assert parsed.references[1].year == 2020
+    assert reference_key(None, "Too short") is None
+
+
+def test_degrees_and_hops(graph):
+    assert graph.degree(0) == (2, 1)
+    assert graph.degree(99) == (0, 0)
+    ids, distances = graph.k_hop(0, 2, direction="out")
+    assert dict(zip(ids.tolist(), distances.tolist())) == {2: 1, 3: 1, 4: 2}
+    ids, distances = graph.k_hop(4, 3, direction="in")
+    assert dict(zip(ids.tolist(), distances.tolist())) == {3: 1, 0: 2, 1: 2, 5: 3}
+    ids, _ = graph.k_hop(2, 1, direction="both")
+    assert sorted(ids.tolist()) == [0, 1]
+    ids, _ = graph.k_hop(0, 4, limit=2)
+    assert len(ids) == 2
+
+
+def test_co_citation_and_coupling(graph):
+    ids, counts = graph.co_citation(2)
+    assert (ids.tolist(), counts.tolist()) == ([3], [2])
+    ids, counts = graph.coupling(0)
+    assert (ids.tolist(), counts.tolist()) == ([1], [2])
+    assert graph.coupling(4)[0].size == 0
+
+
+def test_pagerank_matches_the_dense_computation(graph):
+    rank = graph.pagerank()
+    assert rank.sum() == pytest.approx(1.0)
+    assert rank == pytest.approx(dense_pagerank(6, EDGES), abs=1e-6)
+    top, scores = graph.top_pagerank(2)
+    assert top.tolist() == np.argsort(-rank)[:2].tolist()
+    assert scores.tolist() == sorted(scores.tolist(), reverse=True)
+
+
+def test_merging_edges_equals_building_from_all_of_them(graph):
+    merged = graph.with_edges(np.array([6, 2]), np.array([4, 6]), last_edge_id=8)
+    citing, cited = zip(*EDGES, (6, 4), (2, 6))
+    full = CitationGraph.from_edges(np.array(citing), np.array(cited))
+    for name in ("out_indptr", "out_indices", "in_indptr", "in_indices"):
+        assert getattr(merged, name).tolist() == getattr(full, name).tolist()
+    assert merged.last_edge_id == 8
+
+
+def cites(*keys: str, doi: Optional[str] = None) -> ParsedReferences:
+    return ParsedReferences(
+        doi, [Reference(key=key, doi=None, title=None, year=None) for key in keys]
+    )
+
+
+def test_store_follows_the_citations_table(db):
+    store = CitationGraphStore(refresh_interval=3600)
+    a, _ = crud_citation.ingest_references(
+        db, sha256="a" * 64, parsed=cites("title:x", "title:y")
+    )
+    graph = store.get(db, force=True)
+    assert graph.degree(a) == (2, 0)
+
+    b, added = crud_citation.ingest_references(
+        db, sha256="b" * 64, parsed=cites("title:x", "title:z")
+    )
+    assert added == 2
+    assert store.get(db) is graph  # within the refresh interval
+    graph = store.get(db, force=True)
+    assert graph.degree(b) == (2, 0)
+    assert (store.incremental_updates, store.full_builds) == (2, 0)
+    x = crud_citation._paper_ids_by_key(db, cites("title:x").references)["title:x"]
+    assert graph.degree(x) == (0, 2)
+
+    crud_citation.detach_document(db, "a" * 64)
+    db.commit()
+    graph = store.get(db, force=True)
+    assert graph.degree(a) == (0, 0) and graph.degree(x) == (0, 1)
+    assert store.full_builds == 1  # edges were deleted
+
+
+def test_reingesting_replaces_the_reference_list(db):
+    paper, _ = crud_citation.ingest_references(
+        db, sha256="a" * 64, parsed=cites("title:x", "title:y")
+    )
+    again, added = crud_citation.ingest_references(
+        db, sha256="a" * 64, parsed=cites("title:y", "title:z")
+    )
+    assert (again, added) == (paper, 1)
+    assert sorted(p.key for p in crud_citation.get_references(db, paper)) == [
+        "title:y",
+        "title:z",
+    ]
+
+
+def test_citation_routes(client, signup, db):
+    headers = signup()
+    a, _ = crud_citation.ingest_references(
+        db, sha256="a" * 64, parsed=cites("title:x", "title:y", doi="10.1/a")
+    )
+    b, _ = crud_citation.ingest_references(
+        db, sha256="b" * 64, parsed=cites("title:x", "title:y")
+    )
+    paper = client.get(f"{CITATIONS}/papers/{a}", headers=headers).json()
+    assert (paper["doi"], paper["references_count"], paper["cited_by_count"]) == (
+        "10.1/a",
+        2,
+        0,
+    )
+    coupling = client.get(f"{CITATIONS}/papers/{a}/coupling", headers=headers).json()
+    assert [(p["paper"]["id"], p["score"]) for p in coupling["papers"]] == [(b, 2.0)]
+    neighborhood = client.get(
+        f"{CITATIONS}/papers/{a}/neighborhood", headers=headers, params={"k": 2}
+    ).json()
+    assert {p["paper"]["id"]: p["distance"] for p in neighborhood["papers"]}[b] == 2
+    ranked = client.get(f"{CITATIONS}/pagerank", headers=headers).json()["papers"]
+    assert len(ranked) == 4
+    assert client.get(f"{CITATIONS}/papers/999", headers=headers).status_code == 404
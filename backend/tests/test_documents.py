@@ -0,0 +1,124 @@
+import hashlib
+import os
+
+import pytest
+
+from app.core.config import settings
+from app.db.models import Job
+from app.services.storage import get_content_store
+
+DOCUMENTS = f"{settings.API_V1_STR}/documents/"
+
+
+def upload(client, headers, content: bytes, filename="paper.pdf", **kwargs):
+    return client.post(
+        DOCUMENTS,
+        headers=headers,
+        files={"file": (filename, content, "application/pdf")},
+        **kwargs,
+    )
+
+
+def stored_files():
+    """Stored blobs (ab/cd/<sha256>) and partial uploads in tmp/."""
+    root = get_content_store().root
+    return sorted(
+        path.name
+        for pattern in ("??/??/*", "tmp/*")
+        for path in root.glob(pattern)
+        if path.is_file()
+    )
+
+
+@pytest.fixture()
+def pdf() -> bytes:
+    return b"%PDF-1.4\n" + os.urandom(200_000)
+
+
+def test_upload_stores_and_queues_extraction(client, signup, pdf, db):
+    headers = signup()
+    response = upload(client, headers, pdf, filename="../x/paper.pdf")
+    assert response.status_code == 201, response.text
+    document = response.json()
+    assert document["filename"] == "paper.pdf"
+    assert document["sha256"] == hashlib.sha256(pdf).hexdigest()
+    assert document["size_bytes"] == len(pdf)
+    assert db.query(Job).filter_by(document_id=document["id"]).one().status == (
+        "queued"
+    )
+
+    response = client.get(f"{DOCUMENTS}{document['id']}/content", headers=headers)
+    assert response.content == pdf
+    assert 'filename="paper.pdf"' in response.headers["content-disposition"]
+
+
+def test_identical_uploads_share_one_file(client, signup, pdf):
+    first, second = signup("a@example.com"), signup("b@example.com")
+    a = upload(client, first, pdf).json()
+    again = upload(client, first, pdf, filename="again.pdf")
+    assert again.status_code == 201
+    assert again.json()["id"] == a["id"]  # the existing document
+    b = upload(client, second, pdf, filename="same.pdf").json()
+    assert b["id"] != a["id"] and b["sha256"] == a["sha256"]
+    assert len(stored_files()) == 1
+
+    # Each owner sees only their own document.
+    assert client.get(f"{DOCUMENTS}{a['id']}", headers=second).status_code == 404
+    assert [d["id"] for d in client.get(DOCUMENTS, headers=first).json()] == [a["id"]]
+
+    # The file goes once the last document using it is deleted.
+    assert client.delete(f"{DOCUMENTS}{a['id']}", headers=first).status_code == 200
+    assert len(stored_files()) == 1
+    assert client.delete(f"{DOCUMENTS}{b['id']}", headers=second).status_code == 200
+    assert stored_files() == []
+    assert not get_content_store().path_for(a["sha256"]).exists()
+
+
+def test_non_pdf_upload_is_a_415(client, signup):
+    headers = signup()
+    response = client.post(
+        DOCUMENTS,
+        headers=headers,
+        files={"file": ("notes.pdf", b"hello, not a pdf", "application/pdf")},
+    )
+    assert response.status_code == 415
+    assert stored_files() == []
+
+
+def test_oversized_upload_is_a_413(client, signup, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_MAX_BYTES", 100_000)
+    headers = signup()
+    # Rejected from Content-Length before the body is read...
+    response = upload(client, headers, b"%PDF-" + b"0" * 200_000)
+    assert response.status_code == 413
+    # ...and while streaming when the header understates it.
+    response = client.post(
+        DOCUMENTS,
+        headers={**headers, "Content-Type": "multipart/form-data; boundary=b"},
+        content=iter(
+            [
+                b'--b\r\nContent-Disposition: form-data; name="file"; '
+                b'filename="a.pdf"\r\n\r\n%PDF-',
+                *([b"0" * 50_000] * 3),
+                b"\r\n--b--\r\n",
+            ]
+        ),
+    )
+    assert response.status_code == 413
+    assert stored_files() == []
+
+
+def test_upload_without_a_file_is_rejected(client, signup):
+    headers = signup()
+    response = client.post(DOCUMENTS, headers=headers, data={"note": "no file"})
+    assert 400 <= response.status_code < 500
+    assert stored_files() == []
+
+
+def test_upload_racing_the_last_delete_is_a_409(client, signup, pdf, monkeypatch):
+    headers = signup()
+    store = get_content_store()
+    # The blob is written, then removed by a delete before the row is added.
+    monkeypatch.setattr(store, "exists", lambda sha256: False)
+    assert upload(client, headers, pdf).status_code == 409
+    assert client.get(DOCUMENTS, headers=headers).json() == []
@@ -0,0 +1,74 @@
+import threading
+import time
+
+import pytest
+
+from app.core import hashing
+from app.core.config import settings
+from app.core.hashing import HashingExecutor, HashingQueueFull, bcrypt_self_test
+
+
+def wait_for(event: threading.Event) -> bool:
+    return event.wait(5)
+
+
+def test_calls_over_capacity_are_rejected():
+    executor = HashingExecutor(max_workers=0, max_queue=1)  # two calls at once
+    release = threading.Event()
+    threads = [
+        threading.Thread(target=executor.run, args=(wait_for, release))
+        for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    while executor.stats()["in_flight"] < 2:
+        time.sleep(0.001)
+    with pytest.raises(HashingQueueFull):
+        executor.submit(wait_for, release)
+    assert executor.stats()["queue_depth"] == 1
+
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert executor.run(str.upper, "ok") == "OK"  # capacity is back
+    stats = executor.stats()
+    assert (stats["completed"], stats["rejected"], stats["in_flight"]) == (3, 1, 0)
+    assert stats["latency_buckets"]["le_inf"] == 3
+
+
+def test_errors_reach_the_caller_and_free_the_slot():
+    executor = HashingExecutor(max_workers=0, max_queue=0)
+    with pytest.raises(ValueError):
+        executor.run(int, "not a number")
+    assert executor.run(int, "7") == 7
+    assert executor.stats()["errors"] == 1
+
+
+def test_map_batches_waits_for_capacity_instead_of_failing():
+    executor = HashingExecutor(max_workers=0, max_queue=0)
+    assert executor.map_batches(sum, [[1, 2], [3], [], [4, 5]]) == [3, 3, 0, 9]
+    assert executor.stats()["rejected"] == 0
+
+
+def test_process_pool_runs_bcrypt_off_the_calling_process():
+    executor = HashingExecutor(max_workers=1, max_queue=1)
+    try:
+        executor.warm_up()
+        assert executor.run(bcrypt_self_test)
+    finally:
+        executor.shutdown()
+    assert executor.stats()["completed"] == 1
+
+
+def test_full_executor_is_a_503_with_retry_after(client, signup, monkeypatch):
+    signup("a@example.com")
+    full = HashingExecutor(max_workers=0, max_queue=0)
+    assert full._slots.acquire(blocking=False)  # the only slot is taken
+    monkeypatch.setattr(hashing, "_executor", full)
+    response = client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": "a@example.com", "password": "password123"},
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(settings.HASHING_RETRY_AFTER_SECONDS)
+    assert full.stats()["rejected"] == 1
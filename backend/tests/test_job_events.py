@@ -0,0 +1,118 @@
+import asyncio
+import json
+import threading
+import time
+
+from app.core.config import settings
+from app.services import job_events
+from app.services.job_events import JobEventHub, get_job_event_hub, job_event
+
+DOCUMENTS = f"{settings.API_V1_STR}/documents"
+
+
+def event(stage: str, sha256: str = "a" * 64, **fields) -> dict:
+    return job_event(job_id=1, sha256=sha256, status="running", stage=stage, **fields)
+
+
+def test_events_reach_only_the_files_subscribers():
+    hub = JobEventHub(buffer_size=10)
+
+    async def run():
+        with hub.subscribe("a" * 64) as mine, hub.subscribe("b" * 64) as other:
+            # Workers publish from other threads.
+            thread = threading.Thread(target=hub.dispatch, args=(event("extracting"),))
+            thread.start()
+            received = await asyncio.wait_for(mine.get(), 5)
+            thread.join()
+            assert not other._buffer
+            return received, hub.subscribers
+
+    received, subscribers = asyncio.run(run())
+    assert received["stage"] == "extracting"
+    assert subscribers == 2
+    assert hub.subscribers == 0
+    assert (hub.published, hub.delivered) == (1, 1)
+
+
+def test_slow_subscribers_lose_the_oldest_events():
+    hub = JobEventHub(buffer_size=2)
+
+    async def run():
+        with hub.subscribe("a" * 64) as subscription:
+            for stage in ("queued", "extracting", "indexing", "done"):
+                hub.dispatch(event(stage))
+            return [(await subscription.get())["stage"] for _ in range(2)], subscription
+
+    stages, subscription = asyncio.run(run())
+    assert stages == ["indexing", "done"]
+    assert subscription.dropped == hub.dropped == 2
+
+
+def test_resync_reaches_everyone():
+    hub = JobEventHub(buffer_size=10)
+
+    async def run():
+        with hub.subscribe("a" * 64) as a, hub.subscribe("b" * 64) as b:
+            hub.resync()
+            return await a.get(), await b.get()
+
+    assert asyncio.run(run()) == (job_events.RESYNC, job_events.RESYNC)
+
+
+def test_long_errors_are_truncated():
+    assert len(event("done", error="x" * 10_000)["error"]) == job_events.MAX_ERROR_CHARS
+
+
+def read_events(client, url: str, headers: dict) -> list:
+    lines = []
+    with client.stream("GET", url, headers=headers) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        for line in response.iter_lines():
+            if line.startswith("data:"):
+                lines.append(json.loads(line[len("data:") :]))
+            elif line.startswith(":"):
+                lines.append(line)
+    return lines
+
+
+def test_finished_job_sends_one_event(client, signup, add_document):
+    headers = signup()
+    me = client.get(f"{settings.API_V1_STR}/users/me", headers=headers).json()["id"]
+    document_id = add_document(me, "a" * 64, ["text"])
+    (only,) = read_events(client, f"{DOCUMENTS}/{document_id}/job/events", headers)
+    assert (only["status"], only["stage"]) == ("succeeded", "done")
+
+
+def test_progress_is_pushed_until_done(client, signup, add_document, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_EVENTS_KEEPALIVE_SECONDS", 0.05)
+    headers = signup()
+    me = client.get(f"{settings.API_V1_STR}/users/me", headers=headers).json()["id"]
+    document_id = add_document(me, "a" * 64, [], status="queued")
+    hub = get_job_event_hub()
+
+    def worker():
+        while hub.subscribers == 0:
+            time.sleep(0.01)
+        time.sleep(0.1)  # long enough for a keepalive
+        hub.dispatch(event("extracting"))
+        hub.dispatch(event("other", sha256="b" * 64))
+        hub.dispatch(event("done", pages=3))
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    received = read_events(client, f"{DOCUMENTS}/{document_id}/job/events", headers)
+    thread.join()
+    assert received[0]["stage"] == "queued"
+    assert ": keepalive" in received
+    stages = [item["stage"] for item in received if isinstance(item, dict)]
+    assert stages == ["queued", "extracting", "done"]
+    assert hub.subscribers == 0
+
+
+def test_other_users_documents_are_hidden(client, signup, add_document):
+    owner, other = signup("a@example.com"), signup("b@example.com")
+    me = client.get(f"{settings.API_V1_STR}/users/me", headers=owner).json()["id"]
+    document_id = add_document(me, "a" * 64, ["text"])
+    response = client.get(f"{DOCUMENTS}/{document_id}/job/events", headers=other)
+    assert response.status_code == 404
@@ -0,0 +1,199 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.config import settings
+from app.crud import crud_job
+from app.db.models import DocumentChunk, Job
+from app.services.extraction import Chunk
+from app.services.storage import get_content_store
+from app.worker import Worker
+
+
+def make_pdf(pages: int) -> bytes:
+    """A PDF with a line of distinct words on each page."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for page in range(pages):
+        words = " ".join(f"page{page}word{i}" for i in range(20)).encode()
+        stream = b"BT /F1 10 Tf 20 800 Td (" + words + b") Tj ET"
+        objects.append(
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        )
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), pages)
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    return bytes(out)
+
+
+@pytest.fixture()
+def queue(db):
+    """queue(n) adds `n` runnable extraction jobs and returns their ids."""
+
+    def add(count: int) -> list:
+        jobs = [
+            Job(kind="extract", sha256=f"{i:064x}", status="queued")
+            for i in range(count)
+        ]
+        for job in jobs:
+            job.run_after = datetime.now(timezone.utc) - timedelta(seconds=1)
+        db.add_all(jobs)
+        db.commit()
+        return [job.id for job in jobs]
+
+    return add
+
+
+def chunk(ordinal: int) -> Chunk:
+    return Chunk(ordinal=ordinal, page_start=1, page_end=1, text=f"text {ordinal}")
+
+
+def test_claims_are_disjoint(db, queue):
+    ids = queue(5)
+    first = crud_job.claim_jobs(db, worker_id="a", limit=3)
+    second = crud_job.claim_jobs(db, worker_id="b", limit=3)
+    assert [job.id for job in first] == ids[:3]
+    assert [job.id for job in second] == ids[3:]
+    assert crud_job.claim_jobs(db, worker_id="c", limit=3) == []
+    assert all(job.attempts == 1 for job in first + second)
+
+
+def test_jobs_wait_for_run_after(db, queue):
+    (job_id,) = queue(1)
+    db.get(Job, job_id).run_after = datetime.now(timezone.utc) + timedelta(hours=1)
+    db.commit()
+    assert crud_job.claim_jobs(db, worker_id="a", limit=1) == []
+
+
+def test_failures_retry_or_fail_for_good(db, queue):
+    retried, failed = queue(2)
+    crud_job.claim_jobs(db, worker_id="a", limit=2)
+    crud_job.fail_job(
+        db, job_id=retried, worker_id="a", attempts=1, error="busy", retry_after=3600
+    )
+    crud_job.fail_job(db, job_id=failed, worker_id="a", attempts=1, error="bad")
+    db.expire_all()
+    assert (db.get(Job, retried).status, db.get(Job, retried).locked_by) == (
+        "queued",
+        None,
+    )
+    assert db.get(Job, failed).status == "failed"
+    assert db.get(Job, failed).error == "bad"
+
+
+def test_stale_jobs_are_requeued_until_out_of_attempts(db, queue):
+    requeued, exhausted = queue(2)
+    crud_job.claim_jobs(db, worker_id="gone", limit=2)
+    db.get(Job, exhausted).attempts = 3
+    db.commit()
+    assert crud_job.requeue_stale_jobs(db, lock_timeout=60, max_attempts=3) == 0
+    assert crud_job.requeue_stale_jobs(db, lock_timeout=-1, max_attempts=3) == 2
+    db.expire_all()
+    assert db.get(Job, requeued).status == "queued"
+    assert db.get(Job, exhausted).status == "failed"
+
+
+def test_completion_replaces_chunks_and_needs_the_lock(db, queue):
+    (job_id,) = queue(1)
+    crud_job.claim_jobs(db, worker_id="a", limit=1)
+    kwargs = dict(job_id=job_id, attempts=1, pages=2, duration_seconds=0.5)
+    assert (
+        crud_job.complete_extraction(db, worker_id="b", chunks=[chunk(0)], **kwargs)
+        is None
+    )
+    ids = crud_job.complete_extraction(
+        db, worker_id="a", chunks=[chunk(0), chunk(1)], **kwargs
+    )
+    assert len(ids) == 2
+    assert db.query(DocumentChunk).count() == 2
+    job = db.get(Job, job_id)
+    assert (job.status, job.pages, job.chunks, job.locked_by) == (
+        "succeeded",
+        2,
+        2,
+        None,
+    )
+    stats = crud_job.queue_stats(db)
+    assert (stats["succeeded"], stats["window_pages"]) == (1, 2)
+    assert stats["pages_per_busy_second"] == 4.0
+
+
+def run_worker(jobs: int) -> Worker:
+    """Run a worker until it has finished `jobs` jobs."""
+
+    async def run() -> Worker:
+        worker = Worker(
+            processes=1, poll_interval=0.05, max_attempts=1, lock_timeout=60
+        )
+        task = asyncio.create_task(worker.run())
+        for _ in range(600):
+            await asyncio.sleep(0.05)
+            if worker.jobs_succeeded + worker.jobs_failed == jobs:
+                break
+        worker.stop()
+        await task
+        return worker
+
+    return asyncio.run(run())
+
+
+def test_worker_extracts_uploads(client, signup, db):
+    headers = signup()
+    documents = f"{settings.API_V1_STR}/documents/"
+    files = {"good": make_pdf(3), "bad": b"%PDF-1.4 not really a pdf"}
+    ids = {
+        name: client.post(
+            documents,
+            headers=headers,
+            files={"file": (f"{name}.pdf", content, "application/pdf")},
+        ).json()["id"]
+        for name, content in files.items()
+    }
+    assert get_content_store().path_for(db.get(Job, 1).sha256).exists()
+
+    worker = run_worker(jobs=2)
+    assert (worker.jobs_succeeded, worker.jobs_failed, worker.pages) == (1, 1, 3)
+    good = client.get(f"{documents}{ids['good']}/job", headers=headers).json()
+    assert (good["status"], good["pages"]) == ("succeeded", 3)
+    bad = client.get(f"{documents}{ids['bad']}/job", headers=headers).json()
+    assert bad["status"] == "failed" and bad["error"]
+    chunks = db.query(DocumentChunk).order_by(DocumentChunk.ordinal).all()
+    assert "page0word0" in chunks[0].text
+
+
+def test_a_deleted_file_is_extracted_again_when_re_uploaded(client, signup, db):
+    headers = signup()
+    documents = f"{settings.API_V1_STR}/documents/"
+    files = {"file": ("paper.pdf", make_pdf(2), "application/pdf")}
+    first = client.post(documents, headers=headers, files=files).json()
+    run_worker(jobs=1)
+    extracted = db.query(DocumentChunk).count()
+    assert extracted > 0
+
+    client.delete(f"{documents}{first['id']}", headers=headers)
+    assert db.query(DocumentChunk).count() == db.query(Job).count() == 0
+
+    second = client.post(documents, headers=headers, files=files).json()
+    job = client.get(f"{documents}{second['id']}/job", headers=headers).json()
+    assert job["status"] == "queued"
+    assert run_worker(jobs=1).jobs_succeeded == 1
+    assert db.query(DocumentChunk).count() == extracted
@@ -0,0 +1,47 @@
+import importlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import api
+from app.api.v1.endpoints import health
+from app.core.config import settings
+
+META = f"{settings.API_V1_STR}/meta"
+STATS_PATHS = sorted(route.path for route in health.stats_router.routes)
+
+
+def test_every_meta_route_but_health_is_a_stats_route():
+    assert [route.path for route in health.router.routes] == ["/health"]
+    assert "/metrics" in STATS_PATHS and "/hashing" in STATS_PATHS
+
+
+def test_health_is_public(client):
+    response = client.get(f"{META}/health")
+    assert response.status_code == 200
+    assert response.json() == {"status": "OK"}
+
+
+@pytest.mark.parametrize("path", STATS_PATHS)
+def test_stats_need_a_superuser(client, signup, path):
+    assert client.get(f"{META}{path}").status_code == 401
+    user = signup("user@example.com")
+    assert client.get(f"{META}{path}", headers=user).status_code == 403
+    admin = signup("admin@example.com", superuser=True)
+    response = client.get(f"{META}{path}", headers=admin)
+    assert response.status_code == 200, response.text
+
+
+def test_stats_can_be_served_publicly(engine, monkeypatch):
+    # The router is built at import, like the DB mode switch.
+    with monkeypatch.context() as patch:
+        patch.setattr(settings, "META_STATS_PUBLIC", True)
+        public = importlib.reload(api)
+    try:
+        app = FastAPI()
+        app.include_router(public.api_router, prefix=settings.API_V1_STR)
+        with TestClient(app) as client:
+            assert client.get(f"{META}/token-cache").status_code == 200
+    finally:
+        importlib.reload(api)
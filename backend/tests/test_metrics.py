@@ -0,0 +1,131 @@
+import time
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.metrics import MetricsMiddleware, MetricsRegistry, render_stats
+
+
+@pytest.fixture()
+def registry(monkeypatch) -> MetricsRegistry:
+    fresh = MetricsRegistry()
+    monkeypatch.setattr(metrics, "registry", fresh)
+    return fresh
+
+
+@pytest.fixture()
+def app_client(tmp_path, registry):
+    engine = create_engine(f"sqlite:///{tmp_path / 'metrics.db'}")
+    metrics.instrument_engine(engine)
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def read_item(item_id: int):
+        if item_id < 0:
+            raise HTTPException(status_code=404)
+        with engine.connect() as connection:
+            for _ in range(3):
+                connection.execute(text("SELECT 1"))
+        return {"id": item_id}
+
+    @app.get("/skipped")
+    def skipped():
+        return {}
+
+    app.add_middleware(MetricsMiddleware, exclude_paths=["/skipped"])
+    with TestClient(app) as client:
+        yield client
+    engine.dispose()
+
+
+def series(body: str, name: str) -> dict:
+    """{labels: value} of every sample of `name` in a Prometheus text body."""
+    samples = {}
+    for line in body.splitlines():
+        if line.startswith(name + "{"):
+            labels, value = line[len(name) + 1 :].rsplit("} ", 1)
+            samples[labels] = float(value)
+    return samples
+
+
+def test_requests_are_labelled_by_route_template(app_client, registry):
+    for item_id in (1, 2, -1):
+        app_client.get(f"/items/{item_id}")
+    app_client.get("/nowhere")
+    app_client.get("/skipped")
+    counts = series(registry.render(), "http_request_duration_seconds_count")
+    assert counts == {
+        'method="GET",route="/items/{item_id}",status="200"': 2,
+        'method="GET",route="/items/{item_id}",status="404"': 1,
+        'method="GET",route="unmatched",status="404"': 1,
+    }
+    assert registry.in_flight == 0
+
+
+def test_sql_statements_are_counted_per_request(app_client, registry):
+    app_client.get("/items/1")
+    body = registry.render()
+    route = 'method="GET",route="/items/{item_id}"'
+    assert series(body, "http_request_sql_statements_sum")[route] == 3
+    assert series(body, "http_request_sql_statements_count")[route] == 1
+    assert registry.sql_statements_total == 3
+    sizes = series(body, "http_response_size_bytes_sum")
+    assert sizes[route] == len(b'{"id":1}')
+
+
+def test_failed_statements_leave_nothing_on_the_connection(tmp_path, registry):
+    engine = create_engine(f"sqlite:///{tmp_path / 'metrics.db'}")
+    metrics.instrument_engine(engine)
+    with engine.connect() as connection:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                connection.execute(text("SELECT * FROM missing"))
+        # Pooled connections live for hours; failures must not pile up state.
+        assert connection.info == {}
+        time.sleep(0.2)
+        connection.execute(text("SELECT 1"))
+    engine.dispose()
+    assert registry.sql_statements_total == 1
+    assert registry.sql_seconds_total < 0.1
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    histogram = metrics.Histogram((1, 5))
+    for value in (0.5, 1, 3, 10):
+        histogram.observe(value)
+    assert histogram.counts == [2, 1, 1]
+    registry._latency[("GET", "/x", "200")] = histogram
+    buckets = series(registry.render(), "http_request_duration_seconds_bucket")
+    labels = 'method="GET",route="/x",status="200"'
+    assert [buckets[f'{labels},le="{le}"'] for le in ("1", "5", "+Inf")] == [2, 3, 4]
+
+
+def test_render_stats():
+    body = render_stats(
+        "cache",
+        {"hits": 3, "enabled": True, "name": "x", "buckets": {"le_1": 2}},
+    )
+    assert body.splitlines() == [
+        "# TYPE cache_hits gauge",
+        "cache_hits 3",
+        "# TYPE cache_enabled gauge",
+        "cache_enabled 1",
+        "# TYPE cache_buckets gauge",
+        'cache_buckets{bucket="le_1"} 2',
+    ]
+    assert render_stats("empty", {"name": "x"}) == ""
+
+
+def test_metrics_route_serves_prometheus_text(client, signup):
+    admin = signup("admin@example.com", superuser=True)
+    client.get(f"{settings.API_V1_STR}/users/me", headers=admin)
+    response = client.get(f"{settings.API_V1_STR}/meta/metrics", headers=admin)
+    assert response.headers["content-type"] == metrics.PROMETHEUS_CONTENT_TYPE
+    assert f'route="{settings.API_V1_STR}/users/me"' in response.text
+    assert "token_cache_hits" in response.text
+    assert "/meta/metrics" not in response.text
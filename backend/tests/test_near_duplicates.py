@@ -0,0 +1,126 @@
+import random
+
+import numpy as np
+
+from app.core.config import settings
+from app.crud import crud_signature
+from app.db.models import DocumentSignature
+from app.services import minhash
+from app.services.embeddings import get_embedder
+from app.services.extraction import Chunk
+from app.services.results import get_result_store
+from app.worker import index_chunks
+
+THRESHOLD = 0.8
+
+
+def paper(seed: int, n_words: int = 2000) -> str:
+    rng = random.Random(seed)
+    return " ".join(f"w{rng.randrange(5000)}" for _ in range(n_words))
+
+
+def chunks(texts):
+    return [Chunk(i, i + 1, i + 1, text) for i, text in enumerate(texts)]
+
+
+def passages(n: int = 20):
+    return [f"passage {i} " + f"word{i} " * 50 for i in range(n)]
+
+
+def test_signature_similarity_tracks_jaccard():
+    original = paper(1)
+    edited = original + " an added acknowledgements paragraph at the end"
+    assert (
+        minhash.similarity(minhash.signature(original), minhash.signature(edited))
+        >= THRESHOLD
+    )
+    assert (
+        minhash.similarity(minhash.signature(original), minhash.signature(paper(2)))
+        < 0.2
+    )
+    assert minhash.signature("too short") is None
+
+
+def test_near_duplicates_link_to_the_first_copy(db):
+    first, second, third = paper(1), paper(1) + " revised", paper(1) + " again"
+    assert (
+        crud_signature.save_signature(
+            db, sha256="a" * 64, signature=minhash.signature(first), threshold=THRESHOLD
+        )
+        is None
+    )
+    linked = crud_signature.save_signature(
+        db, sha256="b" * 64, signature=minhash.signature(second), threshold=THRESHOLD
+    )
+    assert linked[0] == "a" * 64 and linked[1] >= THRESHOLD
+    # Links never chain: the third copy points at the first one too.
+    linked = crud_signature.save_signature(
+        db, sha256="c" * 64, signature=minhash.signature(third), threshold=THRESHOLD
+    )
+    assert linked[0] == "a" * 64
+    unrelated = crud_signature.save_signature(
+        db, sha256="d" * 64, signature=minhash.signature(paper(2)), threshold=THRESHOLD
+    )
+    assert unrelated is None
+
+    crud_signature.delete_signature(db, "a" * 64)
+    db.commit()
+    assert crud_signature.get_analysis_sha(db, "b" * 64) == "b" * 64
+
+
+def test_linked_file_reuses_only_identical_passage_embeddings(engine):
+    original = passages()
+    corrected = original[:-1] + ["corrected appendix " * 30]
+    assert index_chunks("a" * 64, list(range(1, 21)), chunks(original)) == 20
+    embedded = index_chunks(
+        "b" * 64, list(range(21, 41)), chunks(corrected), reuse_from="a" * 64
+    )
+    assert embedded == 1
+
+    bundle = get_result_store().open("b" * 64)
+    assert bundle.column("text") == corrected
+    np.testing.assert_allclose(
+        bundle.column("embedding"), get_embedder().embed(corrected), atol=1e-6
+    )
+
+
+def test_reuse_falls_back_to_embedding_everything(engine):
+    # No results stored for the earlier file (e.g. its indexing failed).
+    assert index_chunks("b" * 64, [1, 2], chunks(passages(2)), reuse_from="a" * 64) == 2
+
+
+def test_linked_document_is_summarized_from_its_own_chunks(
+    client, signup, add_document, summarize, db
+):
+    headers = signup()
+    me = client.get(f"{settings.API_V1_STR}/users/me", headers=headers).json()["id"]
+    original = passages()
+    corrected = original[:-1] + ["corrected appendix " * 30]
+    first = add_document(me, "a" * 64, original)
+    second = add_document(me, "b" * 64, corrected)
+    db.add_all(
+        [
+            DocumentSignature(sha256="a" * 64, minhash=b""),
+            DocumentSignature(
+                sha256="b" * 64, minhash=b"", canonical_sha256="a" * 64, similarity=0.98
+            ),
+        ]
+    )
+    db.commit()
+
+    summarize(first, headers)
+    events = summarize(second, headers)
+    chunk_events = [data for name, data in events if name == "chunk"]
+    assert len(chunk_events) == 20
+    # Only the changed passage went to the model.
+    assert sum(not data["cached"] for data in chunk_events) == 1
+    changed = next(data for data in chunk_events if not data["cached"])
+    assert changed["ordinal"] == 19
+    assert "corrected appendix" in changed["summary"]
+    summary = events[-1]
+    assert summary[0] == "summary"
+    assert summary[1]["cached_chunks"] == 19
+
+    stored = get_result_store().open("b" * 64)
+    assert "corrected appendix" in stored.column("chunk_summary", 19)[0]
+    assert stored.document["summary"] == summary[1]["summary"]
@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.db.models import User
+
+USERS = f"{settings.API_V1_STR}/users/"
+
+
+def test_cursor_round_trips():
+    created_at = datetime(2024, 5, 1, 12, 30, 15, 123456)
+    token = encode_cursor(created_at, 42)
+    assert "=" not in token
+    assert decode_cursor(token) == (created_at, 42)
+
+
+@pytest.mark.parametrize("token", ["garbage", "", "bm90IGpzb24", "WzEsMiwzXQ"])
+def test_malformed_cursors_are_rejected(token):
+    with pytest.raises(HTTPException) as excinfo:
+        decode_cursor(token)
+    assert excinfo.value.status_code == 400
+
+
+@pytest.fixture()
+def users(client, db, signup):
+    """Seven users; pairs share a creation time, so pages must break ties on
+    id. Returns the bearer headers of the last one."""
+    start = datetime(2024, 1, 1)
+    db.add_all(
+        User(
+            email=f"u{i}@example.com",
+            hashed_password="x",
+            created_at=start + timedelta(seconds=i // 2),
+        )
+        for i in range(6)
+    )
+    db.commit()
+    return signup("z@example.com")
+
+
+def test_pages_follow_the_cursor_without_gaps_or_repeats(client, users):
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get(USERS, headers=users, params=params)
+        assert response.status_code == 200, response.text
+        assert len(response.json()) <= 2
+        seen += [user["email"] for user in response.json()]
+        pages += 1
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            break
+    assert seen == [f"u{i}@example.com" for i in range(6)] + ["z@example.com"]
+    assert pages == 4
+
+
+def test_last_full_page_has_no_cursor(client, users):
+    response = client.get(USERS, headers=users, params={"limit": 7})
+    assert len(response.json()) == 7
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+
+def test_bad_cursor_is_a_400(client, users):
+    response = client.get(USERS, headers=users, params={"cursor": "garbage"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_skip_still_works(client, users):
+    response = client.get(USERS, headers=users, params={"skip": 5})
+    assert [user["email"] for user in response.json()] == [
+        "u5@example.com",
+        "z@example.com",
+    ]
+
+
+def test_pages_have_only_the_public_columns(client, users):
+    user = client.get(USERS, headers=users, params={"limit": 1}).json()[0]
+    assert "hashed_password" not in user
+    assert set(user) >= {"id", "email", "is_active", "created_at"}
+
+
+def test_users_created_within_one_second_page_through(client, signup):
+    # created_at comes from the database default here, not from Python.
+    for i in range(4):
+        response = client.post(
+            USERS, json={"email": f"n{i}@example.com", "password": "password123"}
+        )
+        assert response.status_code == 201, response.text
+    headers = signup("z@example.com")
+    first = client.get(USERS, headers=headers, params={"limit": 2})
+    rest = client.get(
+        USERS,
+        headers=headers,
+        params={"limit": 10, "cursor": first.headers[NEXT_CURSOR_HEADER]},
+    )
+    assert [user["email"] for user in first.json() + rest.json()] == [
+        f"n{i}@example.com" for i in range(4)
+    ] + ["z@example.com"]
@@ -0,0 +1,86 @@
+import time
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.pool import QueuePool
+
+from app.core.config import settings
+from app.db import session
+from app.db.pool_metrics import PoolMetrics, install_idle_pre_ping
+
+
+@pytest.fixture()
+def pooled(tmp_path):
+    """An instrumented engine with one pooled connection and one overflow."""
+    metrics = PoolMetrics("test")
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=metrics.pool_class(QueuePool),
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.1,
+    )
+    metrics.instrument(engine)
+    yield engine, metrics
+    engine.dispose()
+
+
+def test_pool_kwargs_follow_settings(monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 7)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 3)
+    monkeypatch.setattr(settings, "DB_POOL_PRE_PING", "always")
+    kwargs = session.pool_kwargs()
+    assert (kwargs["pool_size"], kwargs["max_overflow"]) == (7, 3)
+    assert kwargs["pool_pre_ping"] is True
+    monkeypatch.setattr(settings, "DB_POOL_PRE_PING", "idle")
+    assert session.pool_kwargs()["pool_pre_ping"] is False
+
+
+def test_saturation_and_timeouts_are_recorded(pooled):
+    engine, metrics = pooled
+    first, second = engine.connect(), engine.connect()
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    stats = metrics.snapshot()
+    assert (stats["checked_out"], stats["peak_checked_out"]) == (2, 2)
+    assert (stats["overflow"], stats["peak_overflow"]) == (1, 1)
+    assert stats["timeouts"] == 1
+    assert stats["wait_max_ms"] >= 100
+
+    first.close()
+    second.close()
+    stats = metrics.snapshot()
+    assert (stats["checked_out"], stats["checkouts"], stats["checkins"]) == (0, 2, 2)
+    assert stats["wait_buckets"]["le_inf"] == 3
+
+
+def test_counters_survive_dispose(pooled):
+    engine, metrics = pooled
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    engine.dispose()
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    stats = metrics.snapshot()
+    assert stats["pool_class"] == "InstrumentedQueuePool"
+    assert (stats["checkouts"], stats["connects"]) == (2, 2)
+
+
+def test_idle_pre_ping_replaces_a_dead_connection(pooled):
+    engine, metrics = pooled
+    install_idle_pre_ping(engine, idle_seconds=0.01)
+    with engine.connect() as connection:
+        connection.connection.dbapi_connection.close()  # the server went away
+    time.sleep(0.02)
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT 1")).scalar() == 1
+    stats = metrics.snapshot()
+    assert stats["invalidations"] == 1
+    assert stats["connects"] == 2
+
+
+def test_db_pool_route(client, signup):
+    admin = signup("admin@example.com", superuser=True)
+    response = client.get(f"{settings.API_V1_STR}/meta/db-pool", headers=admin)
+    assert response.status_code == 200
+    assert response.json()["primary"]["name"] == "primary"
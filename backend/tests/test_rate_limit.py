@@ -0,0 +1,172 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import deps
+from app.core import rate_limit, security
+from app.core.config import settings
+from app.core.rate_limit import (
+    MemoryRateLimitStore,
+    Rate,
+    RateLimiter,
+    get_rate_limiter,
+    parse_rate,
+)
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture()
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def test_parse_rate():
+    assert parse_rate("10/minute") == Rate(10, 60.0)
+    assert parse_rate("100 / 5 minutes") == Rate(100, 300.0)
+    assert parse_rate("2/Hour") == Rate(2, 3600.0)
+    assert parse_rate("  ") is None
+    with pytest.raises(ValueError):
+        parse_rate("ten a minute")
+
+
+def test_sliding_window_counts_the_previous_window(clock):
+    store = MemoryRateLimitStore(shards=4)
+    rate = Rate(5, 10.0)
+    results = [store.hit("k", rate) for _ in range(6)]
+    assert [r.allowed for r in results] == [True] * 5 + [False]
+    assert [r.remaining for r in results[:5]] == [4, 3, 2, 1, 0]
+    assert results[-1].retry_after == pytest.approx(10.0)
+
+    # Next window: the previous five still weigh in fully at its start, and
+    # one request's worth slides out after a fifth of the window.
+    clock.now += 10.0
+    rejected = store.hit("k", rate)
+    assert not rejected.allowed
+    assert rejected.retry_after == pytest.approx(2.0)
+    clock.now += 2.0
+    assert store.hit("k", rate).allowed
+    assert not store.hit("k", rate).allowed
+
+    # Two windows later nothing carries over.
+    clock.now += 20.0
+    assert all(store.hit("k", rate).allowed for _ in range(5))
+
+
+def test_keys_and_rates_are_counted_separately(clock):
+    store = MemoryRateLimitStore()
+    rate = Rate(1, 60.0)
+    assert store.hit("a", rate).allowed
+    assert store.hit("b", rate).allowed
+    assert not store.hit("a", rate).allowed
+    assert store.hit("a", Rate(2, 60.0)).allowed
+
+
+def test_expired_counters_are_pruned(clock):
+    store = MemoryRateLimitStore(shards=1, max_keys=10)
+    rate = Rate(1, 1.0)
+    for i in range(10):
+        store.hit(f"old{i}", rate)
+    clock.now += 2.0
+    for i in range(2):
+        store.hit(f"new{i}", rate)
+    assert store.stats()["pruned"] == 10
+    assert store.stats()["keys"] == 2
+
+
+def test_disabled_limiter_allows_everything():
+    limiter = RateLimiter(MemoryRateLimitStore(), enabled=False)
+    assert all(limiter.hit("login", "ip:x", Rate(1, 60.0)).allowed for _ in range(3))
+
+
+def test_login_is_limited_per_ip_with_retry_headers(client, signup):
+    signup("a@example.com")
+    url = f"{settings.API_V1_STR}/login/access-token"
+    form = {"username": "a@example.com", "password": "wrong"}
+    limit = parse_rate(settings.RATE_LIMIT_LOGIN).limit
+    # signup() logged in once already.
+    codes = [client.post(url, data=form).status_code for _ in range(limit - 1)]
+    assert set(codes) == {400}
+    response = client.post(url, data=form)
+    assert response.status_code == 429
+    assert response.headers["X-RateLimit-Limit"] == str(limit)
+    assert response.headers["X-RateLimit-Remaining"] == "0"
+    assert 1 <= int(response.headers["Retry-After"]) <= 60
+    assert get_rate_limiter().stats()["rejected_by_limit"] == {"login": 1}
+
+
+def test_per_user_limits_key_on_the_token_subject(engine):
+    app = FastAPI()
+
+    @app.get(
+        "/limited",
+        dependencies=[Depends(deps.rate_limit("test", "2/minute", per="user"))],
+    )
+    def limited() -> dict:
+        return {}
+
+    def bearer(email: str) -> dict:
+        token = security.create_access_token({"sub": email})
+        return {"Authorization": f"Bearer {token}"}
+
+    with TestClient(app) as client:
+        a, b = bearer("a@example.com"), bearer("b@example.com")
+        assert [client.get("/limited", headers=a).status_code for _ in range(3)] == [
+            200,
+            200,
+            429,
+        ]
+        # Another user from the same address has their own allowance, and a
+        # new token for the same user does not reset it.
+        assert client.get("/limited", headers=b).status_code == 200
+        assert client.get("/limited", headers=bearer("a@example.com")).status_code == (
+            429
+        )
+        # Without a token the request is limited by IP.
+        assert client.get("/limited").status_code == 200
+
+
+def test_client_ip_ignores_addresses_the_client_made_up(monkeypatch):
+    def ip(forwarded: str) -> str:
+        request = SimpleNamespace(
+            headers={"x-forwarded-for": forwarded},
+            client=SimpleNamespace(host="10.0.0.1"),
+        )
+        return deps.client_ip(request)
+
+    # The client sent "1.1.1.1"; the proxy appended the address it saw.
+    spoofed = "1.1.1.1, 203.0.113.7"
+    assert ip(spoofed) == "10.0.0.1"  # forwarded headers not trusted
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUST_FORWARDED", True)
+    assert ip(spoofed) == "203.0.113.7"
+    assert ip("203.0.113.7") == "203.0.113.7"
+    # Two proxies: the second appended the first one's address.
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUSTED_PROXIES", 2)
+    assert ip("1.1.1.1, 203.0.113.7, 10.0.0.2") == "203.0.113.7"
+    assert ip("203.0.113.7") == "203.0.113.7"
+
+
+def test_a_new_forwarded_address_does_not_reset_the_login_limit(
+    client, signup, monkeypatch
+):
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUST_FORWARDED", True)
+    url = f"{settings.API_V1_STR}/login/access-token"
+    form = {"username": "a@example.com", "password": "wrong"}
+    limit = parse_rate(settings.RATE_LIMIT_LOGIN).limit
+    codes = [
+        client.post(
+            url, data=form, headers={"X-Forwarded-For": f"10.1.0.{i}, 203.0.113.7"}
+        ).status_code
+        for i in range(limit + 1)
+    ]
+    assert codes[-1] == 429
@@ -0,0 +1,138 @@
+import pytest
+from jose import jwt
+
+from app.core.config import settings
+from app.core.revocation import BloomFilter, RevokedFamilies
+
+API = settings.API_V1_STR
+
+
+@pytest.fixture()
+def session_tokens(client, signup):
+    """session_tokens() logs a@example.com in and returns the token pair."""
+    signup("a@example.com")
+
+    def log_in(password: str = "password123") -> dict:
+        response = client.post(
+            f"{API}/login/access-token",
+            data={"username": "a@example.com", "password": password},
+        )
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    return log_in
+
+
+def bearer(tokens: dict) -> dict:
+    return {"Authorization": f"Bearer {tokens['access_token']}"}
+
+
+def refresh(client, tokens: dict):
+    return client.post(
+        f"{API}/login/refresh-token", json={"refresh_token": tokens["refresh_token"]}
+    )
+
+
+def me(client, tokens: dict) -> int:
+    return client.get(f"{API}/users/me", headers=bearer(tokens)).status_code
+
+
+def family(tokens: dict) -> str:
+    claims = jwt.decode(
+        tokens["access_token"], settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+    )
+    return claims["fam"]
+
+
+def test_refresh_rotates_the_token_pair(client, session_tokens):
+    first = session_tokens()
+    assert {"access_token", "refresh_token", "token_type"} <= set(first)
+    second = refresh(client, first).json()
+    third = refresh(client, second).json()
+    assert third["refresh_token"] != second["refresh_token"]
+    assert family(third) == family(first)
+    assert me(client, third) == 200
+
+
+def test_refresh_token_is_not_an_access_token(client, session_tokens):
+    tokens = session_tokens()
+    headers = {"Authorization": f"Bearer {tokens['refresh_token']}"}
+    assert client.get(f"{API}/users/me", headers=headers).status_code == 403
+    response = client.post(
+        f"{API}/login/refresh-token", json={"refresh_token": tokens["access_token"]}
+    )
+    assert response.status_code == 401
+
+
+def test_reusing_a_refresh_token_revokes_the_family(client, session_tokens):
+    first = session_tokens()
+    other_session = session_tokens()
+    second = refresh(client, first).json()
+    latest = refresh(client, second).json()
+    assert me(client, latest) == 200
+
+    response = refresh(client, second)  # a copy of an exchanged token
+    assert response.status_code == 401
+    assert "already used" in response.json()["detail"]
+    # Every token of the session is dead, including the legitimate holder's.
+    assert me(client, latest) == 401
+    response = refresh(client, latest)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Session has been revoked"
+    # Other sessions of the same user are untouched.
+    assert me(client, other_session) == 200
+    assert refresh(client, other_session).status_code == 200
+
+
+def test_logout_ends_the_session(client, session_tokens):
+    tokens = session_tokens()
+    assert me(client, tokens) == 200
+    response = client.post(
+        f"{API}/login/logout", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 204
+    assert me(client, tokens) == 401
+    assert refresh(client, tokens).status_code == 401
+
+
+def test_password_change_revokes_every_session(client, session_tokens):
+    current, other = session_tokens(), session_tokens()
+    response = client.post(
+        f"{API}/users/me/password",
+        headers=bearer(current),
+        json={"current_password": "password123", "new_password": "password456"},
+    )
+    assert response.status_code == 200, response.text
+    assert me(client, other) == 401
+    assert refresh(client, other).status_code == 401
+    assert me(client, session_tokens("password456")) == 200
+
+
+def test_malformed_refresh_token_is_a_401(client):
+    response = client.post(
+        f"{API}/login/refresh-token", json={"refresh_token": "x.y.z"}
+    )
+    assert response.status_code == 401
+
+
+def test_another_process_loads_revocations_from_the_database(client, session_tokens):
+    revoked, live = session_tokens(), session_tokens()
+    client.post(f"{API}/login/logout", json={"refresh_token": revoked["refresh_token"]})
+    # A fresh filter, as in another API process.
+    families = RevokedFamilies(
+        capacity=1000, error_rate=0.001, refresh_interval=5, rebuild_interval=3600
+    )
+    assert families.is_revoked(family(revoked))
+    assert not families.is_revoked(family(live))
+    stats = families.stats()
+    assert stats["revoked_families"] == 1
+    assert stats["filter_negatives"] == 1
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"family-{i}")
+    assert all(f"family-{i}" in bloom for i in range(1000))
+    false_positives = sum(f"other-{i}" in bloom for i in range(10_000))
+    assert false_positives < 300  # about 1% expected
@@ -0,0 +1,232 @@
+import time
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+
+from app.api import deps
+from app.api.v1.endpoints import users_async
+from app.core import security
+from app.core.config import settings
+from app.db.base import Base
+from app.db.models import User
+from app.db.replicas import (
+    PIN_COOKIE,
+    ReadYourWritesMiddleware,
+    Replica,
+    ReplicaRouter,
+    get_replica_router,
+)
+from app.main import create_app
+
+USERS = f"{settings.API_V1_STR}/users/"
+
+
+def make_router(n: int = 2, **kwargs) -> ReplicaRouter:
+    replicas = [Replica(f"replica_{i}", create_engine("sqlite://")) for i in range(n)]
+    kwargs.setdefault("lag_probe", lambda engine: 0.0)
+    return ReplicaRouter(replicas, **kwargs)
+
+
+def test_no_replicas_reads_from_primary():
+    router = ReplicaRouter([])
+    assert router.choose() is None
+    assert router.choose(pinned=True) is None
+
+
+def test_round_robin_alternates_between_healthy_replicas():
+    router = make_router(3)
+    chosen = [router.choose().name for _ in range(6)]
+    assert chosen == ["replica_0", "replica_1", "replica_2"] * 2
+    assert router.stats()["replica_reads"] == 6
+
+
+def test_unreachable_replica_is_skipped_until_it_recovers():
+    router = make_router(2)
+    down = {"replica_0"}
+
+    def probe(engine):
+        if engine is router.replicas[0].engine and down:
+            raise ConnectionError("refused")
+        return 0.0
+
+    router.lag_probe = probe
+    router.check()
+    assert not router.replicas[0].healthy
+    assert "refused" in router.replicas[0].last_error
+    assert {router.choose().name for _ in range(4)} == {"replica_1"}
+
+    down.clear()
+    router.check()
+    assert {router.choose().name for _ in range(4)} == {"replica_0", "replica_1"}
+
+
+def test_lagging_replicas_fall_back_to_the_primary():
+    router = make_router(2, max_lag=5.0, lag_probe=lambda engine: 30.0)
+    router.check()
+    assert router.choose() is None
+    stats = router.stats()
+    assert stats["healthy"] == 0
+    assert stats["failover_reads"] == stats["primary_reads"] == 1
+
+    router.lag_probe = lambda engine: 1.0
+    router.check()
+    assert router.choose() is not None
+
+
+def test_pinned_reads_go_to_the_primary():
+    router = make_router(2, pin_seconds=0.05)
+    router.pin("user:a@example.com")
+    assert router.is_pinned("user:a@example.com")
+    assert not router.is_pinned("user:b@example.com")
+    assert router.choose(pinned=True) is None
+    assert router.stats()["pinned_reads"] == 1
+    time.sleep(0.06)
+    assert not router.is_pinned("user:a@example.com")
+
+
+def test_unknown_balancing_is_rejected():
+    with pytest.raises(ValueError):
+        ReplicaRouter([], balancing="random")
+
+
+@pytest.fixture()
+def replica_urls(engine, tmp_path, monkeypatch):
+    """Two SQLite replicas, each holding one user the primary does not have,
+    so responses show where a read went."""
+    urls = []
+    for i in range(2):
+        url = f"sqlite:///{tmp_path / f'replica{i}.db'}"
+        replica_engine = create_engine(url)
+        Base.metadata.create_all(replica_engine)
+        with replica_engine.begin() as conn:
+            conn.execute(
+                insert(User),
+                [
+                    {
+                        "email": f"replica{i}@example.com",
+                        "hashed_password": "x",
+                        "is_active": True,
+                        "is_superuser": False,
+                        "created_at": datetime.now(timezone.utc),
+                    }
+                ],
+            )
+        replica_engine.dispose()
+        urls.append(url)
+    monkeypatch.setattr(settings, "DATABASE_REPLICA_URLS", urls)
+    monkeypatch.setattr(settings, "DB_REPLICA_CHECK_SECONDS", 60.0)
+    monkeypatch.setattr(settings, "DB_READ_YOUR_WRITES_SECONDS", 0.5)
+    return urls
+
+
+@pytest.fixture()
+def replica_client(replica_urls):
+    with TestClient(create_app()) as client:
+        yield client
+
+
+def register(client: TestClient, email: str) -> dict:
+    response = client.post(USERS, json={"email": email, "password": "password123"})
+    assert response.status_code == 201, response.text
+    response = client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": email, "password": "password123"},
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def emails(client: TestClient, headers: dict) -> list:
+    response = client.get(USERS, headers=headers)
+    assert response.status_code == 200, response.text
+    return [user["email"] for user in response.json()]
+
+
+def test_reads_without_replicas_use_the_primary(client, signup):
+    headers = signup("a@example.com")
+    assert emails(client, headers) == ["a@example.com"]
+
+
+def test_reads_are_balanced_over_replicas(replica_client):
+    headers = register(replica_client, "a@example.com")
+    replica_client.cookies.clear()
+    reads = [emails(replica_client, headers) for _ in range(4)]
+    assert reads == [["replica0@example.com"], ["replica1@example.com"]] * 2
+
+
+def test_write_pins_reads_by_cookie(replica_client):
+    headers = register(replica_client, "a@example.com")
+    assert PIN_COOKIE in replica_client.cookies
+    # Without the in-process pin the cookie alone keeps reads on the primary.
+    get_replica_router()._pins.clear()
+    assert emails(replica_client, headers) == ["a@example.com"]
+
+
+def test_write_pins_reads_by_bearer_token(replica_client):
+    headers = register(replica_client, "a@example.com")
+    user_id = replica_client.get(f"{USERS}me", headers=headers).json()["id"]
+    replica_client.cookies.clear()
+    assert emails(replica_client, headers)[0].startswith("replica")
+
+    response = replica_client.put(
+        f"{USERS}{user_id}", headers=headers, json={"full_name": "A"}
+    )
+    assert response.status_code == 200, response.text
+    replica_client.cookies.clear()  # a client that drops cookies
+    assert emails(replica_client, headers) == ["a@example.com"]
+
+    time.sleep(0.6)  # DB_READ_YOUR_WRITES_SECONDS
+    assert emails(replica_client, headers)[0].startswith("replica")
+
+
+def test_failed_write_does_not_pin(replica_client):
+    headers = register(replica_client, "a@example.com")
+    replica_client.cookies.clear()
+    get_replica_router()._pins.clear()
+    response = replica_client.put(f"{USERS}999", headers=headers, json={})
+    assert response.status_code >= 400
+    assert PIN_COOKIE not in replica_client.cookies
+    assert emails(replica_client, headers)[0].startswith("replica")
+
+
+def test_unhealthy_replicas_fail_over_to_the_primary(replica_client):
+    headers = register(replica_client, "a@example.com")
+    replica_client.cookies.clear()
+    get_replica_router()._pins.clear()
+    router = get_replica_router()
+
+    def down(engine):
+        raise ConnectionError("refused")
+
+    router.lag_probe = down
+    router.check()
+    assert emails(replica_client, headers) == ["a@example.com"]
+    assert router.stats()["failover_reads"] == 1
+
+
+def test_async_reads_use_replicas_and_fall_back(replica_urls, db, monkeypatch):
+    monkeypatch.setattr(settings, "DB_ASYNC_MODE", True)
+    db.add(User(email="a@example.com", hashed_password="x", is_active=True))
+    db.commit()
+    app = FastAPI()
+    app.include_router(users_async.router, prefix="/users")
+    app.add_middleware(ReadYourWritesMiddleware, key_func=deps.read_your_writes_key)
+    token = security.create_access_token({"sub": "a@example.com"})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    with TestClient(app) as client:
+        reads = [client.get("/users/", headers=headers).json() for _ in range(2)]
+        assert [read[0]["email"] for read in reads] == [
+            "replica0@example.com",
+            "replica1@example.com",
+        ]
+
+        def down(engine):
+            raise ConnectionError("refused")
+
+        get_replica_router().lag_probe = down
+        get_replica_router().check()
+        read = client.get("/users/", headers=headers).json()
+        assert [user["email"] for user in read] == ["a@example.com"]
@@ -0,0 +1,66 @@
+import json
+from datetime import datetime, timezone
+
+from app import schemas
+from app.api.responses import (
+    FastJSONResponse,
+    row_list_adapter,
+    rows_response,
+    rows_to_json,
+)
+from app.core.config import settings
+
+ROWS = [
+    ("a@example.com", True, False, None, 1, datetime(2024, 1, 2, 3, 4, 5), None),
+    (
+        "b@example.com",
+        None,
+        True,
+        'Bé "quoted"',
+        2,
+        datetime(2024, 1, 2, 3, 4, 5, 123456, tzinfo=timezone.utc),
+        datetime(2024, 2, 1),
+    ),
+]
+
+
+def test_rows_serialize_like_the_validated_models():
+    names = list(schemas.User.model_fields)
+    expected = [
+        schemas.User.model_validate(dict(zip(names, row))).model_dump(mode="json")
+        for row in ROWS
+    ]
+    assert json.loads(rows_to_json(ROWS, schemas.User)) == expected
+    assert rows_to_json([], schemas.User) == b"[]"
+
+
+def test_the_serializer_is_built_once_per_schema():
+    assert row_list_adapter(schemas.User) is row_list_adapter(schemas.User)
+    assert row_list_adapter(schemas.User) is not row_list_adapter(schemas.Document)
+
+
+def test_rows_response_keeps_headers():
+    response = rows_response(ROWS[:1], schemas.User, headers={"X-Next-Cursor": "c"})
+    assert response.media_type == "application/json"
+    assert response.headers["x-next-cursor"] == "c"
+    assert json.loads(response.body)[0]["email"] == "a@example.com"
+
+
+def test_fast_json_response():
+    body = FastJSONResponse(
+        {"when": datetime(2024, 1, 1), "score": float("nan"), "text": "é"}
+    ).body
+    assert json.loads(body) == {
+        "when": "2024-01-01T00:00:00",
+        "score": None,
+        "text": "é",
+    }
+
+
+def test_user_list_matches_the_single_user_route(client, signup):
+    headers = signup("a@example.com")
+    signup("b@example.com")
+    users = client.get(f"{settings.API_V1_STR}/users/", headers=headers)
+    assert users.headers["content-type"] == "application/json"
+    me = client.get(f"{settings.API_V1_STR}/users/me", headers=headers).json()
+    assert users.json()[0] == me
@@ -0,0 +1,165 @@
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.db.models import DocumentSignature
+from app.services.extraction import Chunk
+from app.services.results import (
+    ResultsNotFound,
+    ResultStore,
+    UnknownField,
+    get_result_store,
+)
+from app.worker import index_chunks
+
+DOCUMENTS = f"{settings.API_V1_STR}/documents"
+
+
+def passages(n: int):
+    return [f"passage {i} ünïcode " + f"word{i} " * 20 for i in range(n)]
+
+
+@pytest.fixture()
+def store(tmp_path) -> ResultStore:
+    return ResultStore(str(tmp_path / "results"))
+
+
+def test_columns_round_trip_by_row_range(store):
+    texts = passages(10)
+    embeddings = np.arange(40, dtype=np.float32).reshape(10, 4)
+    store.write(
+        "a" * 64,
+        columns={
+            "text": texts,
+            "page_start": list(range(1, 11)),
+            "entities": [["BERT", "GLUE"]] + [[] for _ in range(9)],
+            "embedding": embeddings,
+        },
+        document={"summary": "A summary.", "concepts": ["attention"]},
+    )
+    bundle = store.open("a" * 64)
+    assert bundle.chunk_count == 10
+    assert bundle.fields == [
+        "concepts",
+        "summary",
+        "embedding",
+        "entities",
+        "page_start",
+        "text",
+    ]
+    assert bundle.column("text", 3, 5) == texts[3:5]
+    assert bundle.column("page_start", 8).tolist() == [9, 10]
+    assert bundle.column("entities", 0, 2) == [["BERT", "GLUE"], []]
+    np.testing.assert_array_equal(bundle.column("embedding", 2, 4), embeddings[2:4])
+    assert bundle.column("text", 20, 30) == []
+
+    document, chunks = bundle.select(None, 0, 1)
+    assert document == {"summary": "A summary.", "concepts": ["attention"]}
+    # Embeddings are only returned when asked for by name.
+    assert sorted(chunks) == ["entities", "page_start", "text"]
+    with pytest.raises(UnknownField):
+        bundle.select(["summary", "nope"])
+
+
+def test_writes_add_fields_and_replace_drops_them(store):
+    store.write("a" * 64, columns={"text": passages(3)})
+    store.write("a" * 64, columns={"chunk_summary": ["x", "y", "z"]})
+    assert store.open("a" * 64).fields == ["chunk_summary", "text"]
+    with pytest.raises(ValueError):
+        store.write("a" * 64, columns={"bad": ["only one row"]})
+    # A rejected write publishes nothing.
+    assert store.open("a" * 64).fields == ["chunk_summary", "text"]
+
+    store.write("a" * 64, columns={"text": passages(2)}, replace=True)
+    bundle = store.open("a" * 64)
+    assert bundle.fields == ["text"] and bundle.chunk_count == 2
+    directory = store._dir("a" * 64)
+    assert not list(directory.glob("chunk_summary-*"))
+
+    store.delete("a" * 64)
+    with pytest.raises(ResultsNotFound):
+        store.open("a" * 64)
+
+
+def test_results_endpoint_reads_the_requested_fields_and_chunks(
+    client, signup, add_document
+):
+    headers = signup()
+    me = client.get(f"{settings.API_V1_STR}/users/me", headers=headers).json()["id"]
+    texts = passages(30)
+    document_id = add_document(me, "a" * 64, texts)
+    url = f"{DOCUMENTS}/{document_id}/results"
+    assert client.get(url, headers=headers).status_code == 404
+
+    index_chunks(
+        "a" * 64,
+        list(range(1, 31)),
+        [Chunk(i, i + 1, i + 1, text) for i, text in enumerate(texts)],
+    )
+    response = client.get(
+        url,
+        headers=headers,
+        params={"fields": "text,page_start", "chunk_start": 10, "chunk_end": 15},
+    )
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["analysis_sha256"] == "a" * 64
+    assert body["chunk_count"] == 30
+    assert (body["chunk_start"], body["chunk_end"]) == (10, 15)
+    assert body["chunks"] == {"text": texts[10:15], "page_start": [11, 12, 13, 14, 15]}
+
+    body = client.get(
+        url, headers=headers, params={"fields": "embedding", "chunk_start": 28}
+    ).json()
+    assert len(body["chunks"]["embedding"]) == 2
+
+    response = client.get(url, headers=headers, params={"fields": "nope"})
+    assert response.status_code == 400
+    assert "nope" in response.json()["detail"]
+    response = client.get(
+        url, headers=headers, params={"chunk_start": 5, "chunk_end": 2}
+    )
+    assert response.status_code == 400
+
+    other = signup("other@example.com")
+    assert client.get(url, headers=other).status_code == 404
+
+
+def test_near_duplicate_keeps_its_results_when_the_original_is_deleted(
+    client, signup, add_document, summarize, db
+):
+    headers = signup()
+    me = client.get(f"{settings.API_V1_STR}/users/me", headers=headers).json()["id"]
+    original = passages(20)
+    corrected = original[:-1] + ["corrected appendix " * 30]
+    first = add_document(me, "a" * 64, original)
+    second = add_document(me, "b" * 64, corrected)
+    db.add_all(
+        [
+            DocumentSignature(sha256="a" * 64, minhash=b""),
+            DocumentSignature(
+                sha256="b" * 64, minhash=b"", canonical_sha256="a" * 64, similarity=0.98
+            ),
+        ]
+    )
+    db.commit()
+    summarize(first, headers)
+    summary = summarize(second, headers)[-1][1]["summary"]
+
+    def own_results():
+        response = client.get(
+            f"{DOCUMENTS}/{second}/results",
+            headers=headers,
+            params={"fields": "summary,chunk_summary", "chunk_start": 19},
+        )
+        assert response.status_code == 200, response.text
+        body = response.json()
+        assert body["analysis_sha256"] == "b" * 64
+        assert body["document"] == {"summary": summary}
+        assert "corrected appendix" in body["chunks"]["chunk_summary"][0]
+
+    own_results()
+    assert client.delete(f"{DOCUMENTS}/{first}", headers=headers).status_code == 200
+    with pytest.raises(ResultsNotFound):
+        get_result_store().open("a" * 64)
+    own_results()
@@ -0,0 +1,95 @@
+import pytest
+from sqlalchemy import delete
+
+from app.core.config import settings
+from app.crud import crud_document
+from app.db.models import DocumentChunk
+from app.services.extraction import Chunk
+from app.services.ranking import reciprocal_rank_fusion
+from app.worker import index_chunks
+
+SEARCH = f"{settings.API_V1_STR}/search/"
+TEXTS = [
+    "BRCA1 mutations in breast cancer cohorts",
+    "graph neural networks for molecules",
+    "attention models for protein folding",
+]
+
+
+def test_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion(["a", "b", "c"], ["b", "d", "a"], k=1)
+    assert [item for item, _ in fused] == ["b", "a", "d", "c"]
+    assert fused[0][1] == pytest.approx(1 / 3 + 1 / 2)
+    assert reciprocal_rank_fusion() == []
+
+
+@pytest.fixture()
+def corpus(db, add_document):
+    add_document(1, "a" * 64, TEXTS)
+    add_document(2, "b" * 64, ["BRCA1 expression in other tissues"])
+    return db
+
+
+def search(db, query: str, shas=("a" * 64,)) -> list:
+    hits = crud_document.keyword_search(db, query=query, shas=list(shas), limit=10)
+    return [chunk_id for chunk_id, _ in hits]
+
+
+def test_keyword_search_needs_every_word(corpus):
+    assert search(corpus, "brca1") == [1]
+    assert search(corpus, "protein folding") == [3]
+    assert search(corpus, "protein cancer") == []
+    assert sorted(search(corpus, "brca1", shas=("a" * 64, "b" * 64))) == [1, 4]
+    assert search(corpus, "brca1", shas=()) == []
+
+
+@pytest.mark.parametrize("query", ['AND "(*', "NEAR(a b)", "graph OR", "-", '"'])
+def test_query_syntax_is_not_interpreted(corpus, query):
+    # Raises on malformed FTS5 syntax unless the input is quoted.
+    search(corpus, query)
+
+
+def test_index_follows_chunk_changes(corpus):
+    corpus.execute(delete(DocumentChunk).where(DocumentChunk.id == 1))
+    corpus.commit()
+    assert search(corpus, "brca1") == []
+
+
+def test_search_modes(client, signup, add_document):
+    headers = signup()
+    me = client.get(f"{settings.API_V1_STR}/users/me", headers=headers).json()["id"]
+    add_document(me, "a" * 64, TEXTS)
+    index_chunks(
+        "a" * 64,
+        [1, 2, 3],
+        [Chunk(i, i + 1, i + 1, text) for i, text in enumerate(TEXTS)],
+    )
+
+    def hits(mode: str, q: str = "BRCA1") -> list:
+        response = client.get(
+            SEARCH, headers=headers, params={"q": q, "mode": mode, "k": 3}
+        )
+        assert response.status_code == 200, response.text
+        assert response.json()["mode"] == mode
+        return response.json()["hits"]
+
+    (keyword,) = hits("keyword")
+    assert keyword["chunk_id"] == 1
+    assert keyword["semantic_score"] is None
+    assert keyword["score"] == keyword["keyword_score"]
+
+    hybrid = hits("hybrid")
+    assert hybrid[0]["chunk_id"] == 1
+    assert hybrid[0]["keyword_score"] is not None
+    assert hybrid[0]["semantic_score"] is not None
+    assert {hit["chunk_id"] for hit in hybrid} == {1, 2, 3}
+
+    assert hits("keyword", q="?!") == []
+    response = client.get(SEARCH, headers=headers, params={"q": "x", "mode": "fuzzy"})
+    assert response.status_code == 422
+
+
+def test_users_without_documents_get_no_hits(client, signup):
+    response = client.get(SEARCH, headers=signup(), params={"q": "BRCA1"})
+    assert response.status_code == 200
+    assert response.json()["hits"] == []
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app.core import warmup
+from app.core.config import settings
+
+BACKEND = Path(__file__).resolve().parents[1]
+PROBE = """
+import json, sys
+{setup}
+from app.db import session
+print(json.dumps({{
+    "modules": sorted(name for name in {modules!r} if name in sys.modules),
+    "engine": "engine" in vars(session),
+}}))
+"""
+MODULES = (
+    "jose",
+    "passlib",
+    "app.api.v1.api",
+    "app.api.v1.endpoints.users",
+    "app.api.v1.endpoints.users_async",
+)
+
+
+def probe(setup: str, env: dict) -> dict:
+    """Run `setup` in a fresh interpreter and report what it loaded."""
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(setup=setup, modules=MODULES)],
+        cwd=BACKEND,
+        env={"PATH": os.environ["PATH"], **env},
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def test_importing_main_reads_no_settings():
+    # No database settings at all: Settings() would fail validation.
+    loaded = probe(
+        "import app.main\n"
+        "from app.core.config import get_settings\n"
+        "assert get_settings.cache_info().currsize == 0",
+        env={},
+    )
+    assert loaded == {"modules": [], "engine": False}
+
+
+def test_create_app_loads_only_the_configured_mode():
+    env = {
+        key: os.environ[key]
+        for key in (
+            "POSTGRES_SERVER",
+            "POSTGRES_USER",
+            "POSTGRES_PASSWORD",
+            "POSTGRES_DB",
+            "DATABASE_URL",
+            "SECRET_KEY",
+            "STORAGE_DIR",
+        )
+    }
+    loaded = probe(
+        "from app.main import create_app\ncreate_app()",
+        env={**env, "DB_ASYNC_MODE": "false", "LOG_LEVEL": "WARNING"},
+    )
+    # Tokens and password hashing are loaded by the first request that
+    # needs them; the engine by the lifespan.
+    assert loaded == {
+        "modules": ["app.api.v1.api", "app.api.v1.endpoints.users"],
+        "engine": False,
+    }
+
+
+def test_warm_up_runs_every_step(engine, monkeypatch):
+    ran = []
+    for step in ("_database", "_hashing", "_tokens"):
+        monkeypatch.setattr(warmup, step, lambda step=step: ran.append(step))
+    timings = asyncio.run(warmup.warm_up())
+    assert sorted(timings) == ["database", "hashing", "tokens"]
+    assert sorted(ran) == ["_database", "_hashing", "_tokens"]
+
+
+def test_the_real_steps_succeed(engine, caplog):
+    with caplog.at_level(logging.WARNING, logger=warmup.__name__):
+        timings = asyncio.run(warmup.warm_up())
+    assert sorted(timings) == ["database", "hashing", "tokens"]
+    assert caplog.records == []
+
+
+def test_failed_and_slow_steps_do_not_block_start_up(engine, monkeypatch, caplog):
+    def fail():
+        raise RuntimeError("no database")
+
+    monkeypatch.setattr(warmup, "_database", fail)
+    monkeypatch.setattr(warmup, "_hashing", lambda: time.sleep(1))
+    monkeypatch.setattr(warmup, "_tokens", lambda: None)
+    monkeypatch.setattr(settings, "STARTUP_WARMUP_TIMEOUT_SECONDS", 0.2)
+    with caplog.at_level(logging.WARNING, logger=warmup.__name__):
+        timings = asyncio.run(warmup.warm_up())
+    assert sorted(timings) == ["database", "tokens"]
+    messages = [record.getMessage() for record in caplog.records]
+    assert "Warm-up step 'database' failed: RuntimeError('no database')" in messages
+    assert "Warm-up step 'hashing' timed out" in messages
+
+
+def test_lifespan_warms_up_when_enabled(app, engine, monkeypatch):
+    calls = []
+
+    async def fake_warm_up():
+        calls.append(True)
+        return {}
+
+    monkeypatch.setattr(settings, "STARTUP_WARMUP", True)
+    monkeypatch.setattr(warmup, "warm_up", fake_warm_up)
+    with TestClient(app):
+        assert calls == [True]
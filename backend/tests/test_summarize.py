@@ -0,0 +1,131 @@
+import asyncio
+
+from app.api.v1.endpoints import documents
+from app.services.ai_cache import AIResponseCache
+from app.services.ai_provider import FakeProvider, GenerationRequest, ProviderError
+from app.services.summarize import ChunkText, summarize_chunks
+
+
+class FailingProvider(FakeProvider):
+    async def generate(self, request: GenerationRequest):
+        raise ProviderError("upstream failed")
+
+
+class StuckProvider(FakeProvider):
+    """Never answers prompts about "stuck" passages."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.cancelled = 0
+
+    async def generate(self, request: GenerationRequest):
+        if "stuck" in request.prompt:
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+        return await super().generate(request)
+
+
+def chunks(count: int, changed: int = -1) -> list:
+    return [
+        ChunkText(i, i + 1, i + 1, f"passage {i}{' (revised)' if i == changed else ''}")
+        for i in range(count)
+    ]
+
+
+def collect(source, cache: AIResponseCache, provider: FakeProvider) -> list:
+    async def run():
+        return [
+            event
+            async for event in summarize_chunks(
+                source, model="m", cache=cache, provider=provider
+            )
+        ]
+
+    return asyncio.run(run())
+
+
+def test_map_then_reduce_eight_at_a_time(engine):
+    provider = FakeProvider()
+    events = collect(
+        chunks(20), AIResponseCache(max_entries=100, persistent=False), provider
+    )
+    kinds = [event.event for event in events]
+    assert kinds == ["chunk"] * 20 + ["reduce", "reduce", "summary"]
+    assert [event.data["groups"] for event in events[20:22]] == [3, 1]
+    assert sorted(event.data["ordinal"] for event in events[:20]) == list(range(20))
+    assert events[19].data["completed"] == events[19].data["total"] == 20
+    summary = events[-1].data
+    assert (summary["chunks"], summary["reduce_levels"]) == (20, 2)
+    assert summary["summary"].startswith("[summarize_reduce")
+    assert provider.calls == 20 + 3 + 1
+
+
+def test_a_revised_version_reuses_unchanged_work(engine):
+    cache = AIResponseCache(max_entries=100, persistent=False)
+    collect(chunks(20), cache, FakeProvider())
+    provider = FakeProvider()
+    events = collect(chunks(20, changed=19), cache, provider)
+    assert [event.data["cached"] for event in events if event.event == "chunk"] == [
+        True
+    ] * 19 + [False]
+    assert [event.data["cached"] for event in events if event.event == "reduce"] == [
+        2,
+        0,
+    ]
+    assert events[-1].data["cached_chunks"] == 19
+    assert provider.calls == 1 + 1 + 1  # the chunk, its group, the root
+
+
+def test_single_chunk_needs_no_reduce(engine):
+    events = collect(
+        chunks(1), AIResponseCache(max_entries=100, persistent=False), FakeProvider()
+    )
+    assert [event.event for event in events] == ["chunk", "summary"]
+    assert events[-1].data["summary"] == events[0].data["summary"]
+
+
+def test_closing_the_stream_cancels_outstanding_calls(engine):
+    async def run():
+        cache = AIResponseCache(max_entries=100, persistent=False)
+        provider = StuckProvider()
+        source = chunks(1) + [ChunkText(1, 2, 2, "stuck passage")]
+        events = summarize_chunks(source, model="m", cache=cache, provider=provider)
+        first = await events.__anext__()
+        await events.aclose()
+        await asyncio.sleep(0.01)
+        return cache, provider, first
+
+    cache, provider, first = asyncio.run(run())
+    assert first.data["ordinal"] == 0
+    assert provider.cancelled == 1
+    assert cache.stats()["in_flight"] == 0
+
+
+def test_summary_stream(client, signup, add_document, summarize, monkeypatch):
+    headers = signup()
+    me = client.get("/api/v1/users/me", headers=headers).json()["id"]
+    document_id = add_document(me, "a" * 64, ["first passage", "second passage"])
+    events = summarize(document_id, headers)
+    assert [name for name, _ in events] == ["chunk", "chunk", "reduce", "summary"]
+
+    monkeypatch.setattr(documents, "get_ai_client", FailingProvider)
+    monkeypatch.setattr(
+        documents,
+        "get_ai_cache",
+        lambda: AIResponseCache(max_entries=100, persistent=False),
+    )
+    assert summarize(document_id, headers)[-1] == (
+        "error",
+        {"detail": "upstream failed"},
+    )
+
+
+def test_summary_waits_for_extraction(client, signup, add_document):
+    headers = signup()
+    me = client.get("/api/v1/users/me", headers=headers).json()["id"]
+    document_id = add_document(me, "a" * 64, [], status="running")
+    response = client.get(f"/api/v1/documents/{document_id}/summary", headers=headers)
+    assert response.status_code == 409
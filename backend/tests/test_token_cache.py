@@ -0,0 +1,106 @@
+from types import SimpleNamespace
+from typing import Optional
+
+from app.core import token_cache
+from app.core.config import settings
+from app.core.token_cache import TokenCache, UserSnapshot, get_token_cache
+from app.schemas.token import TokenPayload
+
+ME = f"{settings.API_V1_STR}/users/me"
+
+
+def user(user_id: int) -> UserSnapshot:
+    return UserSnapshot(
+        id=user_id,
+        email=f"u{user_id}@example.com",
+        full_name=None,
+        is_active=True,
+        is_superuser=False,
+        created_at=None,
+        updated_at=None,
+    )
+
+
+def payload(user_id: int, exp: Optional[int] = None) -> TokenPayload:
+    return TokenPayload(sub=f"u{user_id}@example.com", exp=exp)
+
+
+def fake_clock(monkeypatch, now: float) -> SimpleNamespace:
+    clock = SimpleNamespace(time=lambda: clock.now, now=now)
+    monkeypatch.setattr(token_cache, "time", clock)
+    return clock
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TokenCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", payload(1), user(1))
+    cache.put("b", payload(2), user(2))
+    assert cache.get("a") is not None  # "b" is now the oldest
+    cache.put("c", payload(3), user(3))
+    assert cache.get("b") is None
+    assert cache.get("a")[1] == user(1)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_at_the_ttl_or_the_token_exp(monkeypatch):
+    clock = fake_clock(monkeypatch, 1000.0)
+    cache = TokenCache(max_entries=10, ttl_seconds=60)
+    cache.put("long", payload(1, exp=5000), user(1))
+    cache.put("short", payload(2, exp=1010), user(2))
+    clock.now = 1010.0
+    assert cache.get("short") is None
+    assert cache.get("long") is not None
+    clock.now = 1060.0
+    assert cache.get("long") is None
+    assert cache.stats()["expirations"] == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_invalidate_user_drops_all_of_their_tokens():
+    cache = TokenCache(max_entries=10, ttl_seconds=60)
+    cache.put("laptop", payload(1), user(1))
+    cache.put("phone", payload(1), user(1))
+    cache.put("other", payload(2), user(2))
+    cache.invalidate_user(1)
+    assert cache.get("laptop") is None and cache.get("phone") is None
+    assert cache.get("other") is not None
+    assert cache.stats()["invalidations"] == 2
+
+
+def test_tokens_are_stored_by_digest_only():
+    cache = TokenCache(max_entries=10, ttl_seconds=60)
+    cache.put("secret-token", payload(1), user(1))
+    assert all(isinstance(key, bytes) for key in cache._entries)
+    assert b"secret-token" not in cache._entries
+
+
+def test_repeat_requests_are_answered_from_the_cache(client, signup):
+    headers = signup("a@example.com")
+    for _ in range(3):
+        assert client.get(ME, headers=headers).status_code == 200
+    stats = get_token_cache().stats()
+    assert stats["entries"] == 1
+    assert stats["hits"] == 2
+
+
+def test_updates_and_deletes_are_seen_at_once(client, signup):
+    headers = signup("a@example.com")
+    me = client.get(ME, headers=headers).json()
+    response = client.put(
+        f"{settings.API_V1_STR}/users/{me['id']}",
+        headers=headers,
+        json={"full_name": "Ada"},
+    )
+    assert response.status_code == 200
+    assert client.get(ME, headers=headers).json()["full_name"] == "Ada"
+
+    client.delete(f"{settings.API_V1_STR}/users/{me['id']}", headers=headers)
+    assert client.get(ME, headers=headers).status_code == 404
+
+
+def test_disabled_cache_stores_nothing(client, signup, monkeypatch):
+    monkeypatch.setattr(settings, "TOKEN_CACHE_ENABLED", False)
+    headers = signup("a@example.com")
+    assert client.get(ME, headers=headers).status_code == 200
+    assert client.get(ME, headers=headers).status_code == 200
+    assert get_token_cache().stats()["entries"] == 0
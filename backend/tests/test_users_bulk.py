@@ -0,0 +1,172 @@
+import csv
+import io
+import json
+
+from app.api.v1.endpoints import users_bulk
+from app.core.config import settings
+from app.crud import crud_user
+
+USERS = f"{settings.API_V1_STR}/users"
+
+
+def ndjson(*records) -> str:
+    return "\n".join(
+        record if isinstance(record, str) else json.dumps(record) for record in records
+    )
+
+
+def new_user(email: str) -> dict:
+    return {"email": email, "password": "password123"}
+
+
+def test_import_reports_every_row(client, signup, login, monkeypatch):
+    # Small batches, so duplicates are found across batch boundaries too.
+    monkeypatch.setattr(users_bulk, "IMPORT_BATCH_SIZE", 2)
+    admin = signup("admin@example.com", superuser=True)
+    body = ndjson(
+        new_user("n1@example.com"),
+        "not json",
+        new_user("n1@example.com"),
+        new_user("admin@example.com"),
+        {"email": "bad", "password": "x"},
+        "",
+        new_user("n2@example.com"),
+        new_user("n3@example.com"),
+    )
+    response = client.post(f"{USERS}/import", headers=admin, content=body)
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert (report["created"], report["duplicates"], report["invalid"]) == (3, 2, 2)
+    rows = {row["line"]: row for row in report["rows"]}
+    assert [rows[line]["status"] for line in range(1, 8)] == [
+        "created",
+        "invalid",
+        "duplicate",
+        "duplicate",
+        "invalid",
+        "created",
+        "created",
+    ]
+    assert rows[2]["error"].startswith("Invalid JSON")
+    assert rows[3]["error"] == "Email appears earlier in the file"
+    assert "already exists" in rows[4]["error"]
+    assert "email" in rows[5]["error"]
+    # Imported users can log in with their password.
+    login("n3@example.com")
+
+
+def test_importing_the_same_file_twice_creates_nothing(client, signup):
+    admin = signup("admin@example.com", superuser=True)
+    body = ndjson(*(new_user(f"m{i}@example.com") for i in range(5)))
+    assert (
+        client.post(f"{USERS}/import", headers=admin, content=body).json()["created"]
+        == 5
+    )
+    report = client.post(f"{USERS}/import", headers=admin, content=body).json()
+    assert (report["created"], report["duplicates"]) == (0, 5)
+
+
+def test_csv_import(client, signup, db):
+    admin = signup("admin@example.com", superuser=True)
+    body = (
+        "email,password,full_name,is_superuser\n"
+        "c1@example.com,password123,C One,false\n"
+        "c2@example.com,password123,,\n"
+    )
+    response = client.post(
+        f"{USERS}/import", headers=admin, params={"format": "csv"}, content=body
+    )
+    assert response.json()["created"] == 2
+    user = crud_user.get_user_by_email(db, email="c2@example.com")
+    assert user.full_name is None and not user.is_superuser
+
+
+def test_bulk_insert_skips_rows_that_already_exist(db, engine):
+    rows = [
+        {"email": email, "hashed_password": "x", "is_active": True}
+        for email in ("a@example.com", "b@example.com")
+    ]
+    first = crud_user.bulk_insert_users(db, rows[:1])
+    db.commit()
+    # As if a@example.com raced in after the existing-emails check.
+    inserted = crud_user.bulk_insert_users(db, rows)
+    db.commit()
+    assert list(first) == ["a@example.com"]
+    assert list(inserted) == ["b@example.com"]
+
+
+def test_import_is_for_superusers_only(client, signup):
+    headers = signup()
+    body = ndjson(new_user("n1@example.com"))
+    response = client.post(f"{USERS}/import", headers=headers, content=body)
+    assert response.status_code == 403
+    assert client.post(f"{USERS}/import", content=body).status_code == 401
+
+
+def test_non_utf8_import_is_a_400(client, signup):
+    admin = signup("admin@example.com", superuser=True)
+    body = ndjson(new_user("n1@example.com")).encode().replace(b"n1", b"\xe9")
+    response = client.post(f"{USERS}/import", headers=admin, content=body)
+    assert response.status_code == 400
+    assert "UTF-8" in response.json()["detail"]
+
+
+def test_oversized_import_is_a_413(client, signup, monkeypatch):
+    monkeypatch.setattr(settings, "USER_IMPORT_MAX_BYTES", 1000)
+    admin = signup("admin@example.com", superuser=True)
+    body = ndjson(*(new_user(f"n{i}@example.com") for i in range(50))).encode()
+    # Rejected from Content-Length...
+    response = client.post(f"{USERS}/import", headers=admin, content=body)
+    assert response.status_code == 413
+    # ...and while reading a body sent without one.
+    chunks = [body[i : i + 100] for i in range(0, len(body), 100)]
+    response = client.post(f"{USERS}/import", headers=admin, content=iter(chunks))
+    assert response.status_code == 413
+    assert len(client.get(f"{USERS}/", headers=admin).json()) == 1
+
+
+def test_export_streams_every_user_across_batches(client, signup, monkeypatch):
+    monkeypatch.setattr(users_bulk, "EXPORT_BATCH_SIZE", 2)
+    admin = signup("admin@example.com", superuser=True)
+    for i in range(4):
+        signup(f"e{i}@example.com")
+    response = client.get(f"{USERS}/export", headers=admin)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["email"] for row in rows] == ["admin@example.com"] + [
+        f"e{i}@example.com" for i in range(4)
+    ]
+    assert all(list(row) == users_bulk.EXPORT_FIELDS for row in rows)
+    assert "hashed_password" not in users_bulk.EXPORT_FIELDS
+
+
+def test_csv_export(client, signup, monkeypatch):
+    monkeypatch.setattr(users_bulk, "EXPORT_BATCH_SIZE", 2)
+    admin = signup("admin@example.com", superuser=True)
+    for i in range(2):
+        signup(f"e{i}@example.com")
+    response = client.get(f"{USERS}/export", headers=admin, params={"format": "csv"})
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"].endswith('filename="users.csv"')
+    reader = csv.DictReader(io.StringIO(response.text))
+    assert reader.fieldnames == users_bulk.EXPORT_FIELDS
+    rows = list(reader)
+    assert [row["email"] for row in rows] == [
+        "admin@example.com",
+        "e0@example.com",
+        "e1@example.com",
+    ]
+    assert rows[0]["is_superuser"] == "True"
+
+
+def test_export_is_for_superusers_only(client, signup):
+    headers = signup()
+    assert client.get(f"{USERS}/export", headers=headers).status_code == 403
+    assert client.get(f"{USERS}/export").status_code == 401
+
+
+def test_unknown_export_format_is_a_422(client, signup):
+    admin = signup("admin@example.com", superuser=True)
+    response = client.get(f"{USERS}/export", headers=admin, params={"format": "xml"})
+    assert response.status_code == 422
@@ -0,0 +1,134 @@
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.services.extraction import Chunk
+from app.services.vector_index import MIN_POINTS_PER_LIST, VectorIndex, normalize
+from app.worker import index_chunks
+
+DIM = 16
+
+
+def vectors(n: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((n, DIM)).astype(np.float32)
+
+
+def exact_top(data: np.ndarray, query: np.ndarray, k: int, ids) -> list:
+    scores = normalize(data) @ normalize(query[None])[0]
+    return [ids[i] for i in np.argsort(-scores)[:k]]
+
+
+@pytest.fixture()
+def index(tmp_path) -> VectorIndex:
+    return VectorIndex(str(tmp_path / "vectors"), DIM)
+
+
+def test_search_returns_the_exact_top_k(index):
+    data = vectors(500)
+    ids = list(range(1000, 1500))
+    index.add(ids, [i % 5 for i in range(500)], data)
+    query = vectors(1, seed=1)
+    (hits,) = index.search(query, 10)
+    assert [chunk_id for chunk_id, _ in hits] == exact_top(data, query[0], 10, ids)
+    scores = [score for _, score in hits]
+    assert scores == sorted(scores, reverse=True)
+    assert scores[0] <= 1.0 + 1e-6
+
+    # A stored vector is its own best match.
+    (hits,) = index.search(data[42:43], 1)
+    assert hits[0][0] == 1042 and hits[0][1] == pytest.approx(1.0, abs=1e-5)
+
+
+def test_groups_restrict_the_results(index):
+    data = vectors(100)
+    index.add(list(range(100)), [i % 4 for i in range(100)], data)
+    (hits,) = index.search(vectors(1, seed=2), 100, groups=[1, 3])
+    assert len(hits) == 50
+    assert {chunk_id % 4 for chunk_id, _ in hits} == {1, 3}
+    (hits,) = index.search(vectors(1, seed=2), 5, groups=[99])
+    assert hits == []
+
+
+def test_deleted_rows_are_skipped_and_compacted_away(index):
+    data = vectors(40)
+    index.add(list(range(40)), [i // 10 for i in range(40)], data)
+    assert index.delete_groups([0, 1]) == 20
+    index.replace_group(2, [100, 101], data[:2])
+    (hits,) = index.search(vectors(1, seed=3), 40)
+    assert sorted(chunk_id for chunk_id, _ in hits) == list(range(30, 40)) + [100, 101]
+
+    stats = index.stats()
+    assert (stats["rows"], stats["deleted"]) == (42, 30)
+    assert index.needs_compaction()
+    assert index.compact()
+    assert not index.compact()  # nothing left to do
+    stats = index.stats()
+    assert (stats["rows"], stats["deleted"], stats["generation"]) == (12, 0, 1)
+    (after,) = index.search(vectors(1, seed=3), 40)
+    assert [chunk_id for chunk_id, _ in after] == [chunk_id for chunk_id, _ in hits]
+    assert [score for _, score in after] == pytest.approx([score for _, score in hits])
+    assert sorted(p.name for p in index.directory.glob("vectors-*")) == [
+        "vectors-1.f32"
+    ]
+
+
+def test_ivf_search_matches_exact_search_when_probing_every_list(tmp_path):
+    index = VectorIndex(str(tmp_path / "vectors"), DIM, ivf_lists=4, nprobe=1)
+    n = 4 * MIN_POINTS_PER_LIST * 2
+    data = vectors(n)
+    ids = list(range(n))
+    index.add(ids, [0] * n, data)
+    assert index.needs_compaction()
+    index.compact()
+    assert index.stats()["ivf_lists"] == 4
+    query = vectors(1, seed=4)
+    (hits,) = index.search(query, 10, nprobe=4)
+    assert [chunk_id for chunk_id, _ in hits] == exact_top(data, query[0], 10, ids)
+    # With one list probed only that list's rows are scored.
+    (hits,) = index.search(query, 10)
+    assert 0 < len(hits) <= 10
+
+
+def test_other_instances_see_published_writes(index):
+    reader = VectorIndex(str(index.directory), DIM)
+    assert reader.search(vectors(1), 5) == [[]]
+    index.add([1, 2], [0, 0], vectors(2))
+    (hits,) = reader.search(vectors(1), 5)
+    assert sorted(chunk_id for chunk_id, _ in hits) == [1, 2]
+
+
+def test_dimension_mismatch_is_refused(index):
+    with pytest.raises(ValueError):
+        VectorIndex(str(index.directory), DIM * 2)
+    with pytest.raises(ValueError):
+        index.add([1, 2], [0], vectors(2))
+
+
+def test_semantic_search_covers_only_the_users_documents(client, signup, add_document):
+    headers, other = signup("a@example.com"), signup("b@example.com")
+    me = client.get(f"{settings.API_V1_STR}/users/me", headers=headers).json()["id"]
+    them = client.get(f"{settings.API_V1_STR}/users/me", headers=other).json()["id"]
+    texts = ["graph neural networks for molecules", "protein folding with attention"]
+    add_document(me, "a" * 64, texts)
+    add_document(them, "b" * 64, ["graph neural networks for molecules"])
+    for sha, chunk_ids, chunk_texts in (
+        ("a" * 64, [1, 2], texts),
+        ("b" * 64, [3], texts[:1]),
+    ):
+        index_chunks(
+            sha,
+            chunk_ids,
+            [Chunk(i, i + 1, i + 1, text) for i, text in enumerate(chunk_texts)],
+        )
+
+    response = client.get(
+        f"{settings.API_V1_STR}/search/",
+        headers=headers,
+        params={"q": "protein folding", "mode": "semantic", "k": 5},
+    )
+    assert response.status_code == 200, response.text
+    hits = response.json()["hits"]
+    assert [hit["chunk_id"] for hit in hits][0] == 2
+    assert {hit["chunk_id"] for hit in hits} <= {1, 2}
+    assert hits[0]["semantic_score"] == hits[0]["score"]
+    assert hits[0]["keyword_score"] is None